@@ -67,6 +67,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',                 # Funcionalidades comunes (ETags, etc.)
     'django.middleware.csrf.CsrfViewMiddleware',                 # Protección CSRF
     'django.contrib.auth.middleware.AuthenticationMiddleware',   # Autenticación de usuarios
+    'prueba.usuario_actual.UsuarioActualMiddleware',              # Usuario de la sesión en request.usuario_actual (con caché)
     'django.contrib.messages.middleware.MessageMiddleware',      # Manejo de mensajes
     'django.middleware.clickjacking.XFrameOptionsMiddleware',    # Protección contra clickjacking
 ]
@@ -173,3 +174,171 @@ MEDIA_ROOT = BASE_DIR / 'media'                         # Directorio físico don
 # Tipo de campo usado automáticamente para claves primarias en modelos
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'   # Usa AutoField de 64 bits (BigAutoField)
+
+
+# CONFIGURACIÓN DE CARGA MASIVA (CSV)
+# ====================================
+# Cantidad de calificaciones que se insertan en MongoDB en cada insert_many
+# Lotes más grandes = menos viajes a la base de datos, pero más memoria por lote
+CARGA_MASIVA_TAMANO_LOTE = 1000
+
+# Filas que se leen del CSV en cada bloque (pd.read_csv con chunksize)
+# La memoria usada depende de este valor y no del tamaño total del archivo
+CARGA_MASIVA_FILAS_POR_BLOQUE = 20000
+
+# Archivos más grandes que este tamaño (en bytes) se procesan en modo streaming:
+# la previsualización devuelve solo una muestra y al grabar se reenvía el archivo en lugar de los datos
+CARGA_MASIVA_UMBRAL_STREAMING = 1024 * 1024  # 1 MB (el JSON de las filas pesa varias veces más que el CSV y Django limita el body a 2.5 MB)
+
+# Filas que se muestran en la previsualización cuando el archivo está en modo streaming
+CARGA_MASIVA_FILAS_MUESTRA = 200
+
+# Carpeta donde la previsualización deja los bloques ya validados (staging) hasta que se graben
+# Al grabar, el navegador solo envía el token de la carga preparada
+# IMPORTANTE: Debe quedar FUERA de MEDIA_ROOT: los bloques son datos de negocio (pickle) y /media/ se sirve sin autenticación
+CARGA_MASIVA_DIRECTORIO_STAGING = BASE_DIR / 'cargas_staging'
+
+# Cargas preparadas con más filas que este número se graban en segundo plano (trabajos.py)
+# La solicitud responde de inmediato y el navegador consulta el avance en estado_carga_view
+CARGA_MASIVA_UMBRAL_SEGUNDO_PLANO = 5000
+
+# Cantidad de cargas en segundo plano que se graban a la vez (hilos del pool de trabajadores)
+CARGA_MASIVA_TRABAJADORES = 2
+
+# Segundos sin avance después de los cuales un trabajo 'pendiente' o 'procesando' se considera interrumpido
+# (ej: el proceso se reinició a mitad de la carga): se marca como 'error', se eliminan las filas que alcanzó
+# a insertar y el archivo se puede volver a cargar. Un trabajo en proceso avanza con cada bloque grabado;
+# uno pendiente cuenta desde que se encoló (debe cubrir la espera en la cola detrás de otras cargas)
+CARGA_MASIVA_TRABAJO_SIN_AVANCE = 60 * 60  # 1 hora
+
+# Perfiles de columnas por corredora: nombres de columna propios de cada corredora para los campos del sistema
+# Se agregan a los nombres estándar (Ejercicio, Mercado, F8 MONT, ...); ver prueba/encabezados.py
+# Si la carga no indica un perfil, se usa el que coincide con más columnas del archivo
+# Ejemplo:
+#   'corredora_ejemplo': {
+#       'Ejercicio': ('AÑO', 'Periodo'),
+#       'Instrumento': ('NEMOTECNICO',),
+#       'Monto08': ('MONTO_08',),
+#   },
+CARGA_MASIVA_PERFILES_COLUMNAS = {}
+
+# ====================================
+# BÚSQUEDA DE CALIFICACIONES (paginación)
+# ====================================
+# Calificaciones que devuelve buscar_calificaciones_view por página cuando el navegador no indica 'limit'
+# La tabla pide la página siguiente (con el cursor) solo cuando el usuario hace clic en "Cargar más"
+CALIFICACIONES_POR_PAGINA = 100
+
+# Máximo de calificaciones por página que acepta buscar_calificaciones_view (un 'limit' mayor se recorta)
+CALIFICACIONES_LIMITE_MAXIMO = 1000
+
+# Calificaciones que exportar_calificaciones_view lee del cursor y escribe en cada bloque del archivo
+# (en Parquet, cada bloque es un grupo de filas). El archivo se envía por streaming:
+# la memoria usada depende de este valor y no del total exportado
+EXPORTACION_FILAS_POR_BLOQUE = 1000
+
+# Máximo de IDs en cada consulta $in cuando se exporta una selección de calificaciones
+# Una selección de 20.000 filas se lee en 20 consultas de 1.000 IDs en lugar de una sola consulta gigante
+EXPORTACION_IDS_POR_CONSULTA = 1000
+
+# ====================================
+# HISTORIAL DE LOGS (ver_logs_view)
+# ====================================
+# Logs que se muestran por página; la página siguiente se pide con el cursor (fecharegistrada, _id)
+LOGS_POR_PAGINA = 50
+
+# Escritura de los logs de auditoría (prueba/auditoria.py):
+#   'asincrona': se encolan en memoria y un hilo los graba por lotes (insert_many)
+#   'sincrona': cada log se graba en el momento con save() (pruebas, scripts)
+LOGS_ESCRITURA = 'asincrona'
+
+# La cola se graba al juntar esta cantidad de logs...
+LOGS_TAMANO_LOTE = 100
+
+# ...o cuando pasan estos segundos desde el último vaciado (lo que ocurra primero)
+LOGS_INTERVALO_VACIADO = 1.0
+
+# ====================================
+# RESPUESTAS JSON (prueba/respuestas.py)
+# ====================================
+# Codificador de las respuestas JSON de las vistas AJAX:
+#   'auto'   -> orjson si está instalado (mucho más rápido), si no el json de la librería estándar
+#   'orjson' -> exige orjson (error de configuración si no está instalado)
+#   'stdlib' -> siempre el json de la librería estándar
+#   'paquete.modulo.funcion' -> codificador propio (recibe el dato y devuelve bytes)
+RESPUESTAS_JSON_CODIFICADOR = 'auto'
+
+# ====================================
+# USUARIO ACTUAL (prueba/usuario_actual.py)
+# ====================================
+# Segundos que el usuario de la sesión queda en la caché del proceso (0 = sin caché, se lee MongoDB en cada solicitud)
+# Los cambios hechos desde otro proceso del servidor se ven, a lo más, después de este tiempo
+USUARIO_ACTUAL_CACHE_SEGUNDOS = 30
+
+# Máximo de usuarios en la caché; al superarlo se descarta el usado hace más tiempo
+USUARIO_ACTUAL_CACHE_MAXIMO = 1000
+
+# ====================================
+# CONTRASEÑAS (prueba/contrasenas.py)
+# ====================================
+# Costo de bcrypt para los hashes nuevos (cada +1 duplica el tiempo de cálculo)
+# Usar "python manage.py calibrar_bcrypt" para elegirlo según el servidor
+# Al cambiarlo, los hashes existentes se actualizan cuando cada usuario inicia sesión
+CONTRASENAS_COSTO_BCRYPT = 12
+
+# Cálculos de bcrypt simultáneos por proceso (el resto de la CPU queda para las demás solicitudes)
+CONTRASENAS_HILOS = 2
+
+# Cálculos que pueden esperar un hilo libre; con más pendientes se responde 503 (servidor ocupado)
+CONTRASENAS_MAXIMO_EN_ESPERA = 20
+
+# Segundos máximos que una solicitud espera su cálculo de bcrypt antes de responder 503
+CONTRASENAS_ESPERA_MAXIMA = 10
+
+# ====================================
+# LÍMITE DE INTENTOS DE LOGIN (prueba/limite_login.py)
+# ====================================
+# Activa el límite de intentos (token bucket) en login_view
+LOGIN_LIMITE_ACTIVO = True
+
+# Dónde se guardan las cubetas:
+#   'local' -> memoria del proceso (cada proceso del servidor cuenta por separado)
+#   'cache' -> caché de Django LOGIN_LIMITE_CACHE (compartida si es Redis o Memcached)
+LOGIN_LIMITE_BACKEND = 'local'
+LOGIN_LIMITE_CACHE = 'default'
+
+# (capacidad, fichas recuperadas por minuto)
+# Por IP: ráfaga de hasta 20 intentos, luego 10 por minuto
+LOGIN_LIMITE_IP = (20, 10)
+# Por cuenta (correo): ráfaga de hasta 5 intentos, luego 2 por minuto
+LOGIN_LIMITE_CUENTA = (5, 2)
+
+# Usar la IP de X-Forwarded-For (solo si el servidor está detrás de un proxy propio que lo reemplaza)
+LOGIN_LIMITE_CONFIAR_EN_PROXY = False
+
+# ====================================
+# SESIONES (prueba/sesiones.py)
+# ====================================
+# Motor de sesiones:
+#   'prueba.sesiones'                        -> colección 'sesiones' de MongoDB con índice TTL (recomendado)
+#   'django.contrib.sessions.backends.db'    -> tabla django_session de db.sqlite3 (motor anterior; las
+#                                               escrituras de todos los procesos se bloquean entre sí)
+# Al cambiar de motor las sesiones abiertas se pierden (los usuarios vuelven a iniciar sesión una vez)
+SESSION_ENGINE = 'prueba.sesiones'
+
+# Caché delante de MongoDB con escritura directa (write-through), o None para leer siempre MongoDB
+# Debe ser un alias de CACHES compartido por todos los procesos del servidor ('sesiones' usa archivos
+# en el mismo servidor; Redis o Memcached si hay varios servidores). LocMemCache solo sirve con un
+# único proceso: con varios, un proceso podría seguir viendo una sesión que otro ya cerró
+SESIONES_CACHE = None
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',  # Caché en memoria del proceso (la de Django por defecto)
+    },
+    'sesiones': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',  # Caché en archivos, compartida por los procesos del servidor
+        'LOCATION': BASE_DIR / 'cache_sesiones',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
@@ -0,0 +1,173 @@
+"""
+AUDITORIA.PY - Escritura de logs de auditoría por lotes
+========================================================
+Este archivo contiene el buffer en memoria donde _crear_log deja los registros
+de auditoría y el hilo que los graba en MongoDB por lotes.
+
+POR QUÉ EXISTE ESTE ARCHIVO:
+- _crear_log hacía Log.save() en cada acción: cada solicitud que modificaba algo
+  esperaba un viaje extra a MongoDB solo para el log (y uno por cada usuario en
+  eliminar_usuarios_view)
+- Ahora el log queda en una cola del proceso y la solicitud sigue de inmediato;
+  un hilo en segundo plano graba la cola con un solo insert_many
+
+CÓMO FUNCIONA:
+1. registrar_log valida el Log, le asigna su _id y lo agrega a la cola (no toca MongoDB)
+2. La cola se graba cuando junta LOGS_TAMANO_LOTE registros o cuando pasan
+   LOGS_INTERVALO_VACIADO segundos desde el último vaciado (lo que ocurra primero)
+3. Al terminar el proceso (atexit) se graba lo que quede en la cola
+4. Las vistas que leen logs llaman a vaciar_logs() antes de consultar, así un
+   administrador ve de inmediato las acciones recién hechas en el mismo proceso
+5. Con LOGS_ESCRITURA = 'sincrona' cada log se graba en el momento (pruebas, scripts)
+6. Si un insert_many falla a medias, solo se reintentan los logs que no se grabaron: como
+   cada log ya tiene su _id, un log que sí se grabó da "clave duplicada" al reintentar
+   y se descarta (el registro de auditoría no queda con entradas repetidas)
+
+Funciones definidas:
+- registrar_log: Agrega un Log a la cola (o lo graba, en modo sincrónico)
+- vaciar_logs: Graba en MongoDB todos los logs pendientes
+"""
+
+# IMPORTACIONES
+# ======================================
+import atexit  # Para grabar los logs pendientes al terminar el proceso
+import threading  # Hilo de vaciado y candados de la cola
+from bson import ObjectId  # _id asignado al encolar (el mismo en cada reintento)
+from django.conf import settings  # Para leer LOGS_ESCRITURA, LOGS_TAMANO_LOTE y LOGS_INTERVALO_VACIADO
+from pymongo.errors import BulkWriteError  # Error de insert_many con el detalle de cada log rechazado
+from .models import Log
+
+
+# Máximo de logs que se conservan en la cola si MongoDB no responde
+# POR QUÉ: Si la base de datos está caída la cola no puede crecer sin límite;
+# pasado este número se descartan los más antiguos (con advertencia en la consola)
+MAXIMO_PENDIENTES = 100000
+
+# Código de error de MongoDB para una clave duplicada (el log ya estaba grabado)
+CODIGO_CLAVE_DUPLICADA = 11000
+
+
+class _ColaDeLogs:
+    """
+    Cola de logs pendientes con su hilo de vaciado.
+
+    Hay una sola por proceso (_cola); el hilo se crea la primera vez que se registra un log.
+    """
+
+    def __init__(self):
+        self._pendientes = []
+        self._condicion = threading.Condition()  # Protege _pendientes y despierta al hilo
+        self._candado_vaciado = threading.Lock()  # Un solo insert_many a la vez (hilo, atexit o vista)
+        self._hilo = None
+
+    def agregar(self, log):
+        """Agrega un log a la cola y despierta al hilo si ya se juntó un lote."""
+        with self._condicion:
+            self._pendientes.append(log)
+            if self._hilo is None:
+                self._hilo = threading.Thread(target=self._vaciar_periodicamente, name='logs_auditoria', daemon=True)
+                self._hilo.start()
+            if len(self._pendientes) >= getattr(settings, 'LOGS_TAMANO_LOTE', 100):
+                self._condicion.notify()
+
+    def vaciar(self):
+        """
+        Graba todos los logs pendientes con un insert_many.
+
+        Si la escritura falla, vuelven al inicio de la cola solo los logs que no se grabaron:
+        - BulkWriteError: los de writeErrors, salvo los de clave duplicada (ya estaban grabados)
+        - Otro error (ej: se cortó la conexión a mitad del lote): no se sabe cuáles se grabaron,
+          vuelven todos; al reintentar, los ya grabados dan clave duplicada y se descartan
+
+        Returns (lo que devuelve la funcion):
+            int: Cantidad de logs grabados
+        """
+        with self._candado_vaciado:
+            with self._condicion:
+                lote, self._pendientes = self._pendientes, []
+            if not lote:
+                return 0
+
+            try:
+                # to_mongo(): el mismo documento que guardaría save() (con el _id asignado al encolar);
+                # ordered=False graba todos los que pueda aunque uno falle
+                Log._get_collection().insert_many([log.to_mongo() for log in lote], ordered=False)
+            except BulkWriteError as bwe:
+                errores = bwe.details.get('writeErrors', [])
+                fallidos = [lote[error['index']] for error in errores if error.get('code') != CODIGO_CLAVE_DUPLICADA]
+                grabados = len(lote) - len(fallidos)
+                if fallidos:
+                    self._reencolar(fallidos, bwe)
+                return grabados
+            except Exception as e:
+                self._reencolar(lote, e)
+                return 0
+            return len(lote)
+
+    def _reencolar(self, logs, error):
+        """Devuelve al inicio de la cola los logs que no se grabaron (respetando MAXIMO_PENDIENTES)."""
+        with self._condicion:
+            self._pendientes = logs + self._pendientes
+            descartados = len(self._pendientes) - MAXIMO_PENDIENTES
+            if descartados > 0:
+                self._pendientes = self._pendientes[descartados:]
+                print(f"[AUDITORIA] ¡¡ADVERTENCIA!! Cola llena, se descartaron {descartados} logs")
+        print(f"[AUDITORIA] ¡¡ADVERTENCIA!! Falló al grabar {len(logs)} logs (se reintentará): {error}")
+
+    def _vaciar_periodicamente(self):
+        """Hilo de vaciado: espera un lote completo o LOGS_INTERVALO_VACIADO segundos y graba la cola."""
+        while True:
+            with self._condicion:
+                self._condicion.wait(timeout=getattr(settings, 'LOGS_INTERVALO_VACIADO', 1.0))
+            try:
+                self.vaciar()
+            except Exception as e:
+                # El hilo no debe terminar nunca: si termina, los logs quedarían en memoria hasta el atexit
+                print(f"[AUDITORIA] Error en el hilo de vaciado: {e}")
+
+
+_cola = _ColaDeLogs()
+
+
+def registrar_log(log):
+    """
+    Registra un log de auditoría según LOGS_ESCRITURA.
+
+    - 'asincrona' (por defecto): lo agrega a la cola; se graba por lotes en segundo plano
+    - 'sincrona': lo graba en el momento con save() (pruebas y scripts)
+
+    El log se valida antes de encolarlo, así un log inválido falla aquí (en la vista
+    que lo creó) y no en el hilo de vaciado. También recibe su _id aquí: cada reintento
+    del insert_many envía el mismo _id, así un log no se puede grabar dos veces.
+
+    Argumentos:
+        log: Documento Log sin guardar
+
+    Returns (lo que devuelve la funcion):
+        bool: True si el log ya quedó grabado (modo sincrónico), False si quedó en la cola
+
+    Raises:
+        ValidationError: Si el log no es válido (ej: acción que no está en ACCION_CHOICES)
+    """
+    if getattr(settings, 'LOGS_ESCRITURA', 'asincrona') == 'sincrona':
+        log.save()
+        return True
+    log.validate()
+    if log.id is None:
+        log.id = ObjectId()
+    _cola.agregar(log)
+    return False
+
+
+def vaciar_logs():
+    """
+    Graba en MongoDB todos los logs pendientes de este proceso.
+
+    Returns (lo que devuelve la funcion):
+        int: Cantidad de logs grabados
+    """
+    return _cola.vaciar()
+
+
+# Al terminar el proceso (reinicio del servidor, fin de un comando) se graba lo pendiente
+atexit.register(vaciar_logs)
@@ -0,0 +1,721 @@
+"""
+CARGA_MASIVA.PY - Procesamiento vectorizado de archivos CSV para la carga masiva
+=================================================================================
+Este archivo contiene las funciones que limpian, validan y normalizan los datos
+de un CSV de calificaciones trabajando por COLUMNAS (todo el DataFrame a la vez)
+en lugar de recorrer fila por fila con df.iterrows().
+
+POR QUÉ EXISTE ESTE ARCHIVO:
+- df.iterrows() crea un objeto Series por cada fila y luego se llamaba a
+  pd.to_numeric() una vez por celda (30 factores por fila), lo que hacía que un
+  archivo de 50.000 filas tardara minutos en cargarse
+- Pandas y NumPy pueden convertir, recortar y normalizar una columna completa en
+  una sola operación, dejando el trabajo en Python por fila casi en cero
+- Las vistas de preview y carga (factor y monto) comparten la misma lógica, así
+  que los mensajes de error son idénticos a los que generaba el código anterior
+
+Funciones definidas:
+- limpiar_dataframe: Convierte todas las celdas a texto limpio ('' para vacíos)
+- normalizar_calificaciones: Valida y normaliza Ejercicio, Mercado, Instrumento, Descripcion,
+  FEC_PAGO y SEC_EVE para todo el archivo
+- columnas_factores: Convierte y recorta (0..1) las columnas F8 a F37
+- columnas_montos: Convierte las columnas F8 MONT a F37 MONT
+- calcular_factores_desde_montos: Calcula SumaBase y los factores desde los montos
+- guardar_calificaciones: Inserta las calificaciones en MongoDB por lotes (insert_many)
+- registros_factor / registros_monto: Preparan los documentos de un bloque de filas
+- analizar_archivo: Calcula el hash SHA-256 y detecta el encoding leyendo el archivo por partes
+- leer_csv_por_bloques: Lee el CSV de a bloques de filas (memoria acotada)
+- previsualizar_bloques: Valida el archivo completo por bloques y junta una muestra para la tabla
+- crear_carga_preparada / leer_carga_preparada / descartar_carga_preparada: Staging en el servidor
+  de los bloques ya validados, para que al grabar solo se envíe un token
+- ordenar_errores: Devuelve los errores en el orden de las filas del archivo
+"""
+
+# IMPORTACIONES
+# ======================================
+import codecs  # Para validar UTF-8 de forma incremental (sin cargar todo el archivo)
+import datetime  # Para la fecha de actualización de cada calificación
+import hashlib  # Para calcular el hash SHA-256 del archivo
+import io  # Para leer el archivo subido como texto con el encoding detectado
+import os  # Para las rutas de la carpeta de staging
+import pickle  # Para guardar en disco los bloques preparados (DataFrames)
+import shutil  # Para eliminar la carpeta de una carga preparada
+import uuid  # Para generar el token de cada carga preparada
+import numpy as np  # Para operaciones vectorizadas sobre columnas completas
+import pandas as pd  # Para manejar el CSV como DataFrame
+from django.conf import settings  # Para leer CARGA_MASIVA_TAMANO_LOTE
+from pymongo.errors import BulkWriteError  # Error de insert_many con el detalle de cada documento rechazado
+from .models import Calificacion, CargaPreparada, TrabajoCarga, VIGENCIA_CARGA_PREPARADA  # Modelos de calificaciones, staging y trabajos
+from .encabezados import RANGO_FACTORES, resolver_encabezados, renombrar_a_estandar  # Columnas del archivo -> campos canónicos
+from .motor_factores import calcular_factores, calcular_sumas_base, factores_flotantes  # Cálculo de factores con enteros
+
+
+# =====================================================================
+# CONSTANTES
+# =====================================================================
+
+# Los nombres de columna aceptados para cada campo (y los perfiles por corredora) están en encabezados.py
+
+# Valores del CSV (en minúsculas) y el Mercado válido al que se normalizan
+MAPA_MERCADOS = {
+    'acciones': 'acciones',
+    'accion': 'acciones',
+    'cfi': 'CFI',
+    'fondos mutuos': 'Fondos mutuos',
+    'fondosmutuos': 'Fondos mutuos',
+    'fondo mutuo': 'Fondos mutuos',
+}
+
+# Mismo formato que acepta int() de Python para un texto ya sin espacios (ej: "2024", "+2024", "2_024")
+PATRON_ENTERO = r'[+-]?\d+(?:_\d+)*'
+
+# Cualquier letra (equivale a str.isalpha() sobre un carácter)
+PATRON_LETRA = r'[^\W\d_]'
+
+
+# =====================================================================
+# FUNCIONES AUXILIARES
+# =====================================================================
+
+def _primera_con_valor(limpio, nombres):
+    """
+    Devuelve, para cada fila, el valor de la primera columna de `nombres` que no esté vacía.
+
+    Equivale a fila.get('Ejercicio') or fila.get('ejercicio') or '' pero para todas las filas a la vez.
+
+    Argumentos:
+        limpio: DataFrame devuelto por limpiar_dataframe()
+        nombres: Tupla con los nombres de columna a probar, en orden de prioridad
+                 (normalmente mapa[campo] de resolver_encabezados())
+
+    Returns (lo que devuelve la funcion):
+        Series: Texto de cada fila ('' si ninguna columna tiene valor)
+    """
+    resultado = pd.Series('', index=limpio.index, dtype=object)
+    # Se recorre al revés para que las primeras columnas sobrescriban a las últimas
+    for nombre in reversed(nombres):
+        if nombre in limpio.columns:
+            columna = limpio[nombre]
+            resultado = columna.where(columna != '', resultado)
+    return resultado
+
+
+def limpiar_dataframe(df):
+    """
+    Convierte todas las celdas del DataFrame a texto limpio.
+
+    CÓMO FUNCIONA:
+    - Las celdas NaN o "falsas" (0, '', False) quedan como ''
+    - El resto se convierte a str y se eliminan los espacios al inicio y final
+    - Es el mismo resultado que el antiguo bucle que armaba `fila_limpia` por cada fila
+
+    Argumentos:
+        df: DataFrame leído del CSV (o armado desde los datos de la previsualización)
+
+    Returns (lo que devuelve la funcion):
+        DataFrame: Mismo índice y columnas, con todos los valores como texto
+    """
+    # Si hay columnas repetidas se conserva la última (igual que row.to_dict())
+    df = df.loc[:, ~df.columns.duplicated(keep='last')]
+
+    columnas = {}
+    for nombre in df.columns:
+        serie = df[nombre]
+        vacios = serie.isna().to_numpy() | ~serie.astype(bool).to_numpy()
+        columnas[nombre] = serie.astype(str).str.strip().mask(vacios, '')
+    return pd.DataFrame(columnas, index=df.index, columns=df.columns)
+
+
+# =====================================================================
+# VALIDACIÓN Y NORMALIZACIÓN DE CALIFICACIONES
+# =====================================================================
+
+def normalizar_calificaciones(df, etiqueta='CARGA', perfil=None):
+    """
+    Valida y normaliza los campos base de todas las filas del CSV en una sola pasada por columnas.
+
+    CÓMO FUNCIONA:
+    1. Obtiene Ejercicio, Mercado e Instrumento (aceptando variaciones en el nombre de columna)
+    2. Normaliza Mercado a los valores válidos (acciones, CFI, Fondos mutuos)
+    3. Intercambia Ejercicio e Instrumento en las filas donde vienen cruzados
+    4. Genera los mismos mensajes de error que antes para filas sin Ejercicio/Mercado
+       o con un Ejercicio que no es número entero
+    5. Convierte FEC_PAGO a fecha y SEC_EVE a entero para toda la columna
+
+    Argumentos:
+        df: DataFrame original (las claves disponibles de los errores salen de sus columnas)
+        etiqueta: Prefijo para los mensajes de depuración (ej: 'CARGAR_FACTOR')
+        perfil: Perfil de columnas de la corredora (None = se detecta por los encabezados)
+
+    Returns (lo que devuelve la funcion):
+        tuple: (limpio, base, errores, mapa)
+            - limpio: DataFrame de texto devuelto por limpiar_dataframe()
+            - base: DataFrame con las filas válidas y las columnas Ejercicio, Mercado, Instrumento,
+              Descripcion, FechaPago, SecuenciaEvento, más '_orden' (posición) y '_fila' (número de fila del CSV)
+            - errores: Lista de tuplas (posición, mensaje) para usar con ordenar_errores()
+              (la posición es el índice de la fila, que sigue creciendo entre bloques del mismo archivo)
+            - mapa: Columnas del archivo para cada campo (resolver_encabezados()), para reutilizarlo
+    """
+    limpio = limpiar_dataframe(df)
+    claves_disponibles = ', '.join(str(c) for c in df.columns)
+    mapa = resolver_encabezados(limpio.columns, perfil)  # Una sola vez por encabezado (queda en caché)
+
+    ejercicio = _primera_con_valor(limpio, mapa['Ejercicio'])
+    mercado = _primera_con_valor(limpio, mapa['Mercado'])
+    instrumento = _primera_con_valor(limpio, mapa['Instrumento'])
+
+    # Normalizar mercado (los valores que no están en el mapa se dejan como vienen)
+    mercado_mapeado = mercado.str.lower().str.strip().map(MAPA_MERCADOS)
+    mercado = mercado_mapeado.where(mercado_mapeado.notna(), mercado)
+
+    # Detectar Ejercicio e Instrumento intercambiados
+    ejercicio_es_numero = ejercicio.str.fullmatch(PATRON_ENTERO).to_numpy(dtype=bool)
+    instrumento_es_numero = instrumento.str.fullmatch(PATRON_ENTERO).to_numpy(dtype=bool)
+    ejercicio_tiene_letras = ejercicio.str.contains(PATRON_LETRA, regex=True).to_numpy(dtype=bool)
+
+    intercambiar = instrumento_es_numero & (~ejercicio_es_numero | ejercicio_tiene_letras)
+    if intercambiar.any():
+        print(f"[{etiqueta}] Advertencia: Ejercicio e Instrumento parecen estar intercambiados en {int(intercambiar.sum())} fila(s). Primera fila: {limpio.index[intercambiar][0]}")
+        ejercicio, instrumento = (
+            instrumento.where(intercambiar, ejercicio),
+            ejercicio.where(intercambiar, instrumento),
+        )
+        ejercicio_es_numero = ejercicio_es_numero | intercambiar
+
+    # Validar campos requeridos y Ejercicio entero
+    faltan = ((ejercicio == '') | (mercado == '')).to_numpy(dtype=bool)
+    no_entero = ~faltan & ~ejercicio_es_numero
+    validas = ~faltan & ~no_entero
+
+    posiciones = np.arange(len(limpio))
+    etiquetas = np.asarray(limpio.index)
+    errores = []
+    for pos in posiciones[faltan]:
+        errores.append((int(etiquetas[pos]), f'Fila {limpio.index[pos]}: Faltan campos requeridos (Ejercicio, Mercado). Claves disponibles: {claves_disponibles}'))
+    for pos in posiciones[no_entero]:
+        errores.append((int(etiquetas[pos]), f'Fila {limpio.index[pos]}: El campo Ejercicio debe ser un número entero. Valor recibido: "{ejercicio.iat[pos]}". Instrumento recibido: "{instrumento.iat[pos]}". Claves disponibles: {claves_disponibles}'))
+
+    # Fecha de pago: '' y fechas inválidas quedan como None
+    fecha_pago = _primera_con_valor(limpio, mapa['FechaPago'])
+    fechas = pd.to_datetime(fecha_pago.where(fecha_pago != ''), format='%Y-%m-%d', errors='coerce')
+    fechas = fechas.to_numpy(dtype='datetime64[us]').astype(object)  # NaT se convierte en None
+
+    # Secuencia de evento: se trunca a entero, los valores no numéricos quedan como None
+    secuencia = _primera_con_valor(limpio, mapa['SecuenciaEvento'])
+    secuencia_num = pd.to_numeric(secuencia.where(secuencia != ''), errors='coerce').to_numpy(dtype=float)
+    secuencia_ok = np.isfinite(secuencia_num)
+    if (~secuencia_ok & (secuencia != '').to_numpy(dtype=bool)).any():
+        print(f"[{etiqueta}] Advertencia: No se pudo convertir SecuenciaEvento a entero en {int((~secuencia_ok & (secuencia != '').to_numpy(dtype=bool)).sum())} fila(s)")
+    secuencias = np.full(len(limpio), None, dtype=object)
+    secuencias[secuencia_ok] = secuencia_num[secuencia_ok].astype(np.int64).tolist()
+
+    indice = limpio.index[validas]
+    base = pd.DataFrame({
+        'Ejercicio': ejercicio[validas].map(int),
+        'Mercado': mercado[validas],
+        'Instrumento': instrumento[validas],
+        'Descripcion': _primera_con_valor(limpio, mapa['Descripcion'])[validas],
+        # dtype=object para que pandas no convierta None en NaT/NaN
+        'FechaPago': pd.Series(fechas[validas], index=indice, dtype=object),
+        'SecuenciaEvento': pd.Series(secuencias[validas], index=indice, dtype=object),
+        '_orden': etiquetas[validas],
+        '_fila': etiquetas[validas] + 2,  # +2 porque el índice empieza en 0 y la fila 1 es el encabezado
+    }, index=indice)
+
+    return limpio, base, errores, mapa
+
+
+def filas_incompletas(limpio, mapa):
+    """
+    Detecta las filas sin Ejercicio o sin Mercado (validación de la previsualización).
+
+    Argumentos:
+        limpio: DataFrame devuelto por limpiar_dataframe()
+        mapa: Mapa de columnas devuelto por resolver_encabezados()
+
+    Returns (lo que devuelve la funcion):
+        ndarray: Arreglo booleano, True en las filas a las que les falta algún campo requerido
+    """
+    ejercicio = _primera_con_valor(limpio, mapa['Ejercicio'])
+    mercado = _primera_con_valor(limpio, mapa['Mercado'])
+    return ((ejercicio == '') | (mercado == '')).to_numpy(dtype=bool)
+
+
+# =====================================================================
+# FACTORES Y MONTOS
+# =====================================================================
+
+def tiene_columnas_factores(mapa):
+    """Indica si el CSV trae alguna columna de factor (F8 a F37), según el mapa de resolver_encabezados()."""
+    return any(mapa[f'Factor{i:02d}'] for i in RANGO_FACTORES)
+
+
+def columnas_factores(limpio, mapa):
+    """
+    Convierte las columnas F8 a F37 a número y las recorta al rango 0..1.
+
+    Las columnas que no existen o los valores no numéricos quedan en 0.
+    Se devuelven floats: DecimalField los convierte con Decimal(str(valor)), que es
+    exactamente la conversión que hacía el bucle anterior.
+
+    Argumentos:
+        limpio: DataFrame devuelto por limpiar_dataframe()
+        mapa: Mapa de columnas devuelto por resolver_encabezados()
+
+    Returns (lo que devuelve la funcion):
+        DataFrame: Columnas Factor08 a Factor37 con el mismo índice que `limpio`
+    """
+    factores = {}
+    for i in RANGO_FACTORES:
+        columnas = mapa[f'Factor{i:02d}']
+        if columnas:
+            valores = pd.to_numeric(limpio[columnas[0]], errors='coerce').to_numpy(dtype=float)
+            valores = np.clip(np.nan_to_num(valores, nan=0.0), 0, 1)
+        else:
+            valores = np.zeros(len(limpio))
+        factores[f'Factor{i:02d}'] = valores
+    return pd.DataFrame(factores, index=limpio.index)
+
+
+def columnas_montos(limpio, mapa):
+    """
+    Convierte las columnas de montos (F8 MONT a F37 MONT, o F8 M a F37 M) a número.
+
+    La columna de cada monto viene del mapa de resolver_encabezados(), que se calcula
+    UNA sola vez por archivo (antes se buscaba recorriendo todas las claves en cada
+    fila y para cada uno de los 30 montos).
+
+    Argumentos:
+        limpio: DataFrame devuelto por limpiar_dataframe()
+        mapa: Mapa de columnas devuelto por resolver_encabezados()
+
+    Returns (lo que devuelve la funcion):
+        DataFrame: Columnas Monto08 a Monto37 (float, 0 si no existe o no es numérico)
+    """
+    montos = {}
+    for i in RANGO_FACTORES:
+        columnas = mapa[f'Monto{i:02d}']
+        if columnas:
+            valores = pd.to_numeric(limpio[columnas[0]], errors='coerce').to_numpy(dtype=float)
+            valores = np.nan_to_num(valores, nan=0.0)
+        else:
+            valores = np.zeros(len(limpio))
+        montos[f'Monto{i:02d}'] = valores
+    return pd.DataFrame(montos, index=limpio.index)
+
+
+def calcular_factores_desde_montos(montos):
+    """
+    Calcula SumaBase y los factores (Factor = Monto / SumaBase) para todas las filas.
+
+    El cálculo lo hace motor_factores.py con enteros para todo el bloque a la vez;
+    el resultado es idéntico al de Decimal(str(monto)) que se usaba antes:
+    SumaBase = suma de montos 8 a 19, factor redondeado a 8 decimales, máximo 1,
+    y todos los factores en 0 cuando SumaBase no es positiva.
+
+    Argumentos:
+        montos: DataFrame devuelto por columnas_montos()
+
+    Returns (lo que devuelve la funcion):
+        tuple: (sumas_base, factores)
+            - sumas_base: Lista de Decimal, una por fila
+            - factores: DataFrame con Factor08 a Factor37 (float) y el mismo índice que `montos`
+    """
+    resultado = calcular_factores(montos.to_numpy(dtype=float), maximo=1)
+    return resultado.sumas_base, pd.DataFrame(
+        factores_flotantes(resultado),
+        index=montos.index,
+        columns=[f'Factor{i:02d}' for i in RANGO_FACTORES],
+    )
+
+
+def suma_base_montos(montos):
+    """
+    Calcula solo la SumaBase (montos 8 a 19) de cada fila, con el mismo resultado que Decimal.
+
+    Argumentos:
+        montos: DataFrame devuelto por columnas_montos()
+
+    Returns (lo que devuelve la funcion):
+        list: Lista de Decimal, una por fila
+    """
+    return calcular_sumas_base(montos.to_numpy(dtype=float))
+
+
+def registros_factor(df, hash_archivo, etiqueta='CARGA', perfil=None):
+    """
+    Prepara los documentos de un bloque de filas de un CSV con factores ya calculados.
+
+    Argumentos:
+        df: DataFrame con las filas del bloque (columnas ya sin espacios)
+        hash_archivo: Hash SHA-256 del archivo, se guarda en cada calificación
+        etiqueta: Prefijo para los mensajes de depuración
+        perfil: Perfil de columnas de la corredora (None = se detecta por los encabezados)
+
+    Returns (lo que devuelve la funcion):
+        tuple: (registros, errores) listos para guardar_calificaciones()
+    """
+    limpio, base, errores, mapa = normalizar_calificaciones(df, etiqueta=etiqueta, perfil=perfil)
+    registros = base.join(columnas_factores(limpio.loc[base.index], mapa))
+    registros['Origen'] = 'csv'  # Normalizado a minúsculas para coincidir con el filtro
+    registros['hash_archivo_csv'] = hash_archivo  # Relaciona la calificación con el archivo
+    return registros, errores
+
+
+def registros_monto(df, hash_archivo, etiqueta='CARGA', perfil=None):
+    """
+    Prepara los documentos de un bloque de filas de un CSV con montos.
+
+    Si el bloque trae columnas de factores (F8 a F37, después de "Calcular Factores")
+    se usan esos factores; si no, se calculan: Factor = Monto / SumaBase.
+
+    Argumentos:
+        df: DataFrame con las filas del bloque (columnas ya sin espacios)
+        hash_archivo: Hash SHA-256 del archivo, se guarda en cada calificación
+        etiqueta: Prefijo para los mensajes de depuración
+        perfil: Perfil de columnas de la corredora (None = se detecta por los encabezados)
+
+    Returns (lo que devuelve la funcion):
+        tuple: (registros, errores) listos para guardar_calificaciones()
+    """
+    limpio, base, errores, mapa = normalizar_calificaciones(df, etiqueta=etiqueta, perfil=perfil)
+    limpio = limpio.loc[base.index]
+
+    montos = columnas_montos(limpio, mapa)
+    if tiene_columnas_factores(mapa):
+        factores = columnas_factores(limpio, mapa)
+        sumas_base = suma_base_montos(montos)
+    else:
+        sumas_base, factores = calcular_factores_desde_montos(montos)
+
+    registros = base.join(montos).join(factores)
+    registros['SumaBase'] = sumas_base
+    registros['Origen'] = 'csv'  # Normalizado a minúsculas para coincidir con el filtro
+    registros['hash_archivo_csv'] = hash_archivo  # Relaciona la calificación con el archivo
+    return registros, errores
+
+
+# =====================================================================
+# LECTURA DEL ARCHIVO CON MEMORIA ACOTADA
+# =====================================================================
+
+def analizar_archivo(archivo):
+    """
+    Calcula el hash SHA-256 del archivo y detecta su encoding, leyendo por partes.
+
+    POR QUÉ:
+    - archivo.read() cargaba el archivo completo en memoria solo para calcular el hash
+    - archivo.chunks() entrega partes de 64 KB, así la memoria no depende del tamaño del archivo
+
+    CÓMO FUNCIONA:
+    - Cada parte se suma al hash y se pasa por un decodificador UTF-8 incremental
+    - Si alguna parte no es UTF-8 válido, el archivo se leerá como latin-1
+      (el mismo respaldo que usaba pd.read_csv antes)
+
+    Argumentos:
+        archivo: UploadedFile de Django (request.FILES['archivo'])
+
+    Returns (lo que devuelve la funcion):
+        tuple: (hash_archivo, encoding)
+    """
+    hash_sha256 = hashlib.sha256()
+    decodificador = codecs.getincrementaldecoder('utf-8')()
+    es_utf8 = True
+
+    archivo.seek(0)
+    for parte in archivo.chunks():
+        hash_sha256.update(parte)
+        if es_utf8:
+            try:
+                decodificador.decode(parte)
+            except UnicodeDecodeError:
+                es_utf8 = False
+    if es_utf8:
+        try:
+            decodificador.decode(b'', final=True)  # Verifica que no quede un carácter cortado al final
+        except UnicodeDecodeError:
+            es_utf8 = False
+    archivo.seek(0)
+
+    return hash_sha256.hexdigest(), 'utf-8' if es_utf8 else 'latin-1'
+
+
+def leer_csv_por_bloques(archivo, encoding, filas_por_bloque=None):
+    """
+    Lee el CSV de a bloques de filas con pd.read_csv(chunksize=...).
+
+    El índice de las filas sigue creciendo entre bloques, por lo que los números de
+    fila de los errores son los mismos que si se leyera el archivo completo.
+
+    Argumentos:
+        archivo: UploadedFile de Django
+        encoding: Encoding devuelto por analizar_archivo()
+        filas_por_bloque: Filas por bloque (por defecto settings.CARGA_MASIVA_FILAS_POR_BLOQUE)
+
+    Returns (lo que devuelve la funcion):
+        generator: DataFrames con columnas sin espacios y sin filas completamente vacías
+    """
+    if filas_por_bloque is None:
+        filas_por_bloque = getattr(settings, 'CARGA_MASIVA_FILAS_POR_BLOQUE', 20000)
+
+    archivo.seek(0)
+    # pandas no reconoce el UploadedFile de Django como archivo binario y lo lee siempre como UTF-8,
+    # por eso se decodifica con TextIOWrapper (también por partes) usando el encoding detectado
+    texto = io.TextIOWrapper(archivo.file, encoding=encoding, newline='')
+    try:
+        with pd.read_csv(texto, chunksize=max(1, int(filas_por_bloque))) as lector:
+            for df in lector:
+                df.columns = df.columns.str.strip()  # Se eliminan los espacios de los nombres de las columnas
+                yield df.dropna(how='all')  # Se eliminan las filas completamente vacías
+    finally:
+        texto.detach()  # Se suelta el archivo sin cerrarlo (Django lo cierra al terminar la solicitud)
+
+
+def previsualizar_bloques(bloques, limite_muestra=None, carga=None, perfil=None):
+    """
+    Valida todas las filas del archivo (bloque por bloque) y junta las filas para la tabla de previsualización.
+
+    Si se entrega `carga`, cada bloque también se prepara (registros listos para insertar)
+    y se guarda en el staging del servidor, aprovechando la misma lectura del archivo.
+
+    Argumentos:
+        bloques: Iterable de DataFrames (ej: leer_csv_por_bloques())
+        limite_muestra: Máximo de filas a devolver en `datos` (None = todas)
+        carga: CargaPreparada devuelta por crear_carga_preparada() (opcional)
+        perfil: Perfil de columnas de la corredora (None = se detecta por los encabezados)
+
+    Returns (lo que devuelve la funcion):
+        tuple: (datos, errores, total)
+            - datos: Lista de diccionarios con las filas válidas (o la muestra), con los
+              nombres de columna estándar aunque el archivo use los de una corredora
+            - errores: Lista de mensajes de error
+            - total: Cantidad total de filas válidas del archivo
+    """
+    datos = []
+    errores = []
+    total = 0
+    for df in bloques:
+        if carga is not None:
+            _guardar_bloque_preparado(carga, df, perfil)
+        limpio = limpiar_dataframe(df)
+        mapa = resolver_encabezados(limpio.columns, perfil)
+        incompletas = filas_incompletas(limpio, mapa)
+        errores.extend(f'Fila {idx + 2}: Faltan campos requeridos (Ejercicio, Mercado)' for idx in limpio.index[incompletas])
+        validas = renombrar_a_estandar(limpio[~incompletas], mapa)
+        total += len(validas)
+        if limite_muestra is None:
+            datos.extend(validas.to_dict('records'))
+        elif len(datos) < limite_muestra:
+            datos.extend(validas.head(limite_muestra - len(datos)).to_dict('records'))
+    if carga is not None:
+        carga.save()  # Se guarda la cantidad final de bloques y filas
+    return datos, errores, total
+
+
+# =====================================================================
+# STAGING DE CARGAS PREVISUALIZADAS
+# =====================================================================
+# POR QUÉ:
+# - Antes la previsualización devolvía todas las filas al navegador y al grabar el navegador
+#   las reenviaba en JSON, para volver a armar el DataFrame y validarlas de nuevo
+# - Ahora la previsualización deja los registros ya validados en disco y devuelve un token;
+#   al grabar solo viaja el token y los bloques se insertan directamente
+
+def _directorio_staging():
+    """Carpeta base donde se guardan las cargas preparadas."""
+    return str(getattr(settings, 'CARGA_MASIVA_DIRECTORIO_STAGING', os.path.join(settings.BASE_DIR, 'cargas_staging')))
+
+
+def limpiar_cargas_vencidas():
+    """
+    Elimina las cargas preparadas que superaron VIGENCIA_CARGA_PREPARADA.
+
+    MongoDB borra los documentos vencidos con el índice TTL, pero las carpetas en disco
+    hay que borrarlas aquí: se elimina toda carpeta sin documento vigente que además tenga
+    más de VIGENCIA_CARGA_PREPARADA segundos.
+
+    POR QUÉ LA ANTIGÜEDAD: Otra previsualización puede estar creando su carga al mismo
+    tiempo; su carpeta recién creada todavía no aparece en la lista de documentos leída aquí.
+    """
+    directorio = _directorio_staging()
+    if not os.path.isdir(directorio):
+        return
+    limite = datetime.datetime.now() - datetime.timedelta(seconds=VIGENCIA_CARGA_PREPARADA)
+    CargaPreparada.objects(fecha_creacion__lt=limite).delete()
+    vigentes = set(CargaPreparada.objects.scalar('token'))
+    for nombre in os.listdir(directorio):
+        ruta = os.path.join(directorio, nombre)
+        if nombre in vigentes:
+            continue
+        try:
+            creada = datetime.datetime.fromtimestamp(os.path.getmtime(ruta))
+        except OSError:
+            continue  # Otra solicitud ya la eliminó
+        if creada < limite:
+            shutil.rmtree(ruta, ignore_errors=True)
+
+
+def crear_carga_preparada(usuario, hash_archivo, nombre_archivo, tipo):
+    """
+    Crea la carga preparada (documento + carpeta) de un archivo que se está previsualizando.
+
+    Si el mismo usuario ya había previsualizado el mismo archivo, la carga anterior se descarta
+    (salvo que un trabajo en segundo plano todavía la esté grabando: sus bloques se conservan).
+
+    Argumentos:
+        usuario: Documento usuarios que previsualiza el archivo
+        hash_archivo: Hash SHA-256 del archivo
+        nombre_archivo: Nombre original del archivo
+        tipo: 'factor' o 'monto'
+
+    Returns (lo que devuelve la funcion):
+        CargaPreparada: Documento de la carga (se guarda al terminar previsualizar_bloques())
+    """
+    limpiar_cargas_vencidas()
+    en_uso = set(TrabajoCarga.objects(hash_archivo=hash_archivo, estado__in=['pendiente', 'procesando']).scalar('token_carga'))
+    for anterior in CargaPreparada.objects(usuario=usuario, hash_archivo=hash_archivo, tipo=tipo):
+        if anterior.token not in en_uso:
+            descartar_carga_preparada(anterior)
+
+    token = uuid.uuid4().hex
+    ruta = os.path.join(_directorio_staging(), token)
+    carga = CargaPreparada(
+        token=token,
+        hash_archivo=hash_archivo,
+        nombre_archivo=nombre_archivo,
+        tipo=tipo,
+        usuario=usuario,
+        ruta=ruta,
+    )
+    carga.save()  # El documento se guarda antes de crear la carpeta: limpiar_cargas_vencidas no la toma como huérfana
+    os.makedirs(ruta, exist_ok=True)
+    return carga
+
+
+def _guardar_bloque_preparado(carga, df, perfil=None):
+    """Prepara un bloque de filas (registros + errores) y lo guarda en la carpeta de la carga."""
+    preparar = registros_factor if carga.tipo == 'factor' else registros_monto
+    registros, errores = preparar(df, carga.hash_archivo, etiqueta=f'PREVIEW_{carga.tipo.upper()}', perfil=perfil)
+    with open(os.path.join(carga.ruta, f'bloque_{carga.bloques:06d}.pkl'), 'wb') as archivo:
+        pickle.dump((registros, errores), archivo, protocol=pickle.HIGHEST_PROTOCOL)
+    carga.bloques += 1
+    carga.total_filas += len(registros)
+
+
+def obtener_carga_preparada(token, usuario):
+    """
+    Busca una carga preparada vigente del usuario.
+
+    Returns (lo que devuelve la funcion):
+        CargaPreparada o None si no existe, venció o pertenece a otro usuario
+    """
+    carga = CargaPreparada.objects(token=token, usuario=usuario).first()
+    if carga is None or not os.path.isdir(carga.ruta):
+        return None
+    if carga.fecha_creacion < datetime.datetime.now() - datetime.timedelta(seconds=VIGENCIA_CARGA_PREPARADA):
+        descartar_carga_preparada(carga)
+        return None
+    return carga
+
+
+def leer_carga_preparada(carga):
+    """
+    Lee los bloques preparados de una carga, uno a la vez (memoria acotada).
+
+    Returns (lo que devuelve la funcion):
+        generator: Tuplas (registros, errores) listas para guardar_calificaciones()
+    """
+    for numero in range(carga.bloques):
+        with open(os.path.join(carga.ruta, f'bloque_{numero:06d}.pkl'), 'rb') as archivo:
+            yield pickle.load(archivo)
+
+
+def descartar_carga_preparada(carga):
+    """Elimina la carpeta y el documento de una carga preparada (después de grabar o al reemplazarla)."""
+    shutil.rmtree(carga.ruta, ignore_errors=True)
+    carga.delete()
+
+
+# =====================================================================
+# PERSISTENCIA POR LOTES
+# =====================================================================
+
+def guardar_calificaciones(registros, errores, etiqueta='CARGA', tamano_lote=None):
+    """
+    Guarda las calificaciones en MongoDB usando insert_many por lotes.
+
+    POR QUÉ:
+    - nueva_calificacion.save() por cada fila cuesta un viaje a MongoDB por fila
+      (~1 ms cada uno: 60 segundos para 60.000 filas)
+    - insert_many envía un lote completo en un solo viaje
+
+    CÓMO FUNCIONA:
+    1. Arma cada documento Calificacion y lo valida con MongoEngine (igual que save())
+    2. Las filas que no pasan la validación se agregan a `errores` con su número de fila
+    3. Envía los documentos válidos con insert_many(ordered=False), de a `tamano_lote`
+    4. Si MongoDB rechaza algún documento (BulkWriteError), el índice del error dentro
+       del lote se traduce al número de fila del CSV y se agrega a `errores`
+    Con ordered=False MongoDB sigue insertando el resto del lote aunque un documento falle.
+
+    Argumentos:
+        registros: DataFrame con los campos de Calificacion más '_orden' y '_fila'
+        errores: Lista de tuplas (posición, mensaje) donde se agregan los errores encontrados
+        etiqueta: Prefijo para los mensajes de depuración (ej: 'CARGAR_FACTOR')
+        tamano_lote: Documentos por insert_many (por defecto settings.CARGA_MASIVA_TAMANO_LOTE)
+
+    Returns (lo que devuelve la funcion):
+        int: Cantidad de calificaciones insertadas
+    """
+    if tamano_lote is None:
+        tamano_lote = getattr(settings, 'CARGA_MASIVA_TAMANO_LOTE', 1000)
+    tamano_lote = max(1, int(tamano_lote))
+
+    coleccion = Calificacion._get_collection()
+    insertadas = 0
+
+    for inicio in range(0, len(registros), tamano_lote):
+        lote = registros.iloc[inicio:inicio + tamano_lote]
+        documentos = []  # Documentos listos para MongoDB (SON)
+        filas = []  # (posición, número de fila) de cada documento, en el mismo orden
+
+        for registro in lote.to_dict('records'):
+            orden = registro.pop('_orden')
+            fila_num = registro.pop('_fila')
+            try:
+                nueva_calificacion = Calificacion(**registro)
+                nueva_calificacion.FechaAct = datetime.datetime.now()
+                nueva_calificacion.validate()  # Misma validación que hace save()
+                documentos.append(nueva_calificacion.to_mongo())
+                filas.append((orden, fila_num))
+            except Exception as e:
+                errores.append((orden, f'Fila {fila_num}: {str(e)}'))
+
+        if not documentos:
+            continue
+
+        try:
+            resultado = coleccion.insert_many(documentos, ordered=False)
+            insertadas += len(resultado.inserted_ids)
+        except BulkWriteError as bwe:
+            detalle = bwe.details
+            insertadas += detalle.get('nInserted', 0)
+            for error in detalle.get('writeErrors', []):
+                orden, fila_num = filas[error['index']]
+                errores.append((orden, f"Fila {fila_num}: {error.get('errmsg', 'Error al insertar')}"))
+
+        print(f"[{etiqueta}] Lote guardado: {insertadas} calificación(es) insertadas hasta ahora")
+
+    return insertadas
+
+
+def ordenar_errores(errores):
+    """
+    Devuelve los mensajes de error en el orden de las filas del archivo.
+
+    Argumentos:
+        errores: Lista de tuplas (posición, mensaje)
+
+    Returns (lo que devuelve la funcion):
+        list: Lista de mensajes (str)
+    """
+    return [mensaje for _, mensaje in sorted(errores, key=lambda e: e[0])]
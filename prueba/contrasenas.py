@@ -0,0 +1,201 @@
+"""
+CONTRASENAS.PY - Hash y verificación de contraseñas con bcrypt
+===============================================================
+Este archivo contiene las funciones que hashean y verifican contraseñas, ejecutadas
+en un pool de hilos acotado con un costo de bcrypt configurable.
+
+POR QUÉ EXISTE ESTE ARCHIVO:
+- bcrypt es lento a propósito (dificulta los ataques de fuerza bruta): con el costo 12
+  cada verificación ocupa un núcleo de CPU por cientos de milisegundos
+- login_view llamaba a bcrypt.checkpw dentro de la solicitud: en el pico de inicios de
+  sesión de la mañana todos los hilos del servidor calculaban bcrypt a la vez y las demás
+  solicitudes (búsquedas, cargas) quedaban esperando CPU
+- El costo estaba fijo en el valor por defecto de bcrypt.gensalt(), sin relación con el
+  hardware donde corre el servidor
+
+CÓMO FUNCIONA:
+1. Todo cálculo de bcrypt pasa por un pool de CONTRASENAS_HILOS hilos: nunca hay más
+   cálculos simultáneos que ese número, así siempre queda CPU para el resto de las solicitudes
+   (bcrypt libera el GIL mientras calcula, por eso un pool de hilos alcanza)
+2. Si ya hay CONTRASENAS_MAXIMO_EN_ESPERA cálculos esperando, o la espera supera
+   CONTRASENAS_ESPERA_MAXIMA segundos, se lanza ServidorOcupado en lugar de encolar
+   más trabajo (la vista responde 503 y el usuario reintenta)
+3. Los hashes nuevos usan el costo CONTRASENAS_COSTO_BCRYPT
+4. necesita_rehash() indica si un hash guardado tiene otro costo: login_view lo vuelve a
+   hashear con el costo actual cuando el usuario ingresa con la contraseña correcta
+5. El comando calibrar_bcrypt mide cada costo en el servidor y sugiere el valor
+
+Clases y funciones definidas:
+- ServidorOcupado: Se lanza cuando el pool de bcrypt está saturado
+- hashear_contrasena: Hashea una contraseña con el costo configurado
+- verificar_contrasena: Verifica una contraseña contra su hash
+- necesita_rehash: Indica si un hash tiene un costo distinto del configurado
+- costo_del_hash: Devuelve el costo de un hash bcrypt
+"""
+
+# IMPORTACIONES
+# ======================================
+import threading  # Para crear el pool una sola vez y contar los cálculos pendientes
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as EsperaAgotada  # Pool de hilos de bcrypt
+import bcrypt  # Algoritmo de hash de contraseñas
+from django.conf import settings  # Para leer CONTRASENAS_*
+
+
+class ServidorOcupado(Exception):
+    """El pool de bcrypt está saturado: la solicitud debe reintentarse más tarde."""
+
+
+# Pool de hilos de bcrypt (se crea la primera vez que se usa)
+_ejecutor = None
+_candado_ejecutor = threading.Lock()
+
+# Cálculos enviados al pool que todavía no terminan (en ejecución + en espera)
+_pendientes = 0
+_candado_pendientes = threading.Lock()
+
+
+def _obtener_ejecutor():
+    """
+    Devuelve el pool de hilos compartido por todos los cálculos de bcrypt.
+
+    Se crea una sola vez por proceso con CONTRASENAS_HILOS hilos.
+    """
+    global _ejecutor
+    with _candado_ejecutor:
+        if _ejecutor is None:
+            _ejecutor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'CONTRASENAS_HILOS', 2),
+                thread_name_prefix='bcrypt'
+            )
+        return _ejecutor
+
+
+def _terminado(_futuro):
+    """Descuenta un cálculo pendiente (callback del futuro)."""
+    global _pendientes
+    with _candado_pendientes:
+        _pendientes -= 1
+
+
+def _ejecutar(funcion, *args):
+    """
+    Ejecuta un cálculo de bcrypt en el pool y espera el resultado.
+
+    Argumentos:
+        funcion: bcrypt.hashpw o bcrypt.checkpw
+        *args: Argumentos de la función
+
+    Returns (lo que devuelve la funcion):
+        El resultado de la función
+
+    Raises:
+        ServidorOcupado: Si hay demasiados cálculos pendientes o la espera supera CONTRASENAS_ESPERA_MAXIMA
+    """
+    global _pendientes
+    hilos = getattr(settings, 'CONTRASENAS_HILOS', 2)
+    maximo_en_espera = getattr(settings, 'CONTRASENAS_MAXIMO_EN_ESPERA', 20)
+
+    # No se encola más trabajo del que el pool puede terminar en un tiempo razonable
+    # POR QUÉ: Con la cola sin límite, una ráfaga de intentos de inicio de sesión dejaría
+    # solicitudes esperando minutos y ocupando hilos del servidor
+    with _candado_pendientes:
+        if _pendientes >= hilos + maximo_en_espera:
+            raise ServidorOcupado('Demasiadas verificaciones de contraseña en curso')
+        _pendientes += 1
+
+    try:
+        futuro = _obtener_ejecutor().submit(funcion, *args)
+    except Exception:
+        _terminado(None)
+        raise
+    futuro.add_done_callback(_terminado)
+
+    try:
+        return futuro.result(timeout=getattr(settings, 'CONTRASENAS_ESPERA_MAXIMA', 10))
+    except EsperaAgotada:
+        # Si todavía no empezó se cancela; si ya está calculando, termina solo y se descarta
+        futuro.cancel()
+        raise ServidorOcupado('La verificación de contraseña tardó demasiado')
+
+
+# =====================================================================
+# HASH Y VERIFICACIÓN
+# =====================================================================
+
+def hashear_contrasena(password):
+    """
+    Hashea una contraseña con bcrypt y el costo CONTRASENAS_COSTO_BCRYPT.
+
+    Cada hash incluye un salt aleatorio (la misma contraseña da hashes distintos)
+    y el costo con que se calculó ('$2b$12$...'), así no hay que guardarlos aparte.
+
+    Argumentos:
+        password: Contraseña en texto plano
+
+    Returns (lo que devuelve la funcion):
+        str: Contraseña hasheada en formato bcrypt, o None si no hay contraseña
+
+    Raises:
+        ServidorOcupado: Si el pool de bcrypt está saturado
+    """
+    if not password:
+        return None
+    salt = bcrypt.gensalt(rounds=getattr(settings, 'CONTRASENAS_COSTO_BCRYPT', 12))
+    return _ejecutar(bcrypt.hashpw, password.encode('utf-8'), salt).decode('utf-8')
+
+
+def verificar_contrasena(password, hashed_password):
+    """
+    Verifica si una contraseña coincide con su hash.
+
+    bcrypt.checkpw vuelve a hashear la contraseña con el salt y el costo del hash
+    guardado y compara en tiempo constante.
+
+    Argumentos:
+        password: Contraseña en texto plano a verificar
+        hashed_password: Contraseña hasheada almacenada en la base de datos
+
+    Returns (lo que devuelve la funcion):
+        bool: True si la contraseña coincide, False si no (o si el hash no es válido)
+
+    Raises:
+        ServidorOcupado: Si el pool de bcrypt está saturado
+    """
+    if not password or not hashed_password:
+        return False
+    try:
+        return _ejecutar(bcrypt.checkpw, password.encode('utf-8'), hashed_password.encode('utf-8'))
+    except ServidorOcupado:
+        raise
+    except Exception:
+        # Hash con formato inválido: es más seguro tratarlo como contraseña incorrecta
+        return False
+
+
+def costo_del_hash(hashed_password):
+    """
+    Devuelve el costo (log2 de las rondas) de un hash bcrypt.
+
+    Argumentos:
+        hashed_password: Hash en formato '$2b$12$<salt><hash>'
+
+    Returns (lo que devuelve la funcion):
+        int: Costo del hash, o None si el texto no es un hash bcrypt
+    """
+    partes = (hashed_password or '').split('$')
+    if len(partes) < 4 or not partes[2].isdigit():
+        return None
+    return int(partes[2])
+
+
+def necesita_rehash(hashed_password):
+    """
+    Indica si un hash se calculó con un costo distinto de CONTRASENAS_COSTO_BCRYPT.
+
+    Argumentos:
+        hashed_password: Hash guardado del usuario
+
+    Returns (lo que devuelve la funcion):
+        bool: True si hay que volver a hashear la contraseña con el costo actual
+    """
+    return costo_del_hash(hashed_password) != getattr(settings, 'CONTRASENAS_COSTO_BCRYPT', 12)
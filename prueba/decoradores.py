@@ -0,0 +1,116 @@
+"""
+DECORADORES.PY - Verificación de sesión y de rol para las vistas
+================================================================
+Este archivo contiene los decoradores que reemplazan la verificación que cada
+vista hacía a mano al comienzo ('user_id' en la sesión, usuarios.objects.get y rol).
+
+POR QUÉ EXISTE ESTE ARCHIVO:
+- Unas 25 vistas repetían el mismo bloque, cada una con su propia consulta a MongoDB
+- Los decoradores usan el usuario de la solicitud (prueba/usuario_actual.py), que sale
+  de la caché del proceso: una vista decorada no consulta MongoDB para saber quién es el usuario
+- Una solicitud sin sesión se rechaza sin tocar MongoDB (solo se mira request.session)
+
+CÓMO FUNCIONA:
+1. Sin 'user_id' en la sesión: se responde de inmediato (redirección a login o 401)
+2. Si el usuario de la sesión ya no existe (fue eliminado): se cierra la sesión
+   y se responde igual que sin sesión
+3. Con los decoradores de administrador, un usuario sin rol de administrador recibe 403
+4. La vista recibe el usuario en request.usuario_actual
+
+Decoradores definidos:
+- login_requerido: Páginas HTML (redirige a login)
+- login_requerido_json: Vistas AJAX (responde 401 en JSON)
+- admin_requerido: Páginas HTML solo para administradores (403 en HTML)
+- admin_requerido_json: Vistas AJAX solo para administradores (403 en JSON)
+"""
+
+# IMPORTACIONES
+# ======================================
+from functools import wraps  # Conserva el nombre y el docstring de la vista decorada
+from django.http import HttpResponseForbidden
+from django.shortcuts import redirect
+from .models import usuarios
+from .respuestas import RespuestaJSON
+from .usuario_actual import usuario_de_la_solicitud
+
+
+# Respuesta HTML para un usuario que no es administrador
+# POR QUÉ: administrar_view y ver_logs_view mostraban el mismo mensaje
+ACCESO_DENEGADO_HTML = (
+    "<h1>Acceso Denegado</h1>"
+    "<p>No tienes permisos de administrador.</p>"
+    "<a href='/home/'>Volver</a>"
+)
+
+
+def _requerir_usuario(vista, sin_sesion, sin_permiso, solo_admin):
+    """
+    Arma el decorador: verifica la sesión (y el rol) antes de llamar a la vista.
+
+    Argumentos:
+        vista: Función de la vista
+        sin_sesion: Función () -> respuesta para una solicitud sin sesión válida
+        sin_permiso: Función () -> respuesta para un usuario que no es administrador
+        solo_admin: True si la vista es solo para administradores
+
+    Returns (lo que devuelve la funcion):
+        function: La vista envuelta
+    """
+    @wraps(vista)
+    def envoltura(request, *args, **kwargs):
+        # Sin sesión: se rechaza sin consultar MongoDB
+        if 'user_id' not in request.session:
+            return sin_sesion()
+
+        try:
+            usuario = usuario_de_la_solicitud(request)
+        except usuarios.DoesNotExist:
+            # El usuario fue eliminado mientras tenía la sesión abierta: la sesión ya no sirve
+            request.session.flush()
+            return sin_sesion()
+
+        if solo_admin and not usuario.rol:
+            return sin_permiso()
+
+        return vista(request, *args, **kwargs)
+    return envoltura
+
+
+def login_requerido(vista):
+    """Páginas HTML: sin sesión válida redirige a login."""
+    return _requerir_usuario(
+        vista,
+        sin_sesion=lambda: redirect('login'),
+        sin_permiso=None,
+        solo_admin=False
+    )
+
+
+def login_requerido_json(vista):
+    """Vistas AJAX: sin sesión válida responde 401 en JSON."""
+    return _requerir_usuario(
+        vista,
+        sin_sesion=lambda: RespuestaJSON({'success': False, 'error': 'No autenticado'}, status=401),
+        sin_permiso=None,
+        solo_admin=False
+    )
+
+
+def admin_requerido(vista):
+    """Páginas HTML solo para administradores: sin sesión redirige a login, sin rol responde 403."""
+    return _requerir_usuario(
+        vista,
+        sin_sesion=lambda: redirect('login'),
+        sin_permiso=lambda: HttpResponseForbidden(ACCESO_DENEGADO_HTML),
+        solo_admin=True
+    )
+
+
+def admin_requerido_json(vista):
+    """Vistas AJAX solo para administradores: sin sesión responde 401, sin rol responde 403 (en JSON)."""
+    return _requerir_usuario(
+        vista,
+        sin_sesion=lambda: RespuestaJSON({'success': False, 'error': 'No autenticado'}, status=401),
+        sin_permiso=lambda: RespuestaJSON({'success': False, 'error': 'No autorizado'}, status=403),
+        solo_admin=True
+    )
@@ -0,0 +1,181 @@
+"""
+ENCABEZADOS.PY - Resolución de los encabezados de los archivos CSV de carga masiva
+==================================================================================
+Este archivo traduce las columnas de un CSV a los campos canónicos del sistema
+(Ejercicio, Mercado, ..., Factor08..Factor37, Monto08..Monto37) UNA sola vez por archivo.
+
+POR QUÉ EXISTE ESTE ARCHIVO:
+- Antes, por cada fila y por cada uno de los 30 montos, se recorrían todas las claves
+  de la fila buscando 'F{i} MONT' o 'F{i} M' (filas × 30 × columnas comparaciones),
+  y lo mismo con las variantes 'Ejercicio'/'ejercicio', 'FEC_PAGO'/'Fec_Pago', etc.
+- Cada corredora entrega sus archivos con nombres de columna propios; en lugar de
+  agregar variantes en el código, se configuran perfiles de alias en settings.py
+  (CARGA_MASIVA_PERFILES_COLUMNAS)
+- Las vistas de previsualización, carga y cálculo masivo usan el mismo resolvedor,
+  así un archivo se interpreta igual en todos los pasos
+
+CÓMO FUNCIONA:
+1. ALIAS_ESTANDAR define, para cada campo canónico, los nombres de columna aceptados
+   en orden de prioridad (los mismos que aceptaba el código anterior)
+2. Un perfil de corredora agrega sus propios alias a los estándar
+3. resolver_encabezados() devuelve, para cada campo, las columnas del archivo que le
+   corresponden (el resultado se guarda en caché por encabezado, así los bloques
+   siguientes del mismo archivo no vuelven a calcularlo)
+
+Funciones definidas:
+- alias_perfil: Alias de cada campo para un perfil (estándar + los del perfil)
+- detectar_perfil: Elige el perfil de corredora que mejor coincide con las columnas
+- resolver_encabezados: Mapa campo canónico -> columnas del archivo
+- renombrar_a_estandar: Cambia los nombres de columna de una corredora por los estándar
+"""
+
+# IMPORTACIONES
+# ======================================
+from functools import lru_cache  # Para resolver cada encabezado una sola vez
+from django.conf import settings  # Para leer CARGA_MASIVA_PERFILES_COLUMNAS
+
+
+# =====================================================================
+# ALIAS ESTÁNDAR
+# =====================================================================
+
+# Rango de factores y montos que maneja el sistema (F8 a F37)
+RANGO_FACTORES = range(8, 38)
+
+# Nombres de columna aceptados para cada campo canónico, en orden de prioridad
+# (cuando hay varias columnas del mismo campo se usa la primera que tenga valor)
+ALIAS_ESTANDAR = {
+    'Ejercicio': ('Ejercicio', 'ejercicio'),
+    'Mercado': ('Mercado', 'mercado'),
+    'Instrumento': ('Instrumento', 'instrumento'),
+    'Descripcion': ('DESCRIPCION', 'Descripcion', 'descripcion'),
+    'FechaPago': ('FEC_PAGO', 'Fec_Pago', 'fec_pago'),
+    'SecuenciaEvento': ('SEC_EVE', 'Sec_Eve', 'sec_eve'),
+}
+for _i in RANGO_FACTORES:
+    ALIAS_ESTANDAR[f'Factor{_i:02d}'] = (f'F{_i}',)
+    ALIAS_ESTANDAR[f'Monto{_i:02d}'] = (f'F{_i} MONT', f'F{_i} M')
+
+
+# =====================================================================
+# PERFILES DE CORREDORAS
+# =====================================================================
+
+def _perfiles():
+    """Perfiles configurados en settings.CARGA_MASIVA_PERFILES_COLUMNAS ({nombre: {campo: alias}})."""
+    return getattr(settings, 'CARGA_MASIVA_PERFILES_COLUMNAS', {})
+
+
+def alias_perfil(perfil=None):
+    """
+    Devuelve los alias de cada campo canónico para un perfil.
+
+    Los alias del perfil se agregan DESPUÉS de los estándar, así un archivo con los
+    nombres de siempre se interpreta igual con cualquier perfil.
+
+    Argumentos:
+        perfil: Nombre del perfil en CARGA_MASIVA_PERFILES_COLUMNAS (None = solo estándar)
+
+    Returns (lo que devuelve la funcion):
+        dict: {campo canónico: tupla de nombres de columna}
+
+    Raises:
+        ValueError: Si el perfil no está configurado
+    """
+    if perfil is None:
+        return ALIAS_ESTANDAR
+    perfiles = _perfiles()
+    if perfil not in perfiles:
+        raise ValueError(f'Perfil de columnas desconocido: "{perfil}". Perfiles disponibles: {", ".join(perfiles) or "ninguno"}')
+
+    alias = dict(ALIAS_ESTANDAR)
+    for campo, nombres in perfiles[perfil].items():
+        if campo not in ALIAS_ESTANDAR:
+            raise ValueError(f'El perfil de columnas "{perfil}" define un campo desconocido: "{campo}"')
+        if isinstance(nombres, str):
+            nombres = (nombres,)
+        alias[campo] = ALIAS_ESTANDAR[campo] + tuple(n for n in nombres if n not in ALIAS_ESTANDAR[campo])
+    return alias
+
+
+def detectar_perfil(columnas):
+    """
+    Elige el perfil de corredora cuyos alias propios coinciden con más columnas del archivo.
+
+    Argumentos:
+        columnas: Nombres de columna del archivo
+
+    Returns (lo que devuelve la funcion):
+        str o None: Nombre del perfil, o None si ninguno aporta columnas (formato estándar)
+    """
+    presentes = {str(c).strip() for c in columnas}
+    mejor, coincidencias_mejor = None, 0
+    for nombre, campos in _perfiles().items():
+        coincidencias = 0
+        for nombres in campos.values():
+            if isinstance(nombres, str):
+                nombres = (nombres,)
+            coincidencias += sum(1 for n in nombres if n in presentes)
+        if coincidencias > coincidencias_mejor:
+            mejor, coincidencias_mejor = nombre, coincidencias
+    return mejor
+
+
+# =====================================================================
+# RESOLUCIÓN DE ENCABEZADOS
+# =====================================================================
+
+@lru_cache(maxsize=128)
+def _resolver(columnas, perfil):
+    """Versión con caché de resolver_encabezados() (columnas como tupla para poder usarlas de clave)."""
+    por_nombre = {}
+    for columna in columnas:
+        por_nombre.setdefault(str(columna).strip(), columna)  # Se compara sin espacios, se devuelve el nombre real
+
+    mapa = {}
+    for campo, nombres in alias_perfil(perfil).items():
+        mapa[campo] = tuple(por_nombre[n] for n in nombres if n in por_nombre)
+    return mapa
+
+
+def resolver_encabezados(columnas, perfil=None):
+    """
+    Relaciona las columnas de un archivo con los campos canónicos del sistema.
+
+    Se calcula una vez por encabezado (caché): todos los bloques de un mismo archivo
+    reutilizan el mismo mapa.
+
+    Argumentos:
+        columnas: Nombres de columna del archivo (ej: df.columns)
+        perfil: Perfil de corredora (None = se detecta con detectar_perfil())
+
+    Returns (lo que devuelve la funcion):
+        dict: {campo canónico: tupla con las columnas del archivo para ese campo (vacía si no hay)}
+    """
+    columnas = tuple(columnas)
+    if perfil is None:
+        perfil = detectar_perfil(columnas)
+    return _resolver(columnas, perfil)
+
+
+def renombrar_a_estandar(df, mapa):
+    """
+    Cambia los nombres de columna de una corredora por los nombres estándar.
+
+    Se usa en las filas que se devuelven al navegador, para que la tabla de
+    previsualización (que busca 'Ejercicio', 'F8 MONT', etc.) las muestre igual
+    sin importar el perfil. Solo se renombra cuando el nombre estándar no existe ya.
+
+    Argumentos:
+        df: DataFrame con los nombres de columna del archivo
+        mapa: Mapa devuelto por resolver_encabezados()
+
+    Returns (lo que devuelve la funcion):
+        DataFrame: Mismas filas con los nombres de columna estándar
+    """
+    renombrar = {}
+    for campo, columnas in mapa.items():
+        estandar = ALIAS_ESTANDAR[campo][0]
+        if columnas and columnas[0] not in ALIAS_ESTANDAR[campo] and estandar not in df.columns:
+            renombrar[columnas[0]] = estandar
+    return df.rename(columns=renombrar) if renombrar else df
@@ -0,0 +1,388 @@
+"""
+EXPORTADORES.PY - Archivos de exportación de calificaciones (CSV, Parquet, XLSX)
+=================================================================================
+Este archivo genera, por partes, el archivo que descarga exportar_calificaciones_view
+en el formato pedido.
+
+POR QUÉ EXISTE ESTE ARCHIVO:
+- Los analistas volvían a leer el CSV en pandas o Excel y cada vez había que convertir
+  30 columnas de texto a decimales
+- Parquet guarda cada columna con su tipo (decimal con 8 decimales, fecha, entero) y comprimida:
+  el archivo es mucho más chico y pandas.read_parquet() lo carga sin convertir nada
+- XLSX abre directo en Excel con fechas y números como tales (no como texto)
+
+CÓMO FUNCIONA:
+1. Todos los formatos reciben los diccionarios de pymongo ya proyectados y ordenados
+   (calificaciones_proyectadas o calificaciones_por_ids) y los leen por bloques
+2. Las columnas y sus tipos salen de SERIALIZADOR_EXPORTACION (los mismos encabezados que el CSV)
+3. CSV y Parquet se envían a medida que se escribe cada bloque (StreamingHttpResponse)
+4. XLSX es un ZIP que solo queda completo al cerrarlo: se escribe en un archivo temporal
+   fila por fila (constant_memory, sin guardar el libro en memoria) y luego se envía por partes
+5. pyarrow (Parquet) y xlsxwriter (XLSX) son opcionales: sin ellos solo está disponible el CSV
+
+Clases y funciones definidas:
+- FORMATOS_EXPORTACION: Tipo de contenido y extensión de cada formato
+- formato_disponible: Indica si el formato se puede generar (dependencia instalada)
+- generar_exportacion: Generador de bytes del archivo en el formato pedido
+"""
+
+# IMPORTACIONES
+# ======================================
+import csv  # Para los encabezados del CSV
+import datetime  # Para convertir FechaPago a fecha (sin hora)
+import decimal  # Para los decimales de Parquet
+import io  # Buffers de texto y bytes
+import itertools  # Para leer las calificaciones por bloques (islice)
+import os  # Para eliminar el archivo temporal del XLSX
+import tempfile  # Archivo temporal donde se escribe el XLSX
+from django.conf import settings  # Para EXPORTACION_FILAS_POR_BLOQUE
+from .serializadores import CAMPOS_FACTORES, ENCABEZADOS_CSV, SERIALIZADOR_EXPORTACION, _texto_decimal
+
+try:
+    import pyarrow as pa  # Tablas por columnas (opcional)
+    import pyarrow.parquet as pq  # Escritura de archivos Parquet
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False  # Sin pyarrow no se puede exportar a Parquet
+
+try:
+    import xlsxwriter  # Escritura de archivos Excel fila por fila (opcional)
+    HAS_XLSXWRITER = True
+except ImportError:
+    HAS_XLSXWRITER = False  # Sin xlsxwriter no se puede exportar a XLSX
+
+
+# Tipo de contenido (Content-Type) y extensión del archivo de cada formato
+FORMATOS_EXPORTACION = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+}
+
+# Librería que necesita cada formato (para el mensaje de error si no está instalada)
+DEPENDENCIAS_FORMATO = {
+    'parquet': 'pyarrow',
+    'xlsx': 'xlsxwriter',
+}
+
+# Filas por hoja de Excel (límite de Excel, incluye la fila de encabezados)
+FILAS_POR_HOJA_XLSX = 1048576
+
+# Tamaño de cada parte del archivo XLSX que se envía al navegador
+BYTES_POR_PARTE_XLSX = 64 * 1024
+
+
+def formato_disponible(formato):
+    """
+    Indica si un formato de exportación se puede generar en este servidor.
+
+    Argumentos:
+        formato: 'csv', 'parquet' o 'xlsx'
+
+    Returns (lo que devuelve la funcion):
+        bool: False si el formato no existe o falta su librería
+    """
+    if formato == 'parquet':
+        return HAS_PYARROW
+    if formato == 'xlsx':
+        return HAS_XLSXWRITER
+    return formato in FORMATOS_EXPORTACION
+
+
+def _por_bloques(calificaciones):
+    """
+    Recorre las calificaciones en listas de EXPORTACION_FILAS_POR_BLOQUE documentos.
+
+    Returns (lo que devuelve la funcion):
+        generator: Listas de diccionarios de pymongo
+    """
+    filas_por_bloque = getattr(settings, 'EXPORTACION_FILAS_POR_BLOQUE', 1000)
+    cursor = iter(calificaciones)
+    while True:
+        bloque = list(itertools.islice(cursor, filas_por_bloque))
+        if not bloque:
+            return
+        yield bloque
+
+
+# =====================================================================
+# VALORES TIPADOS (Parquet y XLSX)
+# =====================================================================
+
+def _fecha(valor):
+    """FechaPago sin la hora (se guarda como datetime a medianoche), o None."""
+    return valor.date() if isinstance(valor, datetime.datetime) else valor
+
+
+def _decimal(valor):
+    """Decimal con el mismo valor que el texto del CSV (8 decimales, 0 si no existe)."""
+    return decimal.Decimal(_texto_decimal(valor))
+
+
+def _booleano(valor):
+    """True o False (los documentos sin el campo se consideran False, como en el CSV)."""
+    return bool(valor)
+
+
+def _tal_cual(valor):
+    """El valor guardado (None si el documento no tiene el campo)."""
+    return valor
+
+
+# Conversión de cada tipo de columna de SERIALIZADOR_EXPORTACION al valor tipado
+VALORES_TIPADOS = {
+    'texto': _tal_cual,
+    'entero': _tal_cual,
+    'fecha': _fecha,
+    'fecha_hora': _tal_cual,
+    'decimal': _decimal,
+    'booleano': _booleano,
+}
+
+# (encabezado, campo de MongoDB, tipo) de todas las columnas, en el orden del CSV
+COLUMNAS_EXPORTACION = (
+    (('ID', '_id', 'id'),)
+    + SERIALIZADOR_EXPORTACION.columnas
+    + tuple((campo, campo, 'decimal') for campo in CAMPOS_FACTORES)
+)
+
+
+def _columnas_del_bloque(bloque):
+    """
+    Convierte un bloque de documentos en listas por columna con valores tipados.
+
+    Returns (lo que devuelve la funcion):
+        list: Una lista de valores por cada columna de COLUMNAS_EXPORTACION
+    """
+    columnas = []
+    for _encabezado, campo, tipo in COLUMNAS_EXPORTACION:
+        if tipo == 'id':
+            columnas.append([str(doc['_id']) for doc in bloque])
+        else:
+            convertir = VALORES_TIPADOS[tipo]
+            columnas.append([convertir(doc.get(campo)) for doc in bloque])
+    return columnas
+
+
+# =====================================================================
+# CSV
+# =====================================================================
+
+def _generar_csv(calificaciones):
+    """
+    Genera el CSV de exportación por partes.
+
+    POR QUÉ: Solo hay en memoria un bloque de filas a la vez, y el primer byte
+    (los encabezados) sale antes de leer la primera calificación.
+    """
+    # Primera fila contiene los nombres de las columnas (datos básicos y factores F8 a F37)
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(ENCABEZADOS_CSV)
+    yield buffer.getvalue().encode('utf-8')
+
+    # a_csv_bytes escribe cada bloque de filas de una vez
+    for bloque in _por_bloques(calificaciones):
+        yield SERIALIZADOR_EXPORTACION.a_csv_bytes(bloque)
+
+
+# =====================================================================
+# PARQUET
+# =====================================================================
+
+class _SalidaPorPartes(io.RawIOBase):
+    """
+    Destino de escritura que guarda los bytes hasta que el generador los retira.
+
+    POR QUÉ: ParquetWriter escribe en un archivo; con este destino cada grupo de filas
+    se envía al navegador apenas se escribe, sin armar el archivo completo.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._partes = []
+        self._posicion = 0
+
+    def writable(self):
+        return True
+
+    def write(self, datos):
+        self._partes.append(bytes(datos))
+        self._posicion += len(datos)
+        return len(datos)
+
+    def tell(self):
+        return self._posicion
+
+    def retirar(self):
+        """Devuelve los bytes escritos desde el último retiro."""
+        datos = b''.join(self._partes)
+        self._partes = []
+        return datos
+
+
+def _esquema_parquet():
+    """
+    Esquema Parquet de la exportación: mismos encabezados que el CSV, con tipos.
+
+    Los decimales se guardan como decimal128(38, 8): el mismo valor exacto que el
+    DecimalField(precision=8) del modelo (pandas los lee como decimal.Decimal).
+    """
+    tipos = {
+        'id': pa.string(),
+        'texto': pa.string(),
+        'entero': pa.int64(),
+        'fecha': pa.date32(),
+        'fecha_hora': pa.timestamp('ms'),
+        'decimal': pa.decimal128(38, 8),
+        'booleano': pa.bool_(),
+    }
+    return pa.schema([(encabezado, tipos[tipo]) for encabezado, _campo, tipo in COLUMNAS_EXPORTACION])
+
+
+def _generar_parquet(calificaciones):
+    """
+    Genera el archivo Parquet por partes: un grupo de filas (row group) por bloque.
+    """
+    esquema = _esquema_parquet()
+    salida = _SalidaPorPartes()
+    escritor = pq.ParquetWriter(salida, esquema, compression='zstd')
+    try:
+        for bloque in _por_bloques(calificaciones):
+            columnas = _columnas_del_bloque(bloque)
+            escritor.write_table(pa.Table.from_arrays(
+                [pa.array(valores, type=campo.type) for valores, campo in zip(columnas, esquema)],
+                schema=esquema
+            ))
+            yield salida.retirar()
+    finally:
+        # Al cerrar se escribe el pie del archivo (metadatos); también sin filas el archivo es válido
+        escritor.close()
+    yield salida.retirar()
+
+
+# =====================================================================
+# XLSX
+# =====================================================================
+
+def _escritores_xlsx(hoja, tipos, formatos):
+    """
+    Función de escritura de cada columna de una hoja según su tipo.
+
+    POR QUÉ: hoja.write() revisa el tipo de cada valor; con el método de cada tipo
+    (write_number, write_string, ...) se evita esa revisión en cada celda.
+
+    Returns (lo que devuelve la funcion):
+        list: Una función (fila, columna, valor) por columna
+    """
+    def numero(fila, columna, valor):
+        hoja.write_number(fila, columna, valor)
+
+    def decimal_(fila, columna, valor):
+        hoja.write_number(fila, columna, float(valor), formatos['decimal'])  # Excel solo guarda números de punto flotante
+
+    def fecha(fila, columna, valor):
+        hoja.write_datetime(fila, columna, valor, formatos['fecha'])
+
+    def fecha_hora(fila, columna, valor):
+        hoja.write_datetime(fila, columna, valor, formatos['fecha_hora'])
+
+    def booleano(fila, columna, valor):
+        hoja.write_boolean(fila, columna, valor)
+
+    escritores = {
+        'entero': numero,
+        'decimal': decimal_,
+        'fecha': fecha,
+        'fecha_hora': fecha_hora,
+        'booleano': booleano,
+    }
+    # 'id' y 'texto' (y cualquier valor guardado con otro tipo) usan write(), que elige según el valor
+    return [escritores.get(tipo, hoja.write) for tipo in tipos]
+
+
+def _generar_xlsx(calificaciones):
+    """
+    Genera el archivo Excel y lo envía por partes.
+
+    El libro se escribe en un archivo temporal con constant_memory (cada fila se guarda
+    en disco al pasar a la siguiente). Si hay más filas de las que admite una hoja
+    de Excel, se continúa en otra hoja ('Calificaciones 2', ...).
+    """
+    descriptor, ruta = tempfile.mkstemp(suffix='.xlsx')
+    os.close(descriptor)
+    try:
+        libro = xlsxwriter.Workbook(ruta, {'constant_memory': True})
+        formatos = {
+            'fecha': libro.add_format({'num_format': 'yyyy-mm-dd'}),
+            'fecha_hora': libro.add_format({'num_format': 'yyyy-mm-dd hh:mm:ss'}),
+            'decimal': libro.add_format({'num_format': '0.00000000'}),
+        }
+        tipos = [tipo for _encabezado, _campo, tipo in COLUMNAS_EXPORTACION]
+
+        hojas = 0
+        fila = FILAS_POR_HOJA_XLSX  # Fuerza la creación de la primera hoja
+        for bloque in _por_bloques(calificaciones):
+            columnas = _columnas_del_bloque(bloque)
+            for valores in zip(*columnas):
+                if fila == FILAS_POR_HOJA_XLSX:
+                    hojas += 1
+                    hoja = libro.add_worksheet('Calificaciones' if hojas == 1 else f'Calificaciones {hojas}')
+                    hoja.write_row(0, 0, ENCABEZADOS_CSV)
+                    escritores = _escritores_xlsx(hoja, tipos, formatos)
+                    fila = 1
+                for columna, valor in enumerate(valores):
+                    if valor is not None:
+                        escritores[columna](fila, columna, valor)
+                fila += 1
+        if hojas == 0:
+            libro.add_worksheet('Calificaciones').write_row(0, 0, ENCABEZADOS_CSV)
+        libro.close()
+
+        with open(ruta, 'rb') as archivo:
+            while True:
+                parte = archivo.read(BYTES_POR_PARTE_XLSX)
+                if not parte:
+                    break
+                yield parte
+    finally:
+        os.remove(ruta)
+
+
+# =====================================================================
+# SELECCIÓN DEL FORMATO
+# =====================================================================
+
+GENERADORES = {
+    'csv': _generar_csv,
+    'parquet': _generar_parquet,
+    'xlsx': _generar_xlsx,
+}
+
+
+def generar_exportacion(calificaciones, formato='csv'):
+    """
+    Genera el archivo de exportación por partes (para StreamingHttpResponse).
+
+    Argumentos:
+        calificaciones: Consulta proyectada o generador de calificaciones_por_ids (diccionarios de pymongo) ya ordenados
+        formato: 'csv', 'parquet' o 'xlsx' (comprobar antes con formato_disponible)
+
+    Returns (lo que devuelve la funcion):
+        generator: Bytes del archivo
+    """
+    total = 0
+
+    def contar(documentos):
+        nonlocal total
+        for doc in documentos:
+            total += 1
+            yield doc
+
+    try:
+        yield from GENERADORES[formato](contar(calificaciones))
+    except Exception as e:
+        # Los encabezados HTTP ya se enviaron: no se puede responder con un error 500,
+        # el archivo queda incompleto y el error queda registrado en la consola
+        print(f"[EXPORTAR] Error en {formato} después de {total} filas: {e}")
+        raise
+    print(f"[EXPORTAR] {formato.upper()} enviado: {total} calificaciones")
@@ -0,0 +1,212 @@
+"""
+LIMITE_LOGIN.PY - Límite de intentos de inicio de sesión (token bucket)
+========================================================================
+Este archivo contiene el límite de intentos de login por IP y por cuenta que
+login_view aplica antes de buscar el usuario y verificar la contraseña.
+
+POR QUÉ EXISTE ESTE ARCHIVO:
+- login_view calcula bcrypt en cada intento (cientos de milisegundos de CPU):
+  una ráfaga de intentos con contraseñas al azar (credential stuffing) satura la CPU
+  y todas las demás solicitudes se vuelven lentas
+- Con el límite, los intentos que sobran se rechazan sin consultar MongoDB ni calcular bcrypt
+
+CÓMO FUNCIONA (token bucket):
+1. Cada IP y cada correo tienen una "cubeta" con hasta N fichas (la capacidad)
+2. Cada intento de login gasta una ficha de la cubeta de la IP y otra de la cubeta del
+   correo, antes de buscar el usuario y calcular bcrypt
+3. Si la contraseña es correcta, la ficha del correo se devuelve (registrar_login_correcto):
+   los inicios de sesión correctos no gastan los intentos de la cuenta. La ficha se gasta
+   antes y no después de bcrypt para que una ráfaga simultánea contra la misma cuenta
+   (desde muchas IPs) no pase entera mientras la cubeta todavía muestra fichas
+4. Las fichas se recuperan a un ritmo fijo (fichas por minuto) hasta llenar la cubeta
+5. Sin fichas, el intento se rechaza (429) indicando cuántos segundos esperar
+   La capacidad permite ráfagas cortas normales (ej: equivocarse 2 o 3 veces seguidas)
+6. LOGIN_LIMITE_BACKEND elige dónde se guardan las cubetas:
+   'local': en la memoria del proceso (sin dependencias; cada proceso cuenta por separado)
+   'cache': en la caché de Django LOGIN_LIMITE_CACHE (compartida entre procesos si es
+            Redis o Memcached)
+
+Funciones definidas:
+- ip_del_cliente: Devuelve la IP de la solicitud
+- verificar_intento_login: Gasta una ficha de la IP y una del correo, o indica cuánto esperar
+- registrar_login_correcto: Devuelve la ficha del correo (contraseña correcta)
+"""
+
+# IMPORTACIONES
+# ======================================
+import hashlib  # Para que el correo no quede en texto plano en las claves de la caché
+import math  # Para redondear hacia arriba los segundos de espera
+import threading  # Candado de las cubetas locales
+import time  # Para calcular las fichas recuperadas
+from collections import OrderedDict  # Para descartar las cubetas usadas hace más tiempo
+from django.conf import settings  # Para leer LOGIN_LIMITE_*
+from django.core.cache import caches  # Backend compartido (opcional)
+
+
+# Máximo de cubetas en memoria con el backend 'local'
+# POR QUÉ: Un ataque desde muchas IPs o con muchos correos no puede hacer crecer la memoria sin límite;
+# se descartan las usadas hace más tiempo (una cubeta descartada vuelve llena, como una cuenta sin intentos)
+MAXIMO_CUBETAS_LOCALES = 100000
+
+
+def _fichas_actuales(fichas, ultima, capacidad, por_segundo, ahora):
+    """Fichas de una cubeta después de sumar las recuperadas desde 'ultima'."""
+    return min(capacidad, fichas + (ahora - ultima) * por_segundo)
+
+
+def _tomar_ficha(estado, capacidad, por_segundo, ahora):
+    """
+    Intenta gastar una ficha de una cubeta.
+
+    Argumentos:
+        estado: (fichas, ultima) guardado, o None si la cubeta no existe (llena)
+        capacidad: Fichas máximas
+        por_segundo: Fichas recuperadas por segundo
+        ahora: Momento actual (time.time())
+
+    Returns (lo que devuelve la funcion):
+        tuple: (nuevo_estado, segundos_de_espera); segundos_de_espera es 0 si se gastó la ficha
+    """
+    fichas = capacidad if estado is None else _fichas_actuales(estado[0], estado[1], capacidad, por_segundo, ahora)
+    if fichas >= 1:
+        return (fichas - 1, ahora), 0
+    return (fichas, ahora), (1 - fichas) / por_segundo
+
+
+def _devolver_ficha(estado, capacidad, por_segundo, ahora):
+    """
+    Devuelve una ficha a una cubeta (sin superar la capacidad).
+
+    Returns (lo que devuelve la funcion):
+        tuple: Nuevo estado (fichas, ultima), o None si la cubeta no existe (ya está llena)
+    """
+    if estado is None:
+        return None
+    return min(capacidad, _fichas_actuales(estado[0], estado[1], capacidad, por_segundo, ahora) + 1), ahora
+
+
+class _CubetasLocales:
+    """Cubetas guardadas en la memoria del proceso (backend 'local')."""
+
+    def __init__(self):
+        self._cubetas = OrderedDict()  # clave -> (fichas, ultima)
+        self._candado = threading.Lock()
+
+    def tomar(self, clave, capacidad, por_segundo):
+        with self._candado:
+            nuevo_estado, espera = _tomar_ficha(self._cubetas.get(clave), capacidad, por_segundo, time.time())
+            self._cubetas[clave] = nuevo_estado
+            self._cubetas.move_to_end(clave)
+            while len(self._cubetas) > MAXIMO_CUBETAS_LOCALES:
+                self._cubetas.popitem(last=False)
+            return espera
+
+    def devolver(self, clave, capacidad, por_segundo):
+        with self._candado:
+            nuevo_estado = _devolver_ficha(self._cubetas.get(clave), capacidad, por_segundo, time.time())
+            if nuevo_estado is not None:
+                self._cubetas[clave] = nuevo_estado
+
+    def limpiar(self):
+        with self._candado:
+            self._cubetas.clear()
+
+
+class _CubetasEnCache:
+    """
+    Cubetas guardadas en una caché de Django (backend 'cache').
+
+    La lectura y la escritura no son atómicas: dos intentos simultáneos de la misma
+    IP o cuenta pueden gastar la misma ficha. Para limitar ráfagas de cientos de intentos esa
+    diferencia no importa, y evita depender de operaciones propias de Redis.
+    """
+
+    def tomar(self, clave, capacidad, por_segundo):
+        cache = caches[getattr(settings, 'LOGIN_LIMITE_CACHE', 'default')]
+        nuevo_estado, espera = _tomar_ficha(cache.get(clave), capacidad, por_segundo, time.time())
+        # La entrada vence cuando la cubeta ya estaría llena otra vez (no hace falta guardarla más)
+        cache.set(clave, nuevo_estado, timeout=math.ceil(capacidad / por_segundo) + 1)
+        return espera
+
+    def devolver(self, clave, capacidad, por_segundo):
+        cache = caches[getattr(settings, 'LOGIN_LIMITE_CACHE', 'default')]
+        nuevo_estado = _devolver_ficha(cache.get(clave), capacidad, por_segundo, time.time())
+        if nuevo_estado is not None:
+            cache.set(clave, nuevo_estado, timeout=math.ceil(capacidad / por_segundo) + 1)
+
+
+_locales = _CubetasLocales()
+_en_cache = _CubetasEnCache()
+
+
+def _cubetas():
+    """Devuelve el backend de cubetas según LOGIN_LIMITE_BACKEND."""
+    return _en_cache if getattr(settings, 'LOGIN_LIMITE_BACKEND', 'local') == 'cache' else _locales
+
+
+def ip_del_cliente(request):
+    """
+    Devuelve la IP de la solicitud.
+
+    X-Forwarded-For solo se usa con LOGIN_LIMITE_CONFIAR_EN_PROXY = True (servidor detrás
+    de un proxy propio): si no, cualquiera podría enviar ese encabezado y cambiar de IP en cada intento.
+
+    Argumentos:
+        request: Objeto HttpRequest de Django
+
+    Returns (lo que devuelve la funcion):
+        str: IP del cliente ('' si no se conoce)
+    """
+    if getattr(settings, 'LOGIN_LIMITE_CONFIAR_EN_PROXY', False):
+        reenviada = request.META.get('HTTP_X_FORWARDED_FOR', '')
+        if reenviada:
+            return reenviada.split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def _cubeta_cuenta(correo):
+    """Clave, capacidad y fichas por segundo de la cubeta de un correo."""
+    # El correo se guarda como hash: las claves de la caché no deben exponer direcciones
+    correo_normalizado = (correo or '').strip().lower()
+    clave_correo = hashlib.sha256(correo_normalizado.encode('utf-8')).hexdigest()
+    capacidad_cuenta, por_minuto_cuenta = getattr(settings, 'LOGIN_LIMITE_CUENTA', (5, 2))
+    return f'login:cuenta:{clave_correo}', capacidad_cuenta, por_minuto_cuenta / 60
+
+
+def verificar_intento_login(ip, correo):
+    """
+    Gasta una ficha de la cubeta de la IP y una de la cubeta del correo.
+
+    Si la contraseña resulta correcta, login_view devuelve la ficha del correo
+    (registrar_login_correcto): un inicio de sesión correcto no gasta los intentos de la cuenta.
+
+    Argumentos:
+        ip: IP del cliente (ip_del_cliente)
+        correo: Correo ingresado en el formulario
+
+    Returns (lo que devuelve la funcion):
+        int: 0 si el intento está permitido, o los segundos que hay que esperar
+    """
+    if not getattr(settings, 'LOGIN_LIMITE_ACTIVO', True):
+        return 0
+
+    cubetas = _cubetas()
+    capacidad_ip, por_minuto_ip = getattr(settings, 'LOGIN_LIMITE_IP', (20, 10))
+    espera = cubetas.tomar(f'login:ip:{ip}', capacidad_ip, por_minuto_ip / 60)
+    if espera:
+        return math.ceil(espera)
+
+    return math.ceil(cubetas.tomar(*_cubeta_cuenta(correo)))
+
+
+def registrar_login_correcto(correo):
+    """
+    Devuelve la ficha del correo que gastó verificar_intento_login, después de un inicio
+    de sesión correcto.
+
+    Argumentos:
+        correo: Correo ingresado en el formulario
+    """
+    if not getattr(settings, 'LOGIN_LIMITE_ACTIVO', True):
+        return
+    _cubetas().devolver(*_cubeta_cuenta(correo))
@@ -0,0 +1,158 @@
+"""
+BENCHMARK_SERIALIZADOR.PY - Mide la serialización de calificaciones antes y después del serializador compilado
+==============================================================================================================
+Uso:
+    python manage.py benchmark_serializador                # 100.000 filas
+    python manage.py benchmark_serializador --filas 20000
+
+POR QUÉ EXISTE ESTE COMANDO:
+- Permite comprobar con números (filas por segundo) cuánto se gana con prueba/serializadores.py
+  frente al bucle anterior (documento Calificacion completo + strftime + getattr por factor)
+- No necesita MongoDB: genera documentos con la misma forma que devuelve pymongo
+
+CÓMO FUNCIONA:
+1. Genera N documentos de calificación con valores al azar (floats de 8 decimales, fechas, textos)
+2. ANTES: crea el documento Calificacion completo (_from_son, como hace MongoEngine al leer)
+   y arma el dict / fila CSV con el bucle que tenían las vistas
+3. DESPUÉS: usa solo los campos proyectados y el serializador compilado
+4. Compara que ambas salidas sean idénticas y muestra filas/segundo de cada una
+"""
+
+# IMPORTACIONES
+# ======================================
+import datetime  # Para generar fechas
+import random  # Para generar valores de prueba
+import time  # Para medir el tiempo
+from bson import ObjectId  # IDs de los documentos generados
+from django.core.management.base import BaseCommand, CommandError  # Base de los comandos de manage.py
+from prueba.models import Calificacion
+from prueba.serializadores import (
+    SERIALIZADOR_LISTADO, SERIALIZADOR_EXPORTACION, CAMPOS_LISTADO, CAMPOS_EXPORTACION
+)
+
+
+def _generar_documentos(cantidad, semilla):
+    """
+    Genera documentos de calificación con la forma en que pymongo los devuelve (todos los campos).
+
+    Returns (lo que devuelve la funcion):
+        list: Diccionarios {'_id': ObjectId, 'Ejercicio': ..., 'Factor08': float, 'Monto08': float, ...}
+    """
+    aleatorio = random.Random(semilla)
+    base = datetime.datetime(2024, 1, 1)
+    documentos = []
+    for _ in range(cantidad):
+        doc = {
+            '_id': ObjectId(),
+            'Mercado': aleatorio.choice(['acciones', 'CFI', 'Fondos mutuos']),
+            'Origen': aleatorio.choice(['csv', 'corredor']),
+            'hash_archivo_csv': '0' * 64,
+            'Ejercicio': aleatorio.randint(2015, 2025),
+            'Instrumento': f'INS{aleatorio.randint(1, 9999)}',
+            'FechaPago': base + datetime.timedelta(days=aleatorio.randint(0, 700)),
+            'SecuenciaEvento': aleatorio.randint(0, 50),
+            'Descripcion': aleatorio.choice(['', 'Dividendo', 'Reparto de capital']),
+            'FechaAct': base + datetime.timedelta(seconds=aleatorio.randint(0, 10 ** 8), milliseconds=aleatorio.randint(0, 999)),
+            'Dividendo': round(aleatorio.random() * 1000, 8),
+            'ISFUT': aleatorio.random() < 0.1,
+            'ValorHistorico': round(aleatorio.random() * 1000, 8),
+            'FactorActualizacion': round(aleatorio.random(), 8),
+            'SumaBase': round(aleatorio.random() * 10 ** 6, 2),
+        }
+        for i in range(8, 38):
+            # La mitad de los factores en 0 (lo habitual en los archivos reales)
+            doc[f'Factor{i:02d}'] = round(aleatorio.random(), 8) if aleatorio.random() < 0.5 else 0.0
+            doc[f'Monto{i:02d}'] = round(aleatorio.random() * 10 ** 5, 2)
+        documentos.append(doc)
+    return documentos
+
+
+# =====================================================================
+# BUCLES ANTERIORES (copia de lo que hacían las vistas, para comparar)
+# =====================================================================
+
+def _dict_anterior(cal):
+    """Diccionario de la tabla como lo armaban home_view y buscar_calificaciones_view."""
+    cal_data = {
+        'id': str(cal.id) if cal.id else '',
+        'ejercicio': cal.Ejercicio or '',
+        'instrumento': cal.Instrumento or '',
+        'fecha_pago': cal.FechaPago.strftime('%Y-%m-%d') if cal.FechaPago else '',
+        'descripcion': cal.Descripcion or '',
+        'secuencia_evento': cal.SecuenciaEvento or '',
+        'fecha_act': cal.FechaAct.strftime('%Y-%m-%d %H:%M:%S') if cal.FechaAct else '',
+        'mercado': cal.Mercado or '',
+        'origen': cal.Origen or '',
+        'factores': {}
+    }
+    for i in range(8, 38):
+        field_name = f'Factor{i:02d}'
+        valor = getattr(cal, field_name, 0.0)
+        cal_data['factores'][field_name] = str(valor) if valor else '0.0'
+    return cal_data
+
+
+def _fila_anterior(cal):
+    """Fila CSV como la armaba exportar_calificaciones_view."""
+    row = [
+        str(cal.id) if cal.id else '',
+        cal.Ejercicio or '',
+        cal.Mercado or '',
+        cal.Origen or '',
+        cal.Instrumento or '',
+        cal.FechaPago.strftime('%Y-%m-%d') if cal.FechaPago else '',
+        cal.SecuenciaEvento or '',
+        cal.Descripcion or '',
+        cal.FechaAct.strftime('%Y-%m-%d %H:%M:%S') if cal.FechaAct else '',
+        str(cal.Dividendo) if cal.Dividendo else '0.0',
+        str(cal.ValorHistorico) if cal.ValorHistorico else '0.0',
+        str(cal.FactorActualizacion) if cal.FactorActualizacion else '0.0',
+        cal.Anho or '',
+        'True' if cal.ISFUT else 'False'
+    ]
+    for i in range(8, 38):
+        valor = getattr(cal, f'Factor{i:02d}', 0.0)
+        row.append(str(valor) if valor else '0.0')
+    return row
+
+
+class Command(BaseCommand):
+    help = 'Mide filas/segundo de la serialización de calificaciones antes y después del serializador compilado'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--filas', type=int, default=100000, help='Cantidad de documentos a serializar (por defecto 100000)')
+        parser.add_argument('--semilla', type=int, default=1, help='Semilla para generar los documentos')
+
+    def handle(self, *args, **opciones):
+        cantidad = opciones['filas']
+        if cantidad <= 0:
+            raise CommandError('--filas debe ser mayor que 0')
+
+        self.stdout.write(f'Generando {cantidad} documentos...')
+        documentos = _generar_documentos(cantidad, opciones['semilla'])
+
+        casos = (
+            ('JSON (tabla del dashboard)', CAMPOS_LISTADO, _dict_anterior, SERIALIZADOR_LISTADO.a_dict),
+            ('CSV (exportación)', CAMPOS_EXPORTACION, _fila_anterior, SERIALIZADOR_EXPORTACION.a_fila),
+        )
+        for nombre, campos, anterior, nuevo in casos:
+            self.stdout.write('')
+            self.stdout.write(self.style.MIGRATE_HEADING(nombre))
+
+            # ANTES: documento completo (todos los campos convertidos por MongoEngine) + bucle anterior
+            inicio = time.perf_counter()
+            salida_anterior = [anterior(Calificacion._from_son(doc)) for doc in documentos]
+            segundos_anterior = time.perf_counter() - inicio
+
+            # DESPUÉS: solo los campos proyectados (como los entrega only().as_pymongo()) + serializador compilado
+            proyectados = [{campo: doc[campo] for campo in ('_id',) + campos if campo in doc} for doc in documentos]
+            inicio = time.perf_counter()
+            salida_nueva = [nuevo(doc) for doc in proyectados]
+            segundos_nuevo = time.perf_counter() - inicio
+
+            if salida_anterior != salida_nueva:
+                raise CommandError(f'{nombre}: la salida del serializador no coincide con la anterior')
+
+            self.stdout.write(f'  Antes:   {cantidad / segundos_anterior:12,.0f} filas/s ({segundos_anterior:.2f} s)')
+            self.stdout.write(f'  Después: {cantidad / segundos_nuevo:12,.0f} filas/s ({segundos_nuevo:.2f} s)')
+            self.stdout.write(self.style.SUCCESS(f'  {segundos_anterior / segundos_nuevo:.1f}x más rápido, salida idéntica'))
@@ -0,0 +1,105 @@
+"""
+CALIBRAR_BCRYPT.PY - Elige el costo de bcrypt según el tiempo objetivo en este servidor
+========================================================================================
+Uso:
+    python manage.py calibrar_bcrypt                    # Objetivo: 250 ms por verificación
+    python manage.py calibrar_bcrypt --objetivo-ms 100
+    python manage.py calibrar_bcrypt --repeticiones 5 --costo-maximo 15
+
+POR QUÉ EXISTE ESTE COMANDO:
+- El tiempo de bcrypt depende de la CPU: el mismo costo puede tardar 80 ms en un
+  servidor y 400 ms en otro
+- Un costo muy alto satura la CPU en el pico de inicios de sesión; uno muy bajo
+  facilita los ataques de fuerza bruta. Conviene el costo más alto que cumpla el objetivo
+
+CÓMO FUNCIONA:
+1. Mide checkpw con cada costo desde --costo-minimo (mediana de --repeticiones)
+2. Se detiene al superar el doble del objetivo (los costos siguientes tardan aún más)
+3. Sugiere el costo más alto cuya mediana no supera el objetivo
+4. Muestra cuántas verificaciones por segundo soporta el proceso con CONTRASENAS_HILOS hilos
+"""
+
+# IMPORTACIONES
+# ======================================
+import statistics  # Para la mediana de las mediciones
+import time  # Para medir el tiempo
+import bcrypt  # Algoritmo de hash de contraseñas
+from django.conf import settings  # Para mostrar el costo y los hilos configurados
+from django.core.management.base import BaseCommand, CommandError  # Base de los comandos de manage.py
+
+
+# Contraseña de prueba (el tiempo de bcrypt no depende de la contraseña)
+CONTRASENA_DE_PRUEBA = b'calibracion-bcrypt'
+
+
+def _medir_costo(costo, repeticiones):
+    """
+    Mide cuánto tarda una verificación con un costo de bcrypt.
+
+    Argumentos:
+        costo: Costo de bcrypt (4 a 31)
+        repeticiones: Cantidad de mediciones
+
+    Returns (lo que devuelve la funcion):
+        float: Mediana de los tiempos de checkpw, en milisegundos
+    """
+    hash_de_prueba = bcrypt.hashpw(CONTRASENA_DE_PRUEBA, bcrypt.gensalt(rounds=costo))
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        bcrypt.checkpw(CONTRASENA_DE_PRUEBA, hash_de_prueba)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos)
+
+
+class Command(BaseCommand):
+    help = 'Mide bcrypt con cada costo en este servidor y sugiere CONTRASENAS_COSTO_BCRYPT para un tiempo objetivo'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--objetivo-ms', type=float, default=250, help='Tiempo máximo por verificación en milisegundos (por defecto 250)')
+        parser.add_argument('--repeticiones', type=int, default=3, help='Mediciones por costo (se usa la mediana, por defecto 3)')
+        parser.add_argument('--costo-minimo', type=int, default=10, help='Primer costo a medir (por defecto 10)')
+        parser.add_argument('--costo-maximo', type=int, default=16, help='Último costo a medir (por defecto 16)')
+
+    def handle(self, *args, **opciones):
+        objetivo = opciones['objetivo_ms']
+        repeticiones = opciones['repeticiones']
+        costo_minimo = opciones['costo_minimo']
+        costo_maximo = opciones['costo_maximo']
+        if objetivo <= 0 or repeticiones <= 0:
+            raise CommandError('--objetivo-ms y --repeticiones deben ser mayores que 0')
+        if not 4 <= costo_minimo <= costo_maximo <= 31:
+            raise CommandError('Los costos deben cumplir 4 <= --costo-minimo <= --costo-maximo <= 31')
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f'Tiempo de una verificación (objetivo: {objetivo:.0f} ms):'))
+        sugerido = None
+        sugerido_ms = None
+        for costo in range(costo_minimo, costo_maximo + 1):
+            milisegundos = _medir_costo(costo, repeticiones)
+            cumple = milisegundos <= objetivo
+            linea = f'  costo {costo:2d}: {milisegundos:9.1f} ms'
+            self.stdout.write(linea if cumple else self.style.WARNING(f'{linea}  (supera el objetivo)'))
+            if cumple:
+                sugerido, sugerido_ms = costo, milisegundos
+            if milisegundos > objetivo * 2:
+                break  # Cada costo siguiente tarda el doble: no tiene sentido seguir midiendo
+
+        self.stdout.write('')
+        if sugerido is None:
+            raise CommandError(
+                f'Ningún costo desde {costo_minimo} cumple el objetivo de {objetivo:.0f} ms; '
+                'pruebe con un --costo-minimo menor o un objetivo mayor'
+            )
+
+        hilos = getattr(settings, 'CONTRASENAS_HILOS', 2)
+        self.stdout.write(self.style.SUCCESS(f'Costo sugerido: CONTRASENAS_COSTO_BCRYPT = {sugerido}'))
+        self.stdout.write(
+            f'  Con CONTRASENAS_HILOS = {hilos}, cada proceso verifica hasta '
+            f'{hilos * 1000 / sugerido_ms:.0f} contraseñas por segundo'
+        )
+        actual = getattr(settings, 'CONTRASENAS_COSTO_BCRYPT', 12)
+        if actual != sugerido:
+            self.stdout.write(
+                f'  Costo configurado actualmente: {actual}. Al cambiarlo, los hashes existentes '
+                'se actualizan cuando cada usuario inicia sesión.'
+            )
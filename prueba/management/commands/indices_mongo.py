@@ -0,0 +1,276 @@
+"""
+INDICES_MONGO.PY - Comando para crear y verificar los índices de MongoDB
+=========================================================================
+Uso:
+    python manage.py indices_mongo                  # Crea los índices que falten y revisa las consultas
+    python manage.py indices_mongo --solo-verificar # Solo informa, no crea nada
+    python manage.py indices_mongo --perfil         # Además lista las consultas lentas del perfilador de MongoDB
+
+POR QUÉ EXISTE ESTE COMANDO:
+- Los índices se declaran en el 'meta' de cada modelo (models.py), pero MongoEngine solo
+  los crea la primera vez que el proceso web usa la colección; en una colección grande
+  eso bloquea la primera solicitud. Con este comando se crean al desplegar.
+- Permite comprobar que cada consulta frecuente de la aplicación usa un índice:
+  una consulta con COLLSCAN lee la colección completa y se vuelve lenta a medida que crece
+
+CÓMO FUNCIONA:
+1. Para cada modelo compara los índices declarados con los que existen en MongoDB
+2. Crea los que falten (ensure_indexes), salvo con --solo-verificar
+3. Ejecuta explain() sobre las consultas frecuentes de la aplicación y muestra el plan elegido
+4. Con --perfil, muestra las consultas registradas por el perfilador que hicieron COLLSCAN
+"""
+
+# IMPORTACIONES
+# ======================================
+import datetime  # Para las consultas de ejemplo por fecha
+from django.core.management.base import BaseCommand, CommandError  # Base de los comandos de manage.py
+from mongoengine.queryset.visitor import Q  # Para la consulta de ejemplo de la paginación por cursor
+from bson import ObjectId  # Para los IDs de ejemplo
+from prueba.models import usuarios, Calificacion, Log, ArchivoCSV, CargaPreparada, TrabajoCarga, SesionMongo
+
+
+# Modelos cuyos índices administra el comando
+MODELOS = (usuarios, Calificacion, Log, ArchivoCSV, CargaPreparada, TrabajoCarga, SesionMongo)
+
+
+def _consultas_frecuentes():
+    """
+    Consultas que la aplicación hace con más frecuencia (las mismas formas que usan las vistas).
+
+    Los valores son de ejemplo: para el plan de MongoDB importa qué campos se filtran
+    y por cuáles se ordena, no el valor buscado.
+
+    Returns (lo que devuelve la funcion):
+        list: Tuplas (descripción, queryset)
+    """
+    ahora = datetime.datetime.now()
+    id_ejemplo = ObjectId()
+    despues_del_cursor = Q(FechaAct__lt=ahora) | Q(FechaAct=ahora, id__lt=id_ejemplo) | Q(FechaAct=None)
+    logs_despues_del_cursor = (
+        Q(fecharegistrada__lt=ahora) | Q(fecharegistrada=ahora, id__lt=id_ejemplo) | Q(fecharegistrada=None)
+    )
+    return [
+        ('Calificaciones sin filtros (dashboard)',
+         Calificacion.objects().order_by('-FechaAct', '-id').limit(101)),
+        ('Calificaciones página siguiente (cursor)',
+         Calificacion.objects(despues_del_cursor).order_by('-FechaAct', '-id').limit(101)),
+        ('Calificaciones por mercado',
+         Calificacion.objects(Mercado='acciones').order_by('-FechaAct', '-id').limit(101)),
+        ('Calificaciones por período',
+         Calificacion.objects(Ejercicio=ahora.year).order_by('-FechaAct', '-id').limit(101)),
+        ('Calificaciones por mercado, origen y período',
+         Calificacion.objects(Mercado='acciones', Origen='csv', Ejercicio=ahora.year).order_by('-FechaAct', '-id').limit(101)),
+        ('Calificaciones de un archivo CSV',
+         Calificacion.objects(Origen='csv', hash_archivo_csv='0' * 64)),
+        ('Logs de una calificación',
+         Log.objects(iddocumento=id_ejemplo).order_by('-fecharegistrada')),
+        ('Logs más recientes (primera página)',
+         Log.objects().order_by('-fecharegistrada', '-id').limit(51)),
+        ('Logs página siguiente (cursor)',
+         Log.objects(logs_despues_del_cursor).order_by('-fecharegistrada', '-id').limit(51)),
+        ('Logs por rango de fechas',
+         Log.objects(fecharegistrada__gte=ahora - datetime.timedelta(days=30), fecharegistrada__lt=ahora)
+         .order_by('-fecharegistrada', '-id').limit(51)),
+        ('Logs por usuario que realizó la acción',
+         Log.objects(Usuarioid=id_ejemplo).order_by('-fecharegistrada', '-id').limit(51)),
+        ('Logs por acción',
+         Log.objects(accion='Modificar Calificacion').order_by('-fecharegistrada', '-id').limit(51)),
+        ('Logs por documento afectado',
+         Log.objects(Q(iddocumento=id_ejemplo) | Q(usuario_afectado=id_ejemplo)).order_by('-fecharegistrada', '-id').limit(51)),
+        ('Logs por archivo CSV',
+         Log.objects(hash_archivo_csv='0' * 64).order_by('-fecharegistrada', '-id').limit(51)),
+        ('Historial de un campo de una calificación',
+         Log.objects(iddocumento=id_ejemplo, cambios__campo='Factor12').order_by('-fecharegistrada', '-id').limit(101)),
+        ('Cambios de un campo en todas las calificaciones',
+         Log.objects(cambios__campo='Factor12').order_by('-fecharegistrada', '-id').limit(51)),
+        ('Usuario por correo (login)',
+         usuarios.objects(correo='ejemplo@ejemplo.cl')),
+        ('Archivo CSV por hash (duplicados)',
+         ArchivoCSV.objects(hash_archivo='0' * 64)),
+        ('Trabajos de carga activos de un archivo',
+         TrabajoCarga.objects(hash_archivo='0' * 64, estado__in=['pendiente', 'procesando'])),
+    ]
+
+
+def _comparar_indices(modelo):
+    """
+    Compara los índices declarados en un modelo con los que existen en su colección.
+
+    POR QUÉ no se usa modelo.compare_indexes(): accede a la colección con _get_collection(),
+    que crea los índices automáticamente, y --solo-verificar nunca vería uno faltante.
+
+    Argumentos:
+        modelo: Clase del documento (ej: Calificacion)
+
+    Returns (lo que devuelve la funcion):
+        dict: {'missing': índices declarados que no existen, 'extra': índices existentes no declarados}
+    """
+    coleccion = modelo._get_db()[modelo._get_collection_name()]
+    existentes = [list(indice['key']) for indice in coleccion.index_information().values()]
+    declarados = modelo.list_indexes()
+    return {
+        'missing': [indice for indice in declarados if indice not in existentes and indice != [('_id', 1)]],
+        'extra': [indice for indice in existentes if indice not in declarados],
+    }
+
+
+def _etapas_del_plan(plan):
+    """
+    Devuelve las etapas de un plan de explain() desde la más externa a la más interna.
+
+    Argumentos:
+        plan: winningPlan de explain() (o una de sus etapas)
+
+    Returns (lo que devuelve la funcion):
+        list: Nombres de etapa con el índice usado, ej: ['LIMIT', 'FETCH', 'IXSCAN (FechaAct_-1__id_-1)']
+    """
+    # MongoDB 7+ puede devolver el plan clásico dentro de 'queryPlan'
+    plan = plan.get('queryPlan', plan)
+    etapa = plan.get('stage', '?')
+    if plan.get('indexName'):
+        etapa = f"{etapa} ({plan['indexName']})"
+
+    etapas = [etapa]
+    if 'inputStage' in plan:
+        etapas += _etapas_del_plan(plan['inputStage'])
+    for entrada in plan.get('inputStages', []):
+        etapas += _etapas_del_plan(entrada)
+    return etapas
+
+
+class Command(BaseCommand):
+    help = 'Crea o verifica los índices declarados en los modelos y revisa qué consultas frecuentes hacen COLLSCAN'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--solo-verificar', action='store_true',
+            help='Solo informa los índices faltantes, sin crearlos (termina con error si falta alguno)'
+        )
+        parser.add_argument(
+            '--perfil', action='store_true',
+            help='Lista también las consultas con COLLSCAN registradas por el perfilador de MongoDB (system.profile)'
+        )
+
+    def handle(self, *args, **opciones):
+        faltantes = self._revisar_indices(opciones['solo_verificar'])
+        consultas_sin_indice, sin_plan = self._revisar_consultas()
+        if opciones['perfil']:
+            consultas_sin_indice += self._revisar_perfilador()
+
+        self.stdout.write('')
+        if consultas_sin_indice:
+            self.stdout.write(self.style.WARNING(f'{consultas_sin_indice} consulta(s) leen la colección completa (COLLSCAN)'))
+        elif sin_plan:
+            self.stdout.write(self.style.WARNING(f'No se pudo revisar el plan de {sin_plan} consulta(s)'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Ninguna consulta revisada hace COLLSCAN'))
+
+        if opciones['solo_verificar'] and faltantes:
+            raise CommandError(f'Faltan {faltantes} índice(s). Ejecute "python manage.py indices_mongo" para crearlos.')
+
+    # =====================================================================
+    # ÍNDICES DECLARADOS
+    # =====================================================================
+
+    def _revisar_indices(self, solo_verificar):
+        """
+        Compara los índices declarados en cada modelo con los existentes y crea los faltantes.
+
+        Returns (lo que devuelve la funcion):
+            int: Cantidad de índices que faltaban
+        """
+        self.stdout.write(self.style.MIGRATE_HEADING('Índices declarados en los modelos:'))
+        total_faltantes = 0
+        for modelo in MODELOS:
+            coleccion = modelo._get_collection_name()
+            diferencias = _comparar_indices(modelo)
+            faltantes = diferencias['missing']
+            total_faltantes += len(faltantes)
+
+            if faltantes and not solo_verificar:
+                modelo.ensure_indexes()
+                self.stdout.write(self.style.SUCCESS(f'  {coleccion}: {len(faltantes)} índice(s) creado(s)'))
+            elif faltantes:
+                self.stdout.write(self.style.WARNING(f'  {coleccion}: faltan {len(faltantes)} índice(s)'))
+            else:
+                self.stdout.write(f'  {coleccion}: OK')
+
+            for indice in faltantes:
+                self.stdout.write(f'      - {indice}')
+            # Los índices que existen pero no están declarados no se eliminan (pueden ser de otra versión)
+            for indice in diferencias['extra']:
+                self.stdout.write(f'      ? no declarado en el modelo: {indice}')
+
+        return total_faltantes
+
+    # =====================================================================
+    # PLANES DE LAS CONSULTAS FRECUENTES
+    # =====================================================================
+
+    def _revisar_consultas(self):
+        """
+        Ejecuta explain() sobre las consultas frecuentes e informa las que hacen COLLSCAN.
+
+        Returns (lo que devuelve la funcion):
+            tuple: (cantidad de consultas con COLLSCAN, cantidad de consultas sin plan)
+        """
+        self.stdout.write('')
+        self.stdout.write(self.style.MIGRATE_HEADING('Plan de las consultas frecuentes:'))
+        con_collscan = 0
+        sin_plan = 0
+        for descripcion, queryset in _consultas_frecuentes():
+            try:
+                plan = queryset.explain()['queryPlanner']['winningPlan']
+            except Exception as e:
+                sin_plan += 1
+                self.stdout.write(self.style.WARNING(f'  {descripcion}: no se pudo obtener el plan ({e})'))
+                continue
+
+            etapas = _etapas_del_plan(plan)
+            recorrido = ' <- '.join(etapas)
+            if any(etapa.startswith('COLLSCAN') for etapa in etapas):
+                con_collscan += 1
+                self.stdout.write(self.style.ERROR(f'  COLLSCAN  {descripcion}: {recorrido}'))
+            else:
+                self.stdout.write(f'  OK        {descripcion}: {recorrido}')
+        return con_collscan, sin_plan
+
+    def _revisar_perfilador(self):
+        """
+        Lista las consultas con COLLSCAN que registró el perfilador de MongoDB.
+
+        Solo hay datos si el perfilador está activo (db.setProfilingLevel(1) en mongosh);
+        registra las consultas reales de la aplicación, no solo las de _consultas_frecuentes().
+
+        Returns (lo que devuelve la funcion):
+            int: Cantidad de formas de consulta distintas con COLLSCAN
+        """
+        self.stdout.write('')
+        self.stdout.write(self.style.MIGRATE_HEADING('Consultas con COLLSCAN en el perfilador (system.profile):'))
+        base_de_datos = Calificacion._get_db()
+        colecciones = [f'{base_de_datos.name}.{modelo._get_collection_name()}' for modelo in MODELOS]
+
+        # Se agrupan por colección y forma de la consulta (campos filtrados y ordenados)
+        # POR QUÉ: La misma consulta lenta aparece una vez por cada ejecución
+        formas = {}
+        registros = base_de_datos['system.profile'].find(
+            {'planSummary': 'COLLSCAN', 'ns': {'$in': colecciones}},
+            {'ns': 1, 'command': 1, 'millis': 1}
+        ).sort('ts', -1).limit(1000)
+        for registro in registros:
+            comando = registro.get('command', {})
+            forma = (
+                registro['ns'],
+                tuple(sorted(comando.get('filter', {}).keys())),
+                tuple(comando.get('sort', {}).keys())
+            )
+            veces, maximo = formas.get(forma, (0, 0))
+            formas[forma] = (veces + 1, max(maximo, registro.get('millis', 0)))
+
+        if not formas:
+            self.stdout.write('  Sin registros (el perfilador está desactivado o no hubo consultas con COLLSCAN)')
+        for (coleccion, filtro, orden), (veces, maximo) in formas.items():
+            self.stdout.write(self.style.ERROR(
+                f'  {coleccion} filtro={list(filtro)} orden={list(orden)}: {veces} vez/veces, máximo {maximo} ms'
+            ))
+        return len(formas)
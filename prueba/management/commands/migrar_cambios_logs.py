@@ -0,0 +1,111 @@
+"""
+MIGRAR_CAMBIOS_LOGS.PY - Convierte los cambios de los logs antiguos a documentos embebidos
+==========================================================================================
+Uso:
+    python manage.py migrar_cambios_logs              # Convierte todos los logs pendientes
+    python manage.py migrar_cambios_logs --lote 500
+    python manage.py migrar_cambios_logs --simular    # Solo cuenta, no modifica nada
+
+POR QUÉ EXISTE ESTE COMANDO:
+- Antes los cambios de cada log se guardaban como un JSON string en 'cambios_detallados';
+  ahora se guardan como documentos embebidos en 'cambios' (campo, valor_anterior, valor_nuevo)
+- historial_campo_view busca por 'cambios.campo': los logs antiguos no aparecen en el
+  historial de un campo hasta que se conviertan
+
+CÓMO FUNCIONA:
+1. Recorre los logs que tienen 'cambios_detallados' y no tienen 'cambios' (solo lee 'cambios_detallados')
+2. Decodifica el JSON y arma la lista de cambios con los valores como texto
+3. Graba los cambios por lotes con bulk_write ($set de 'cambios'); 'cambios_detallados' no se borra
+4. Los logs con JSON inválido se informan y se dejan como están
+5. Se puede ejecutar varias veces: solo procesa los logs que aún no tienen 'cambios'
+"""
+
+# IMPORTACIONES
+# ======================================
+import json  # Para decodificar los cambios antiguos
+from django.core.management.base import BaseCommand, CommandError  # Base de los comandos de manage.py
+from pymongo import UpdateOne  # Operación de actualización para bulk_write
+from prueba.models import Log
+
+
+def _cambios_desde_json(texto):
+    """
+    Convierte el JSON antiguo de 'cambios_detallados' a la forma de 'cambios'.
+
+    Los valores se guardan como texto, igual que los guarda _crear_log.
+
+    Argumentos:
+        texto: JSON string con una lista de {'campo', 'valor_anterior', 'valor_nuevo'}
+
+    Returns (lo que devuelve la funcion):
+        list: Diccionarios {'campo', 'valor_anterior', 'valor_nuevo'} listos para MongoDB
+
+    Raises:
+        ValueError: Si el texto no es JSON o no es una lista de cambios
+    """
+    cambios = json.loads(texto)
+    if not isinstance(cambios, list):
+        raise ValueError('no es una lista')
+
+    convertidos = []
+    for cambio in cambios:
+        if not isinstance(cambio, dict) or not cambio.get('campo'):
+            raise ValueError(f'cambio sin campo: {cambio!r}')
+        convertidos.append({
+            'campo': str(cambio['campo']),
+            'valor_anterior': None if cambio.get('valor_anterior') is None else str(cambio['valor_anterior']),
+            'valor_nuevo': None if cambio.get('valor_nuevo') is None else str(cambio['valor_nuevo']),
+        })
+    return convertidos
+
+
+class Command(BaseCommand):
+    help = 'Convierte los cambios_detallados (JSON) de los logs antiguos a documentos embebidos consultables por campo'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=1000, help='Logs actualizados por cada bulk_write (por defecto 1000)')
+        parser.add_argument('--simular', action='store_true', help='Solo cuenta los logs a convertir, sin modificarlos')
+
+    def handle(self, *args, **opciones):
+        tamano_lote = opciones['lote']
+        if tamano_lote <= 0:
+            raise CommandError('--lote debe ser mayor que 0')
+
+        coleccion = Log._get_collection()
+        pendientes = coleccion.find(
+            # Sin 'cambios' (logs antiguos) o con la lista vacía
+            {
+                'cambios_detallados': {'$nin': [None, '']},
+                '$or': [{'cambios': {'$exists': False}}, {'cambios': {'$size': 0}}],
+            },
+            {'cambios_detallados': 1}
+        )
+
+        convertidos = 0
+        invalidos = 0
+        operaciones = []
+        for documento in pendientes:
+            try:
+                cambios = _cambios_desde_json(documento['cambios_detallados'])
+            except ValueError as e:
+                invalidos += 1
+                self.stdout.write(self.style.WARNING(f"  Log {documento['_id']}: cambios_detallados inválido ({e})"))
+                continue
+            if not cambios:
+                continue  # JSON con la lista vacía: no hay nada que convertir
+
+            convertidos += 1
+            if opciones['simular']:
+                continue
+            operaciones.append(UpdateOne({'_id': documento['_id']}, {'$set': {'cambios': cambios}}))
+            if len(operaciones) >= tamano_lote:
+                coleccion.bulk_write(operaciones, ordered=False)
+                operaciones = []
+
+        if operaciones:
+            coleccion.bulk_write(operaciones, ordered=False)
+
+        verbo = 'a convertir' if opciones['simular'] else 'convertidos'
+        self.stdout.write(self.style.SUCCESS(f'{convertidos} log(s) {verbo}'))
+        if invalidos:
+            self.stdout.write(self.style.WARNING(f'{invalidos} log(s) con cambios_detallados inválido (sin modificar)'))
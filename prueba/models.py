@@ -9,6 +9,9 @@ Documentos definidos:
 - usuarios: Usuarios del sistema con autenticación y roles
 - Calificacion: Datos financieros de calificaciones con factores y montos
 - Log: Registro de auditoría de acciones realizadas por usuarios
+- ArchivoCSV: Archivos CSV ya procesados (para detectar duplicados)
+- CargaPreparada: CSV previsualizado y listo para grabar (staging en el servidor)
+- TrabajoCarga: Carga masiva que se procesa en segundo plano, con su avance
 """
 
 # IMPORTACIONES DE TIPOS DE DATOS DE MONGOENGINE
@@ -22,7 +25,7 @@ Documentos definidos:
 # DecimalField: Campo decimal para números con precisión
 # BooleanField: Campo booleano (True/False)
 # ReferenceField: Campo que referencia a otro documento (relación)
-from mongoengine import Document, StringField, FloatField, IntField, ListField, EmbeddedDocument, EmailField, DateTimeField, DecimalField, BooleanField, ReferenceField
+from mongoengine import Document, StringField, FloatField, IntField, ListField, EmbeddedDocument, EmailField, DateTimeField, DecimalField, BooleanField, ReferenceField, EmbeddedDocumentListField
 
 # Importamos datetime para usar fechas y horas
 import datetime
@@ -48,6 +51,7 @@ class usuarios(Document):
     # meta: Diccionario que define la configuración del documento
     # collection: Nombre de la colección en MongoDB donde se guardará este documento
     # Si no se especifica, MongoEngine usa el nombre de la clase en minúsculas
+    # El login y los formularios buscan por correo: el índice único lo crea MongoEngine por 'unique=True'
     meta = {
         'collection': 'usuarios'  # Los documentos usuarios se guardan en la colección 'usuarios' de MongoDB
     }
@@ -176,8 +180,19 @@ class Calificacion(Document):
 
     # METADATA DEL DOCUMENTO
     # =======================
+    # indexes: Índices según cómo se consulta la colección (ver 'python manage.py indices_mongo')
+    # - (-FechaAct, -_id): búsqueda del dashboard sin filtros y paginación por cursor
+    # - (Mercado, -FechaAct, -_id) y (Ejercicio, -FechaAct, -_id): búsqueda filtrada por mercado o período,
+    #   ya ordenada (el filtro por Origen se aplica sobre el índice elegido, solo tiene 2 valores)
+    # - (Origen, hash_archivo_csv): conteo de calificaciones de un archivo CSV (duplicados y eliminación)
     meta = { 
-        'collection': 'calificaciones'  # Los documentos Calificacion se guardan en la colección 'calificaciones'
+        'collection': 'calificaciones',  # Los documentos Calificacion se guardan en la colección 'calificaciones'
+        'indexes': [
+            ('-FechaAct', '-id'),
+            ('Mercado', '-FechaAct', '-id'),
+            ('Ejercicio', '-FechaAct', '-id'),
+            ('Origen', 'hash_archivo_csv'),
+        ]
     }
 
     # MÉTODO __str__: Representación en string del objeto
@@ -187,6 +202,17 @@ class Calificacion(Document):
         return f"{self.Ejercicio} - {self.Instrumento}"
 
 
+# MODELO EMBEBIDO: CAMBIO DE CAMPO
+# ================================
+# Un cambio de un campo dentro de un Log (ej: Factor12 de '0.10000000' a '0.12500000')
+# Se guarda dentro del documento Log (no en otra colección), así cada cambio se puede
+# consultar e indexar por 'campo' sin decodificar JSON
+class CambioCampo(EmbeddedDocument):
+    campo = StringField(required=True)  # Nombre del campo que cambió (ej: 'Factor12', 'SumaBase', 'Instrumento')
+    valor_anterior = StringField(null=True)  # Valor antes del cambio (como texto, igual que se muestra)
+    valor_nuevo = StringField(null=True)  # Valor después del cambio
+
+
 # MODELO: LOG
 # ===========
 # Documento que registra todas las acciones realizadas por usuarios (auditoría)
@@ -223,9 +249,13 @@ class Log(Document):
     
     # CAMPO DE CAMBIOS DETALLADOS
     # ============================
-    # Almacena un JSON string con los cambios realizados (campos modificados, valores anteriores y nuevos)
-    # Permite ver exactamente qué cambió en una modificación
+    # Lista de cambios realizados (campo, valor anterior y valor nuevo) como documentos embebidos
+    # Permite ver exactamente qué cambió en una modificación y consultar el historial de un campo
+    # (ej: quién cambió Factor12 de una calificación) con el índice de 'cambios.campo'
+    cambios = EmbeddedDocumentListField(CambioCampo)  # Cambios detallados (vacía si la acción no los tiene)
+    # Formato anterior (logs guardados antes de 'cambios'): JSON string con la misma lista
     # Formato: [{"campo": "nombre", "valor_anterior": "valor1", "valor_nuevo": "valor2"}, ...]
+    # Se mantiene solo para leer esos logs; los nuevos usan 'cambios'
     cambios_detallados = StringField(required=False)  # JSON string con los cambios detallados (opcional)
     
     # CAMPO DE HASH DE ARCHIVO CSV
@@ -236,8 +266,25 @@ class Log(Document):
     
     # METADATA DEL DOCUMENTO
     # =======================
+    # indexes: Índices según cómo se consulta la colección (ver 'python manage.py indices_mongo')
+    # - (-fecharegistrada, -_id): listado general de logs por páginas, más recientes primero
+    # - (iddocumento, ...): historial de cambios de una calificación y filtro por documento afectado
+    # - (usuario_afectado, ...), (Usuarioid, ...), (accion, ...), (hash_archivo_csv, ...):
+    #   filtros del historial de logs (ver_logs_view), cada uno con el orden de la página
+    # - (iddocumento, cambios.campo, ...): historial de un campo de una calificación (historial_campo_view)
+    # - (cambios.campo, ...): quién cambió un campo en todas las calificaciones (ej: Factor12 del último año)
     meta = {
-        'collection': 'log'  # Los documentos Log se guardan en la colección 'log' de MongoDB
+        'collection': 'log',  # Los documentos Log se guardan en la colección 'log' de MongoDB
+        'indexes': [
+            ('-fecharegistrada', '-id'),
+            ('iddocumento', '-fecharegistrada', '-id'),
+            ('usuario_afectado', '-fecharegistrada', '-id'),
+            ('Usuarioid', '-fecharegistrada', '-id'),
+            ('accion', '-fecharegistrada', '-id'),
+            ('hash_archivo_csv', '-fecharegistrada', '-id'),
+            ('iddocumento', 'cambios.campo', '-fecharegistrada', '-id'),
+            ('cambios.campo', '-fecharegistrada', '-id'),
+        ]
     }
     
     # MÉTODO __str__: Representación en string del objeto
@@ -276,4 +323,123 @@ class ArchivoCSV(Document):
     # ====================================================
     # Muestra el nombre del archivo, tipo y fecha de subida
     def __str__(self):
-        return f"{self.nombre_archivo} ({self.tipo}) - {self.fecha_subida.strftime('%Y-%m-%d %H:%M:%S')}"
\ No newline at end of file
+        return f"{self.nombre_archivo} ({self.tipo}) - {self.fecha_subida.strftime('%Y-%m-%d %H:%M:%S')}"
+
+# MODELO: CARGA PREPARADA
+# =======================
+# Documento que registra un CSV ya leído y validado en la previsualización
+# Los bloques de filas listos para insertar se guardan en disco (carpeta `ruta`) y al grabar
+# el navegador solo envía el `token`, en lugar de reenviar todas las filas en JSON
+# MongoDB elimina el documento automáticamente después de VIGENCIA_CARGA_PREPARADA segundos (índice TTL)
+VIGENCIA_CARGA_PREPARADA = 6 * 60 * 60  # 6 horas
+
+class CargaPreparada(Document):
+    # CAMPOS DE IDENTIFICACIÓN
+    # ========================
+    token = StringField(max_length=64, required=True, unique=True)  # Identificador que recibe el navegador
+    hash_archivo = StringField(max_length=64, required=True)  # Hash SHA-256 del contenido del archivo
+    nombre_archivo = StringField(max_length=500, required=True)  # Nombre original del archivo
+    tipo = StringField(max_length=20, required=True, choices=['factor', 'monto'])  # Tipo de CSV: 'factor' o 'monto'
+    
+    # CAMPOS DE CONTENIDO
+    # ===================
+    ruta = StringField(required=True)  # Carpeta donde están los bloques preparados
+    bloques = IntField(default=0)  # Cantidad de bloques guardados en la carpeta
+    total_filas = IntField(default=0)  # Filas válidas listas para insertar
+    
+    # CAMPOS DE METADATOS
+    # ===================
+    fecha_creacion = DateTimeField(default=datetime.datetime.now)  # Fecha de la previsualización (usada por el índice TTL)
+    usuario = ReferenceField(usuarios, required=True)  # Usuario que previsualizó el archivo (solo él puede grabarlo)
+    
+    # METADATA DEL DOCUMENTO
+    # =======================
+    meta = {
+        'collection': 'cargas_preparadas',  # Los documentos CargaPreparada se guardan en la colección 'cargas_preparadas'
+        'indexes': [
+            'token',
+            {'fields': ['fecha_creacion'], 'expireAfterSeconds': VIGENCIA_CARGA_PREPARADA},  # Índice TTL
+        ]
+    }
+    
+    # MÉTODO __str__: Representación en string del objeto
+    # ====================================================
+    def __str__(self):
+        return f"{self.nombre_archivo} ({self.tipo}) - {self.total_filas} filas"
+
+
+# MODELO: TRABAJO DE CARGA
+# ========================
+# Documento que representa una carga masiva que se procesa en segundo plano
+# La vista de estado lo consulta para mostrar el avance (filas procesadas, errores y tiempo restante)
+class TrabajoCarga(Document):
+    # ESTADOS POSIBLES DEL TRABAJO
+    ESTADO_CHOICES = (
+        'pendiente',    # En la cola, esperando un trabajador libre
+        'procesando',   # Insertando calificaciones
+        'completado',   # Terminó (puede tener errores por fila)
+        'error'         # Falló por completo (ver `mensaje`)
+    )
+    
+    # CAMPOS DE IDENTIFICACIÓN
+    # ========================
+    tipo = StringField(max_length=20, required=True, choices=['factor', 'monto'])  # Tipo de CSV: 'factor' o 'monto'
+    usuario = ReferenceField(usuarios, required=True)  # Usuario que inició la carga
+    token_carga = StringField(max_length=64, required=True)  # Carga preparada (CargaPreparada.token) que se va a grabar
+    hash_archivo = StringField(max_length=64, required=True)  # Hash SHA-256 del archivo
+    nombre_archivo = StringField(max_length=500, required=True)  # Nombre original del archivo
+    
+    # CAMPOS DE PROGRESO
+    # ==================
+    estado = StringField(max_length=20, choices=ESTADO_CHOICES, default='pendiente')
+    total_filas = IntField(default=0)  # Filas válidas a insertar
+    procesadas = IntField(default=0)  # Filas ya enviadas a MongoDB
+    creadas = IntField(default=0)  # Calificaciones insertadas
+    total_errores = IntField(default=0)  # Cantidad total de errores
+    errores = ListField(StringField())  # Primeros mensajes de error (limitado para no superar el tamaño máximo del documento)
+    mensaje = StringField()  # Mensaje final para el usuario
+    
+    # CAMPOS DE FECHAS
+    # ================
+    fecha_creacion = DateTimeField(default=datetime.datetime.now)  # Cuando se encoló
+    fecha_inicio = DateTimeField()  # Cuando un trabajador lo tomó
+    fecha_fin = DateTimeField()  # Cuando terminó
+    fecha_actualizacion = DateTimeField(default=datetime.datetime.now)  # Último avance (un trabajo sin avance por mucho tiempo se considera interrumpido)
+    
+    # METADATA DEL DOCUMENTO
+    # =======================
+    meta = {
+        'collection': 'trabajos_carga',  # Los documentos TrabajoCarga se guardan en la colección 'trabajos_carga'
+        'indexes': [('usuario', '-fecha_creacion'), ('hash_archivo', 'estado')]
+    }
+    
+    # MÉTODO __str__: Representación en string del objeto
+    # ====================================================
+    def __str__(self):
+        return f"{self.nombre_archivo} ({self.tipo}) - {self.estado} {self.procesadas}/{self.total_filas}"
+
+
+# MODELO: SESIÓN
+# ==============
+# Documento con los datos de una sesión de Django (usado por el motor de sesiones prueba/sesiones.py)
+# Reemplaza la tabla django_session de SQLite: todas las solicitudes leen la sesión y las escrituras
+# de SQLite se bloquean entre sí, mientras que MongoDB atiende a varios procesos a la vez
+# MongoDB elimina las sesiones vencidas automáticamente (índice TTL sobre fecha_expiracion)
+class SesionMongo(Document):
+    clave = StringField(primary_key=True, max_length=40)  # Clave de la sesión (la cookie sessionid); es el _id del documento
+    datos = StringField(required=True)  # Datos de la sesión codificados por Django (SessionBase.encode)
+    fecha_expiracion = DateTimeField(required=True)  # Vencimiento en UTC (usado por el índice TTL)
+    
+    # METADATA DEL DOCUMENTO
+    # =======================
+    meta = {
+        'collection': 'sesiones',  # Los documentos SesionMongo se guardan en la colección 'sesiones'
+        'indexes': [
+            {'fields': ['fecha_expiracion'], 'expireAfterSeconds': 0},  # Índice TTL: se elimina al vencer
+        ]
+    }
+    
+    # MÉTODO __str__: Representación en string del objeto
+    # ====================================================
+    def __str__(self):
+        return f"Sesión {self.clave} (vence {self.fecha_expiracion})"
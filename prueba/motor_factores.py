@@ -0,0 +1,324 @@
+"""
+MOTOR_FACTORES.PY - Cálculo de factores (Factor = Monto / SumaBase) por lotes con enteros
+==========================================================================================
+Este archivo contiene el único motor de cálculo de factores del sistema. Lo usan
+calcular_factores_view, ingresar_calificacion, calcular_factores_masivo_view y la
+carga masiva de montos (carga_masiva.py).
+
+POR QUÉ EXISTE ESTE ARCHIVO:
+- La fórmula estaba repetida en cuatro lugares, cada uno con un bucle de Decimal por
+  monto: (monto / suma_base).quantize(Decimal('0.00000001'))
+- Con Decimal cada división crea objetos Python; recalcular miles de filas tardaba segundos
+- Aquí los montos se pasan a ENTEROS (centavos) y las 30 divisiones de todas las filas
+  se hacen a la vez con NumPy (int64), en milisegundos
+
+CÓMO FUNCIONA:
+1. Cada monto se convierte a un entero de centavos (Decimal('1234.5') -> 123450)
+2. SumaBase = suma de los centavos de los montos 8 a 19, con el mismo exponente que
+   sum(montos, Decimal(0)): el menor entre 0 y el de cada monto (ej: '1000', '1000.0', '1000.25')
+3. Factor en unidades de 1e-8 = división larga entera (8 dígitos) + redondeo HALF_EVEN
+   (el mismo redondeo que usa Decimal por defecto en quantize)
+4. Opcionalmente se recorta a 1 (factor máximo)
+
+RESULTADO IDÉNTICO A DECIMAL (bit a bit):
+- Decimal primero redondea la división a 28 dígitos significativos y después a 8 decimales;
+  eso solo cambia el resultado cuando el resto queda a menos de 1e-10 de la mitad exacta.
+  Esas divisiones (y los montos con más de 2 decimales, no finitos o demasiado grandes
+  para int64) se calculan con Decimal exactamente como antes, solo para esas filas.
+- Con |unidades| <= 2**53 (factores menores que ~90 millones), float(unidades / 1e8) es el
+  mismo float que float(Decimal('0.xxxxxxxx')); los factores más grandes (solo posibles sin
+  recorte) se convierten a float pasando por Decimal. Lo que se guarda en MongoDB no cambia
+
+Funciones definidas:
+- calcular_factores: Calcula SumaBase y los factores de un lote de filas de montos
+- calcular_sumas_base: Calcula solo la SumaBase de cada fila
+- factores_flotantes: Factores como float (para insertar en MongoDB)
+- factores_decimales: Factores como Decimal, iguales a los del cálculo anterior
+"""
+
+# IMPORTACIONES
+# ======================================
+from collections import namedtuple  # Para devolver el resultado del cálculo con nombres
+from decimal import Decimal  # Para el cálculo exacto de las filas que no caben en enteros
+import numpy as np  # Para operar con todas las filas a la vez
+
+
+# =====================================================================
+# CONSTANTES
+# =====================================================================
+
+# Precisión de los factores calculados (8 decimales)
+EIGHT_PLACES = Decimal('0.00000001')
+
+# Los montos se manejan en centavos (2 decimales, igual que Monto08..Monto37 en el modelo)
+DECIMALES_MONTO = 2
+CENTAVOS = 10 ** DECIMALES_MONTO
+
+# Los factores se manejan en unidades de 1e-8 (8 decimales)
+DECIMALES_FACTOR = 8
+UNIDADES_FACTOR = 10 ** DECIMALES_FACTOR
+
+# Montos de hasta 10 billones caben de sobra en int64 incluso sumando 12 de ellos
+# y multiplicando el resto por 10 en la división larga
+MONTO_MAXIMO = 10 ** 13
+
+# Mayor entero que cabe en int64
+ENTERO_MAXIMO = np.iinfo(np.int64).max
+
+# Mayor entero que float64 representa sin redondear (unidades más grandes pasan por Decimal)
+ENTERO_EXACTO_FLOAT = 2 ** 53
+
+# Parte entera máxima de un factor: con más, unidades (factor × 1e8) ya no cabe en int64
+PARTE_ENTERA_MAXIMA = 10 ** 10
+
+# Decimal redondea la división a 28 dígitos significativos; con una parte entera de
+# hasta 10 dígitos quedan al menos 28 - 10 - 8 = 10 dígitos después del octavo decimal
+DIGITOS_SOBRANTES_MINIMOS = 10
+
+# Resultado de calcular_factores():
+# - unidades: int64 (filas, 30), factor × 1e8 (ya recortado y en 0 si SumaBase <= 0)
+# - con_base: bool (filas,), True si SumaBase > 0
+# - recortados: bool (filas, 30), True donde el factor superaba el máximo
+# - especiales: dict {(fila, columna): Decimal} con resultados que no caben en `unidades`
+#   (-0E-8 o factores enormes sin recortar)
+# - sumas_base: lista de Decimal, una por fila
+FactoresCalculados = namedtuple('FactoresCalculados', 'unidades con_base recortados especiales sumas_base')
+
+
+# =====================================================================
+# CONVERSIÓN DE MONTOS A CENTAVOS
+# =====================================================================
+
+def _centavos_desde_flotantes(valores):
+    """
+    Convierte montos float (leídos del CSV) a centavos, sin salir de NumPy.
+
+    Un float es exacto en centavos cuando k / 100 vuelve a dar el mismo float; en ese
+    caso Decimal(str(valor)) es exactamente k centavos (nada más corto lo representa).
+
+    El exponente es el de Decimal(str(valor)): str() siempre deja al menos un decimal
+    ('1000.0' -> -1, '1000.25' -> -2).
+
+    Returns (lo que devuelve la funcion):
+        tuple: (centavos int64, exactos bool, negativos bool, exponentes int64) con la misma
+               forma que `valores` (negativos incluye -0.0, porque Decimal conserva ese signo)
+    """
+    valores = np.asarray(valores, dtype=float)
+    exactos = np.isfinite(valores) & (np.abs(valores) < MONTO_MAXIMO)
+    centavos = np.rint(np.where(exactos, valores, 0.0) * CENTAVOS)
+    exactos &= (centavos / CENTAVOS) == valores
+    centavos = centavos.astype(np.int64)
+    exponentes = np.where(centavos % 10 != 0, -2, -1)
+    return centavos, exactos, np.signbit(valores), exponentes
+
+
+def _centavos_desde_decimales(valores):
+    """
+    Convierte montos Decimal (formularios, JSON) a centavos.
+
+    Returns (lo que devuelve la funcion):
+        tuple: (centavos int64, exactos bool, negativos bool, exponentes int64) con la misma
+               forma que `valores`
+    """
+    valores = np.asarray(valores, dtype=object)
+    centavos = np.zeros(valores.shape, dtype=np.int64)
+    exactos = np.zeros(valores.shape, dtype=bool)
+    negativos = np.zeros(valores.shape, dtype=bool)
+    exponentes = np.zeros(valores.shape, dtype=np.int64)
+    for posicion, valor in np.ndenumerate(valores):
+        valor = _a_decimal(valor)
+        negativos[posicion] = valor.is_signed()
+        if (valor.is_finite() and valor.as_tuple().exponent >= -DECIMALES_MONTO
+                and abs(valor) < MONTO_MAXIMO):
+            centavos[posicion] = int(valor.scaleb(DECIMALES_MONTO))
+            exactos[posicion] = True
+            exponentes[posicion] = valor.as_tuple().exponent
+    return centavos, exactos, negativos, exponentes
+
+
+def _sumas_base(centavos, exponentes):
+    """
+    SumaBase de cada fila como Decimal, igual a sum(montos 8..19, Decimal(0)) en las filas exactas.
+
+    Decimal suma con el menor exponente de los sumandos (Decimal(0) aporta el 0), así que la
+    SumaBase se arma con ese exponente: 1000 da Decimal('1000'), 1000.0 da Decimal('1000.0').
+    """
+    sumas = centavos[:, :12].sum(axis=1).tolist()
+    exponentes_suma = exponentes[:, :12].min(axis=1, initial=0).tolist()
+    return [
+        Decimal(suma // 10 ** (exponente + DECIMALES_MONTO)).scaleb(exponente)
+        for suma, exponente in zip(sumas, exponentes_suma)
+    ]
+
+
+def _a_decimal(valor):
+    """Mismo Decimal que usaba el cálculo anterior: Decimal(str(valor)) para los float."""
+    return valor if isinstance(valor, Decimal) else Decimal(str(valor))
+
+
+# =====================================================================
+# CÁLCULO DE FACTORES
+# =====================================================================
+
+def calcular_factores(montos, maximo=None):
+    """
+    Calcula SumaBase y los factores (Factor = Monto / SumaBase) de un lote de filas.
+
+    Argumentos:
+        montos: Matriz (filas, 30) con los montos 8 a 37: floats (CSV) o Decimal (formularios)
+        maximo: Factor máximo (1 en la carga masiva); None = sin recorte
+
+    Returns (lo que devuelve la funcion):
+        FactoresCalculados: Ver la descripción de la tupla al inicio del archivo
+    """
+    montos = np.asarray(montos)
+    if montos.ndim != 2:
+        montos = montos.reshape(-1, 30)
+    if montos.dtype == object:
+        centavos, exactos, negativos, exponentes = _centavos_desde_decimales(montos)
+    else:
+        centavos, exactos, negativos, exponentes = _centavos_desde_flotantes(montos)
+
+    # SUMA BASE (montos 8 a 19 = primeras 12 columnas)
+    suma_base = centavos[:, :12].sum(axis=1)
+    con_base = suma_base > 0
+    divisor = np.where(con_base, suma_base, 1)[:, None]
+
+    # DIVISIÓN LARGA: parte entera y 8 decimales, con el resto exacto
+    # (las filas sin SumaBase positiva no se dividen: sus factores son 0)
+    dividendo = np.where(con_base[:, None], np.abs(centavos), 0)
+    parte_entera, resto = np.divmod(dividendo, divisor)
+    exactos &= parte_entera < PARTE_ENTERA_MAXIMA
+    unidades = np.where(exactos, parte_entera, 0)
+    resto = np.where(exactos, resto, 0)
+    # Se bajan tantos dígitos por paso como permita int64 (con SumaBase normales, los 8 en un solo paso)
+    digitos_por_paso = max(1, len(str(ENTERO_MAXIMO // int(divisor.max(initial=1)))) - 1)
+    pendientes = DECIMALES_FACTOR
+    while pendientes > 0:
+        paso = min(pendientes, digitos_por_paso)
+        cociente, resto = np.divmod(resto * 10 ** paso, divisor)
+        unidades = unidades * 10 ** paso + cociente
+        pendientes -= paso
+
+    # REDONDEO HALF_EVEN: se compara el doble del resto con el divisor
+    diferencia = 2 * resto - divisor
+    redondear = (diferencia > 0) | ((diferencia == 0) & (unidades % 2 == 1))
+    unidades = unidades + redondear
+
+    # Divisiones que quedan a menos de 1e-10 de la mitad: Decimal podría redondear distinto
+    exactos &= ~((diferencia != 0) & (np.abs(diferencia) <= divisor // 10 ** DIGITOS_SOBRANTES_MINIMOS))
+
+    unidades = np.where(negativos, -unidades, unidades)
+    recortados = np.zeros(unidades.shape, dtype=bool)
+    if maximo is not None:
+        tope = int(maximo) * UNIDADES_FACTOR
+        recortados = unidades > tope
+        unidades = np.minimum(unidades, tope)
+
+    # Decimal conserva el signo de los ceros negativos (-0E-8)
+    especiales = {}
+    for fila, columna in zip(*np.nonzero(negativos & (unidades == 0) & exactos & con_base[:, None])):
+        especiales[(int(fila), int(columna))] = Decimal((1, (0,), -DECIMALES_FACTOR))
+
+    sumas_base = _sumas_base(centavos, exponentes)
+
+    # FILAS QUE NO SE PUEDEN CALCULAR CON ENTEROS: mismo cálculo con Decimal de antes
+    for fila in np.nonzero(~exactos.all(axis=1))[0].tolist():
+        valores = [_a_decimal(v) for v in montos[fila].tolist()]
+        suma = sum(valores[:12], Decimal(0))
+        sumas_base[fila] = suma
+        con_base[fila] = suma > 0
+        recortados[fila] = False
+        unidades[fila] = 0
+        for clave in [c for c in especiales if c[0] == fila]:
+            del especiales[clave]
+        if not con_base[fila]:
+            continue
+        for columna, monto in enumerate(valores):
+            factor = (monto / suma).quantize(EIGHT_PLACES)
+            if maximo is not None and factor > maximo:
+                recortados[fila, columna] = True
+                unidades[fila, columna] = int(maximo) * UNIDADES_FACTOR
+            else:
+                especiales[(fila, columna)] = factor
+
+    unidades[~con_base] = 0
+    return FactoresCalculados(unidades, con_base, recortados, especiales, sumas_base)
+
+
+def calcular_sumas_base(montos):
+    """
+    Calcula solo la SumaBase (montos 8 a 19) de cada fila, sin calcular factores.
+
+    Se usa con los CSV de montos que ya traen los factores calculados.
+
+    Argumentos:
+        montos: Matriz (filas, 30) con los montos 8 a 37: floats (CSV) o Decimal (formularios)
+
+    Returns (lo que devuelve la funcion):
+        list: Lista de Decimal, una por fila (igual a sum(montos 8..19, Decimal(0)))
+    """
+    montos = np.asarray(montos)
+    if montos.ndim != 2:
+        montos = montos.reshape(-1, 30)
+    montos = montos[:, :12]
+    if montos.dtype == object:
+        centavos, exactos, _, exponentes = _centavos_desde_decimales(montos)
+    else:
+        centavos, exactos, _, exponentes = _centavos_desde_flotantes(montos)
+
+    sumas_base = _sumas_base(centavos, exponentes)
+    for fila in np.nonzero(~exactos.all(axis=1))[0].tolist():
+        sumas_base[fila] = sum((_a_decimal(v) for v in montos[fila].tolist()), Decimal(0))
+    return sumas_base
+
+
+def factores_flotantes(resultado):
+    """
+    Devuelve los factores como float (filas, 30), listos para DecimalField.
+
+    Los factores con |unidades| > 2**53 (solo sin recorte) pasan por Decimal: la división
+    de NumPy redondearía dos veces (al convertir unidades a float y al dividir).
+
+    Argumentos:
+        resultado: FactoresCalculados devuelto por calcular_factores()
+    """
+    flotantes = resultado.unidades / UNIDADES_FACTOR
+    for fila, columna in zip(*np.nonzero(np.abs(resultado.unidades) > ENTERO_EXACTO_FLOAT)):
+        flotantes[fila, columna] = float(Decimal(int(resultado.unidades[fila, columna])).scaleb(-DECIMALES_FACTOR))
+    for (fila, columna), valor in resultado.especiales.items():
+        flotantes[fila, columna] = float(valor)
+    return flotantes
+
+
+def factores_decimales(resultado):
+    """
+    Devuelve los factores como listas de Decimal, iguales a los del cálculo anterior.
+
+    - Factor calculado: Decimal con 8 decimales (ej: Decimal('0.25000000'))
+    - Factor recortado al máximo: Decimal(1)
+    - Filas con SumaBase <= 0: Decimal(0)
+
+    Argumentos:
+        resultado: FactoresCalculados devuelto por calcular_factores()
+
+    Returns (lo que devuelve la funcion):
+        list: Una lista de 30 Decimal por fila
+    """
+    filas = []
+    for fila, (unidades, recortados, con_base) in enumerate(zip(
+            resultado.unidades.tolist(), resultado.recortados.tolist(), resultado.con_base.tolist())):
+        if not con_base:
+            filas.append([Decimal(0)] * len(unidades))
+            continue
+        factores = []
+        for columna, (valor, recortado) in enumerate(zip(unidades, recortados)):
+            especial = resultado.especiales.get((fila, columna))
+            if especial is not None:
+                factores.append(especial)
+            elif recortado:
+                factores.append(Decimal(valor // UNIDADES_FACTOR))
+            else:
+                factores.append(Decimal(valor).scaleb(-DECIMALES_FACTOR))
+        filas.append(factores)
+    return filas
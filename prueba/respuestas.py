@@ -0,0 +1,170 @@
+"""
+RESPUESTAS.PY - Respuestas JSON con codificador rápido
+=======================================================
+Este archivo define RespuestaJSON, la respuesta que usan todas las vistas AJAX
+en lugar de JsonResponse de Django.
+
+POR QUÉ EXISTE ESTE ARCHIVO:
+- JsonResponse codifica con el json de la librería estándar; en búsquedas y
+  previsualizaciones grandes (miles de filas con 30 factores) la codificación era
+  una parte visible del tiempo de respuesta
+- orjson (opcional) codifica varias veces más rápido y entrega bytes directamente
+- Decimal, datetime, date y ObjectId se codifican directamente: las vistas pueden
+  devolverlos sin convertirlos antes con str()
+
+CÓMO FUNCIONA:
+1. settings.RESPUESTAS_JSON_CODIFICADOR elige el codificador:
+   'auto' (orjson si está instalado, si no la librería estándar), 'orjson', 'stdlib'
+   o la ruta a una función propia ('paquete.modulo.funcion' que recibe el dato y devuelve bytes)
+2. Ambos codificadores producen el mismo JSON para los mismos datos
+   (salvo NaN/Infinity, que orjson escribe como null: JSON válido para el navegador):
+   - Decimal: texto (str), igual que hacían las vistas ('0.25000000')
+   - datetime / date: ISO 8601 ('2024-01-15T14:30:22')
+   - ObjectId: texto con el ID
+   - Tipos de numpy (filas de pandas): su valor de Python
+3. Si orjson no puede codificar un dato (ej: entero de más de 64 bits) se usa la librería estándar
+
+Clases y funciones definidas:
+- codificar_json: Codifica un dato a bytes JSON con el codificador configurado
+- RespuestaJSON: HttpResponse con el JSON (mismos argumentos que JsonResponse)
+"""
+
+# IMPORTACIONES
+# ======================================
+import datetime  # Para reconocer fechas
+import decimal  # Para reconocer valores Decimal
+import json  # Codificador de la librería estándar (respaldo)
+import numpy as np  # Para reconocer los tipos de numpy que vienen de pandas
+from bson import ObjectId  # Para reconocer los IDs de MongoDB
+from django.conf import settings  # Para leer RESPUESTAS_JSON_CODIFICADOR
+from django.http import HttpResponse  # Respuesta base
+from django.utils.module_loading import import_string  # Para cargar un codificador propio desde settings
+
+try:
+    import orjson  # Codificador JSON rápido (opcional)
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False  # Sin orjson se usa el json de la librería estándar
+
+
+# =====================================================================
+# TIPOS QUE NO SON JSON ESTÁNDAR
+# =====================================================================
+
+def _valor_json(obj):
+    """
+    Convierte los tipos que el JSON no conoce (lo usan los dos codificadores como 'default').
+
+    Raises:
+        TypeError: Si el tipo no se puede convertir (igual que json.dumps)
+    """
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    raise TypeError(f'El tipo {type(obj).__name__} no se puede convertir a JSON')
+
+
+# =====================================================================
+# CODIFICADORES
+# =====================================================================
+
+def _codificar_stdlib(datos):
+    """Codifica con el json de la librería estándar (sin espacios, UTF-8)."""
+    return json.dumps(datos, default=_valor_json, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _codificar_orjson(datos):
+    """
+    Codifica con orjson.
+
+    OPT_NON_STR_KEYS: acepta diccionarios con claves que no son texto (como json.dumps)
+    OPT_PASSTHROUGH_DATETIME: las fechas pasan por _valor_json, así el formato es el mismo que con la librería estándar
+    """
+    try:
+        return orjson.dumps(
+            datos,
+            default=_valor_json,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        )
+    except orjson.JSONEncodeError:
+        # Casos que orjson no soporta (ej: enteros de más de 64 bits): se usa la librería estándar
+        return _codificar_stdlib(datos)
+
+
+CODIFICADORES = {
+    'orjson': _codificar_orjson,
+    'stdlib': _codificar_stdlib,
+}
+
+# Codificador resuelto (se resuelve la primera vez que se usa)
+_codificador = None
+_codificador_configurado = None
+
+
+def _obtener_codificador():
+    """
+    Devuelve la función de codificación según settings.RESPUESTAS_JSON_CODIFICADOR.
+
+    Se guarda la resolución y se vuelve a calcular solo si el setting cambia (ej: en pruebas).
+
+    Raises:
+        ImproperlyConfigured: Si se pide 'orjson' y no está instalado
+    """
+    global _codificador, _codificador_configurado
+    configurado = getattr(settings, 'RESPUESTAS_JSON_CODIFICADOR', 'auto')
+    if _codificador is not None and configurado == _codificador_configurado:
+        return _codificador
+
+    if configurado == 'auto':
+        codificador = _codificar_orjson if HAS_ORJSON else _codificar_stdlib
+    elif configurado == 'orjson' and not HAS_ORJSON:
+        from django.core.exceptions import ImproperlyConfigured
+        raise ImproperlyConfigured('RESPUESTAS_JSON_CODIFICADOR = "orjson" pero orjson no está instalado (pip install orjson)')
+    elif configurado in CODIFICADORES:
+        codificador = CODIFICADORES[configurado]
+    else:
+        codificador = import_string(configurado)  # Codificador propio: 'paquete.modulo.funcion'
+
+    _codificador, _codificador_configurado = codificador, configurado
+    return codificador
+
+
+def codificar_json(datos):
+    """
+    Codifica un dato a JSON con el codificador configurado.
+
+    Argumentos:
+        datos: dict, list u otro valor (puede contener Decimal, datetime, ObjectId)
+
+    Returns (lo que devuelve la funcion):
+        bytes: JSON en UTF-8
+    """
+    return _obtener_codificador()(datos)
+
+
+# =====================================================================
+# RESPUESTA
+# =====================================================================
+
+class RespuestaJSON(HttpResponse):
+    """
+    Respuesta HTTP con contenido JSON, con los mismos argumentos que JsonResponse.
+
+    Argumentos:
+        data: Datos a codificar (dict; con safe=False también listas u otros valores)
+        safe: Si es True (por defecto) solo se aceptan diccionarios, como en JsonResponse
+        **kwargs: status, headers, etc. (los de HttpResponse)
+    """
+
+    def __init__(self, data, safe=True, **kwargs):
+        if safe and not isinstance(data, dict):
+            raise TypeError('Para codificar algo que no es un dict use safe=False.')
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(content=codificar_json(data), **kwargs)
@@ -0,0 +1,288 @@
+"""
+SERIALIZADORES.PY - Lectura proyectada y serialización de calificaciones
+=========================================================================
+Este archivo convierte las calificaciones leídas de MongoDB en los formatos que
+necesitan las vistas de listado, búsqueda y exportación (JSON para JavaScript,
+filas CSV y bytes ya codificados para respuestas por streaming).
+
+POR QUÉ EXISTE ESTE ARCHIVO:
+- Antes cada vista cargaba documentos Calificacion completos: MongoEngine convertía
+  los 90+ campos (Montos, SumaBase, ...) a Decimal aunque solo se usaran unos 40
+- El mismo bucle (strftime + f'Factor{i:02d}' + getattr) estaba copiado en varias vistas
+- Ahora las consultas piden solo los campos necesarios (only) y se recorren como
+  diccionarios de pymongo (as_pymongo), y una sola especificación de columnas
+  genera todas las salidas
+
+CÓMO FUNCIONA:
+1. Cada Serializador se arma UNA vez (al importar el módulo) con sus columnas:
+   (nombre de salida, campo de MongoDB, tipo de conversión)
+2. Los nombres de campo y las funciones quedan en tuplas: por fila no se arman
+   f-strings ni se busca el tipo de cada campo
+3. Las fechas se formatean con isoformat() (mucho más rápido que strftime y con el mismo texto)
+4. Los decimales usan un camino rápido para los floats guardados con 8 decimales o menos;
+   el resto pasa por el to_python() del DecimalField del modelo, así el texto es idéntico
+   al que se obtenía del documento completo
+5. Benchmark: python manage.py benchmark_serializador (filas/segundo antes y después)
+
+Clases y funciones definidas:
+- Serializador: Especificación compilada de columnas con sus salidas (dict, fila CSV, bytes)
+- calificaciones_proyectadas: Aplica la proyección y devuelve diccionarios de pymongo
+- calificacion_a_dict: Diccionario JSON de una calificación (tabla del dashboard)
+- calificacion_a_fila_csv: Fila CSV de una calificación (exportación)
+- calificaciones_por_ids: Lee una selección grande de calificaciones en consultas $in por lotes
+"""
+
+# IMPORTACIONES
+# ======================================
+import csv  # Para las filas CSV codificadas
+import io  # Buffer de texto para escribir varias filas CSV de una vez
+from .models import Calificacion  # Para la definición de los campos (to_python de cada DecimalField)
+from .respuestas import codificar_json  # Mismo codificador JSON que las respuestas de las vistas
+
+
+# =====================================================================
+# CONVERSIÓN DE VALORES
+# =====================================================================
+
+# Decimales con que el modelo guarda factores, dividendos y valores (DecimalField(precision=8))
+DECIMALES = 8
+
+# to_python() del DecimalField del modelo (todos los campos decimales usados tienen precision=8)
+# POR QUÉ: Reproduce el redondeo del modelo (ROUND_HALF_UP) para los valores del camino lento
+_decimal_del_modelo = Calificacion._fields['Factor08'].to_python
+
+
+def _texto_decimal(valor):
+    """
+    Texto de un campo decimal igual al que daba str() del Decimal del documento completo.
+
+    Devuelve '0.0' si el valor es 0 o no existe (como hacían las vistas).
+
+    Camino rápido: un float cuyo repr tiene 8 decimales o menos (ej: 0.25) da el mismo texto
+    que el Decimal cuantizado completando con ceros ('0.25000000'), sin crear el Decimal.
+    """
+    if not valor:
+        return '0.0'
+    if valor.__class__ is float:
+        texto = repr(valor)
+        punto = texto.find('.')
+        if punto != -1 and 'e' not in texto:
+            decimales = len(texto) - punto - 1
+            if decimales <= DECIMALES:
+                return texto + '0' * (DECIMALES - decimales)
+    valor = _decimal_del_modelo(valor)
+    return str(valor) if valor else '0.0'
+
+
+def _texto_fecha(valor):
+    """Fecha como 'AAAA-MM-DD' (igual que strftime('%Y-%m-%d')), o '' si no existe."""
+    if not valor:
+        return ''
+    if valor.year >= 1000:  # isoformat rellena el año con ceros; strftime no
+        return valor.date().isoformat()
+    return valor.strftime('%Y-%m-%d')
+
+
+def _texto_fecha_hora(valor):
+    """Fecha y hora como 'AAAA-MM-DD HH:MM:SS' (igual que strftime), o '' si no existe."""
+    if not valor:
+        return ''
+    if valor.year >= 1000 and valor.tzinfo is None:
+        return valor.isoformat(' ', 'seconds')
+    return valor.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _texto_o_vacio(valor):
+    """El valor tal cual, o '' si es None/0/'' (el 'or ""' que usaban las vistas)."""
+    return valor or ''
+
+
+def _texto_booleano(valor):
+    """'True' o 'False' (los documentos sin el campo se consideran False)."""
+    return 'True' if valor else 'False'
+
+
+# Función de conversión de cada tipo de columna
+CONVERSORES = {
+    'texto': _texto_o_vacio,
+    'entero': _texto_o_vacio,
+    'fecha': _texto_fecha,
+    'fecha_hora': _texto_fecha_hora,
+    'decimal': _texto_decimal,
+    'booleano': _texto_booleano,
+}
+
+
+# =====================================================================
+# ESPECIFICACIÓN COMPILADA
+# =====================================================================
+
+# Nombres de los 30 factores (Factor08 a Factor37), calculados una sola vez
+CAMPOS_FACTORES = tuple(f'Factor{i:02d}' for i in range(8, 38))
+
+
+class Serializador:
+    """
+    Especificación compilada de las columnas de una salida de calificaciones.
+
+    Argumentos:
+        columnas: Lista de (nombre de salida, campo de MongoDB, tipo) de los datos básicos,
+                  en el orden de la salida; tipo es una clave de CONVERSORES
+
+    El ID (_id) siempre es la primera columna ('id' en el dict) y los 30 factores
+    van al final (en el dict, dentro de 'factores').
+    """
+
+    def __init__(self, columnas):
+        self.columnas = tuple(columnas)
+        self.claves = tuple(salida for salida, _campo, _tipo in self.columnas)
+        self.campos = tuple(campo for _salida, campo, _tipo in self.columnas) + CAMPOS_FACTORES
+        self._basicos = tuple((salida, campo, CONVERSORES[tipo]) for salida, campo, tipo in self.columnas)
+
+    def a_dict(self, doc):
+        """
+        Diccionario JSON de una calificación: {'id', <datos básicos>, 'factores': {'Factor08': '0.25', ...}}.
+
+        Argumentos:
+            doc: Diccionario de pymongo (de calificaciones_proyectadas())
+        """
+        obtener = doc.get
+        salida = {'id': str(doc['_id'])}
+        for clave, campo, convertir in self._basicos:
+            salida[clave] = convertir(obtener(campo))
+        salida['factores'] = {campo: _texto_decimal(obtener(campo)) for campo in CAMPOS_FACTORES}
+        return salida
+
+    def a_fila(self, doc):
+        """
+        Fila CSV de una calificación: [id, <datos básicos>, Factor08, ..., Factor37].
+
+        Argumentos:
+            doc: Diccionario de pymongo (de calificaciones_proyectadas())
+        """
+        obtener = doc.get
+        fila = [str(doc['_id'])]
+        fila += [convertir(obtener(campo)) for _clave, campo, convertir in self._basicos]
+        fila += [_texto_decimal(obtener(campo)) for campo in CAMPOS_FACTORES]
+        return fila
+
+    def a_json_bytes(self, doc):
+        """Diccionario JSON de una calificación ya codificado en UTF-8 (para respuestas por streaming)."""
+        return codificar_json(self.a_dict(doc))
+
+    def a_csv_bytes(self, docs):
+        """
+        Varias calificaciones como líneas CSV ya codificadas en UTF-8.
+
+        POR QUÉ: Escribir un bloque de filas en un solo buffer es mucho más rápido que
+        codificar fila por fila; se usa para enviar el CSV por partes.
+
+        Argumentos:
+            docs: Iterable de diccionarios de pymongo
+        """
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(self.a_fila(doc) for doc in docs)
+        return buffer.getvalue().encode('utf-8')
+
+
+# Tabla del dashboard (buscar_calificaciones_view)
+SERIALIZADOR_LISTADO = Serializador([
+    ('ejercicio', 'Ejercicio', 'entero'),
+    ('instrumento', 'Instrumento', 'texto'),
+    ('fecha_pago', 'FechaPago', 'fecha'),
+    ('descripcion', 'Descripcion', 'texto'),
+    ('secuencia_evento', 'SecuenciaEvento', 'entero'),
+    ('fecha_act', 'FechaAct', 'fecha_hora'),
+    ('mercado', 'Mercado', 'texto'),
+    ('origen', 'Origen', 'texto'),
+])
+
+# CSV de exportación (exportar_calificaciones_view)
+SERIALIZADOR_EXPORTACION = Serializador([
+    ('Ejercicio', 'Ejercicio', 'entero'),
+    ('Mercado', 'Mercado', 'texto'),
+    ('Origen', 'Origen', 'texto'),
+    ('Instrumento', 'Instrumento', 'texto'),
+    ('Fecha Pago', 'FechaPago', 'fecha'),
+    ('Secuencia Evento', 'SecuenciaEvento', 'entero'),
+    ('Descripcion', 'Descripcion', 'texto'),
+    ('Fecha Act', 'FechaAct', 'fecha_hora'),
+    ('Dividendo', 'Dividendo', 'decimal'),
+    ('Valor Historico', 'ValorHistorico', 'decimal'),
+    ('Factor Actualizacion', 'FactorActualizacion', 'decimal'),
+    ('Anho', 'Anho', 'entero'),
+    ('ISFUT', 'ISFUT', 'booleano'),
+])
+
+# Campos que se piden a MongoDB para cada salida
+CAMPOS_LISTADO = SERIALIZADOR_LISTADO.campos
+CAMPOS_EXPORTACION = SERIALIZADOR_EXPORTACION.campos
+
+# Encabezados del CSV de exportación (mismo orden que calificacion_a_fila_csv)
+ENCABEZADOS_CSV = ['ID'] + list(SERIALIZADOR_EXPORTACION.claves) + list(CAMPOS_FACTORES)
+
+# Salidas usadas por las vistas
+calificacion_a_dict = SERIALIZADOR_LISTADO.a_dict
+calificacion_a_fila_csv = SERIALIZADOR_EXPORTACION.a_fila
+
+
+# =====================================================================
+# LECTURA PROYECTADA
+# =====================================================================
+
+def calificaciones_proyectadas(queryset, campos=CAMPOS_LISTADO):
+    """
+    Aplica la proyección a una consulta de calificaciones y la devuelve como diccionarios de pymongo.
+
+    Argumentos:
+        queryset: Consulta de Calificacion (con filtros y orden ya aplicados)
+        campos: Campos a leer (CAMPOS_LISTADO o CAMPOS_EXPORTACION); '_id' siempre se incluye
+
+    Returns (lo que devuelve la funcion):
+        QuerySet: Al recorrerlo entrega diccionarios {'_id': ObjectId, 'Ejercicio': 2024, ...}
+                  (los campos que no están guardados en el documento no aparecen)
+    """
+    return queryset.only(*campos).as_pymongo()
+
+
+def calificaciones_por_ids(object_ids, campos=CAMPOS_EXPORTACION, ids_por_consulta=1000):
+    """
+    Lee una selección de calificaciones por ID en consultas $in de tamaño acotado.
+
+    POR QUÉ: Una sola consulta id__in con miles de IDs es lenta y pesada para MongoDB;
+    con lotes de ids_por_consulta cada consulta usa el índice _id y solo hay un lote en memoria.
+
+    CÓMO FUNCIONA:
+    1. Lee solo (_id, FechaAct) de todos los IDs (por lotes) y los ordena por fecha descendente,
+       igual que order_by('-FechaAct', '-id') (los documentos sin fecha van al final)
+    2. Recorre los IDs ya ordenados por lotes y lee los campos pedidos de cada lote
+    3. Entrega los documentos de cada lote en el orden global
+
+    Argumentos:
+        object_ids: Lista de ObjectId (los repetidos se ignoran)
+        campos: Campos a leer (CAMPOS_LISTADO o CAMPOS_EXPORTACION)
+        ids_por_consulta: Máximo de IDs en cada consulta $in
+
+    Returns (lo que devuelve la funcion):
+        generator: Diccionarios de pymongo {'_id': ObjectId, ...} (los IDs que no existen no aparecen)
+    """
+    ids_unicos = list(dict.fromkeys(object_ids))
+    lotes = [ids_unicos[i:i + ids_por_consulta] for i in range(0, len(ids_unicos), ids_por_consulta)]
+
+    # PASO 1: Fechas de todos los IDs, para ordenar la selección completa
+    fechas = []
+    for lote in lotes:
+        fechas.extend(
+            (doc.get('FechaAct'), doc['_id'])
+            for doc in Calificacion.objects(id__in=lote).only('FechaAct').as_pymongo()
+        )
+    fechas.sort(key=lambda fecha_id: (fecha_id[0] is not None, fecha_id[0] or 0, fecha_id[1]), reverse=True)
+    ids_ordenados = [cal_id for _fecha, cal_id in fechas]
+
+    # PASO 2: Campos pedidos, un lote a la vez
+    for inicio in range(0, len(ids_ordenados), ids_por_consulta):
+        lote = ids_ordenados[inicio:inicio + ids_por_consulta]
+        documentos = {doc['_id']: doc for doc in calificaciones_proyectadas(Calificacion.objects(id__in=lote), campos)}
+        for cal_id in lote:
+            if cal_id in documentos:  # Puede haberse eliminado entre las dos lecturas
+                yield documentos[cal_id]
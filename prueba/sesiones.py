@@ -0,0 +1,190 @@
+"""
+SESIONES.PY - Motor de sesiones de Django guardado en MongoDB
+==============================================================
+Uso (nuppy/settings.py):
+    SESSION_ENGINE = 'prueba.sesiones'
+    SESIONES_CACHE = None          # Solo MongoDB
+    SESIONES_CACHE = 'sesiones'    # Caché (memoria local o archivos) delante de MongoDB
+
+POR QUÉ EXISTE ESTE ARCHIVO:
+- Con el motor por defecto de Django las sesiones se guardan en la tabla django_session
+  del archivo db.sqlite3: todas las solicitudes la leen y cada escritura bloquea el archivo
+  completo, así los procesos del servidor se esperan entre sí
+- Todos los datos del sistema ya están en MongoDB; las sesiones pasan a la colección
+  'sesiones' (modelo SesionMongo), que atiende a varios procesos sin bloquearse
+- MongoDB elimina las sesiones vencidas con un índice TTL (no hace falta 'clearsessions')
+
+CÓMO FUNCIONA:
+1. La clave de la sesión (cookie sessionid) es el _id del documento: leerla es una
+   búsqueda por _id
+2. Con SESIONES_CACHE (alias de settings.CACHES) la sesión también se guarda en esa
+   caché con escritura directa (write-through): las lecturas salen de la caché y cada
+   escritura va a MongoDB y a la caché, así MongoDB siempre tiene la versión completa
+   (si la caché se vacía o el proceso se reinicia, la sesión se vuelve a leer de MongoDB)
+3. Las fechas de vencimiento se guardan en UTC (el índice TTL de MongoDB compara en UTC)
+
+Clases definidas:
+- SessionStore: Motor de sesiones (Django busca una clase con este nombre en el módulo)
+"""
+
+# IMPORTACIONES
+# ======================================
+import datetime  # Para calcular el vencimiento de la sesión
+import logging  # Para informar errores de la caché sin interrumpir la solicitud
+from django.conf import settings  # Para leer SESIONES_CACHE
+from django.contrib.sessions.backends.base import CreateError, SessionBase, UpdateError  # Base de los motores de sesión
+from django.core.cache import caches  # Caché opcional delante de MongoDB
+from pymongo.errors import DuplicateKeyError  # Clave de sesión repetida al crear
+from .models import SesionMongo
+
+logger = logging.getLogger(__name__)
+
+# Prefijo de las claves de sesión en la caché
+PREFIJO_CACHE = 'prueba.sesiones.'
+
+
+def _ahora_utc():
+    """Fecha y hora actual en UTC sin zona horaria (como las guarda y compara MongoDB)."""
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+
+class SessionStore(SessionBase):
+    """
+    Sesiones de Django en la colección 'sesiones' de MongoDB, con caché opcional (SESIONES_CACHE).
+    """
+
+    def __init__(self, session_key=None):
+        alias = getattr(settings, 'SESIONES_CACHE', None)
+        self._cache = caches[alias] if alias else None
+        super().__init__(session_key)
+
+    @classmethod
+    def _coleccion(cls):
+        return SesionMongo._get_collection()
+
+    def _clave_cache(self, session_key):
+        return PREFIJO_CACHE + session_key
+
+    # =====================================================================
+    # LECTURA
+    # =====================================================================
+
+    def load(self):
+        """
+        Devuelve los datos de la sesión actual ({} si no existe o venció).
+
+        Con caché: primero la caché; si no está, MongoDB (y se guarda en la caché).
+        """
+        if self.session_key is None:
+            return {}
+
+        if self._cache is not None:
+            try:
+                datos = self._cache.get(self._clave_cache(self.session_key))
+            except Exception:
+                # Algunas cachés rechazan claves inválidas: se lee MongoDB
+                datos = None
+            if datos is not None:
+                return datos
+
+        documento = self._coleccion().find_one(
+            {'_id': self.session_key, 'fecha_expiracion': {'$gt': _ahora_utc()}}
+        )
+        if documento is None:
+            # Sesión inexistente o vencida (el índice TTL la elimina, pero no en el mismo instante)
+            self._session_key = None
+            return {}
+
+        datos = self.decode(documento['datos'])
+        if self._cache is not None:
+            segundos = int((documento['fecha_expiracion'] - _ahora_utc()).total_seconds())
+            self._guardar_en_cache(self.session_key, datos, segundos)
+        return datos
+
+    def exists(self, session_key):
+        """Indica si ya existe una sesión con esa clave (Django lo usa al generar claves nuevas)."""
+        if not session_key:
+            return False
+        if self._cache is not None and self._clave_cache(session_key) in self._cache:
+            return True
+        return self._coleccion().count_documents({'_id': session_key}, limit=1) > 0
+
+    # =====================================================================
+    # ESCRITURA
+    # =====================================================================
+
+    def create(self):
+        """Crea una sesión nueva con una clave que no esté en uso."""
+        while True:
+            self._session_key = self._get_new_session_key()
+            try:
+                self.save(must_create=True)
+            except CreateError:
+                # Otra solicitud creó la misma clave al mismo tiempo: se genera otra
+                continue
+            self.modified = True
+            return
+
+    def save(self, must_create=False):
+        """
+        Guarda la sesión en MongoDB (y en la caché, si está configurada).
+
+        Argumentos:
+            must_create: True para crear la sesión; falla con CreateError si la clave ya existe
+
+        Raises:
+            CreateError: Si must_create y la clave ya existe
+            UpdateError: Si la sesión se eliminó mientras se usaba (ej: logout en otra pestaña)
+        """
+        if self.session_key is None:
+            return self.create()
+
+        datos = self._get_session(no_load=must_create)
+        documento = {
+            'datos': self.encode(datos),
+            'fecha_expiracion': _ahora_utc() + datetime.timedelta(seconds=self.get_expiry_age()),
+        }
+        coleccion = self._coleccion()
+        if must_create:
+            try:
+                coleccion.insert_one({'_id': self.session_key, **documento})
+            except DuplicateKeyError:
+                raise CreateError
+        else:
+            # Igual que el motor de base de datos de Django: una sesión eliminada no se vuelve a crear
+            resultado = coleccion.update_one({'_id': self.session_key}, {'$set': documento})
+            if resultado.matched_count == 0:
+                raise UpdateError
+
+        self._guardar_en_cache(self.session_key, datos, self.get_expiry_age())
+
+    def delete(self, session_key=None):
+        """Elimina la sesión de MongoDB y de la caché (logout, flush)."""
+        if session_key is None:
+            if self.session_key is None:
+                return
+            session_key = self.session_key
+        self._coleccion().delete_one({'_id': session_key})
+        if self._cache is not None:
+            try:
+                self._cache.delete(self._clave_cache(session_key))
+            except Exception:
+                logger.exception('Error al eliminar la sesión de la caché (%s)', self._cache)
+
+    def _guardar_en_cache(self, session_key, datos, segundos):
+        """Guarda los datos en la caché; un error de la caché no impide la solicitud (MongoDB ya tiene la sesión)."""
+        if self._cache is None or segundos <= 0:
+            return
+        try:
+            self._cache.set(self._clave_cache(session_key), datos, segundos)
+        except Exception:
+            logger.exception('Error al guardar la sesión en la caché (%s)', self._cache)
+
+    @classmethod
+    def clear_expired(cls):
+        """
+        Elimina las sesiones vencidas (comando 'clearsessions').
+
+        El índice TTL ya las elimina; esto solo adelanta el trabajo si se ejecuta a mano.
+        """
+        cls._coleccion().delete_many({'fecha_expiracion': {'$lte': _ahora_utc()}})
@@ -1265,6 +1265,16 @@ document.addEventListener('DOMContentLoaded', function() {
     const buscarCalificacionesUrl = window.DJANGO_URLS ? window.DJANGO_URLS.buscarCalificaciones : '/buscar-calificaciones/';
     const tablaBody = document.getElementById('tabla-calificaciones-body');
 
+    // Estado de la paginación de la tabla
+    // POR QUÉ: buscar_calificaciones_view devuelve una página a la vez; para pedir la
+    // siguiente se reenvían los mismos filtros con el cursor que devolvió la anterior
+    const paginacionCalificaciones = {
+        params: '',        // Filtros de la búsqueda actual (query string)
+        cursor: null,      // next_cursor de la última página recibida
+        hayMas: false,     // has_more de la última página recibida
+        cargando: false    // Evita pedir dos veces la misma página
+    };
+
     // ============================================
     // FUNCIÓN: formatearNumero(valor)
     // ============================================
@@ -1338,10 +1348,12 @@ document.addEventListener('DOMContentLoaded', function() {
      * 
      * Parámetros:
      *   - calificaciones: Array de objetos con datos de calificaciones
+     *   - agregar: Si es true, las filas se agregan al final de la tabla (página siguiente)
+     *     en lugar de reemplazar su contenido
      * 
      * Retorna: void
      */
-    function renderizarCalificaciones(calificaciones) {
+    function renderizarCalificaciones(calificaciones, agregar = false) {
         // Validar que el elemento tablaBody exista
         // POR QUÉ: No podemos renderizar si no existe el contenedor
         // CÓMO: Si no existe, salimos de la función inmediatamente
@@ -1352,6 +1364,7 @@ document.addEventListener('DOMContentLoaded', function() {
         // CÓMO: Verificamos si el array está vacío o es null/undefined
         // LÓGICA: Si no hay calificaciones, mostramos mensaje y salimos
         if (!calificaciones || calificaciones.length === 0) {
+            if (agregar) return; // Página siguiente vacía: se mantienen las filas ya mostradas
             tablaBody.innerHTML = `
                 <tr>
                     <td colspan="38" style="text-align: center; padding: 20px;">
@@ -1406,10 +1419,134 @@ document.addEventListener('DOMContentLoaded', function() {
             html += '</tr>';
         });
 
+        if (agregar) {
+            // Las filas nuevas se arman aparte para agregar listeners solo a sus botones
+            const filasNuevas = document.createElement('tbody');
+            filasNuevas.innerHTML = html;
+            agregarEventListenersBotones(filasNuevas);
+            while (filasNuevas.firstChild) {
+                tablaBody.appendChild(filasNuevas.firstChild);
+            }
+            return;
+        }
+
         tablaBody.innerHTML = html;
         
         // Agregar event listeners a los botones después de renderizar
-        agregarEventListenersBotones();
+        agregarEventListenersBotones(tablaBody);
+    }
+
+    // ============================================
+    // FUNCIÓN: mostrarPaginaCalificaciones(data, agregar)
+    // ============================================
+    /**
+     * Muestra una página devuelta por buscar_calificaciones_view y guarda su cursor.
+     * 
+     * CÓMO FUNCIONA:
+     * 1. Guarda next_cursor y has_more para pedir la página siguiente
+     * 2. Renderiza las filas (reemplazando la tabla o agregándolas al final)
+     * 3. Si hay más calificaciones, agrega al final la fila con el botón "Cargar más"
+     * 
+     * Parámetros:
+     *   - data: Respuesta JSON de buscar_calificaciones_view
+     *   - agregar: true si es una página siguiente (se agrega a las filas existentes)
+     */
+    function mostrarPaginaCalificaciones(data, agregar = false) {
+        paginacionCalificaciones.cursor = data.next_cursor || null;
+        paginacionCalificaciones.hayMas = Boolean(data.has_more);
+
+        // Quitar la fila "Cargar más" de la página anterior (se vuelve a poner al final si corresponde)
+        const filaCargarMas = tablaBody ? tablaBody.querySelector('.fila-cargar-mas') : null;
+        if (filaCargarMas) filaCargarMas.remove();
+
+        renderizarCalificaciones(data.calificaciones, agregar);
+
+        if (tablaBody && paginacionCalificaciones.hayMas) {
+            tablaBody.insertAdjacentHTML('beforeend', `
+                <tr class="fila-cargar-mas">
+                    <td colspan="38" style="text-align: center; padding: 12px;">
+                        <button type="button" class="btn btn-cargar-mas"><i class="bi bi-chevron-double-down"></i> Cargar más</button>
+                    </td>
+                </tr>
+            `);
+            tablaBody.querySelector('.btn-cargar-mas').addEventListener('click', cargarSiguientePagina);
+        }
+    }
+
+    // ============================================
+    // FUNCIÓN: buscarPaginaCalificaciones(params, agregar)
+    // ============================================
+    /**
+     * Pide una página de calificaciones a buscar_calificaciones_view y la muestra en la tabla.
+     * 
+     * Parámetros:
+     *   - params: URLSearchParams con los filtros (y el cursor si es una página siguiente)
+     *   - agregar: true si la página se agrega a las filas existentes
+     * 
+     * Retorna:
+     *   - Promise con la respuesta JSON del servidor
+     */
+    function buscarPaginaCalificaciones(params, agregar = false) {
+        const url = `${buscarCalificacionesUrl}?${params.toString()}`;
+        paginacionCalificaciones.cargando = true;
+
+        return fetch(url, {
+            method: 'GET',
+            headers: {
+                'X-CSRFToken': csrftoken
+            }
+        })
+        .then(response => response.json())
+        .then(data => {
+            if (data.success) {
+                mostrarPaginaCalificaciones(data, agregar);
+            }
+            return data;
+        })
+        .finally(() => {
+            paginacionCalificaciones.cargando = false;
+        });
+    }
+
+    // ============================================
+    // FUNCIÓN: cargarSiguientePagina()
+    // ============================================
+    /**
+     * Pide la página siguiente de la búsqueda actual (botón "Cargar más").
+     * Usa los mismos filtros de la búsqueda y el cursor de la última página recibida.
+     */
+    function cargarSiguientePagina() {
+        if (paginacionCalificaciones.cargando || !paginacionCalificaciones.hayMas) return;
+
+        const boton = tablaBody ? tablaBody.querySelector('.btn-cargar-mas') : null;
+        if (boton) {
+            boton.disabled = true;
+            boton.innerHTML = '<i class="bi bi-hourglass-split"></i> Cargando...';
+        }
+
+        const params = new URLSearchParams(paginacionCalificaciones.params);
+        params.append('cursor', paginacionCalificaciones.cursor);
+
+        buscarPaginaCalificaciones(params, true)
+            .then(data => {
+                if (data.success) {
+                    console.log(`Se cargaron ${data.total} calificación(es) más`);
+                } else {
+                    mostrarMensaje('Error', data.error || 'No se pudieron cargar más calificaciones', 'error');
+                    if (boton) {
+                        boton.disabled = false;
+                        boton.innerHTML = '<i class="bi bi-chevron-double-down"></i> Cargar más';
+                    }
+                }
+            })
+            .catch(error => {
+                console.error('Error:', error);
+                mostrarMensaje('Error', 'Error al cargar más calificaciones. Por favor, intente nuevamente.', 'error');
+                if (boton) {
+                    boton.disabled = false;
+                    boton.innerHTML = '<i class="bi bi-chevron-double-down"></i> Cargar más';
+                }
+            });
     }
 
     if (btnBuscar) {
@@ -1424,7 +1561,10 @@ document.addEventListener('DOMContentLoaded', function() {
             if (origen) params.append('origen', origen);
             if (periodo) params.append('periodo', periodo);
 
-            const url = `${buscarCalificacionesUrl}?${params.toString()}`;
+            // Una búsqueda nueva empieza desde la primera página
+            paginacionCalificaciones.params = params.toString();
+            paginacionCalificaciones.cursor = null;
+            paginacionCalificaciones.hayMas = false;
 
             // Mostrar mensaje de carga
             if (tablaBody) {
@@ -1437,17 +1577,10 @@ document.addEventListener('DOMContentLoaded', function() {
                 `;
             }
 
-            fetch(url, {
-                method: 'GET',
-                headers: {
-                    'X-CSRFToken': csrftoken
-                }
-            })
-            .then(response => response.json())
+            buscarPaginaCalificaciones(params)
             .then(data => {
                 if (data.success) {
-                    renderizarCalificaciones(data.calificaciones);
-                    console.log(`Se encontraron ${data.total} calificación(es)`);
+                    console.log(`Se encontraron ${data.total} calificación(es)${data.has_more ? ' (hay más páginas)' : ''}`);
                 } else {
                     mostrarMensaje('Error', data.error || 'No se pudieron buscar las calificaciones', 'error');
                     if (tablaBody) {
@@ -1499,10 +1632,15 @@ document.addEventListener('DOMContentLoaded', function() {
      * - .btn-eliminar-row: Llama a eliminarCalificacion()
      * - .btn-copiar-row: Llama a copiarCalificacion()
      * - .btn-log-row: Llama a verLogCalificacion()
+     * 
+     * Parámetros:
+     *   - contenedor: Elemento donde buscar los botones (por defecto todo el documento).
+     *     Al agregar una página con "Cargar más" se pasan solo las filas nuevas, así los
+     *     botones de las páginas anteriores no reciben un segundo listener.
      */
-    function agregarEventListenersBotones() {
+    function agregarEventListenersBotones(contenedor = document) {
         // Botones MODIFICAR
-        const botonesModificar = document.querySelectorAll('.btn-modificar-row');
+        const botonesModificar = contenedor.querySelectorAll('.btn-modificar-row');
         console.log('Botones modificar encontrados:', botonesModificar.length);
         botonesModificar.forEach((btn, index) => {
             const calId = btn.getAttribute('data-calificacion-id');
@@ -1520,7 +1658,7 @@ document.addEventListener('DOMContentLoaded', function() {
         });
 
         // Botones ELIMINAR
-        const botonesEliminar = document.querySelectorAll('.btn-eliminar-row');
+        const botonesEliminar = contenedor.querySelectorAll('.btn-eliminar-row');
         console.log('Botones eliminar encontrados:', botonesEliminar.length);
         botonesEliminar.forEach((btn, index) => {
             const calId = btn.getAttribute('data-calificacion-id');
@@ -1538,7 +1676,7 @@ document.addEventListener('DOMContentLoaded', function() {
         });
 
         // Botones COPIAR
-        const botonesCopiar = document.querySelectorAll('.btn-copiar-row');
+        const botonesCopiar = contenedor.querySelectorAll('.btn-copiar-row');
         console.log('Botones copiar encontrados:', botonesCopiar.length);
         botonesCopiar.forEach((btn, index) => {
             const calId = btn.getAttribute('data-calificacion-id');
@@ -1556,7 +1694,7 @@ document.addEventListener('DOMContentLoaded', function() {
         });
 
         // Botones LOG
-        const botonesLog = document.querySelectorAll('.btn-log-row');
+        const botonesLog = contenedor.querySelectorAll('.btn-log-row');
         console.log('Botones log encontrados:', botonesLog.length);
         botonesLog.forEach((btn, index) => {
             const calId = btn.getAttribute('data-calificacion-id');
@@ -2283,8 +2421,10 @@ document.addEventListener('DOMContentLoaded', function() {
     }
 
     // ========== BOTÓN LIMPIAR ==========
-    // Cargar todas las calificaciones al iniciar (siempre hacer búsqueda fresca para mostrar datos actualizados)
-    // Esto asegura que incluso si el usuario navega a otro módulo y regresa, se muestren los datos más recientes
+    // Cargar la primera página de calificaciones al iniciar
+    // POR QUÉ: home.html ya no trae las calificaciones dentro del HTML (así se muestra de inmediato
+    // sin importar cuántas haya); la tabla se llena con la búsqueda paginada
+    // Esto también asegura que si el usuario navega a otro módulo y regresa, se muestren los datos más recientes
     if (btnBuscar && buscarCalificacionesUrl) {
         // Resetear filtros para mostrar todas las calificaciones
         if (dashboardMercado) dashboardMercado.value = '';
@@ -2292,9 +2432,6 @@ document.addEventListener('DOMContentLoaded', function() {
         if (dashboardPeriodo) dashboardPeriodo.value = '';
         // Hacer búsqueda automática al cargar para obtener datos frescos
         btnBuscar.click();
-    } else if (window.CALIFICACIONES_INICIALES && window.CALIFICACIONES_INICIALES.length > 0) {
-        // Fallback: usar calificaciones iniciales solo si no se puede hacer búsqueda
-        renderizarCalificaciones(window.CALIFICACIONES_INICIALES);
     }
     
     if (btnLimpiar) {
@@ -2320,14 +2457,28 @@ document.addEventListener('DOMContentLoaded', function() {
     const exportarCalificacionesList = document.getElementById('exportar-calificaciones-list');
     const exportarContador = document.getElementById('exportar-contador');
     
-    let calificacionesFiltradas = []; // Almacenar las calificaciones filtradas para el modal
+    let calificacionesFiltradas = []; // Almacenar las calificaciones filtradas ya cargadas en el modal
+    
+    // Estado de la paginación del modal (igual que la tabla del dashboard)
+    // POR QUÉ: Pedir todas las páginas al abrir el modal descargaba la colección filtrada completa
+    // (cientos de MB); ahora se pide una página y las siguientes solo con "Cargar más"
+    const paginacionExportar = {
+        params: '',        // Filtros del dashboard al abrir el modal (query string)
+        cursor: null,      // next_cursor de la última página recibida
+        hayMas: false,     // has_more de la última página recibida
+        cargando: false    // Evita pedir dos veces la misma página
+    };
+    
+    // "Seleccionar Todas" exporta todas las calificaciones que cumplen los filtros, también las
+    // que todavía no se cargaron en el modal: se envían los filtros al servidor en lugar de los IDs
+    let exportarTodasFiltradas = false;
     
     // Función para cargar las calificaciones filtradas del dashboard en el modal
     // ============================================
     // FUNCIÓN: cargarCalificacionesParaExportar()
     // ============================================
     /**
-     * Carga las calificaciones disponibles para exportar según los filtros del dashboard.
+     * Carga la primera página de calificaciones para exportar según los filtros del dashboard.
      * 
      * POR QUÉ ESTA FUNCIÓN ES NECESARIA:
      * - Permite seleccionar calificaciones específicas para exportar
@@ -2338,10 +2489,9 @@ document.addEventListener('DOMContentLoaded', function() {
      * CÓMO FUNCIONA:
      * 1. Muestra indicador de carga
      * 2. Obtiene filtros actuales del dashboard (mercado, origen, período)
-     * 3. Envía petición AJAX al servidor con los filtros
-     * 4. El servidor retorna calificaciones filtradas
-     * 5. Guarda calificaciones en variable global
-     * 6. Llama a renderizarListaExportar() para mostrarlas
+     * 3. Pide la primera página a buscar_calificaciones_view con los filtros
+     * 4. Las páginas siguientes se piden con el botón "Cargar más" (cargarMasParaExportar)
+     * 5. Llama a renderizarListaExportar() para mostrarlas
      */
     function cargarCalificacionesParaExportar() {
         if (!exportarCalificacionesList) return;
@@ -2353,16 +2503,52 @@ document.addEventListener('DOMContentLoaded', function() {
         const origen = dashboardOrigen ? dashboardOrigen.value : '';
         const periodo = dashboardPeriodo ? dashboardPeriodo.value : '';
         
-        // Construir URL con los mismos filtros que el dashboard
-        const buscarCalificacionesUrl = window.DJANGO_URLS?.buscarCalificaciones || '/prueba/buscar-calificaciones/';
+        // Construir los parámetros con los mismos filtros que el dashboard
         const params = new URLSearchParams();
         if (mercado) params.append('mercado', mercado);
         if (origen) params.append('origen', origen);
         if (periodo) params.append('periodo', periodo);
         
-        const url = params.toString() ? `${buscarCalificacionesUrl}?${params.toString()}` : buscarCalificacionesUrl;
+        // Una apertura del modal empieza desde la primera página y sin selección
+        paginacionExportar.params = params.toString();
+        paginacionExportar.cursor = null;
+        paginacionExportar.hayMas = false;
+        calificacionesFiltradas = [];
+        exportarTodasFiltradas = false;
+        if (checkboxTodasExportar) checkboxTodasExportar.checked = false;
+        actualizarContadorExportar();
         
-        fetch(url, {
+        pedirPaginaExportar(false)
+        .then(data => {
+            if (!data.success) {
+                exportarCalificacionesList.innerHTML = '<div class="exportar-loading"><i class="bi bi-exclamation-triangle"></i><p>No se pudieron cargar las calificaciones</p></div>';
+            }
+        })
+        .catch(error => {
+            console.error('Error al cargar calificaciones:', error);
+            exportarCalificacionesList.innerHTML = '<div class="exportar-loading"><i class="bi bi-x-circle" style="color: var(--color-danger);"></i><p style="color: var(--color-danger);">Error al cargar calificaciones</p></div>';
+        });
+    }
+    
+    // ============================================
+    // FUNCIÓN: pedirPaginaExportar(agregar)
+    // ============================================
+    /**
+     * Pide una página de calificaciones para el modal de exportar y la muestra.
+     * 
+     * Parámetros:
+     *   - agregar: true si es la página siguiente (se agrega al final de la lista)
+     * 
+     * Retorna:
+     *   - Promise con la respuesta JSON del servidor
+     */
+    function pedirPaginaExportar(agregar) {
+        const buscarCalificacionesUrl = window.DJANGO_URLS?.buscarCalificaciones || '/prueba/buscar-calificaciones/';
+        const params = new URLSearchParams(paginacionExportar.params);
+        if (agregar && paginacionExportar.cursor) params.append('cursor', paginacionExportar.cursor);
+        paginacionExportar.cargando = true;
+        
+        return fetch(`${buscarCalificacionesUrl}?${params.toString()}`, {
             method: 'GET',
             headers: {
                 'X-CSRFToken': csrftoken
@@ -2371,23 +2557,58 @@ document.addEventListener('DOMContentLoaded', function() {
         .then(response => response.json())
         .then(data => {
             if (data.success && data.calificaciones) {
-                calificacionesFiltradas = data.calificaciones;
-                renderizarListaExportar();
-            } else {
-                exportarCalificacionesList.innerHTML = '<div class="exportar-loading"><i class="bi bi-exclamation-triangle"></i><p>No se pudieron cargar las calificaciones</p></div>';
+                paginacionExportar.cursor = data.next_cursor || null;
+                paginacionExportar.hayMas = Boolean(data.has_more);
+                calificacionesFiltradas.push(...data.calificaciones);
+                renderizarListaExportar(data.calificaciones, agregar);
+            }
+            return data;
+        })
+        .finally(() => {
+            paginacionExportar.cargando = false;
+        });
+    }
+    
+    // ============================================
+    // FUNCIÓN: cargarMasParaExportar()
+    // ============================================
+    /**
+     * Pide la página siguiente del modal de exportar (botón "Cargar más").
+     */
+    function cargarMasParaExportar() {
+        if (paginacionExportar.cargando || !paginacionExportar.hayMas) return;
+        
+        const boton = exportarCalificacionesList ? exportarCalificacionesList.querySelector('.btn-cargar-mas') : null;
+        if (boton) {
+            boton.disabled = true;
+            boton.innerHTML = '<i class="bi bi-hourglass-split"></i> Cargando...';
+        }
+        
+        pedirPaginaExportar(true)
+        .then(data => {
+            if (!data.success) {
+                mostrarMensaje('Error', data.error || 'No se pudieron cargar más calificaciones', 'error');
+                if (boton) {
+                    boton.disabled = false;
+                    boton.innerHTML = '<i class="bi bi-chevron-double-down"></i> Cargar más';
+                }
             }
         })
         .catch(error => {
-            console.error('Error al cargar calificaciones:', error);
-            exportarCalificacionesList.innerHTML = '<div class="exportar-loading"><i class="bi bi-x-circle" style="color: var(--color-danger);"></i><p style="color: var(--color-danger);">Error al cargar calificaciones</p></div>';
+            console.error('Error:', error);
+            mostrarMensaje('Error', 'Error al cargar más calificaciones. Por favor, intente nuevamente.', 'error');
+            if (boton) {
+                boton.disabled = false;
+                boton.innerHTML = '<i class="bi bi-chevron-double-down"></i> Cargar más';
+            }
         });
     }
     
     // ============================================
-    // FUNCIÓN: renderizarListaExportar()
+    // FUNCIÓN: renderizarListaExportar(nuevas, agregar)
     // ============================================
     /**
-     * Renderiza la lista de calificaciones en el modal de exportar con checkboxes.
+     * Renderiza calificaciones en el modal de exportar con checkboxes.
      * 
      * POR QUÉ ESTA FUNCIÓN ES ÚTIL:
      * - Muestra calificaciones disponibles para exportar
@@ -2397,24 +2618,34 @@ document.addEventListener('DOMContentLoaded', function() {
      * 
      * CÓMO FUNCIONA:
      * 1. Valida que existan calificaciones para mostrar
-     * 2. Genera HTML para cada calificación con checkbox
+     * 2. Genera HTML para cada calificación nueva con checkbox
      * 3. Muestra información básica (instrumento, ejercicio, mercado, origen)
-     * 4. Inserta HTML en el contenedor
-     * 5. Agrega event listeners a checkboxes y items
-     * 6. Actualiza contador de seleccionadas
+     * 4. Reemplaza la lista o agrega las filas al final (página siguiente)
+     * 5. Agrega event listeners a los checkboxes e items nuevos
+     * 6. Si hay más páginas, agrega al final el botón "Cargar más"
+     * 7. Actualiza contador de seleccionadas
+     * 
+     * Parámetros:
+     *   - nuevas: Calificaciones de la página recibida
+     *   - agregar: true si se agregan a las ya mostradas
      */
-    function renderizarListaExportar() {
-        if (!exportarCalificacionesList || calificacionesFiltradas.length === 0) {
+    function renderizarListaExportar(nuevas, agregar = false) {
+        if (!exportarCalificacionesList) return;
+        if (!agregar && nuevas.length === 0) {
             exportarCalificacionesList.innerHTML = '<div class="exportar-loading"><i class="bi bi-inbox"></i><p>No hay calificaciones disponibles con los filtros actuales</p></div>';
+            actualizarContadorExportar();
             return;
         }
         
+        // Índice de la primera calificación nueva dentro de calificacionesFiltradas
+        const inicio = calificacionesFiltradas.length - nuevas.length;
         let html = '';
-        calificacionesFiltradas.forEach((cal, index) => {
+        nuevas.forEach((cal, posicion) => {
+            const index = inicio + posicion;
             const calId = cal.id || cal._id || '';
             html += `
                 <div class="opcion-item opcion-item-exportar" data-index="${index}">
-                    <input type="checkbox" id="checkbox-exportar-${index}" class="checkbox-exportar-calificacion" data-cal-id="${calId}">
+                    <input type="checkbox" id="checkbox-exportar-${index}" class="checkbox-exportar-calificacion" data-cal-id="${calId}"${exportarTodasFiltradas ? ' checked' : ''}>
                     <div>
                         <div>${cal.instrumento || 'Sin instrumento'}</div>
                         <div>
@@ -2427,37 +2658,52 @@ document.addEventListener('DOMContentLoaded', function() {
             `;
         });
         
-        exportarCalificacionesList.innerHTML = html;
+        // Quitar el botón "Cargar más" de la página anterior (se vuelve a poner al final si corresponde)
+        const filaCargarMas = exportarCalificacionesList.querySelector('.exportar-cargar-mas');
+        if (filaCargarMas) filaCargarMas.remove();
         
-        // Agregar event listeners a los checkboxes después de renderizar
-        const checkboxes = exportarCalificacionesList.querySelectorAll('.checkbox-exportar-calificacion');
-        checkboxes.forEach(checkbox => {
+        if (agregar) {
+            exportarCalificacionesList.insertAdjacentHTML('beforeend', html);
+        } else {
+            exportarCalificacionesList.innerHTML = html;
+        }
+        
+        // Agregar event listeners solo a los items nuevos (los anteriores ya los tienen)
+        for (let index = inicio; index < calificacionesFiltradas.length; index++) {
+            const item = exportarCalificacionesList.querySelector(`.opcion-item-exportar[data-index="${index}"]`);
+            if (!item) continue;
+            const checkbox = item.querySelector('.checkbox-exportar-calificacion');
+            
             checkbox.addEventListener('change', function(e) {
                 e.stopPropagation(); // Evitar que el evento se propague al item
+                // Desmarcar una calificación deja de exportar "todas" las filtradas
+                if (!checkbox.checked) exportarTodasFiltradas = false;
                 actualizarContadorExportar();
             });
             checkbox.addEventListener('click', function(e) {
                 e.stopPropagation(); // Evitar que el evento se propague al item
             });
-        });
-        
-        // Agregar event listeners a los items para hacer clic en el checkbox
-        const items = exportarCalificacionesList.querySelectorAll('.opcion-item-exportar');
-        items.forEach(item => {
+            
+            // Hacer clic en el item hace toggle del checkbox
             item.addEventListener('click', function(e) {
                 // Si el clic fue directamente en el checkbox, no hacer nada más (ya se maneja arriba)
                 if (e.target.type === 'checkbox') {
                     return;
                 }
-                // Si el clic fue en el item, hacer toggle del checkbox
-                const checkbox = item.querySelector('.checkbox-exportar-calificacion');
-                if (checkbox) {
-                    checkbox.checked = !checkbox.checked;
-                    // Disparar evento change manualmente para que se actualice el contador
-                    checkbox.dispatchEvent(new Event('change'));
-                }
+                checkbox.checked = !checkbox.checked;
+                // Disparar evento change manualmente para que se actualice el contador
+                checkbox.dispatchEvent(new Event('change'));
             });
-        });
+        }
+        
+        if (paginacionExportar.hayMas) {
+            exportarCalificacionesList.insertAdjacentHTML('beforeend', `
+                <div class="exportar-cargar-mas" style="text-align: center; padding: 12px;">
+                    <button type="button" class="btn btn-cargar-mas"><i class="bi bi-chevron-double-down"></i> Cargar más</button>
+                </div>
+            `);
+            exportarCalificacionesList.querySelector('.btn-cargar-mas').addEventListener('click', cargarMasParaExportar);
+        }
         
         actualizarContadorExportar();
     }
@@ -2477,7 +2723,8 @@ document.addEventListener('DOMContentLoaded', function() {
      * 
      * CÓMO FUNCIONA:
      * 1. Cuenta cuántos checkboxes están marcados
-     * 2. Actualiza el texto del contador
+     * 2. Actualiza el texto del contador (con "Todas" y más páginas sin cargar,
+     *    indica que se exportan todas las calificaciones filtradas)
      * 3. Cambia el icono según la cantidad (vacío o con check)
      * 4. Habilita/deshabilita el botón de exportar
      * 5. Actualiza el estado del checkbox "Todas"
@@ -2488,17 +2735,21 @@ document.addEventListener('DOMContentLoaded', function() {
         const checkboxes = document.querySelectorAll('.checkbox-exportar-calificacion:checked');
         const count = checkboxes.length;
         
+        // Con "Todas" y páginas sin cargar el total no se conoce: se exporta todo lo que cumple los filtros
+        const texto = exportarTodasFiltradas && paginacionExportar.hayMas
+            ? 'Todas las calificaciones con los filtros actuales'
+            : `${count} calificación${count !== 1 ? 'es' : ''} seleccionada${count !== 1 ? 's' : ''}`;
         const contadorText = exportarContador.querySelector('.exportar-contador-text');
         if (contadorText) {
-            contadorText.textContent = `${count} calificación${count !== 1 ? 'es' : ''} seleccionada${count !== 1 ? 's' : ''}`;
+            contadorText.textContent = texto;
         } else {
-            exportarContador.textContent = `${count} calificación${count !== 1 ? 'es' : ''} seleccionada${count !== 1 ? 's' : ''}`;
+            exportarContador.textContent = texto;
         }
         
         // Actualizar icono según cantidad
         const contadorIcon = exportarContador.querySelector('i');
         if (contadorIcon) {
-            if (count > 0) {
+            if (count > 0 || exportarTodasFiltradas) {
                 contadorIcon.className = 'bi bi-check-circle-fill';
                 contadorIcon.style.color = 'var(--color-success)';
             } else {
@@ -2509,13 +2760,14 @@ document.addEventListener('DOMContentLoaded', function() {
         
         // Habilitar/deshabilitar botón de exportar
         if (btnExportarSeleccionadas) {
-            btnExportarSeleccionadas.disabled = count === 0;
+            btnExportarSeleccionadas.disabled = count === 0 && !exportarTodasFiltradas;
         }
         
-        // Actualizar checkbox "Todas"
+        // Actualizar checkbox "Todas" (con más páginas sin cargar, solo si se marcó "Todas")
         if (checkboxTodasExportar) {
             const totalCheckboxes = document.querySelectorAll('.checkbox-exportar-calificacion').length;
-            checkboxTodasExportar.checked = count === totalCheckboxes && totalCheckboxes > 0;
+            checkboxTodasExportar.checked = exportarTodasFiltradas
+                || (count === totalCheckboxes && totalCheckboxes > 0 && !paginacionExportar.hayMas);
         }
     }
     
@@ -2562,6 +2814,7 @@ document.addEventListener('DOMContentLoaded', function() {
         if (modalExportarOverlay) {
             modalExportarOverlay.style.display = 'none';
             // Limpiar selecciones
+            exportarTodasFiltradas = false;
             if (checkboxTodasExportar) checkboxTodasExportar.checked = false;
             const checkboxes = document.querySelectorAll('.checkbox-exportar-calificacion');
             checkboxes.forEach(cb => cb.checked = false);
@@ -2583,8 +2836,10 @@ document.addEventListener('DOMContentLoaded', function() {
     }
     
     // Checkbox "Todas" - seleccionar/deseleccionar todas
+    // Marca las ya cargadas y también las páginas que faltan: al exportar se envían los filtros, no los IDs
     if (checkboxTodasExportar) {
         checkboxTodasExportar.addEventListener('change', function() {
+            exportarTodasFiltradas = checkboxTodasExportar.checked;
             const checkboxes = document.querySelectorAll('.checkbox-exportar-calificacion');
             checkboxes.forEach(cb => {
                 cb.checked = checkboxTodasExportar.checked;
@@ -2599,23 +2854,48 @@ document.addEventListener('DOMContentLoaded', function() {
             const checkboxes = document.querySelectorAll('.checkbox-exportar-calificacion:checked');
             const ids = Array.from(checkboxes).map(cb => cb.getAttribute('data-cal-id')).filter(id => id);
             
-            if (ids.length === 0) {
+            if (ids.length === 0 && !exportarTodasFiltradas) {
                 mostrarMensaje('Advertencia', 'Debe seleccionar al menos una calificación para exportar', 'warning');
                 return;
             }
             
-            // Construir URL con los IDs
+            // Enviar los IDs (o los filtros) por POST en un formulario oculto
+            // POR QUÉ: Con miles de filas seleccionadas la URL (?ids=...) supera el largo que aceptan
+            // el navegador y el servidor; un formulario POST no tiene ese límite y la respuesta
+            // (el CSV por streaming) se descarga igual que al abrir la URL
             const exportarUrl = window.DJANGO_URLS?.exportarCalificaciones || '/prueba/exportar-calificaciones/';
-            const params = new URLSearchParams();
-            params.append('ids', ids.join(','));
+            const formulario = document.createElement('form');
+            formulario.method = 'POST';
+            formulario.action = exportarUrl;
+            formulario.target = '_blank';
+            formulario.style.display = 'none';
             
-            const url = `${exportarUrl}?${params.toString()}`;
+            // formato: csv, parquet o xlsx (selector del modal; csv si no existe)
+            const selectFormato = document.getElementById('exportar-formato');
+            const formato = selectFormato ? selectFormato.value : 'csv';
+            const campos = { csrfmiddlewaretoken: csrftoken, formato: formato };
+            if (exportarTodasFiltradas) {
+                // "Todas": el servidor exporta por los filtros del dashboard (sin IDs),
+                // incluidas las calificaciones de páginas que no se cargaron en el modal
+                new URLSearchParams(paginacionExportar.params).forEach((valor, nombre) => { campos[nombre] = valor; });
+            } else {
+                campos.ids = ids.join(',');
+            }
+            Object.entries(campos).forEach(([nombre, valor]) => {
+                const input = document.createElement('input');
+                input.type = 'hidden';
+                input.name = nombre;
+                input.value = valor;
+                formulario.appendChild(input);
+            });
             
             // Cerrar modal y exportar
             cerrarModalExportar();
             
-            // Abrir en nueva ventana para descargar el archivo
-            window.open(url, '_blank');
+            // Enviar el formulario (se abre en nueva ventana para descargar el archivo) y quitarlo del documento
+            document.body.appendChild(formulario);
+            formulario.submit();
+            formulario.remove();
         });
     }
 
@@ -2628,6 +2908,16 @@ document.addEventListener('DOMContentLoaded', function() {
     let nombreArchivoFactorData = null;
     let hashArchivoMonto = null;
     let nombreArchivoMontoData = null;
+    // Modo streaming: para archivos grandes el servidor solo devuelve una muestra
+    // y al grabar se reenvía el archivo original en lugar de las filas en JSON
+    let archivoFactorOriginal = null;
+    let archivoMontoOriginal = null;
+    let modoStreamingFactor = false;
+    let modoStreamingMonto = false;
+    // Token de la carga preparada en el servidor durante la previsualización:
+    // al grabar solo se envía el token y el servidor inserta las filas ya validadas
+    let tokenCargaFactor = null;
+    let tokenCargaMonto = null;
     
     // Elementos del modal de carga por factor
     const modalCargaFactor = document.getElementById('carga-factor-modal-overlay');
@@ -2800,14 +3090,27 @@ document.addEventListener('DOMContentLoaded', function() {
                     datosCSVFactor = data.datos;
                     hashArchivoFactor = data.hash_archivo || null;
                     nombreArchivoFactorData = data.nombre_archivo || null;
+                    archivoFactorOriginal = archivo;
+                    modoStreamingFactor = !!data.modo_streaming;
+                    tokenCargaFactor = data.token_carga || null;
                     mostrarPreviewFactor(data.datos);
                     if (btnGrabarFactor) btnGrabarFactor.disabled = false;
                 } else {
                     datosCSVMonto = data.datos;
                     hashArchivoMonto = data.hash_archivo || null;
                     nombreArchivoMontoData = data.nombre_archivo || null;
+                    archivoMontoOriginal = archivo;
+                    modoStreamingMonto = !!data.modo_streaming;
+                    tokenCargaMonto = data.token_carga || null;
                     mostrarPreviewMonto(data.datos);
                     if (btnCalcularFactoresMonto) btnCalcularFactoresMonto.disabled = false;
+                    // Con la carga preparada (o en modo streaming) el servidor calcula los factores al grabar,
+                    // así que se puede grabar sin pasar por "Calcular Factores"
+                    if ((tokenCargaMonto || modoStreamingMonto) && btnGrabarMonto) btnGrabarMonto.disabled = false;
+                }
+                
+                if (data.modo_streaming) {
+                    mostrarMensaje('Archivo grande', `El archivo tiene ${data.total} fila(s) válidas. Se muestran solo las primeras ${data.datos.length} en la previsualización; al grabar se procesará el archivo completo.`, 'info');
                 }
                 
                 if (data.errores && data.errores.length > 0) {
@@ -3015,6 +3318,9 @@ document.addEventListener('DOMContentLoaded', function() {
         datosCSVFactor = null;
         hashArchivoFactor = null;
         nombreArchivoFactorData = null;
+        archivoFactorOriginal = null;
+        modoStreamingFactor = false;
+        tokenCargaFactor = null;
         // Limpiar campos del formulario
         if (inputArchivoFactor) inputArchivoFactor.value = '';
         if (nombreArchivoFactor) nombreArchivoFactor.value = '';
@@ -3050,6 +3356,9 @@ document.addEventListener('DOMContentLoaded', function() {
         datosCSVMonto = null;
         hashArchivoMonto = null;
         nombreArchivoMontoData = null;
+        archivoMontoOriginal = null;
+        modoStreamingMonto = false;
+        tokenCargaMonto = null;
         // Limpiar campos del formulario
         if (inputArchivoMonto) inputArchivoMonto.value = '';
         if (nombreArchivoMonto) nombreArchivoMonto.value = '';
@@ -3114,7 +3423,8 @@ document.addEventListener('DOMContentLoaded', function() {
      * CÓMO FUNCIONA:
      * 1. Determina la URL según el tipo (factor o monto)
      * 2. Obtiene hash y nombre del archivo guardados
-     * 3. Envía datos al servidor en formato JSON
+     * 3. Envía al servidor el token de la carga preparada en la previsualización
+     *    (si no hay token: el archivo original en modo streaming, o los datos en formato JSON)
      * 4. El servidor valida y guarda cada calificación en MongoDB
      * 5. Retorna cantidad de calificaciones creadas y errores encontrados
      * 6. Muestra mensaje de éxito/error con detalles
@@ -3136,20 +3446,48 @@ document.addEventListener('DOMContentLoaded', function() {
         const hashArchivo = tipo === 'factor' ? hashArchivoFactor : hashArchivoMonto;
         const nombreArchivo = tipo === 'factor' ? nombreArchivoFactorData : nombreArchivoMontoData;
         
-        console.log('Enviando datos para grabar:', { tipo, total: datos.length, url, hashArchivo, nombreArchivo });
+        // Carga preparada: el servidor ya tiene las filas validadas, solo se envía el token
+        const tokenCarga = tipo === 'factor' ? tokenCargaFactor : tokenCargaMonto;
+        // Modo streaming: se reenvía el archivo original y el servidor lo lee por bloques
+        const modoStreaming = tipo === 'factor' ? modoStreamingFactor : modoStreamingMonto;
+        const archivoOriginal = tipo === 'factor' ? archivoFactorOriginal : archivoMontoOriginal;
         
-        fetch(url, {
-            method: 'POST',
-            headers: {
-                'X-CSRFToken': csrftoken,
-                'Content-Type': 'application/json'
-            },
-            body: JSON.stringify({ 
-                datos: datos,
-                hash_archivo: hashArchivo,
-                nombre_archivo: nombreArchivo
-            })
-        })
+        console.log('Enviando datos para grabar:', { tipo, total: datos.length, url, hashArchivo, nombreArchivo, modoStreaming, tokenCarga });
+        
+        let opciones;
+        if (tokenCarga) {
+            opciones = {
+                method: 'POST',
+                headers: {
+                    'X-CSRFToken': csrftoken,
+                    'Content-Type': 'application/json'
+                },
+                body: JSON.stringify({ token_carga: tokenCarga })
+            };
+        } else if (modoStreaming && archivoOriginal) {
+            const formData = new FormData();
+            formData.append('archivo', archivoOriginal);
+            opciones = {
+                method: 'POST',
+                headers: { 'X-CSRFToken': csrftoken },
+                body: formData
+            };
+        } else {
+            opciones = {
+                method: 'POST',
+                headers: {
+                    'X-CSRFToken': csrftoken,
+                    'Content-Type': 'application/json'
+                },
+                body: JSON.stringify({ 
+                    datos: datos,
+                    hash_archivo: hashArchivo,
+                    nombre_archivo: nombreArchivo
+                })
+            };
+        }
+        
+        fetch(url, opciones)
         .then(response => {
             console.log('Respuesta del servidor:', response.status, response.statusText);
             // Intentar parsear JSON incluso si el status no es 200 para obtener mensajes personalizados
@@ -3163,76 +3501,17 @@ document.addEventListener('DOMContentLoaded', function() {
         .then(result => {
             const data = result.data;
             console.log('Datos recibidos del servidor:', data);
-            if (data.success) {
-                if (data.total > 0) {
-                    let mensaje = `Se grabaron ${data.total} calificación(es) exitosamente.`;
-                    if (data.errores && data.errores.length > 0) {
-                        mensaje += `\n\nSe encontraron ${data.errores.length} error(es):\n${data.errores.slice(0, 5).join('\n')}`;
-                        if (data.errores.length > 5) {
-                            mensaje += `\n... y ${data.errores.length - 5} error(es) más.`;
-                        }
-                    }
-                    mostrarMensaje('Éxito', mensaje, 'success');
-                    // Cerrar el modal de carga
-                    const modalFactor = document.getElementById('carga-factor-modal-overlay');
-                    const modalMonto = document.getElementById('carga-monto-modal-overlay');
-                    if (modalFactor) modalFactor.style.display = 'none';
-                    if (modalMonto) modalMonto.style.display = 'none';
-                    
-                    // Buscar todas las calificaciones sin filtros para mostrarlas
-                    setTimeout(() => {
-                        // Limpiar filtros del dashboard
-                        if (dashboardMercado) dashboardMercado.value = '';
-                        if (dashboardOrigen) dashboardOrigen.value = '';
-                        if (dashboardPeriodo) dashboardPeriodo.value = '';
-                        
-                        // Hacer la búsqueda sin filtros (parámetros vacíos)
-                        const params = new URLSearchParams();
-                        const url = `${buscarCalificacionesUrl}?${params.toString()}`;
-                        
-                        console.log('Buscando calificaciones después de grabar:', url);
-                        
-                        fetch(url, {
-                            method: 'GET',
-                            headers: {
-                                'X-CSRFToken': csrftoken
-                            }
-                        })
-                            .then(response => response.json())
-                            .then(data => {
-                                console.log('Calificaciones recibidas después de grabar:', data);
-                                if (data.success) {
-                                    renderizarCalificaciones(data.calificaciones);
-                                    console.log(`Se cargaron ${data.total} calificación(es) después de grabar`);
-                                } else {
-                                    console.error('Error al buscar calificaciones:', data.error);
-                                }
-                            })
-                            .catch(error => {
-                                console.error('Error al buscar calificaciones:', error);
-                            });
-                    }, 1500);
-                } else {
-                    // Si no se grabaron registros, mostrar los errores
-                    let mensajeError = 'No se grabaron calificaciones.\n\nErrores encontrados:\n';
-                    if (data.errores && data.errores.length > 0) {
-                        mensajeError += data.errores.slice(0, 10).join('\n');
-                        if (data.errores.length > 10) {
-                            mensajeError += `\n... y ${data.errores.length - 10} error(es) más.`;
-                        }
-                    } else {
-                        mensajeError += 'No se encontraron errores específicos.';
-                    }
-                    mostrarMensaje('Error', mensajeError, 'error');
-                }
-            } else {
-                // Si hay error de duplicado, mostrar mensaje específico
-                if (data.duplicado) {
-                    mostrarMensaje('Archivo Duplicado', data.error || 'Este archivo ya fue procesado anteriormente', 'error');
-                } else {
-                    mostrarMensaje('Error', data.error || 'Error al grabar los datos', 'error');
-                }
+            if (data.success && data.en_segundo_plano) {
+                // La carga es grande: el servidor la graba en segundo plano y aquí se consulta el avance
+                const modalFactor = document.getElementById('carga-factor-modal-overlay');
+                const modalMonto = document.getElementById('carga-monto-modal-overlay');
+                if (modalFactor) modalFactor.style.display = 'none';
+                if (modalMonto) modalMonto.style.display = 'none';
+                mostrarMensaje('Carga en segundo plano', `${data.message}\nPuede seguir trabajando; se le avisará cuando termine.`, 'info');
+                seguirCargaEnSegundoPlano(data.trabajo_id);
+                return;
             }
+            mostrarResultadoGrabado(data);
         })
         .catch(error => {
             console.error('Error completo:', error);
@@ -3244,6 +3523,135 @@ document.addEventListener('DOMContentLoaded', function() {
             }
         });
     }
+
+    // ============================================
+    // FUNCIÓN: mostrarResultadoGrabado(data)
+    // ============================================
+    /**
+     * Muestra el resultado de grabar un CSV (calificaciones creadas y errores)
+     * y, si se creó alguna, cierra el modal y actualiza la tabla.
+     * 
+     * La usan grabarDatosCSV() (carga directa) y seguirCargaEnSegundoPlano()
+     * (cuando termina una carga en segundo plano).
+     * 
+     * Parámetros:
+     *   - data: Respuesta del servidor (success, total, errores, error, duplicado)
+     */
+    function mostrarResultadoGrabado(data) {
+        if (data.success) {
+            if (data.total > 0) {
+                let mensaje = `Se grabaron ${data.total} calificación(es) exitosamente.`;
+                if (data.errores && data.errores.length > 0) {
+                    // En segundo plano el servidor guarda solo los primeros errores: total_errores trae la cantidad real
+                    const totalErrores = data.total_errores || data.errores.length;
+                    mensaje += `\n\nSe encontraron ${totalErrores} error(es):\n${data.errores.slice(0, 5).join('\n')}`;
+                    if (totalErrores > 5) {
+                        mensaje += `\n... y ${totalErrores - 5} error(es) más.`;
+                    }
+                }
+                mostrarMensaje('Éxito', mensaje, 'success');
+                // Cerrar el modal de carga
+                const modalFactor = document.getElementById('carga-factor-modal-overlay');
+                const modalMonto = document.getElementById('carga-monto-modal-overlay');
+                if (modalFactor) modalFactor.style.display = 'none';
+                if (modalMonto) modalMonto.style.display = 'none';
+                
+                // Buscar todas las calificaciones sin filtros para mostrarlas
+                setTimeout(() => {
+                    // Limpiar filtros del dashboard
+                    if (dashboardMercado) dashboardMercado.value = '';
+                    if (dashboardOrigen) dashboardOrigen.value = '';
+                    if (dashboardPeriodo) dashboardPeriodo.value = '';
+                    
+                    // Hacer la búsqueda sin filtros (parámetros vacíos), desde la primera página
+                    const params = new URLSearchParams();
+                    paginacionCalificaciones.params = '';
+                    
+                    console.log('Buscando calificaciones después de grabar');
+                    
+                    buscarPaginaCalificaciones(params)
+                        .then(data => {
+                            console.log('Calificaciones recibidas después de grabar:', data);
+                            if (data.success) {
+                                console.log(`Se cargaron ${data.total} calificación(es) después de grabar`);
+                            } else {
+                                console.error('Error al buscar calificaciones:', data.error);
+                            }
+                        })
+                        .catch(error => {
+                            console.error('Error al buscar calificaciones:', error);
+                        });
+                }, 1500);
+            } else {
+                // Si no se grabaron registros, mostrar los errores
+                let mensajeError = 'No se grabaron calificaciones.\n\nErrores encontrados:\n';
+                if (data.errores && data.errores.length > 0) {
+                    mensajeError += data.errores.slice(0, 10).join('\n');
+                    if (data.errores.length > 10) {
+                        mensajeError += `\n... y ${data.errores.length - 10} error(es) más.`;
+                    }
+                } else {
+                    mensajeError += 'No se encontraron errores específicos.';
+                }
+                mostrarMensaje('Error', mensajeError, 'error');
+            }
+        } else {
+            // Si hay error de duplicado, mostrar mensaje específico
+            if (data.duplicado) {
+                mostrarMensaje('Archivo Duplicado', data.error || 'Este archivo ya fue procesado anteriormente', 'error');
+            } else {
+                mostrarMensaje('Error', data.error || 'Error al grabar los datos', 'error');
+            }
+        }
+    }
+    
+    // ============================================
+    // FUNCIÓN: seguirCargaEnSegundoPlano(trabajoId)
+    // ============================================
+    /**
+     * Consulta cada 2 segundos el avance de una carga masiva en segundo plano
+     * hasta que termina, y entonces muestra el resultado.
+     * 
+     * POR QUÉ: Las cargas grandes ya no se graban dentro de la solicitud (el proxy
+     * la cortaba por timeout); el servidor responde con un trabajo_id y el avance
+     * (filas procesadas, errores, tiempo restante) se consulta en estado_carga_view.
+     * 
+     * Parámetros:
+     *   - trabajoId: ID del trabajo devuelto por cargar_factor_view / cargar_monto_view
+     */
+    function seguirCargaEnSegundoPlano(trabajoId) {
+        const url = (window.DJANGO_URLS?.estadoCargaBase || '/prueba/estado-carga/000000000000000000000000/')
+            .replace('000000000000000000000000', trabajoId);
+        
+        const consultar = () => {
+            fetch(url, { method: 'GET' })
+                .then(response => response.json())
+                .then(data => {
+                    if (!data.success) {
+                        mostrarMensaje('Error', data.error || 'No se pudo consultar el avance de la carga', 'error');
+                        return;
+                    }
+                    const eta = data.eta_segundos !== null ? `, faltan ~${data.eta_segundos} s` : '';
+                    console.log(`Carga en segundo plano: ${data.estado} ${data.procesadas}/${data.total_filas} (${data.porcentaje}%${eta}), ${data.total_errores} error(es)`);
+                    
+                    if (!data.terminado) {
+                        setTimeout(consultar, 2000);
+                        return;
+                    }
+                    if (data.estado === 'error') {
+                        mostrarMensaje('Error', data.message || 'Error al grabar los datos', 'error');
+                    } else {
+                        mostrarResultadoGrabado(data);
+                    }
+                })
+                .catch(error => {
+                    // Un error de red no cancela la carga: se vuelve a consultar
+                    console.error('Error al consultar el avance de la carga:', error);
+                    setTimeout(consultar, 5000);
+                });
+        };
+        setTimeout(consultar, 2000);
+    }
     
     // ============================================
     // FUNCIÓN: calcularFactoresDesdeMontos(datos)
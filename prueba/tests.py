@@ -1,3 +1,184 @@
-from django.test import TestCase
+"""
+TESTS.PY - Pruebas automáticas de la app prueba
+================================================
+Uso:
+    python manage.py test prueba
 
-# Create your tests here.
+Las pruebas no usan la base de datos (SimpleTestCase): comparan cálculos en memoria.
+"""
+
+# IMPORTACIONES
+# ======================================
+import threading  # Para la ráfaga simultánea de intentos de login
+from decimal import Decimal  # Para el cálculo de referencia con Decimal
+from unittest import mock  # Para fijar la hora de las cubetas
+from django.core.cache import caches  # Para vaciar la caché del backend 'cache'
+from django.test import SimpleTestCase, override_settings  # Pruebas sin base de datos
+from . import limite_login
+from .limite_login import registrar_login_correcto, verificar_intento_login
+from .motor_factores import calcular_factores, calcular_sumas_base, factores_decimales, factores_flotantes
+
+
+def _calculo_decimal_anterior(fila, maximo=None):
+    """
+    Cálculo de factores que usaban las vistas antes del motor de factores (un bucle de Decimal por monto).
+
+    Returns (lo que devuelve la funcion):
+        tuple: (suma_base, factores) como Decimal
+    """
+    suma_base = Decimal(0)
+    for monto in fila[:12]:  # Del 8 al 19
+        suma_base += monto
+    if not suma_base > 0:
+        return suma_base, [Decimal(0)] * len(fila)
+    factores = []
+    for monto in fila:
+        factor = (monto / suma_base).quantize(Decimal('0.00000001'))
+        if maximo is not None and factor > maximo:
+            factor = Decimal(maximo)
+        factores.append(factor)
+    return suma_base, factores
+
+
+def _fila(*montos, **columnas):
+    """Fila de 30 montos: los primeros en orden (montos 8, 9, ...), el resto Decimal(0) como un campo vacío."""
+    fila = [Decimal(0)] * 30
+    for posicion, monto in enumerate(montos):
+        fila[posicion] = monto
+    for nombre, monto in columnas.items():
+        fila[int(nombre[1:]) - 8] = monto  # m20=... -> monto 20
+    return fila
+
+
+class MotorFactoresTests(SimpleTestCase):
+    """El motor de factores debe dar exactamente el mismo Decimal (repr) que el bucle anterior."""
+
+    FILAS = [
+        _fila(),  # Todos los campos vacíos (SumaBase 0)
+        _fila(Decimal(1000)),  # Entero: SumaBase '1000', no '1000.00'
+        _fila(Decimal('1000'), Decimal('250'), m20=Decimal('125')),
+        _fila(Decimal('1000.0'), Decimal('3')),  # Exponente -1
+        _fila(Decimal('1E+3'), Decimal('7')),  # Exponente positivo
+        _fila(Decimal('1234.56'), Decimal('0.01'), m37=Decimal('99.99')),
+        _fila(Decimal('0.125'), Decimal('1.005'), m21=Decimal('0.333')),  # Más de 2 decimales
+        _fila(Decimal('100'), Decimal('-0'), m22=Decimal('-0.00')),  # Ceros negativos
+        _fila(Decimal('-0'), Decimal('-0.00')),  # SumaBase con solo ceros negativos
+        _fila(Decimal('100'), Decimal('-150')),  # SumaBase negativa
+        _fila(Decimal('2000000.00'), m20=Decimal('0.01'), m21=Decimal('0.03')),  # Mitad exacta (HALF_EVEN)
+        _fila(Decimal('2000000.01'), m20=Decimal('0.01'), m21=Decimal('0.03')),  # Justo debajo de la mitad
+        _fila(Decimal('1999999.99'), m20=Decimal('0.01'), m21=Decimal('0.03')),  # Justo encima de la mitad
+        _fila(Decimal('3'), m20=Decimal('1')),  # Decimales periódicos
+        _fila(Decimal('100'), Decimal('-50'), m20=Decimal('50')),  # Factores 2 y 1 (recorte con maximo=1)
+    ]
+
+    def _comparar(self, fila, maximo=None):
+        suma_esperada, factores_esperados = _calculo_decimal_anterior(fila, maximo)
+        resultado = calcular_factores([fila], maximo=maximo)
+        self.assertEqual(repr(resultado.sumas_base[0]), repr(suma_esperada))
+        self.assertEqual(repr(calcular_sumas_base([fila])[0]), repr(suma_esperada))
+        self.assertEqual([repr(f) for f in factores_decimales(resultado)[0]], [repr(f) for f in factores_esperados])
+        self.assertEqual(factores_flotantes(resultado)[0].tolist(), [float(f) for f in factores_esperados])
+
+    def test_montos_decimal_iguales_al_calculo_anterior(self):
+        for fila in self.FILAS:
+            for maximo in (None, 1):
+                with self.subTest(fila=fila[:12], maximo=maximo):
+                    self._comparar(fila, maximo)
+
+    def test_montos_float_iguales_al_calculo_anterior(self):
+        # Los CSV entregan float: el cálculo anterior usaba Decimal(str(valor))
+        filas = [
+            [1000.0, 12.5, -0.0, 0.01] + [0.0] * 8 + [250.25, 0.125, 1e20, -0.0] + [0.0] * 14,
+            [2000000.0] + [0.0] * 11 + [0.01, 0.03] + [0.0] * 16,
+            [100.0, -50.0] + [0.0] * 10 + [50.0] + [0.0] * 17,
+        ]
+        for fila in filas:
+            for maximo in (None, 1):
+                with self.subTest(fila=fila[:12], maximo=maximo):
+                    suma_esperada, factores_esperados = _calculo_decimal_anterior([Decimal(str(v)) for v in fila], maximo)
+                    resultado = calcular_factores([fila], maximo=maximo)
+                    self.assertEqual(repr(resultado.sumas_base[0]), repr(suma_esperada))
+                    self.assertEqual(repr(calcular_sumas_base([fila])[0]), repr(suma_esperada))
+                    self.assertEqual([repr(f) for f in factores_decimales(resultado)[0]], [repr(f) for f in factores_esperados])
+
+    def test_varias_filas_a_la_vez(self):
+        resultado = calcular_factores(self.FILAS, maximo=1)
+        for fila, suma_base, factores in zip(self.FILAS, resultado.sumas_base, factores_decimales(resultado)):
+            suma_esperada, factores_esperados = _calculo_decimal_anterior(fila, 1)
+            self.assertEqual(repr(suma_base), repr(suma_esperada))
+            self.assertEqual([repr(f) for f in factores], [repr(f) for f in factores_esperados])
+
+    def test_factor_enorme_sin_recorte(self):
+        # unidades = factor × 1e8 supera 2**53: la conversión a float no debe redondear dos veces
+        fila = _fila(Decimal('0.07'), m20=Decimal('148875594.20'))
+        self._comparar(fila)
+
+
+# Por cuenta: 5 intentos y 30 por minuto (una ficha cada 2 segundos, sin errores de redondeo en las esperas)
+@override_settings(LOGIN_LIMITE_ACTIVO=True, LOGIN_LIMITE_BACKEND='local', LOGIN_LIMITE_IP=(20, 10), LOGIN_LIMITE_CUENTA=(5, 30))
+class LimiteLoginTests(SimpleTestCase):
+    """Cubetas de intentos de login: ráfaga, recuperación, espera (Retry-After) y devolución de fichas."""
+
+    CORREO = 'usuario@ejemplo.cl'
+
+    def setUp(self):
+        limite_login._locales.limpiar()
+        caches['default'].clear()
+        self.ahora = 1000.0
+        reloj = mock.patch.object(limite_login, 'time', mock.Mock(time=lambda: self.ahora))
+        reloj.start()
+        self.addCleanup(reloj.stop)
+
+    def _intentos(self, cantidad, correo=CORREO):
+        """Intentos desde IPs distintas (solo cuenta la cubeta del correo); devuelve las esperas."""
+        return [verificar_intento_login(f'10.0.0.{n}', correo) for n in range(cantidad)]
+
+    def test_rafaga_recuperacion_y_espera(self):
+        self.assertEqual(self._intentos(6), [0, 0, 0, 0, 0, 2])
+        self.ahora += 1  # Media ficha recuperada
+        self.assertEqual(verificar_intento_login('10.0.1.1', self.CORREO), 1)
+        self.ahora += 1
+        self.assertEqual(verificar_intento_login('10.0.1.2', self.CORREO), 0)
+        self.assertEqual(verificar_intento_login('10.0.1.3', self.CORREO), 2)
+        # Las demás cuentas tienen su propia cubeta
+        self.assertEqual(verificar_intento_login('10.0.1.4', 'otro@ejemplo.cl'), 0)
+
+    def test_limite_por_ip(self):
+        esperas = [verificar_intento_login('10.0.0.1', f'cuenta{n}@ejemplo.cl') for n in range(21)]
+        self.assertEqual(esperas, [0] * 20 + [6])
+
+    def test_login_correcto_no_gasta_intentos(self):
+        for n in range(10):
+            self.assertEqual(verificar_intento_login(f'10.0.0.{n}', self.CORREO), 0)
+            registrar_login_correcto(self.CORREO)
+        # La devolución no supera la capacidad: siguen siendo 5 intentos fallidos
+        self.assertEqual(self._intentos(6), [0, 0, 0, 0, 0, 2])
+
+    @override_settings(LOGIN_LIMITE_BACKEND='cache', LOGIN_LIMITE_CACHE='default')
+    def test_backend_cache(self):
+        self.assertEqual(verificar_intento_login('10.0.0.1', self.CORREO), 0)
+        registrar_login_correcto(self.CORREO)
+        self.assertEqual(self._intentos(6), [0, 0, 0, 0, 0, 2])
+        self.assertEqual(limite_login._locales._cubetas, {})
+
+    @override_settings(LOGIN_LIMITE_ACTIVO=False)
+    def test_limite_desactivado(self):
+        self.assertEqual(self._intentos(30), [0] * 30)
+
+    def test_rafaga_simultanea_contra_una_cuenta(self):
+        # Intentos simultáneos desde muchas IPs: solo pasan tantos como fichas tiene la cuenta
+        # (la ficha se gasta antes de bcrypt, no después)
+        cantidad = 50
+        barrera = threading.Barrier(cantidad)
+        esperas = []
+
+        def intento(n):
+            barrera.wait()
+            esperas.append(verificar_intento_login(f'10.0.{n}.1', self.CORREO))
+
+        hilos = [threading.Thread(target=intento, args=(n,)) for n in range(cantidad)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        self.assertEqual(esperas.count(0), 5)
@@ -0,0 +1,260 @@
+"""
+TRABAJOS.PY - Cargas masivas en segundo plano
+==============================================
+Este archivo contiene el ejecutor de trabajos que graba en MongoDB las cargas
+masivas grandes fuera de la solicitud HTTP.
+
+POR QUÉ EXISTE ESTE ARCHIVO:
+- Grabar un CSV de cientos de miles de filas dentro de cargar_monto_view ocupaba
+  el proceso web durante minutos y el proxy cortaba la solicitud por timeout
+- Con un trabajador en segundo plano la vista responde de inmediato (HTTP 202) y el
+  navegador consulta el avance en estado_carga_view (filas procesadas, errores, ETA)
+- Los demás usuarios no quedan esperando detrás de una carga de 10 minutos
+
+CÓMO FUNCIONA:
+1. La previsualización deja los bloques validados en el staging (CargaPreparada)
+2. encolar_carga crea un documento TrabajoCarga y lo envía al pool de hilos
+3. El trabajador lee los bloques, los inserta por lotes y actualiza el avance en el documento
+4. Al terminar crea el log 'Carga Masiva' y el ArchivoCSV, y elimina la carga preparada
+5. Si el trabajo falla, se eliminan las calificaciones que alcanzó a insertar: el archivo
+   se puede volver a cargar sin duplicar filas
+6. Un trabajo sin avance durante CARGA_MASIVA_TRABAJO_SIN_AVANCE segundos (ej: el proceso se
+   reinició a mitad de la carga) se marca como interrumpido y también se revierte
+
+Funciones definidas:
+- encolar_carga: Crea el trabajo y lo envía al pool de trabajadores
+- trabajo_activo: Devuelve el trabajo pendiente o en proceso de un archivo (si existe)
+- marcar_trabajos_interrumpidos: Marca como 'error' (y revierte) los trabajos sin avance
+- procesar_trabajo: Graba los bloques de la carga preparada (lo ejecuta el trabajador)
+"""
+
+# IMPORTACIONES
+# ======================================
+import datetime  # Para las fechas de inicio y fin del trabajo
+import threading  # Para crear el pool de trabajadores una sola vez
+import traceback  # Para imprimir el detalle de un error del trabajador
+from concurrent.futures import ThreadPoolExecutor  # Pool de hilos que ejecuta los trabajos
+from django.conf import settings  # Para leer CARGA_MASIVA_TRABAJADORES y CARGA_MASIVA_TRABAJO_SIN_AVANCE
+from mongoengine.queryset.visitor import Q  # Para los trabajos anteriores al campo fecha_actualizacion
+from .models import ArchivoCSV, Calificacion, CargaPreparada, TrabajoCarga  # Modelos de calificaciones, staging y trabajos
+from .carga_masiva import guardar_calificaciones, leer_carga_preparada, descartar_carga_preparada, ordenar_errores
+
+
+# Cantidad máxima de mensajes de error que se guardan en el documento del trabajo
+# POR QUÉ: Un documento de MongoDB no puede superar 16 MB; el total se informa aparte en total_errores
+MAXIMO_ERRORES_GUARDADOS = 1000
+
+# Estados de un trabajo que todavía no terminó
+ESTADOS_ACTIVOS = ['pendiente', 'procesando']
+
+# Pool de trabajadores (se crea la primera vez que se encola una carga)
+_ejecutor = None
+_candado_ejecutor = threading.Lock()
+
+
+def _obtener_ejecutor():
+    """
+    Devuelve el pool de hilos compartido por todas las cargas en segundo plano.
+
+    Se crea una sola vez por proceso con CARGA_MASIVA_TRABAJADORES hilos, así nunca
+    hay más cargas grabándose a la vez que ese número (las demás esperan en la cola).
+    """
+    global _ejecutor
+    with _candado_ejecutor:
+        if _ejecutor is None:
+            _ejecutor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'CARGA_MASIVA_TRABAJADORES', 2),
+                thread_name_prefix='carga_masiva'
+            )
+        return _ejecutor
+
+
+def encolar_carga(usuario, carga, tipo):
+    """
+    Crea un TrabajoCarga para una carga preparada y lo envía al pool de trabajadores.
+
+    Argumentos:
+        usuario: Usuario que inició la carga
+        carga: CargaPreparada con los bloques ya validados
+        tipo: 'factor' o 'monto'
+
+    Returns (lo que devuelve la funcion):
+        TrabajoCarga: Documento del trabajo (su id se entrega al navegador)
+    """
+    trabajo = TrabajoCarga(
+        tipo=tipo,
+        usuario=usuario,
+        token_carga=carga.token,
+        hash_archivo=carga.hash_archivo,
+        nombre_archivo=carga.nombre_archivo,
+        total_filas=carga.total_filas
+    )
+    trabajo.save()
+
+    _obtener_ejecutor().submit(procesar_trabajo, trabajo.id)
+    print(f"[TRABAJOS] Trabajo {trabajo.id} encolado: {carga.nombre_archivo} ({carga.total_filas} filas)")
+    return trabajo
+
+
+class TrabajoInterrumpido(Exception):
+    """El trabajo se marcó como interrumpido mientras el trabajador todavía lo procesaba."""
+
+
+def trabajo_activo(hash_archivo):
+    """
+    Devuelve el trabajo pendiente o en proceso del archivo con ese hash (o None).
+
+    Se usa para no cargar ni volver a previsualizar el mismo archivo mientras un trabajo
+    todavía lo graba (el ArchivoCSV recién se crea al terminar, así que la verificación de
+    duplicados no lo detecta). Antes se marcan como interrumpidos los trabajos sin avance:
+    si no, un trabajo que quedó 'procesando' por un reinicio bloquearía el archivo para siempre.
+    """
+    marcar_trabajos_interrumpidos(hash_archivo=hash_archivo)
+    return TrabajoCarga.objects(hash_archivo=hash_archivo, estado__in=ESTADOS_ACTIVOS).first()
+
+
+def marcar_trabajos_interrumpidos(**filtro):
+    """
+    Marca como 'error' los trabajos pendientes o en proceso sin avance durante
+    CARGA_MASIVA_TRABAJO_SIN_AVANCE segundos y elimina las calificaciones que alcanzaron a insertar.
+
+    POR QUÉ:
+    - El pool de trabajadores vive en la memoria del proceso: si el proceso se reinicia,
+      el trabajo queda 'procesando' (o 'pendiente') en MongoDB y nadie lo termina
+    - Las filas insertadas hasta ese momento no tienen ArchivoCSV: al volver a cargar el
+      archivo se insertarían otra vez
+
+    Argumentos:
+        **filtro: Condiciones adicionales (ej: hash_archivo=..., id=...)
+    """
+    limite = datetime.datetime.now() - datetime.timedelta(seconds=getattr(settings, 'CARGA_MASIVA_TRABAJO_SIN_AVANCE', 60 * 60))
+    sin_avance = Q(fecha_actualizacion__lt=limite) | (Q(fecha_actualizacion__exists=False) & Q(fecha_creacion__lt=limite))
+    for trabajo in TrabajoCarga.objects(sin_avance, estado__in=ESTADOS_ACTIVOS, **filtro).only('id', 'hash_archivo'):
+        # Actualización condicional: si dos solicitudes lo detectan a la vez, solo una lo revierte
+        marcado = TrabajoCarga.objects(sin_avance, id=trabajo.id, estado__in=ESTADOS_ACTIVOS).update(
+            set__estado='error',
+            set__mensaje='La carga se interrumpió (sin avance por mucho tiempo). Seleccione el archivo nuevamente.',
+            set__fecha_fin=datetime.datetime.now()
+        )
+        if marcado:
+            revertidas = _revertir_calificaciones(trabajo.hash_archivo)
+            print(f"[TRABAJOS] Trabajo {trabajo.id} marcado como interrumpido: {revertidas} calificación(es) revertidas")
+
+
+def _revertir_calificaciones(hash_archivo):
+    """
+    Elimina las calificaciones de un archivo cuya carga no terminó.
+
+    Si el archivo ya tiene ArchivoCSV la carga se registró completa y no se elimina nada.
+
+    Argumentos:
+        hash_archivo: Hash SHA-256 del archivo
+
+    Returns (lo que devuelve la funcion):
+        int: Cantidad de calificaciones eliminadas
+    """
+    if ArchivoCSV.objects(hash_archivo=hash_archivo).count():
+        return 0
+    return Calificacion.objects(Origen='csv', hash_archivo_csv=hash_archivo).delete()
+
+
+def procesar_trabajo(trabajo_id):
+    """
+    Graba en MongoDB los bloques de la carga preparada de un trabajo.
+
+    La ejecuta un hilo del pool. Después de cada bloque actualiza el avance del trabajo
+    (procesadas, creadas, errores) para que estado_carga_view lo informe.
+
+    Si falla antes de registrar la carga, elimina las calificaciones que alcanzó a insertar
+    (por hash_archivo_csv): así el archivo se puede volver a cargar sin duplicar filas.
+
+    Argumentos:
+        trabajo_id: ID del TrabajoCarga a procesar
+    """
+    # Import local: views importa este módulo dentro de las vistas de carga
+    from .views import _registrar_carga_masiva
+
+    trabajo = TrabajoCarga.objects(id=trabajo_id).first()
+    if trabajo is None:
+        return
+    etiqueta = f'TRABAJO_{trabajo.tipo.upper()}'
+    registrado = False # True cuando ya se crearon el log y el ArchivoCSV (desde ahí no se revierte)
+
+    try:
+        carga = CargaPreparada.objects(token=trabajo.token_carga).first()
+        if carga is None:
+            TrabajoCarga.objects(id=trabajo_id, estado='pendiente').update(
+                set__estado='error',
+                set__mensaje='La previsualización ya no está disponible. Seleccione el archivo nuevamente.',
+                set__fecha_fin=datetime.datetime.now()
+            )
+            return
+
+        # Solo se toma si sigue pendiente (pudo marcarse como interrumpido mientras esperaba en la cola)
+        ahora = datetime.datetime.now()
+        if not TrabajoCarga.objects(id=trabajo_id, estado='pendiente').update(
+            set__estado='procesando', set__fecha_inicio=ahora, set__fecha_actualizacion=ahora
+        ):
+            print(f"[{etiqueta}] Trabajo {trabajo_id} descartado: ya no está pendiente")
+            return
+        print(f"[{etiqueta}] Iniciando trabajo {trabajo_id}: {trabajo.total_filas} filas")
+
+        calificaciones_creadas = 0
+        procesadas = 0
+        errores = []
+        for registros, errores_bloque in leer_carga_preparada(carga):
+            errores.extend(errores_bloque)
+            calificaciones_creadas += guardar_calificaciones(registros, errores, etiqueta=etiqueta)
+            procesadas += len(registros)
+
+            # Se actualiza el avance con una sola operación (sin volver a leer el documento)
+            # Si el trabajo ya no está 'procesando' se marcó como interrumpido (y se revirtió): se detiene
+            if not TrabajoCarga.objects(id=trabajo_id, estado='procesando').update(
+                set__procesadas=procesadas,
+                set__creadas=calificaciones_creadas,
+                set__total_errores=len(errores),
+                set__errores=ordenar_errores(errores)[:MAXIMO_ERRORES_GUARDADOS],
+                set__fecha_actualizacion=datetime.datetime.now()
+            ):
+                raise TrabajoInterrumpido(f'El trabajo {trabajo_id} se marcó como interrumpido')
+            print(f"[{etiqueta}] Bloque procesado: {procesadas}/{trabajo.total_filas} filas, {len(errores)} errores hasta ahora")
+
+        descartar_carga_preparada(carga) # La carga ya se grabó: se eliminan sus bloques del servidor
+
+        # Crear log de carga masiva y registrar el archivo CSV procesado para evitar duplicados
+        _registrar_carga_masiva(trabajo.usuario, trabajo.hash_archivo, trabajo.nombre_archivo, trabajo.tipo, calificaciones_creadas, etiqueta=etiqueta)
+        registrado = True
+
+        mensaje = f'Se crearon {calificaciones_creadas} calificación(es) exitosamente.'
+        if errores:
+            mensaje += f' Se encontraron {len(errores)} error(es).'
+
+        TrabajoCarga.objects(id=trabajo_id).update(
+            set__estado='completado',
+            set__mensaje=mensaje,
+            set__fecha_fin=datetime.datetime.now()
+        )
+        print(f"[{etiqueta}] Trabajo {trabajo_id} completado: {calificaciones_creadas} creadas, {len(errores)} errores")
+
+    except TrabajoInterrumpido as e:
+        # marcar_trabajos_interrumpidos ya dejó el trabajo en 'error' y revirtió las filas
+        print(f"[{etiqueta}] {e}: se detiene sin seguir insertando")
+
+    except Exception as e:
+        # Un error en el hilo no llega a ninguna vista: se deja registrado en el trabajo
+        print(f"[{etiqueta}] Error en el trabajo {trabajo_id}: {e}")
+        print(traceback.format_exc())
+        mensaje = f'Error al procesar: {str(e)}'
+        if not registrado:
+            # Se revierten las filas insertadas para que el archivo se pueda volver a cargar sin duplicados
+            try:
+                revertidas = _revertir_calificaciones(trabajo.hash_archivo)
+                print(f"[{etiqueta}] Se revirtieron {revertidas} calificación(es) del trabajo {trabajo_id}")
+                mensaje += ' No se guardó ninguna calificación; puede volver a cargar el archivo.'
+            except Exception as error_reversion:
+                print(f"[{etiqueta}] Error al revertir las calificaciones del trabajo {trabajo_id}: {error_reversion}")
+        TrabajoCarga.objects(id=trabajo_id).update(
+            set__estado='error',
+            set__mensaje=mensaje,
+            set__fecha_fin=datetime.datetime.now()
+        )
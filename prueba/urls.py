@@ -9,7 +9,7 @@ Ejemplo: path('home/', ...) es accesible en /prueba/home/
 
 from django.urls import path, include
 # Importamos todas las vistas que manejarán las peticiones HTTP
-from .views import listar_usuarios, login_view, home_view, logout_view, contacto_view, ingresar_view, ingresar_calificacion, administrar_view, crear_usuario_view, eliminar_usuarios_view, obtener_usuario_view, modificar_usuario_view, ver_logs_view, guardar_factores_view, calcular_factores_view, buscar_calificaciones_view, obtener_calificacion_view, eliminar_calificacion_view, obtener_logs_calificacion_view, copiar_calificacion_view, cargar_factor_view, cargar_monto_view, calcular_factores_masivo_view, preview_factor_view, preview_monto_view, exportar_calificaciones_view
+from .views import listar_usuarios, login_view, home_view, logout_view, contacto_view, ingresar_view, ingresar_calificacion, administrar_view, crear_usuario_view, eliminar_usuarios_view, obtener_usuario_view, modificar_usuario_view, ver_logs_view, guardar_factores_view, calcular_factores_view, buscar_calificaciones_view, obtener_calificacion_view, eliminar_calificacion_view, obtener_logs_calificacion_view, historial_campo_view, copiar_calificacion_view, cargar_factor_view, cargar_monto_view, estado_carga_view, calcular_factores_masivo_view, preview_factor_view, preview_monto_view, exportar_calificaciones_view
 
 # PATRONES DE URL
 # ===============
@@ -46,6 +46,7 @@ urlpatterns = [
     path('preview-monto/', preview_monto_view, name='preview_monto'),     # Previsualizar CSV con montos
     path('cargar-factor/', cargar_factor_view, name='cargar_factor'),     # Cargar CSV con factores ya calculados
     path('cargar-monto/', cargar_monto_view, name='cargar_monto'),        # Cargar CSV con montos (factores se calculan)
+    path('estado-carga/<str:trabajo_id>/', estado_carga_view, name='estado_carga'),  # Avance de una carga masiva en segundo plano
     
     # RUTAS DE ADMINISTRACIÓN DE USUARIOS
     # ====================================
@@ -59,4 +60,5 @@ urlpatterns = [
     # ==========================
     path('ver-logs/', ver_logs_view, name='ver_logs'),                                # Ver todos los logs del sistema
     path('obtener-logs-calificacion/<str:calificacion_id>/', obtener_logs_calificacion_view, name='obtener_logs_calificacion'),  # Obtener logs de una calificación específica
+    path('historial-campo/<str:calificacion_id>/<str:campo>/', historial_campo_view, name='historial_campo'),  # Historial de cambios de un campo de una calificación
 ]
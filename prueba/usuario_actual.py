@@ -0,0 +1,170 @@
+"""
+USUARIO_ACTUAL.PY - Usuario de la sesión, cargado una vez por solicitud
+=======================================================================
+Este archivo contiene el middleware que deja en request.usuario_actual el usuario
+que inició sesión, y la caché en memoria que evita leerlo de MongoDB en cada solicitud.
+
+POR QUÉ EXISTE ESTE ARCHIVO:
+- Casi todas las vistas empezaban con usuarios.objects.get(id=request.session['user_id'])
+  solo para saber el nombre y el rol: una consulta extra a MongoDB por solicitud
+- home.js hace varias llamadas AJAX por cada acción del usuario, así que la misma
+  consulta se repetía varias veces por segundo para el mismo usuario
+
+CÓMO FUNCIONA:
+1. UsuarioActualMiddleware carga el usuario de la sesión (si hay sesión) y lo deja
+   en request.usuario_actual (None si no hay sesión o el usuario ya no existe)
+2. El documento del usuario se guarda en una caché del proceso por
+   USUARIO_ACTUAL_CACHE_SEGUNDOS segundos, con un máximo de USUARIO_ACTUAL_CACHE_MAXIMO
+   usuarios (al llenarse se descarta el usado hace más tiempo)
+3. modificar_usuario_view y eliminar_usuarios_view llaman a invalidar_usuarios() para
+   que el cambio se vea de inmediato en este proceso; en los otros procesos del servidor
+   el cambio se ve cuando vence la entrada (por eso el tiempo de vida es corto)
+4. Cada solicitud recibe su propia copia del documento: una vista puede modificarlo
+   sin afectar a las demás
+
+Clases y funciones definidas:
+- cargar_usuario: Devuelve el usuario con ese ID (desde la caché o MongoDB)
+- usuario_de_la_solicitud: Devuelve el usuario de la solicitud o lanza usuarios.DoesNotExist
+- invalidar_usuarios: Quita usuarios de la caché
+- UsuarioActualMiddleware: Agrega request.usuario_actual
+"""
+
+# IMPORTACIONES
+# ======================================
+import threading  # Candado de la caché (el servidor atiende solicitudes en varios hilos)
+import time  # Para el vencimiento de las entradas
+from collections import OrderedDict  # Orden de uso para descartar el usado hace más tiempo
+from bson import ObjectId  # Para validar el ID guardado en la sesión
+from django.conf import settings  # Para leer USUARIO_ACTUAL_CACHE_SEGUNDOS y USUARIO_ACTUAL_CACHE_MAXIMO
+from .models import usuarios
+
+
+class _CacheUsuarios:
+    """
+    Caché de documentos de usuario con tiempo de vida y límite de tamaño (LRU).
+
+    Guarda el documento tal como viene de MongoDB (diccionario), no el objeto de
+    MongoEngine: así cada solicitud arma su propio objeto y nadie comparte estado.
+    """
+
+    def __init__(self):
+        self._entradas = OrderedDict()  # user_id (str) -> (vence_en, documento)
+        self._candado = threading.Lock()
+
+    def obtener(self, user_id):
+        """Devuelve el documento guardado o None si no está o ya venció."""
+        with self._candado:
+            entrada = self._entradas.get(user_id)
+            if entrada is None:
+                return None
+            vence_en, documento = entrada
+            if vence_en <= time.monotonic():
+                del self._entradas[user_id]
+                return None
+            self._entradas.move_to_end(user_id)  # Usado recién: es el último en descartarse
+            return documento
+
+    def guardar(self, user_id, documento, segundos, maximo):
+        """Guarda un documento y descarta los usados hace más tiempo si se supera el máximo."""
+        with self._candado:
+            self._entradas[user_id] = (time.monotonic() + segundos, documento)
+            self._entradas.move_to_end(user_id)
+            while len(self._entradas) > maximo:
+                self._entradas.popitem(last=False)
+
+    def invalidar(self, user_ids):
+        """Quita de la caché los usuarios indicados."""
+        with self._candado:
+            for user_id in user_ids:
+                self._entradas.pop(user_id, None)
+
+    def limpiar(self):
+        """Vacía la caché completa."""
+        with self._candado:
+            self._entradas.clear()
+
+
+_cache = _CacheUsuarios()
+
+
+def cargar_usuario(user_id):
+    """
+    Devuelve el usuario con ese ID, leyendo MongoDB solo si no está en la caché.
+
+    Con USUARIO_ACTUAL_CACHE_SEGUNDOS = 0 no se usa la caché (siempre se lee MongoDB).
+
+    Argumentos:
+        user_id: ID del usuario (str u ObjectId), normalmente request.session['user_id']
+
+    Returns (lo que devuelve la funcion):
+        usuarios: Documento del usuario (un objeto nuevo en cada llamada), o None si no existe
+    """
+    if not user_id or not ObjectId.is_valid(str(user_id)):
+        return None
+    user_id = str(user_id)
+
+    segundos = getattr(settings, 'USUARIO_ACTUAL_CACHE_SEGUNDOS', 30)
+    documento = _cache.obtener(user_id) if segundos > 0 else None
+    if documento is None:
+        # as_pymongo(): el documento tal como está en MongoDB (se guarda en la caché)
+        documento = usuarios.objects(id=ObjectId(user_id)).as_pymongo().first()
+        if documento is None:
+            # No se guarda en la caché: el usuario fue eliminado o el ID no corresponde a nadie
+            return None
+        if segundos > 0:
+            _cache.guardar(user_id, documento, segundos, getattr(settings, 'USUARIO_ACTUAL_CACHE_MAXIMO', 1000))
+
+    # _from_son(): arma el documento de MongoEngine igual que al leerlo con usuarios.objects.get()
+    # dict(documento): copia superficial, así el objeto no comparte el diccionario de la caché
+    return usuarios._from_son(dict(documento))
+
+
+def usuario_de_la_solicitud(request):
+    """
+    Devuelve el usuario que inició sesión en esta solicitud.
+
+    Reemplaza a usuarios.objects.get(id=request.session['user_id']) en las vistas:
+    lanza la misma excepción cuando el usuario no existe, así el manejo de errores
+    de cada vista no cambia.
+
+    Argumentos:
+        request: Objeto HttpRequest de Django
+
+    Returns (lo que devuelve la funcion):
+        usuarios: Documento del usuario actual
+
+    Raises:
+        usuarios.DoesNotExist: Si no hay sesión o el usuario ya no existe
+    """
+    if not hasattr(request, 'usuario_actual'):
+        # Solicitud que no pasó por el middleware (ej: RequestFactory en pruebas)
+        request.usuario_actual = cargar_usuario(request.session.get('user_id'))
+    if request.usuario_actual is None:
+        raise usuarios.DoesNotExist('El usuario de la sesión no existe')
+    return request.usuario_actual
+
+
+def invalidar_usuarios(*user_ids):
+    """
+    Quita usuarios de la caché (después de modificarlos o eliminarlos).
+
+    Argumentos:
+        *user_ids: IDs de los usuarios (str u ObjectId)
+    """
+    _cache.invalidar([str(user_id) for user_id in user_ids])
+
+
+class UsuarioActualMiddleware:
+    """
+    Agrega request.usuario_actual: el usuario de la sesión o None.
+
+    Debe ir después de SessionMiddleware en settings.MIDDLEWARE (necesita request.session).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        # Sin 'user_id' en la sesión no se consulta nada (login, contacto, solicitudes sin sesión)
+        request.usuario_actual = cargar_usuario(request.session.get('user_id'))
+        return self.get_response(request)
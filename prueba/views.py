@@ -17,17 +17,18 @@ Estructura de las vistas xd:
 # IMPORTACIONES
 # ======================================
 import json      # Para manejar datos JSON en las respuestas de API
-import bcrypt    # Para hashear contraseñas de forma segura
 import re        # Para expresiones regulares - usado en _extraer_object_id() para parsear DBRef
 import os        # Para operaciones del sistema de archivos (rutas, extensiones)
 import datetime  # Para manejar fechas y horas
-import csv       # Para exportar datos a CSV
+import base64    # Para codificar el cursor de paginación de buscar_calificaciones_view y ver_logs_view
+from urllib.parse import urlencode  # Para armar el enlace a la página siguiente de ver_logs_view con los mismos filtros
 from django.shortcuts import render, redirect  # render: renderizar templates HTML | redirect: redirigir a otras URLs
-from django.http import HttpResponseForbidden, JsonResponse, HttpResponseServerError, HttpResponse  # Respuestas HTTP: Forbidden(403), JSON, ServerError(500), HttpResponse para CSV estas respuestas son para los errores por ejemplo cuando no se encuentra el usuario o cuando hay un error en el servidor
-from django.views.decorators.http import require_POST, require_GET  # Decoradores para restringir métodos HTTP (POST/GET)
+from django.http import HttpResponseServerError, HttpResponseBadRequest, StreamingHttpResponse  # Respuestas HTTP: ServerError(500), BadRequest(400), StreamingHttpResponse para archivos estas respuestas son para los errores por ejemplo cuando no se encuentra el usuario o cuando hay un error en el servidor
+from django.views.decorators.http import require_POST, require_GET, require_http_methods  # Decoradores para restringir métodos HTTP (POST/GET)
 from django.contrib import messages  # Para mensajes flash al usuario
 from django.conf import settings  # Acceso a configuración de Django (MEDIA_ROOT, etc.)
 from mongoengine.errors import DoesNotExist  # Excepción cuando un documento no existe en MongoDB
+from mongoengine.queryset.visitor import Q  # Para combinar condiciones con OR (cursor de paginación)
 from bson import ObjectId  # Tipo ObjectId de MongoDB - usado para IDs y operaciones con documentos
 try:
     from PIL import Image  # Librería para procesamiento de imágenes (redimensionar fotos)
@@ -35,7 +36,18 @@ try:
 except ImportError:
     HAS_PIL = False  # Si no está instalado Pillow, las imágenes no se redimensionarán pero la app funcionará
 from .formulario import LoginForm, CalificacionModalForm, UsuarioForm, UsuarioUpdateForm, FactoresForm, MontosForm  # Formularios Django para validación
-from .models import usuarios, Calificacion, Log  # Modelos de MongoDB (Documentos) para interactuar con la base de datos
+from .models import usuarios, Calificacion, Log, CambioCampo  # Modelos de MongoDB (Documentos) para interactuar con la base de datos
+from .motor_factores import calcular_factores, factores_decimales  # Cálculo de factores (Monto / SumaBase) con enteros
+from .auditoria import registrar_log, vaciar_logs  # Escritura de logs de auditoría por lotes (cola en memoria + insert_many)
+from .exportadores import FORMATOS_EXPORTACION, DEPENDENCIAS_FORMATO, formato_disponible, generar_exportacion  # Archivos de exportación (CSV, Parquet, XLSX) por streaming
+from .contrasenas import hashear_contrasena, verificar_contrasena, necesita_rehash, ServidorOcupado  # bcrypt en un pool de hilos acotado, con costo configurable
+from .limite_login import verificar_intento_login, registrar_login_correcto, ip_del_cliente  # Límite de intentos de login (token bucket por IP y por cuenta)
+from .usuario_actual import invalidar_usuarios  # Quita de la caché del usuario actual a los usuarios modificados o eliminados
+from .decoradores import login_requerido, login_requerido_json, admin_requerido, admin_requerido_json  # Verificación de sesión y rol (usuario desde la caché)
+from .respuestas import RespuestaJSON  # Respuesta JSON de las vistas AJAX (orjson si está instalado, maneja Decimal/datetime/ObjectId)
+from .serializadores import (  # Lectura proyectada y serialización de calificaciones (búsqueda y exportación)
+    CAMPOS_EXPORTACION, calificaciones_proyectadas, calificaciones_por_ids, calificacion_a_dict
+)
 
 
 # =====================================================================
@@ -190,6 +202,46 @@ def _extraer_object_id(valor):
 
 
 
+# ===================================
+# FUNCION AUXILIAR: NOMBRES DE USUARIOS EN UNA SOLA CONSULTA
+# ===================================
+# Resuelve los nombres de varios usuarios (actores de los logs) con una consulta $in.
+def _nombres_de_usuarios(ids_usuarios):
+    """
+    Obtiene el nombre de varios usuarios con una sola consulta a MongoDB.
+    
+    POR QUÉ ESTA FUNCIÓN ES NECESARIA:
+    - Las vistas de logs buscaban el nombre del actor con usuarios.objects.get() por cada log:
+      con 100.000 logs eran 100.000 consultas por cada carga de la página
+    - Los logs se repiten mucho por actor (pocos usuarios, muchas acciones):
+      se piden solo los IDs distintos, una vez cada uno
+    
+    CÓMO FUNCIONA:
+    1. Descarta los IDs vacíos, repetidos o inválidos
+    2. Busca todos los usuarios con id__in, leyendo solo el campo 'nombre'
+    3. Devuelve un diccionario {id: nombre}; los usuarios eliminados no aparecen
+    
+    Argumentos:
+        ids_usuarios: Iterable de IDs como string (los que devuelve _extraer_object_id)
+        
+    Returns (lo que devuelve la funcion):
+        dict: {id del usuario (str): nombre}
+    """
+    object_ids = set()
+    for id_usuario in ids_usuarios:
+        if id_usuario and ObjectId.is_valid(id_usuario):
+            object_ids.add(ObjectId(id_usuario))
+    if not object_ids:
+        return {}
+    
+    # as_pymongo(): diccionarios simples, sin crear documentos usuarios
+    return {
+        str(usuario['_id']): usuario.get('nombre', 'N/A')
+        for usuario in usuarios.objects(id__in=list(object_ids)).only('nombre').as_pymongo()
+    }
+
+
+
 # ===================================
 # FUNCION AUXILIAR: GUARDAR FOTO DE PERFIL
 # =========================================
@@ -308,93 +360,30 @@ def _guardar_foto_perfil(archivo, usuario_id):
 
 
 
-# FUNCIONES AUXILIARES: HASH DE CONTRASEÑAS
-# ==========================================
-# Funciones para hashear y verificar contraseñas usando bcrypt
-# Bcrypt es un algoritmo de hashing seguro y ampliamente usado
-
-def _hash_password(password):
-    """
-    Hashea una contraseña usando bcrypt.
-    
-    POR QUÉ ESTA FUNCIÓN ES CRÍTICA:
-    - NUNCA debemos guardar contraseñas en texto plano (seguridad)
-    - bcrypt es un algoritmo de hashing seguro y lento (dificulta ataques de fuerza bruta)
-    - Cada hash incluye un "salt" aleatorio único (misma contraseña = diferentes hashes)
-    - Esto protege contra ataques de diccionario y rainbow tables
-    
-    CÓMO FUNCIONA:
-    1. Genera un salt aleatorio único
-    2. Combina salt + contraseña y los hashea
-    3. El resultado incluye el salt, así que no necesitamos guardarlo por separado
-    
-    Argumentos:
-        password: Contraseña en texto plano
-        
-    Returns (lo que devuelve la funcion):
-        str: Contraseña hasheada en formato bcrypt
-    """
-    # Validación: si no hay contraseña, retornamos None
-    # POR QUÉ: Algunos usuarios pueden no tener contraseña (aunque no debería pasar)
-    if not password:
-        return None
-    
-    # Generar salt aleatorio único
-    # POR QUÉ: El salt hace que cada hash sea único, incluso para la misma contraseña
-    # Ejemplo: "password123" puede generar "$2b$12$abc..." o "$2b$12$xyz..." (diferentes)
-    # Esto protege contra ataques que comparan hashes pre-calculados
-    salt = bcrypt.gensalt()
-    
-    # Hashear la contraseña combinada con el salt
-    # password.encode('utf-8'): convierte string a bytes (bcrypt requiere bytes)
-    # bcrypt.hashpw(): combina salt + password y genera el hash
-    # El resultado es bytes, no string
-    hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
-    
-    # Convertir hash de bytes a string para guardarlo en MongoDB
-    # POR QUÉ: MongoDB guarda strings, no bytes
-    return hashed.decode('utf-8')
-
-def _check_password(password, hashed_password):
+# FUNCIÓN AUXILIAR: REHASH DE CONTRASEÑAS
+# ========================================
+def _rehashear_contrasena(usuario, password):
     """
-    Verifica si una contraseña coincide con su hash usando bcrypt.
+    Vuelve a hashear la contraseña de un usuario con el costo CONTRASENAS_COSTO_BCRYPT.
     
-    POR QUÉ ESTA FUNCIÓN ES NECESARIA:
-    - No podemos "deshashear" un hash (es unidireccional)
-    - Para verificar, debemos hashear la contraseña ingresada y comparar
-    - bcrypt.checkpw() hace esto de forma segura y eficiente
+    POR QUÉ: Al cambiar el costo (ej: después de calibrar_bcrypt) los hashes guardados
+    siguen con el costo anterior; se actualizan de a uno cuando cada usuario inicia sesión.
     
-    CÓMO FUNCIONA:
-    1. Toma el hash guardado (que incluye el salt original)
-    2. Hashea la contraseña ingresada con el mismo salt
-    3. Compara ambos hashes (si coinciden, la contraseña es correcta)
+    Un error aquí no impide el inicio de sesión (la contraseña ya se verificó):
+    se reintenta en el próximo inicio de sesión.
     
     Argumentos:
-        password: Contraseña en texto plano a verificar
-        hashed_password: Contraseña hasheada almacenada en la base de datos
-        
-    Returns (lo que devuelve la funcion):
-        bool: True si la contraseña coincide, False en caso contrario
+        usuario: Documento del usuario (ya verificado)
+        password: Contraseña en texto plano que ingresó
     """
-    # Validación: si falta alguno de los dos, no podemos verificar
-    # POR QUÉ: Necesitamos ambos para comparar
-    if not password or not hashed_password:
-        return False
-    
     try:
-        # bcrypt.checkpw() compara la contraseña con el hash de forma segura
-        # password.encode('utf-8'): convierte string a bytes
-        # hashed_password.encode('utf-8'): convierte hash string a bytes
-        # Retorna True si coinciden, False si no
-        # POR QUÉ: Usa comparación constante en tiempo (previene timing attacks)
-        return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
-    except Exception:
-        # Si hay cualquier error (formato inválido, etc.), retornamos False
-        # POR QUÉ: Es más seguro asumir que la contraseña es incorrecta que lanzar excepción
-        return False
-
-
-
+        nuevo_hash = hashear_contrasena(password)
+        # update_one con la condición del hash anterior: si otro proceso ya lo cambió, no se pisa
+        usuarios.objects(id=usuario.id, contrasena=usuario.contrasena).update_one(set__contrasena=nuevo_hash)
+        invalidar_usuarios(usuario.id)
+        print(f"[LOGIN] Contraseña de {usuario.correo} rehasheada con el costo actual")
+    except Exception as e:
+        print(f"[LOGIN] No se pudo rehashear la contraseña de {usuario.correo}: {e}")
 
 
 # FUNCIÓN AUXILIAR: CREAR LOG 
@@ -412,9 +401,10 @@ def _crear_log(usuario_obj, accion_str, documento_afectado=None, usuario_afectad
     - Cumplimiento: muchas regulaciones requieren logs de auditoría
     
     CÓMO FUNCIONA:
-    1. Convierte cambios detallados a JSON (si existen)
+    1. Convierte cambios detallados a documentos embebidos CambioCampo (si existen)
     2. Crea objeto Log con toda la información
-    3. Guarda en MongoDB
+    3. Lo entrega a registrar_log() (prueba/auditoria.py), que lo graba en MongoDB por lotes
+       en segundo plano: la solicitud no espera el viaje a la base de datos
     4. Si falla, solo imprime advertencia (no interrumpe el flujo principal)
     
     Argumentos:
@@ -427,18 +417,18 @@ def _crear_log(usuario_obj, accion_str, documento_afectado=None, usuario_afectad
         hash_archivo_csv: Hash SHA-256 del archivo CSV para cargas masivas (opcional)
     """
     try:
-        # Inicializar cambios_json como None
-        # POR QUÉ: Si no hay cambios, guardamos None en lugar de string vacío
-        cambios_json = None
-        
-        # Si hay cambios detallados, los convertimos a JSON
-        # POR QUÉ: MongoDB puede guardar JSON strings, pero es más eficiente guardarlo como string
-        if cambios_detallados:
-            import json
-            # json.dumps() convierte lista/diccionario a string JSON
-            # default=str: si encuentra tipos no serializables (Decimal, datetime), los convierte a string
-            # POR QUÉ: Decimal y datetime no son JSON nativos, necesitan conversión
-            cambios_json = json.dumps(cambios_detallados, default=str)
+        # Convertir los cambios detallados a documentos embebidos (campo, valor_anterior, valor_nuevo)
+        # POR QUÉ: Antes se guardaban como un JSON string; como documentos embebidos cada cambio
+        # se puede consultar por campo con un índice (historial_campo_view) sin decodificar JSON
+        # Los valores se guardan como texto (Decimal y datetime con str(), como hacía json.dumps con default=str)
+        cambios = [
+            CambioCampo(
+                campo=str(cambio.get('campo', '')),
+                valor_anterior=None if cambio.get('valor_anterior') is None else str(cambio.get('valor_anterior')),
+                valor_nuevo=None if cambio.get('valor_nuevo') is None else str(cambio.get('valor_nuevo'))
+            )
+            for cambio in (cambios_detallados or [])
+        ]
         
         # Crear objeto Log con todos los datos
         # Usuarioid: referencia al usuario que hizo la acción (DBRef en MongoDB)
@@ -446,7 +436,7 @@ def _crear_log(usuario_obj, accion_str, documento_afectado=None, usuario_afectad
         # accion: tipo de acción ("Crear Calificacion", "Modificar Usuario", etc.)
         # iddocumento: referencia a la calificación afectada (si aplica)
         # usuario_afectado: referencia al usuario afectado (si aplica)
-        # cambios_detallados: JSON string con los cambios específicos
+        # cambios: lista de cambios específicos (documentos embebidos CambioCampo)
         # hash_archivo_csv: hash del archivo CSV para cargas masivas
         nuevo_log = Log(
             Usuarioid=usuario_obj,
@@ -454,16 +444,21 @@ def _crear_log(usuario_obj, accion_str, documento_afectado=None, usuario_afectad
             accion=accion_str,
             iddocumento=documento_afectado,
             usuario_afectado=usuario_afectado,
-            cambios_detallados=cambios_json,
+            cambios=cambios,
             hash_archivo_csv=hash_archivo_csv
         )
         
-        # Guardar el log en MongoDB
-        # POR QUÉ: MongoEngine requiere .save() para persistir en la base de datos
-        nuevo_log.save()
+        # Registrar el log (se graba en MongoDB por lotes con insert_many)
+        # POR QUÉ: Un .save() por log agregaba un viaje a MongoDB a cada solicitud que modifica datos
+        # (con LOGS_ESCRITURA = 'sincrona' se graba en el momento)
+        grabado = registrar_log(nuevo_log)
         
         # Imprimir confirmación (útil para debugging)
-        print(f"Log guardado correctamente: {accion_str} por {usuario_obj.correo}")
+        # En modo asíncrono el log todavía no está en MongoDB: solo quedó en la cola de auditoría
+        if grabado:
+            print(f"Log registrado correctamente: {accion_str} por {usuario_obj.correo}")
+        else:
+            print(f"Log encolado (se grabará en MongoDB por lotes): {accion_str} por {usuario_obj.correo}")
     
     except Exception as e:
         # Si falla al guardar el log, solo imprimimos advertencia
@@ -531,8 +526,10 @@ def login_view(request):
     CÓMO FUNCIONA LA AUTENTICACIÓN:
     1. GET: Muestra formulario de login
     2. POST: Valida credenciales
+       - Aplica el límite de intentos por IP y por cuenta (429 si se supera)
        - Busca usuario por correo en MongoDB
-       - Compara contraseña hasheada con bcrypt
+       - Compara contraseña hasheada con bcrypt (en el pool de prueba/contrasenas.py)
+       - Si el hash tiene un costo distinto de CONTRASENAS_COSTO_BCRYPT, lo vuelve a hashear
        - Si es correcta, crea sesión y redirige a home
        - Si es incorrecta, muestra error
     
@@ -586,6 +583,20 @@ def login_view(request):
             correo_usuario = form.cleaned_data['correo']
             contrasena_usuario = form.cleaned_data['contrasena']
 
+            # Límite de intentos por IP y por cuenta (token bucket, prueba/limite_login.py)
+            # POR QUÉ: Cada intento calcula bcrypt; los intentos que superan el límite se rechazan
+            # aquí, antes de consultar MongoDB y de gastar CPU en bcrypt
+            ip_cliente = ip_del_cliente(request)
+            espera = verificar_intento_login(ip_cliente, correo_usuario)
+            if espera:
+                print(f"[LOGIN] Intento rechazado por límite ({ip_cliente}), esperar {espera} s")
+                respuesta = render(request, 'prueba/login.html', {
+                    'form': form,
+                    'error': f'Demasiados intentos de inicio de sesión. Intente nuevamente en {espera} segundos.'
+                }, status=429)
+                respuesta['Retry-After'] = str(espera)
+                return respuesta
+
             # Intentar buscar el usuario en la base de datos
             # POR QUÉ: Usamos try-except porque .get() lanza excepción si no encuentra el usuario
             try:
@@ -595,12 +606,25 @@ def login_view(request):
                 user = usuarios.objects.get(correo=correo_usuario)
                 
                 # Verificar si la contraseña ingresada coincide con la guardada
-                # _check_password() compara la contraseña en texto plano con el hash guardado
+                # verificar_contrasena() compara la contraseña en texto plano con el hash guardado
                 # POR QUÉ: No podemos comparar directamente porque la contraseña está hasheada
                 # Si la contraseña NO coincide, establecemos user = None
-                if not _check_password(contrasena_usuario, user.contrasena):
+                if not verificar_contrasena(contrasena_usuario, user.contrasena):
                     user = None
+                elif necesita_rehash(user.contrasena):
+                    # El hash se calculó con otro costo (CONTRASENAS_COSTO_BCRYPT cambió):
+                    # ahora que tenemos la contraseña en texto plano se vuelve a hashear
+                    # POR QUÉ: Es el único momento en que se puede (el hash no se puede revertir)
+                    _rehashear_contrasena(user, contrasena_usuario)
                     
+            except ServidorOcupado as e:
+                # Demasiadas verificaciones de contraseña en curso (ej: ráfaga de intentos de inicio de sesión)
+                # POR QUÉ: Es mejor pedir que reintente que dejar la solicitud esperando CPU
+                print(f"[LOGIN] {e}")
+                return render(request, 'prueba/login.html', {
+                    'form': form,
+                    'error': 'El servidor está ocupado. Intente nuevamente en unos segundos.'
+                }, status=503)
             except usuarios.DoesNotExist:
                 # Si el usuario no existe en la base de datos, establecer user = None
                 # POR QUÉ: No queremos revelar si el correo existe o no (seguridad)
@@ -609,6 +633,11 @@ def login_view(request):
 
             # Verificar si encontramos un usuario válido con contraseña correcta
             if user:
+                # Los inicios de sesión correctos no gastan los intentos de la cuenta
+                # POR QUÉ: Si los gastaran, unos pocos envíos con el correo de otra persona
+                # (junto con sus propios inicios de sesión) la dejarían sin poder entrar
+                registrar_login_correcto(correo_usuario)
+
                 # Crear sesión del usuario
                 # request.session es un diccionario que Django guarda en cookies/BD
                 # 'user_id': ID del usuario (lo usamos para identificar al usuario en otras vistas)
@@ -640,199 +669,196 @@ def login_view(request):
 # VISTAS DE DASHBOARD
 # =====================================================================
 
+@login_requerido
 def home_view(request):
     """
     Vista principal del dashboard (página de inicio).
     
     POR QUÉ ESTA VISTA ES IMPORTANTE:
     - Es la página principal después del login
-    - Muestra todas las calificaciones del sistema
-    - Permite filtrar calificaciones por diferentes criterios
-    - Proporciona datos en JSON para que JavaScript los use dinámicamente
+    - Muestra la estructura del dashboard (filtros, tabla, modales)
+    - Las calificaciones las carga JavaScript desde buscar_calificaciones_view
+    
+    POR QUÉ NO SE INCLUYEN LAS CALIFICACIONES EN EL HTML:
+    - Antes se leían y serializaban TODAS las calificaciones (con sus 30 factores)
+      en cada carga de la página, así el HTML y el tiempo de respuesta crecían con la base de datos
+    - Ahora el HTML tiene siempre el mismo tamaño y se muestra de inmediato;
+      la tabla pide la primera página a buscar_calificaciones_view (paginada por cursor)
     
     CÓMO FUNCIONA:
     1. Verifica que el usuario esté autenticado
-    2. Obtiene filtros de la URL (mercado, origen, período)
-    3. Normaliza los valores de filtros (acepta variaciones como "Acciones", "acciones", etc.)
-    4. Construye query de MongoDB con los filtros
-    5. Carga calificaciones de la base de datos
-    6. Serializa a JSON para JavaScript
-    7. Renderiza el template con los datos
-    
-    Funcionalidades:
-    - Verifica autenticación del usuario
-    - Permite filtrar calificaciones por mercado, origen y período
-    - Muestra calificaciones en formato JSON para JavaScript
+    2. Obtiene el usuario actual (para el nombre y las opciones de admin)
+    3. Renderiza el template (sin calificaciones)
     
     Argumentos:
         request: Objeto HttpRequest de Django
         
     Returns (lo que devuelve la funcion):
-        HttpResponse: Renderiza home.html con las calificaciones filtradas
+        HttpResponse: Renderiza home.html (la tabla se llena por AJAX)
     """
-    # Verificar autenticación del usuario
-    # POR QUÉ: Solo usuarios autenticados pueden ver el dashboard
-    # Si no tiene sesión, redirigir a login
-    if 'user_id' not in request.session:
-        return redirect('login')
-
-    # Obtener información del usuario actual
-    # POR QUÉ: Necesitamos saber si es admin para mostrar opciones especiales
-    try:
-        # Buscar usuario en MongoDB usando el ID de la sesión
-        # request.session['user_id'] es un string, pero MongoDB necesita ObjectId
-        # MongoEngine convierte automáticamente el string a ObjectId
-        current_user = usuarios.objects.get(id=request.session['user_id'])
-        
-        # Obtener rol del usuario (True = admin, False = usuario normal)
-        # POR QUÉ: Los admins ven opciones adicionales en la interfaz
-        is_admin = current_user.rol
-    except usuarios.DoesNotExist:
-        # Si el usuario no existe (fue eliminado mientras estaba logueado)
-        # Limpiar sesión y redirigir a login
-        # POR QUÉ: La sesión tiene un ID inválido, debemos limpiarla
-        request.session.flush()
-        return redirect('login')
-
-    # Inicializar lista vacía de calificaciones
-    # POR QUÉ: Si no hay filtros o no hay calificaciones, la lista estará vacía
-    calificaciones = []
-    
-    # Procesar solo si es método GET (cargar página o aplicar filtros)
-    # GET se usa cuando el usuario accede a la URL o envía filtros desde el formulario
-    if request.method == 'GET':
-        # Obtener parámetros de filtro de la URL
-        # request.GET es un diccionario con los parámetros de la URL (?mercado=acciones&origen=csv)
-        # .get('mercado', '') obtiene el valor o '' si no existe
-        mercado_raw = request.GET.get('mercado', '')
-        origen = request.GET.get('origen', '')
-        periodo = request.GET.get('periodo', '')
-        
-        # NORMALIZACIÓN DE MERCADO
-        # POR QUÉ: Los usuarios pueden escribir "Acciones", "acciones", "ACCIONES", etc.
-        # Necesitamos convertir todo a un formato estándar para la base de datos
-        mercado_normalizado = mercado_raw
-        
-        # Solo normalizar si hay valor y no es "Todos"
-        if mercado_raw and mercado_raw != 'Todos':
-            # Convertir a minúsculas y eliminar espacios al inicio/final
-            # .lower() convierte "Acciones" a "acciones"
-            # .strip() elimina espacios de " acciones " dejando "acciones"
-            mercado_lower = mercado_raw.lower().strip()
-            
-            # Comparar con variaciones posibles y asignar valor normalizado
-            # POR QUÉ: Aceptamos "accion" (singular) y "acciones" (plural)
-            if mercado_lower == 'acciones' or mercado_lower == 'accion':
-                mercado_normalizado = 'acciones'
-            elif mercado_lower == 'cfi':
-                mercado_normalizado = 'CFI'
-            # Aceptamos variaciones: "fondos mutuos", "fondosmutuos", "fondo mutuo"
-            elif mercado_lower == 'fondos mutuos' or mercado_lower == 'fondosmutuos' or mercado_lower == 'fondo mutuo':
-                mercado_normalizado = 'Fondos mutuos'
-            else:
-                # Si no coincide con ningún valor conocido, mantener el original
-                # POR QUÉ: Puede ser un valor válido que no conocíamos
-                mercado_normalizado = mercado_raw
-        
-        # NORMALIZACIÓN DE ORIGEN
-        # Similar a mercado, normalizamos "CSV", "csv", "Csv" a "csv"
-        origen_normalizado = origen
-        if origen:
-            origen_lower = origen.lower().strip()
-            if origen_lower == 'csv':
-                origen_normalizado = 'csv'
-            elif origen_lower == 'corredor':
-                origen_normalizado = 'corredor'
-        
-        # CONSTRUIR QUERY DE MONGODB
-        # query es un diccionario que se pasa a Calificacion.objects(**query)
-        # Solo agregamos filtros que tienen valor
-        query = {}
-        
-        # Agregar filtro de mercado si tiene valor y no es "Todos"
-        if mercado_normalizado and mercado_normalizado != 'Todos':
-            query['Mercado'] = mercado_normalizado
-        
-        # Agregar filtro de origen si tiene valor
-        if origen_normalizado:
-            query['Origen'] = origen_normalizado
-        
-        # Agregar filtro de período (año) si tiene valor
-        if periodo:
-            try:
-                # Convertir período a entero, ejemplo: "2024" se convierte a 2024
-                # POR QUÉ: En MongoDB, Ejercicio es IntField, necesita número, no string
-                periodo_int = int(periodo)
-                query['Ejercicio'] = periodo_int
-            except ValueError:
-                # Si no es un número válido, ignorar el filtro
-                # POR QUÉ: No queremos que un período inválido rompa la consulta
-                pass
-        
-        # CARGAR CALIFICACIONES DE MONGODB
-        # Si hay filtros en query, aplicar filtros
-        # Si query está vacío, cargar todas las calificaciones
-        if query:
-            # Calificacion.objects(**query) aplica los filtros
-            # **query expande el diccionario, ejemplo: {'Mercado': 'acciones'} se convierte en Mercado='acciones'
-            # .order_by('-FechaAct') ordena por fecha de actualización descendente (más recientes primero)
-            # El signo '-' significa descendente
-            calificaciones = Calificacion.objects(**query).order_by('-FechaAct')
-        else:
-            # Si no hay filtros, cargar TODAS las calificaciones
-            # POR QUÉ: Al cargar la página por primera vez, queremos mostrar todas las calificaciones
-            # Si no mostramos nada, el dashboard se ve vacío y confunde al usuario
-            calificaciones = Calificacion.objects().order_by('-FechaAct')
-
-    # SERIALIZAR CALIFICACIONES A JSON
-    # POR QUÉ: JavaScript necesita los datos en formato JSON para mostrarlos dinámicamente
-    # El template HTML recibe tanto los objetos MongoEngine como el JSON string
-    import json
-    calificaciones_data = []  # Lista que contendrá diccionarios con datos de cada calificación
-    for cal in calificaciones:
-        # Asegurar que el ID esté disponible
-        cal_id = str(cal.id) if cal.id else '' # Convertir el ID a string
-        if not cal_id:
-            continue  # Saltar calificaciones sin ID (si el ID es None, se salta la calificación)
-        
-        #diccionario de calificación con los datos de la calificación
-        cal_data = {
-            'id': cal_id,
-            'ejercicio': cal.Ejercicio or '',
-            'instrumento': cal.Instrumento or '',
-            'fecha_pago': cal.FechaPago.strftime('%Y-%m-%d') if cal.FechaPago else '',
-            'descripcion': cal.Descripcion or '',
-            'secuencia_evento': cal.SecuenciaEvento or '',
-            'fecha_act': cal.FechaAct.strftime('%Y-%m-%d %H:%M:%S') if cal.FechaAct else '',
-            'mercado': cal.Mercado or '',
-            'origen': cal.Origen or '',
-            'factores': {} # Inicializar diccionario de factores
-        }
-        
-        # Agregar todos los factores
-        for i in range(8, 38): # range(8, 38) se refiere a que se agregan los factores F8 a F37
-            field_name = f'Factor{i:02d}'
-            valor = getattr(cal, field_name, 0.0) # getattr se refiere a que se obtiene el valor del campo field_name de la calificación
-            cal_data['factores'][field_name] = str(valor) if valor else '0.0' #convertimos a string el valor del factor
-        
-        calificaciones_data.append(cal_data) # Agregar la calificación al diccionario de calificaciones
-    
-    calificaciones_json = json.dumps(calificaciones_data) #convertimos a json el diccionario de calificaciones
+    # Usuario de la sesión (el decorador ya verificó que existe; normalmente sale de la caché)
+    current_user = request.usuario_actual
     
-    return render(request, 'prueba/home.html', { #renderizamos el template home.html con los datos de la calificación
+    # Obtener rol del usuario (True = admin, False = usuario normal)
+    # POR QUÉ: Los admins ven opciones adicionales en la interfaz
+    is_admin = current_user.rol
+
+    return render(request, 'prueba/home.html', { #renderizamos el template home.html (las calificaciones se cargan por AJAX)
         'user_nombre': current_user.nombre, #nombre del usuario
         'is_admin': is_admin, #rol del usuario
         'current_user': current_user, #usuario actual
-        'calificaciones': calificaciones, #calificaciones
-        'calificaciones_json': calificaciones_json #calificaciones en formato json
+        'exportar_parquet': formato_disponible('parquet'), #el modal de exportar ofrece Parquet solo si pyarrow está instalado
+        'exportar_xlsx': formato_disponible('xlsx'), #y Excel solo si xlsxwriter está instalado
     })
 
 
+# =====================================================================
+# PAGINACIÓN POR CURSOR (KEYSET) DE LA BÚSQUEDA DE CALIFICACIONES Y DE LOS LOGS
+# =====================================================================
+
+def _codificar_cursor(fecha, cal_id):
+    """
+    Crea el cursor que apunta a las filas siguientes a una fila en el orden (-fecha, -_id).
+
+    El cursor es la fecha (FechaAct en calificaciones, fecharegistrada en logs) y el ID de la
+    última fila de la página, codificados en base64 (seguro para URL). El navegador lo devuelve
+    tal cual para pedir la página siguiente.
+
+    Argumentos:
+        fecha: Fecha guardada en la última fila de la página (None si no tiene)
+        cal_id: ID de la última fila de la página (calificación o log)
+
+    Returns (lo que devuelve la funcion):
+        str: Cursor opaco para el parámetro 'cursor'
+    """
+    texto = f'{fecha.isoformat() if fecha else ""}|{cal_id}'
+    return base64.urlsafe_b64encode(texto.encode('utf-8')).decode('ascii')
+
+
+def _decodificar_cursor(cursor):
+    """
+    Obtiene la fecha y el ID guardados en un cursor creado por _codificar_cursor().
+
+    Argumentos:
+        cursor: Cursor recibido en el parámetro 'cursor'
+
+    Returns (lo que devuelve la funcion):
+        tuple: (fecha o None si la fila no tenía fecha, ObjectId)
+
+    Raises:
+        ValueError: Si el cursor no es válido
+    """
+    try:
+        texto = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        fecha_texto, cal_id = texto.split('|')
+        fecha = datetime.datetime.fromisoformat(fecha_texto) if fecha_texto else None
+        return fecha, ObjectId(cal_id)
+    except Exception:
+        raise ValueError('Cursor de paginación inválido')
+
+
+def _filtro_despues_del_cursor(fecha, cal_id, campo='FechaAct'):
+    """
+    Condición de MongoDB para las filas que van DESPUÉS del cursor en el orden (-campo, -_id).
+
+    POR QUÉ: Con skip() MongoDB recorre y descarta todas las filas anteriores en cada página;
+    comparando contra la última fila entregada, cada página cuesta lo mismo sin importar su posición.
+
+    En orden descendente las filas sin fecha quedan al final, por eso:
+    - Cursor con fecha: fecha anterior, o misma fecha con ID menor, o sin fecha
+    - Cursor sin fecha: sin fecha con ID menor
+
+    Argumentos:
+        fecha: Fecha del cursor (None si no tenía)
+        cal_id: ObjectId del cursor
+        campo: Campo de fecha del orden ('FechaAct' en calificaciones, 'fecharegistrada' en logs)
+
+    Returns (lo que devuelve la funcion):
+        Q: Condición para combinar con los filtros de la búsqueda
+    """
+    if fecha is None:
+        return Q(**{campo: None, 'id__lt': cal_id})
+    return Q(**{f'{campo}__lt': fecha}) | Q(**{campo: fecha, 'id__lt': cal_id}) | Q(**{campo: None})
+
+
+def _filtros_calificaciones(parametros):
+    """
+    Arma el filtro de MongoDB de las calificaciones según los filtros del dashboard.
+
+    POR QUÉ: buscar_calificaciones_view y exportar_calificaciones_view (al exportar "todas"
+    las calificaciones filtradas) deben aplicar exactamente los mismos filtros.
+
+    Argumentos:
+        parametros: QueryDict con 'mercado', 'origen' y 'periodo' (request.GET o request.POST)
+
+    Returns (lo que devuelve la funcion):
+        dict: Condiciones para Calificacion.objects(**query)
+    """
+    # Obtener parámetros de filtro
+    # parametros es request.GET (?mercado=acciones&origen=csv) o request.POST (exportación)
+    # .get('mercado', '') obtiene el valor o string vacío si no existe
+    # .strip() elimina espacios al inicio y final
+    mercado_raw = parametros.get('mercado', '').strip()
+    origen = parametros.get('origen', '').strip()
+    periodo = parametros.get('periodo', '').strip()
+
+    # NORMALIZAR MERCADO
+    # Convertir variaciones a valores estándar
+    # POR QUÉ: Los usuarios pueden escribir "Acciones", "acciones", "ACCIONES", etc.
+    mercado_normalizado = mercado_raw
+    if mercado_raw:
+        # Convertir a minúsculas y eliminar espacios
+        mercado_lower = mercado_raw.lower().strip()
+        if mercado_lower == 'acciones' or mercado_lower == 'accion':
+            mercado_normalizado = 'acciones'
+        elif mercado_lower == 'cfi':
+            mercado_normalizado = 'CFI'
+        elif mercado_lower == 'fondos mutuos' or mercado_lower == 'fondosmutuos' or mercado_lower == 'fondo mutuo':
+            mercado_normalizado = 'Fondos mutuos'
+
+    # NORMALIZAR ORIGEN
+    # Similar a mercado, normalizar variaciones
+    origen_normalizado = origen
+    if origen:
+        origen_lower = origen.lower().strip()
+        if origen_lower == 'csv':
+            origen_normalizado = 'csv'
+        elif origen_lower == 'corredor':
+            origen_normalizado = 'corredor'
+    
+    # CONSTRUIR QUERY DE MONGODB
+    # query es un diccionario que se pasa a Calificacion.objects(**query)
+    query = {}
+    
+    # Agregar filtro de mercado si tiene valor y no es "Todos"
+    if mercado_normalizado and mercado_normalizado != 'Todos':
+        query['Mercado'] = mercado_normalizado
+    
+    # Agregar filtro de origen si tiene valor
+    if origen_normalizado:
+        query['Origen'] = origen_normalizado
+    
+    # Agregar filtro de período si tiene valor
+    if periodo:
+        try:
+            # Convertir período a entero
+            # POR QUÉ: En MongoDB, Ejercicio es IntField, necesita número
+            periodo_int = int(periodo)
+            query['Ejercicio'] = periodo_int
+        except ValueError:
+            # Si no es un número válido, ignorar el filtro
+            # POR QUÉ: No queremos que un período inválido rompa la consulta
+            pass
+
+    return query
+
+
 # =====================================================================
 # VISTAS DE BUSCAR CALIFICACIONES
 # =====================================================================
 
 @require_GET
+@login_requerido_json
 def buscar_calificaciones_view(request):
     """
     Vista AJAX para buscar calificaciones según filtros.
@@ -850,6 +876,13 @@ def buscar_calificaciones_view(request):
     4. Busca calificaciones con los filtros
     5. Serializa a JSON y retorna
     
+    PAGINACIÓN (parámetros 'limit' y 'cursor'):
+    - Devuelve como máximo 'limit' calificaciones (CALIFICACIONES_POR_PAGINA por defecto)
+    - Si hay más, 'has_more' es true y 'next_cursor' se envía como 'cursor' para pedir la página siguiente
+    - El cursor se basa en (FechaAct, _id) de la última fila, no en un número de página:
+      las calificaciones que se crean mientras el usuario recorre las páginas no hacen
+      que se repitan o salten filas
+    
     DIFERENCIA CON home_view:
     - home_view: renderiza HTML completo
     - buscar_calificaciones_view: retorna solo JSON (para AJAX)
@@ -865,145 +898,74 @@ def buscar_calificaciones_view(request):
         request: Objeto HttpRequest de Django (solo GET permitido)
         
     Returns (lo que devuelve la funcion):
-        JsonResponse: JSON con lista de calificaciones encontradas
+        RespuestaJSON: JSON con la página de calificaciones, 'has_more' y 'next_cursor'
     """
-    # Verificar autenticación del usuario
-    # POR QUÉ: Solo usuarios autenticados pueden buscar calificaciones
-    if 'user_id' not in request.session:
-        return JsonResponse({'success': False, 'error': 'No autenticado'}, status=401)
-
     try:
-        # Obtener parámetros de filtro de la URL
-        # request.GET contiene los parámetros de la URL (?mercado=acciones&origen=csv)
-        # .get('mercado', '') obtiene el valor o string vacío si no existe
-        # .strip() elimina espacios al inicio y final
-        mercado_raw = request.GET.get('mercado', '').strip()
-        origen = request.GET.get('origen', '').strip()
-        periodo = request.GET.get('periodo', '').strip()
-
-        # NORMALIZAR MERCADO
-        # Convertir variaciones a valores estándar
-        # POR QUÉ: Los usuarios pueden escribir "Acciones", "acciones", "ACCIONES", etc.
-        mercado_normalizado = mercado_raw
-        if mercado_raw:
-            # Convertir a minúsculas y eliminar espacios
-            mercado_lower = mercado_raw.lower().strip()
-            if mercado_lower == 'acciones' or mercado_lower == 'accion':
-                mercado_normalizado = 'acciones'
-            elif mercado_lower == 'cfi':
-                mercado_normalizado = 'CFI'
-            elif mercado_lower == 'fondos mutuos' or mercado_lower == 'fondosmutuos' or mercado_lower == 'fondo mutuo':
-                mercado_normalizado = 'Fondos mutuos'
-
-        # NORMALIZAR ORIGEN
-        # Similar a mercado, normalizar variaciones
-        origen_normalizado = origen
-        if origen:
-            origen_lower = origen.lower().strip()
-            if origen_lower == 'csv':
-                origen_normalizado = 'csv'
-            elif origen_lower == 'corredor':
-                origen_normalizado = 'corredor'
-        
-        # CONSTRUIR QUERY DE MONGODB
-        # query es un diccionario que se pasa a Calificacion.objects(**query)
-        query = {}
-        
-        # Agregar filtro de mercado si tiene valor y no es "Todos"
-        if mercado_normalizado and mercado_normalizado != 'Todos':
-            query['Mercado'] = mercado_normalizado
-        
-        # Agregar filtro de origen si tiene valor
-        if origen_normalizado:
-            query['Origen'] = origen_normalizado
-        
-        # Agregar filtro de período si tiene valor
-        if periodo:
+        # Filtros del dashboard (mercado, origen y período normalizados)
+        query = _filtros_calificaciones(request.GET)
+
+        # TAMAÑO DE PÁGINA
+        # Si 'limit' no viene o no es un número se usa el valor por defecto; nunca supera el máximo
+        try:
+            limite = int(request.GET.get('limit', settings.CALIFICACIONES_POR_PAGINA))
+        except ValueError:
+            limite = settings.CALIFICACIONES_POR_PAGINA
+        limite = max(1, min(limite, settings.CALIFICACIONES_LIMITE_MAXIMO))
+
+        # CURSOR DE LA PÁGINA ANTERIOR
+        # Si viene, solo se buscan las calificaciones que siguen a la última fila ya entregada
+        cursor = request.GET.get('cursor', '').strip()
+        filtro_cursor = Q()
+        if cursor:
             try:
-                # Convertir período a entero
-                # POR QUÉ: En MongoDB, Ejercicio es IntField, necesita número
-                periodo_int = int(periodo)
-                query['Ejercicio'] = periodo_int
-            except ValueError:
-                # Si no es un número válido, ignorar el filtro
-                # POR QUÉ: No queremos que un período inválido rompa la consulta
-                pass
+                fecha_cursor, id_cursor = _decodificar_cursor(cursor)
+            except ValueError as e:
+                return RespuestaJSON({'success': False, 'error': str(e)}, status=400)
+            filtro_cursor = _filtro_despues_del_cursor(fecha_cursor, id_cursor)
 
         # BUSCAR CALIFICACIONES EN MONGODB
-        # Si hay filtros, aplicar filtros; si no, obtener todas
-        if query:
-            # Aplicar filtros y ordenar por fecha descendente
-            calificaciones = Calificacion.objects(**query).order_by('-FechaAct')
-        else:
-            # Si no hay filtros, obtener todas las calificaciones
-            calificaciones = Calificacion.objects().order_by('-FechaAct')
+        # Se ordena por fecha descendente y, a igual fecha, por ID (así el orden es estable entre páginas)
+        # Se pide una fila más que el límite: si llega, hay otra página (sin contar toda la colección)
+        # Solo se leen los campos de la tabla, como diccionarios de pymongo (sin crear documentos Calificacion)
+        calificaciones = list(calificaciones_proyectadas(
+            Calificacion.objects(filtro_cursor, **query).order_by('-FechaAct', '-id').limit(limite + 1)
+        ))
+        hay_mas = len(calificaciones) > limite
+        calificaciones = calificaciones[:limite]
+
+        # CURSOR DE LA PÁGINA SIGUIENTE
+        # Se usa la FechaAct tal como está guardada en la última fila (puede no existir)
+        siguiente_cursor = None
+        if hay_mas:
+            ultima = calificaciones[-1]
+            siguiente_cursor = _codificar_cursor(ultima.get('FechaAct'), ultima['_id'])
 
         # SERIALIZAR CALIFICACIONES A JSON
-        # Convertir objetos MongoEngine a diccionarios para JSON
-        calificaciones_data = []
-        
-        # Iterar sobre cada calificación encontrada
-        for cal in calificaciones:
-            # Obtener ID de la calificación
-            # Convertir ObjectId a string para JSON
-            cal_id = str(cal.id) if cal.id else ''
-            
-            # Validar que tenga ID
-            # POR QUÉ: Las calificaciones sin ID no se pueden usar
-            if not cal_id:
-                print(f"ADVERTENCIA: Calificación sin ID: {cal}")
-                continue  # Saltar esta calificación
-            
-            # Crear diccionario con datos de la calificación
-            # or '' convierte None a string vacío para evitar errores en JSON
-            cal_data = {
-                'id': cal_id,
-                'ejercicio': cal.Ejercicio or '',
-                'instrumento': cal.Instrumento or '',
-                'fecha_pago': cal.FechaPago.strftime('%Y-%m-%d') if cal.FechaPago else '',
-                'descripcion': cal.Descripcion or '',
-                'secuencia_evento': cal.SecuenciaEvento or '',
-                'fecha_act': cal.FechaAct.strftime('%Y-%m-%d %H:%M:%S') if cal.FechaAct else '',
-                'mercado': cal.Mercado or '',
-                'origen': cal.Origen or '',
-                'factores': {}  # Diccionario para los factores
-            }
-            
-            # Agregar todos los factores del 8 al 37
-            # POR QUÉ: JavaScript necesita todos los factores para mostrar en la interfaz
-            for i in range(8, 38):
-                # Construir nombre del campo: "Factor08", "Factor09", etc.
-                field_name = f'Factor{i:02d}'
-                
-                # Obtener valor del factor del objeto calificación
-                # getattr() obtiene el atributo o 0.0 si no existe
-                valor = getattr(cal, field_name, 0.0)
-                
-                # Convertir a string para JSON
-                # Si el valor es None o 0, usar '0.0'
-                cal_data['factores'][field_name] = str(valor) if valor else '0.0'
-            
-            # Agregar la calificación procesada a la lista
-            calificaciones_data.append(cal_data)
+        # calificacion_a_dict() arma el diccionario de cada fila (id, datos básicos y factores como texto)
+        calificaciones_data = [calificacion_a_dict(cal) for cal in calificaciones]
 
         # Retornar respuesta JSON con las calificaciones encontradas
-        return JsonResponse({
+        return RespuestaJSON({
             'success': True,  # Indica que la operación fue exitosa
-            'calificaciones': calificaciones_data,  # Lista de calificaciones
-            'total': len(calificaciones_data)  # Cantidad total de resultados
+            'calificaciones': calificaciones_data,  # Lista de calificaciones de esta página
+            'total': len(calificaciones_data),  # Cantidad de resultados en esta página
+            'limit': limite,  # Tamaño de página usado
+            'has_more': hay_mas,  # Si hay más calificaciones después de esta página
+            'next_cursor': siguiente_cursor  # Cursor para pedir la página siguiente (None si no hay más)
         })
 
     except Exception as e:
         # Si ocurre cualquier error, capturarlo y retornar error en JSON
         # POR QUÉ: Mejor retornar error claro que dejar que la excepción se propague
         print(f"Error al buscar calificaciones: {e}")
-        return JsonResponse({'success': False, 'error': f'Error al buscar: {str(e)}'}, status=500) #retornamos el error en formato JSON
+        return RespuestaJSON({'success': False, 'error': f'Error al buscar: {str(e)}'}, status=500) #retornamos el error en formato JSON
 
 
-@require_GET
+@require_http_methods(['GET', 'POST'])
+@login_requerido
 def exportar_calificaciones_view(request):
     """
-    Vista para exportar calificaciones a CSV según IDs seleccionados.
+    Vista para exportar calificaciones a CSV, Parquet o XLSX según IDs seleccionados.
     
     POR QUÉ ESTA FUNCIÓN ES NECESARIA:
     - Permite exportar calificaciones para análisis externo
@@ -1012,34 +974,49 @@ def exportar_calificaciones_view(request):
     - Puede exportar calificaciones específicas o todas
     
     CÓMO FUNCIONA:
-    1. Recibe IDs de calificaciones desde la URL (opcional)
-    2. Si hay IDs, busca solo esas calificaciones
-    3. Si no hay IDs, exporta todas las calificaciones
-    4. Crea archivo CSV con encabezados y datos
+    1. Recibe IDs de calificaciones desde la URL o, para selecciones grandes, desde un POST (opcional)
+    2. Si hay IDs, busca solo esas calificaciones en consultas $in por lotes (calificaciones_por_ids)
+    3. Si no hay IDs, exporta todas las calificaciones que cumplen los filtros del dashboard
+       (mercado, origen, período; sin filtros, la colección completa). Así "Todas" en el modal
+       no necesita descargar primero todas las calificaciones para juntar sus IDs
+    4. Envía el archivo por streaming (prueba/exportadores.py): los bloques de filas se escriben
+       a medida que se leen del cursor (la memoria no depende de la cantidad de filas)
     5. Retorna el archivo como descarga
     
     Permite exportar calificaciones específicas pasando sus IDs como parámetros.
-    Si no se pasan IDs, exporta todas las calificaciones.
+    Si no se pasan IDs, exporta todas las calificaciones que cumplen los filtros.
     
-    Retorna un archivo CSV descargable con las calificaciones seleccionadas y sus factores.
+    Retorna un archivo descargable con las calificaciones seleccionadas y sus factores.
     
     Argumentos:
-        request: Objeto HttpRequest de Django (solo GET permitido)
+        request: Objeto HttpRequest de Django (GET o POST)
         - ids: Lista de IDs de calificaciones separados por comas (opcional)
+               En GET va en la URL; en POST va en el formulario (el navegador limita el largo
+               de la URL, así que la selección de miles de filas se envía por POST)
+        - mercado, origen, periodo: Filtros del dashboard, se usan cuando no hay IDs (opcionales)
+        - formato: 'csv' (por defecto), 'parquet' (columnas con tipos, requiere pyarrow)
+                   o 'xlsx' (Excel, requiere xlsxwriter)
         
     Returns (lo que devuelve la funcion):
-        HttpResponse: Archivo CSV con las calificaciones
+        StreamingHttpResponse: Archivo con las calificaciones
+        HttpResponseBadRequest: Si el formato no existe
     """
-    # Verificar autenticación del usuario
-    # POR QUÉ: Solo usuarios autenticados pueden exportar datos
-    if 'user_id' not in request.session:
-        return HttpResponseForbidden('No autenticado')
-    
     try:
-        # Obtener parámetro 'ids' de la URL
-        # Formato esperado: ?ids=id1,id2,id3
+        # Obtener parámetro 'ids' de la URL (GET) o del formulario (POST)
+        # Formato esperado: ?ids=id1,id2,id3 (o el campo 'ids' del formulario con el mismo formato)
         # .strip() elimina espacios
-        ids_param = request.GET.get('ids', '').strip()
+        datos = request.POST if request.method == 'POST' else request.GET
+        ids_param = datos.get('ids', '').strip()
+        
+        # Formato del archivo (csv si no se indica)
+        # POR QUÉ se valida antes de leer: con streaming, un error después del primer byte ya no puede ser un 400/500
+        formato = datos.get('formato', 'csv').strip().lower() or 'csv'
+        if formato not in FORMATOS_EXPORTACION:
+            return HttpResponseBadRequest(f'Formato de exportación no soportado: {formato}')
+        if not formato_disponible(formato):
+            return HttpResponseServerError(
+                f'El formato {formato} requiere la librería {DEPENDENCIAS_FORMATO[formato]} (pip install {DEPENDENCIAS_FORMATO[formato]})'
+            )
         
         # Verificar si se proporcionaron IDs específicos
         if ids_param:
@@ -1054,86 +1031,49 @@ def exportar_calificaciones_view(request):
                 # ObjectId() valida el formato y convierte el string
                 # POR QUÉ: MongoDB requiere ObjectId, no strings
                 object_ids = [ObjectId(id) for id in ids_list]
-                
-                # Buscar solo las calificaciones con esos IDs
-                # id__in busca documentos cuyo ID esté en la lista
-                # order_by('-FechaAct') ordena por fecha descendente
-                calificaciones = Calificacion.objects(id__in=object_ids).order_by('-FechaAct')
             except Exception as e:
                 # Si algún ID tiene formato inválido, retornar error
                 print(f"Error al convertir IDs: {e}")
                 return HttpResponseServerError('Error: IDs inválidos')
+            
+            # Buscar solo las calificaciones con esos IDs, ordenadas por fecha descendente
+            # POR QUÉ por lotes: una sola consulta id__in con miles de IDs es lenta; calificaciones_por_ids
+            # hace consultas $in de EXPORTACION_IDS_POR_CONSULTA IDs y entrega los documentos a medida que los lee
+            print(f"[EXPORTAR] Selección de {len(object_ids)} IDs ({request.method})")
+            calificaciones = calificaciones_por_ids(
+                object_ids, CAMPOS_EXPORTACION, getattr(settings, 'EXPORTACION_IDS_POR_CONSULTA', 1000)
+            )
         else:
-            # Si no hay IDs, exportar todas las calificaciones
-            calificaciones = Calificacion.objects().order_by('-FechaAct')
-        
-        # CREAR RESPUESTA HTTP CON TIPO CSV
-        # content_type='text/csv' indica que es un archivo CSV
-        # charset='utf-8' permite caracteres especiales (tildes, ñ, etc.)
-        response = HttpResponse(content_type='text/csv; charset=utf-8')
+            # Si no hay IDs, exportar todas las calificaciones que cumplen los filtros (todas si no hay filtros)
+            # Solo se leen los campos exportados, como diccionarios de pymongo (sin crear documentos Calificacion)
+            # batch_size: MongoDB entrega el cursor en lotes del mismo tamaño que los bloques del archivo
+            query = _filtros_calificaciones(datos)
+            print(f"[EXPORTAR] Todas las calificaciones con los filtros {query} ({request.method})")
+            filas_por_bloque = getattr(settings, 'EXPORTACION_FILAS_POR_BLOQUE', 1000)
+            calificaciones = calificaciones_proyectadas(
+                Calificacion.objects(**query).order_by('-FechaAct', '-id'), CAMPOS_EXPORTACION
+            ).batch_size(filas_por_bloque)
+        
+        # CREAR RESPUESTA HTTP POR STREAMING CON EL TIPO DEL FORMATO
+        # StreamingHttpResponse envía cada bloque que entrega el generador apenas está listo
+        # POR QUÉ: Antes el CSV completo se armaba en memoria antes de enviar el primer byte;
+        # con la colección completa eso usaba mucha RAM y la solicitud superaba el tiempo límite
+        # content_type: 'text/csv; charset=utf-8' para CSV (permite tildes, ñ, etc.), el tipo de Parquet o de Excel
+        content_type, extension = FORMATOS_EXPORTACION[formato]
+        response = StreamingHttpResponse(
+            generar_exportacion(calificaciones, formato),
+            content_type=content_type
+        )
         
         # Configurar nombre del archivo descargable
         # Content-Disposition: attachment hace que el navegador descargue el archivo
         # filename define el nombre del archivo
         # datetime.now().strftime() genera timestamp: 20240115_143022
         # POR QUÉ: Cada exportación tiene nombre único basado en fecha/hora
-        response['Content-Disposition'] = f'attachment; filename="calificaciones_{datetime.datetime.now().strftime("%Y%m%d_%H%M%S")}.csv"'
-        
-        # Crear escritor CSV
-        # csv.writer() escribe datos en formato CSV
-        # response es el destino donde se escribe
-        writer = csv.writer(response)
-        
-        # ESCRIBIR ENCABEZADOS DEL CSV
-        # Primera fila contiene los nombres de las columnas
-        headers = [
-            'ID', 'Ejercicio', 'Mercado', 'Origen', 'Instrumento', 'Fecha Pago', 
-            'Secuencia Evento', 'Descripcion', 'Fecha Act', 'Dividendo', 
-            'Valor Historico', 'Factor Actualizacion', 'Anho', 'ISFUT'
-        ]
-        
-        # Agregar encabezados de factores F8 a F37
-        # POR QUÉ: Cada factor necesita su propia columna en el CSV
-        for i in range(8, 38):
-            headers.append(f'Factor{i:02d}')
-        
-        # Escribir la fila de encabezados
-        writer.writerow(headers)
-        
-        # ESCRIBIR DATOS DE CADA CALIFICACIÓN
-        # Cada calificación se convierte en una fila del CSV
-        for cal in calificaciones:
-            # Crear fila con datos básicos de la calificación
-            # or '' convierte None a string vacío para evitar errores
-            row = [
-                str(cal.id) if cal.id else '',  # ID como string
-                cal.Ejercicio or '',  # Año del ejercicio
-                cal.Mercado or '',  # Tipo de mercado
-                cal.Origen or '',  # Origen de los datos
-                cal.Instrumento or '',  # Código del instrumento
-                cal.FechaPago.strftime('%Y-%m-%d') if cal.FechaPago else '',  # Fecha formateada
-                cal.SecuenciaEvento or '',  # Secuencia del evento
-                cal.Descripcion or '',  # Descripción
-                cal.FechaAct.strftime('%Y-%m-%d %H:%M:%S') if cal.FechaAct else '',  # Fecha de actualización
-                str(cal.Dividendo) if cal.Dividendo else '0.0',  # Dividendo
-                str(cal.ValorHistorico) if cal.ValorHistorico else '0.0',  # Valor histórico
-                str(cal.FactorActualizacion) if cal.FactorActualizacion else '0.0',  # Factor de actualización
-                cal.Anho or '',  # Año alternativo
-                'True' if cal.ISFUT else 'False'  # Indicador booleano como string
-            ]
-            
-            # Agregar todos los factores F8 a F37 a la fila
-            for i in range(8, 38):
-                field_name = f'Factor{i:02d}'
-                valor = getattr(cal, field_name, 0.0)
-                # Convertir a string, usar '0.0' si es None
-                row.append(str(valor) if valor else '0.0')
-            
-            # Escribir la fila completa en el CSV
-            writer.writerow(row)
+        response['Content-Disposition'] = f'attachment; filename="calificaciones_{datetime.datetime.now().strftime("%Y%m%d_%H%M%S")}.{extension}"'
         
-        # Retornar la respuesta HTTP con el archivo CSV
-        # El navegador descargará automáticamente el archivo
+        # Retornar la respuesta HTTP con el archivo
+        # El navegador empieza a descargar el archivo mientras se siguen leyendo calificaciones
         return response
         
     except Exception as e:
@@ -1213,6 +1153,7 @@ def contacto_view(request):
 # VISTAS DE CALIFICACIONES
 # =====================================================================
 
+@login_requerido
 def ingresar_view(request):
     """
     Vista para ingresar una nueva calificación o modificar una existente.
@@ -1243,22 +1184,11 @@ def ingresar_view(request):
         request: Objeto HttpRequest de Django
         
     Returns (lo que devuelve la funcion):
-        JsonResponse: Si es POST y éxito, retorna JSON con el ID de la calificación
+        RespuestaJSON: Si es POST y éxito, retorna JSON con el ID de la calificación
         HttpResponse: Si es GET, renderiza el formulario
     """
-    # Verificar autenticación del usuario
-    # POR QUÉ: Solo usuarios autenticados pueden crear/modificar calificaciones
-    if 'user_id' not in request.session:
-        return redirect('login')
-
-    # Obtener usuario actual de la base de datos
-    try:
-        current_user = usuarios.objects.get(id=request.session['user_id'])
-    except usuarios.DoesNotExist:
-        # Si el usuario no existe, limpiar sesión y redirigir
-        # POR QUÉ: La sesión tiene un ID inválido
-        request.session.flush()
-        return redirect('login')
+    # Usuario de la sesión (el decorador ya verificó que existe)
+    current_user = request.usuario_actual
 
     # Procesar formulario si es método POST
     if request.method == 'POST':
@@ -1290,7 +1220,7 @@ def ingresar_view(request):
             # POR QUÉ: Regla de negocio - las secuencias válidas empiezan en 10001
             if 'SecuenciaEvento' in cleaned_data and cleaned_data['SecuenciaEvento']:
                 if cleaned_data['SecuenciaEvento'] <= 10000:
-                    return JsonResponse({'success': False, 'error': 'La secuencia de evento debe ser mayor a 10,000.'}, status=400)
+                    return RespuestaJSON({'success': False, 'error': 'La secuencia de evento debe ser mayor a 10,000.'}, status=400)
             
             # NORMALIZAR MERCADO
             # Convertir variaciones a valores estándar
@@ -1438,7 +1368,7 @@ def ingresar_view(request):
                     
                     # Retornar JSON con los datos actualizados
                     # JavaScript usará estos datos para actualizar la interfaz
-                    return JsonResponse({
+                    return RespuestaJSON({
                         'success': True,
                         'calificacion_id': str(calificacion.id),
                         'data': {
@@ -1455,7 +1385,7 @@ def ingresar_view(request):
                     })
                 except Calificacion.DoesNotExist:
                     # Si la calificación no existe, retornar error
-                    return JsonResponse({'success': False, 'error': 'Calificación no encontrada.'}, status=404)
+                    return RespuestaJSON({'success': False, 'error': 'Calificación no encontrada.'}, status=404)
             else:
                 # CREAR NUEVA CALIFICACIÓN
                 # Si no hay calificacion_id, es una creación nueva
@@ -1478,7 +1408,7 @@ def ingresar_view(request):
                 
                 # Retornar JSON con el ID de la calificación
                 # JavaScript usará este ID para abrir el segundo modal de factores
-                return JsonResponse({
+                return RespuestaJSON({
                     'success': True,
                     'calificacion_id': str(nueva_calificacion.id),
                     'data': {
@@ -1496,7 +1426,7 @@ def ingresar_view(request):
         else:
             # Si el formulario no es válido, retornar errores en JSON
             # form.errors.as_json() convierte los errores de Django a formato JSON
-            return JsonResponse({'success': False, 'error': form.errors.as_json()}, status=400)
+            return RespuestaJSON({'success': False, 'error': form.errors.as_json()}, status=400)
     else:
         # Si es método GET, mostrar formulario
         # Puede recibir datos iniciales desde la URL para prellenar el formulario
@@ -1519,6 +1449,7 @@ def ingresar_view(request):
 # VISTAS DE INGRESAR CALIFICACIONES CON MONTOS
 # =====================================================================
 
+@login_requerido
 def ingresar_calificacion(request):
     """
     Vista para ingresar calificaciones con MONTOS.
@@ -1539,14 +1470,8 @@ def ingresar_calificacion(request):
         HttpResponseRedirect: Redirige a home si se guardó exitosamente
         HttpResponse: Renderiza el formulario si es GET o hay errores
     """
-    if 'user_id' not in request.session: # Si el usuario no está autenticado, redirige a login
-        return redirect('login')
-    
-    try:
-        current_user = usuarios.objects.get(id=request.session['user_id']) # Obtiene el usuario autenticado
-    except usuarios.DoesNotExist:
-        request.session.flush() # Elimina todos los datos de la sesión y redirige a login
-        return redirect('login')
+    # Usuario de la sesión (el decorador ya verificó que existe)
+    current_user = request.usuario_actual # Obtiene el usuario autenticado
     
     if request.method == 'POST': # Si el método es POST, procesa el formulario
         form = MontosForm(request.POST) # Crea un formulario con los datos del POST
@@ -1570,12 +1495,12 @@ def ingresar_calificacion(request):
                     else:
                         montos[i] = monto_value
                 
-                # CALCULAR LA SUMA BASE
-                # Suma de montos del 8 al 19 (inclusive)
-                # POR QUÉ: La SumaBase es el denominador para calcular factores
-                suma_base = Decimal(0)
-                for i in range(8, 20):  # Del 8 al 19 inclusive
-                    suma_base += montos.get(i, Decimal(0))
+                # CALCULAR LA SUMA BASE Y LOS FACTORES CON EL MOTOR DE FACTORES
+                # SumaBase = suma de montos del 8 al 19 (inclusive), el denominador de los factores
+                # POR QUÉ: El motor calcula la SumaBase y los 30 factores de una vez (mismo resultado que Decimal);
+                # así la fórmula está en un solo lugar (prueba/motor_factores.py)
+                resultado = calcular_factores([[montos.get(i, Decimal(0)) for i in range(8, 38)]])
+                suma_base = resultado.sumas_base[0]
                 
                 # CREAR NUEVA CALIFICACIÓN
                 nueva_calificacion = Calificacion()
@@ -1613,16 +1538,11 @@ def ingresar_calificacion(request):
                 # CALCULAR TODOS LOS FACTORES
                 # Fórmula: Factor = Monto / SumaBase
                 # Precisión: 8 decimales (requisito de negocio)
-                EIGHT_PLACES = Decimal('0.00000001')
-                
                 if suma_base > 0:
-                    # Calcular todos los factores del 8 al 37
-                    for i in range(8, 38):
+                    # Los 30 factores ya los calculó el motor de factores junto con la SumaBase
+                    factores = factores_decimales(resultado)[0]
+                    for i, factor_calculado in zip(range(8, 38), factores):
                         factor_field = f'Factor{i:02d}'
-                        monto = montos.get(i, Decimal(0))
-                        # Calcular factor: Monto / SumaBase
-                        # .quantize() redondea a 8 decimales
-                        factor_calculado = (monto / suma_base).quantize(EIGHT_PLACES)
                         setattr(nueva_calificacion, factor_field, factor_calculado)
                 else:
                     # Si SumaBase es 0, todos los factores son 0
@@ -1665,6 +1585,7 @@ def ingresar_calificacion(request):
 # =====================================================================
 
 @require_POST
+@login_requerido_json
 def guardar_factores_view(request):
     """
     Vista para guardar los factores calculados en la calificación.
@@ -1691,28 +1612,21 @@ def guardar_factores_view(request):
         request: Objeto HttpRequest de Django
         
     Returns (lo que devuelve la funcion):
-        JsonResponse: JSON con el resultado de la operación
+        RespuestaJSON: JSON con el resultado de la operación
     """
-    # Verificar autenticación del usuario
-    if 'user_id' not in request.session:
-        return JsonResponse({'success': False, 'error': 'No autenticado'}, status=401)
-
-    # Obtener usuario actual
-    try:
-        current_user = usuarios.objects.get(id=request.session['user_id'])
-    except usuarios.DoesNotExist:
-        return JsonResponse({'success': False, 'error': 'Usuario no válido'}, status=401)
+    # Usuario de la sesión (el decorador ya verificó que existe)
+    current_user = request.usuario_actual
 
     # Obtener ID de la calificación desde el POST
     calificacion_id = request.POST.get('calificacion_id')
     if not calificacion_id:
-        return JsonResponse({'success': False, 'error': 'Falta calificacion_id'}, status=400)
+        return RespuestaJSON({'success': False, 'error': 'Falta calificacion_id'}, status=400)
 
     # Obtener la calificación de MongoDB
     try:
         calificacion = Calificacion.objects.get(id=calificacion_id)
     except Calificacion.DoesNotExist:
-        return JsonResponse({'success': False, 'error': 'Calificación no encontrada'}, status=404)
+        return RespuestaJSON({'success': False, 'error': 'Calificación no encontrada'}, status=404)
 
     try:
         # Importar Decimal para precisión financiera
@@ -1784,11 +1698,11 @@ def guardar_factores_view(request):
             _crear_log(current_user, 'Modificar Calificacion', documento_afectado=calificacion)
         
         # Retornar éxito
-        return JsonResponse({'success': True})
+        return RespuestaJSON({'success': True})
     except Exception as e:
         # Si ocurre cualquier error, capturarlo y retornar error
         print(f"Error al guardar factores: {e}")
-        return JsonResponse({'success': False, 'error': f'Error al guardar: {str(e)}'}, status=500)
+        return RespuestaJSON({'success': False, 'error': f'Error al guardar: {str(e)}'}, status=500)
 
 
 # =====================================================================
@@ -1796,6 +1710,7 @@ def guardar_factores_view(request):
 # =====================================================================
 
 @require_POST
+@login_requerido_json
 def calcular_factores_view(request):
     """
     Vista AJAX para calcular factores desde MONTOS ingresados.
@@ -1829,31 +1744,22 @@ def calcular_factores_view(request):
         request: Objeto HttpRequest de Django (solo POST permitido)
         
     Returns (lo que devuelve la funcion):
-        JsonResponse: JSON con factores calculados para mostrar al usuario
+        RespuestaJSON: JSON con factores calculados para mostrar al usuario
     """
-    # Verificar autenticación del usuario
-    # POR QUÉ: Solo usuarios autenticados pueden calcular factores
-    if 'user_id' not in request.session:
-        return JsonResponse({'success': False, 'error': 'No autenticado'}, status=401)
-
-    # Obtener usuario actual de la base de datos
-    try:
-        current_user = usuarios.objects.get(id=request.session['user_id'])
-    except usuarios.DoesNotExist:
-        # Si el usuario no existe, la sesión es inválida
-        return JsonResponse({'success': False, 'error': 'Usuario no válido'}, status=401)
+    # Usuario de la sesión (el decorador ya verificó que existe)
+    current_user = request.usuario_actual
 
     # Obtener ID de la calificación desde el POST
     # POR QUÉ: Necesitamos saber qué calificación estamos modificando
     calificacion_id = request.POST.get('calificacion_id')
     if not calificacion_id:
-        return JsonResponse({'success': False, 'error': 'Falta calificacion_id'}, status=400)
+        return RespuestaJSON({'success': False, 'error': 'Falta calificacion_id'}, status=400)
 
     # Obtener la calificación de MongoDB
     try:
         calificacion = Calificacion.objects.get(id=calificacion_id)
     except Calificacion.DoesNotExist:
-        return JsonResponse({'success': False, 'error': 'Calificación no encontrada'}, status=404)
+        return RespuestaJSON({'success': False, 'error': 'Calificación no encontrada'}, status=404)
 
     try:
         # Importar Decimal para cálculos financieros precisos
@@ -1884,18 +1790,14 @@ def calcular_factores_view(request):
                 # POR QUÉ: Mejor usar 0 que fallar la operación completa
                 montos[i] = Decimal(0)
 
-        # CALCULAR SUMA BASE
+        # CALCULAR SUMA BASE Y FACTORES
         # SumaBase = suma de montos del 8 al 19 (12 montos)
         # POR QUÉ: Los factores se calculan dividiendo cada monto por esta suma
         # Esta es la base de referencia para todos los cálculos
-        suma_base = Decimal(0)
-        
-        # Iterar del 8 al 19 (inclusive)
-        # range(8, 20) genera: 8, 9, 10, ..., 19
-        for i in range(8, 20):
-            # Sumar cada monto a la suma base
-            # .get(i, Decimal(0)) obtiene el monto o 0 si no existe
-            suma_base += montos.get(i, Decimal(0))
+        # El motor de factores (prueba/motor_factores.py) calcula la SumaBase y los 30 factores de una vez:
+        # la fórmula está en un solo lugar y no se repite aquí con un bucle de Decimal
+        resultado = calcular_factores([[montos.get(i, Decimal(0)) for i in range(8, 38)]])
+        suma_base = resultado.sumas_base[0]
 
         # GUARDAR MONTOS EN LA CALIFICACIÓN
         # Solo guardamos los montos que fueron enviados y son diferentes del valor actual
@@ -1979,10 +1881,8 @@ def calcular_factores_view(request):
         # Fórmula: Factor = Monto / SumaBase para cada monto del 8 al 37
         # Los factores representan el porcentaje que representa cada monto respecto a la SumaBase
         
-        # Precisión de 8 decimales para los factores
-        # Decimal('0.00000001') representa 0.00000001 (8 decimales)
+        # Precisión de 8 decimales para los factores (redondeo HALF_EVEN, igual que Decimal.quantize)
         # POR QUÉ: Los cálculos financieros requieren alta precisión
-        EIGHT_PLACES = Decimal('0.00000001')
         
         # Diccionario para almacenar los factores calculados
         factores_calculados = {}
@@ -1990,16 +1890,11 @@ def calcular_factores_view(request):
         # Solo calcular factores si SumaBase es mayor que 0
         # POR QUÉ: No podemos dividir por cero
         if suma_base > 0:
-            # Iterar sobre todos los montos del 8 al 37
-            for i in range(8, 38):
-                # Obtener el monto correspondiente
-                monto = montos.get(i, Decimal(0))
-                
-                # Calcular el factor: Monto dividido por SumaBase
-                # quantize() redondea el resultado a 8 decimales
-                # POR QUÉ: Mantenemos precisión consistente en todos los factores
-                factor_calculado = (monto / suma_base).quantize(EIGHT_PLACES)
-                
+            # Los 30 factores ya los calculó el motor de factores (enteros, mismo resultado que Decimal)
+            factores = factores_decimales(resultado)[0]
+            
+            # Iterar sobre todos los factores del 8 al 37
+            for i, factor_calculado in zip(range(8, 38), factores):
                 # Construir nombre del campo: "Factor08", "Factor09", etc.
                 factor_field = f'Factor{i:02d}'
                 
@@ -2060,7 +1955,7 @@ def calcular_factores_view(request):
         # RETORNAR RESPUESTA JSON
         # La respuesta incluye los factores formateados para mostrar al usuario
         # También incluye información de debug para desarrollo
-        return JsonResponse({
+        return RespuestaJSON({
             'success': True,  # Indica que la operación fue exitosa
             'message': 'Factores calculados exitosamente',  # Mensaje de confirmación
             'factores': factores_formateados,  # Factores listos para mostrar en la interfaz
@@ -2072,13 +1967,14 @@ def calcular_factores_view(request):
         # Si ocurre cualquier error durante el cálculo, capturarlo y retornar error
         # POR QUÉ: Mejor retornar un error claro que dejar que la excepción se propague
         print(f"Error al calcular factores: {e}")
-        return JsonResponse({'success': False, 'error': f'Error al calcular: {str(e)}'}, status=500)
+        return RespuestaJSON({'success': False, 'error': f'Error al calcular: {str(e)}'}, status=500)
 
 
 # =====================================================================
 # VISTAS DE ADMINISTRACIÓN DE USUARIOS
 # =====================================================================
 
+@admin_requerido
 def administrar_view(request): 
     """
     Vista para administrar usuarios (solo administradores).
@@ -2105,24 +2001,9 @@ def administrar_view(request):
         HttpResponseForbidden: Si el usuario no es administrador
         HttpResponse: Renderiza administrar.html con la lista de usuarios
     """
-    # Verificar autenticación del usuario
-    if 'user_id' not in request.session:
-        return redirect('login')
-
-    # Obtener usuario actual de la base de datos
-    try:
-        current_user = usuarios.objects.get(id=request.session['user_id'])
-    except usuarios.DoesNotExist:
-        # Si el usuario no existe, limpiar sesión y redirigir
-        request.session.flush()
-        return redirect('login')
+    # Usuario de la sesión (el decorador ya verificó que existe y que es administrador)
+    current_user = request.usuario_actual
 
-    # Verificar que el usuario sea administrador
-    # current_user.rol es True para administradores, False para usuarios normales
-    # POR QUÉ: Solo administradores pueden acceder a esta página
-    if not current_user.rol:
-        return HttpResponseForbidden("<h1>Acceso Denegado</h1><p>No tienes permisos...</p><a href='/home/'>Volver</a>")
-    
     # Obtener todos los usuarios del sistema
     # usuarios.objects.all() consulta la colección 'usuarios' y retorna todos los documentos
     todos_los_usuarios = usuarios.objects.all()
@@ -2142,6 +2023,7 @@ def administrar_view(request):
 # =====================================================================
 
 @require_POST
+@admin_requerido_json
 def crear_usuario_view(request):
     """
     Vista AJAX para crear un nuevo usuario (solo administradores).
@@ -2169,19 +2051,10 @@ def crear_usuario_view(request):
         request: Objeto HttpRequest de Django (solo POST permitido)
         
     Returns (lo que devuelve la funcion):
-        JsonResponse: JSON con success=True si se creó exitosamente, o errores si falló
+        RespuestaJSON: JSON con success=True si se creó exitosamente, o errores si falló
     """
-    # Verificar autenticación del usuario
-    if 'user_id' not in request.session:
-        return JsonResponse({'success': False, 'error': 'No autenticado'}, status=401)
-
-    # Verificar que el usuario sea administrador
-    try:
-        admin_user = usuarios.objects.get(id=request.session['user_id'])
-        if not admin_user.rol:
-            return JsonResponse({'success': False, 'error': 'No autorizado'}, status=403)
-    except usuarios.DoesNotExist:
-        return JsonResponse({'success': False, 'error': 'Admin no válido'}, status=401)
+    # Usuario de la sesión (el decorador ya verificó que existe y que es administrador)
+    admin_user = request.usuario_actual
 
     # Crear formulario con datos del POST
     form = UsuarioForm(request.POST)
@@ -2200,7 +2073,7 @@ def crear_usuario_view(request):
             # Hashear la contraseña antes de guardar
             # POR QUÉ: NUNCA guardamos contraseñas en texto plano (seguridad crítica)
             if 'contrasena' in cleaned_data and cleaned_data['contrasena']:
-                cleaned_data['contrasena'] = _hash_password(cleaned_data['contrasena'])
+                cleaned_data['contrasena'] = hashear_contrasena(cleaned_data['contrasena'])
             
             # Crear nuevo usuario con los datos del formulario
             # **cleaned_data expande el diccionario como argumentos
@@ -2227,23 +2100,26 @@ def crear_usuario_view(request):
                     # Si la foto es inválida (tamaño, formato), eliminar usuario y retornar error
                     # POR QUÉ: No queremos usuarios sin foto válida en la base de datos
                     nuevo_usuario.delete()
-                    return JsonResponse({'success': False, 'error': str(e)}, status=400)
+                    return RespuestaJSON({'success': False, 'error': str(e)}, status=400)
                 except Exception as e:
                     # Si hay otro error al guardar la foto, eliminar usuario
                     nuevo_usuario.delete()
                     print(f"Error al guardar foto: {e}")
-                    return JsonResponse({'success': False, 'error': f'Error al guardar foto: {e}'}, status=500)
+                    return RespuestaJSON({'success': False, 'error': f'Error al guardar foto: {e}'}, status=500)
             
             # Crear log de auditoría
             # Registra quién creó el usuario y qué usuario se creó
             _crear_log(admin_user, "Crear Usuario", usuario_afectado=nuevo_usuario)
             
             # Retornar éxito
-            return JsonResponse({'success': True, 'message': 'Usuario creado exitosamente'})
+            return RespuestaJSON({'success': True, 'message': 'Usuario creado exitosamente'})
+        except ServidorOcupado as e:
+            # El pool de bcrypt está saturado: el administrador puede reintentar
+            return RespuestaJSON({'success': False, 'error': f'Servidor ocupado, intente nuevamente: {e}'}, status=503)
         except Exception as e:
             # Si ocurre cualquier error durante la creación, capturarlo
             print(f"Error al crear usuario: {e}")
-            return JsonResponse({'success': False, 'error': f'Error interno: {e}'}, status=500)
+            return RespuestaJSON({'success': False, 'error': f'Error interno: {e}'}, status=500)
     else:
         # Si el formulario no es válido, extraer el primer error
         # POR QUÉ: Mostrar un error claro al usuario en lugar de todos los errores
@@ -2254,7 +2130,7 @@ def crear_usuario_view(request):
             # Obtener el primer error de ese campo
             primer_error = form.errors[primer_campo][0]
             error_mensaje = str(primer_error)
-        return JsonResponse({'success': False, 'error': error_mensaje}, status=400)
+        return RespuestaJSON({'success': False, 'error': error_mensaje}, status=400)
 
 
 # =====================================================================
@@ -2262,6 +2138,7 @@ def crear_usuario_view(request):
 # =====================================================================
 
 @require_POST
+@admin_requerido_json
 def eliminar_usuarios_view(request):
     """
     Vista AJAX para eliminar usuarios (solo administradores).
@@ -2287,19 +2164,10 @@ def eliminar_usuarios_view(request):
         request: Objeto HttpRequest de Django (solo POST permitido)
         
     Returns (lo que devuelve la funcion):
-        JsonResponse: JSON con success=True si se eliminó exitosamente, o errores si falló
+        RespuestaJSON: JSON con success=True si se eliminó exitosamente, o errores si falló
     """
-    # Verificar autenticación del usuario
-    if 'user_id' not in request.session:
-        return JsonResponse({'success': False, 'error': 'No autenticado'}, status=401)
-
-    # Verificar que el usuario sea administrador
-    try:
-        admin_user = usuarios.objects.get(id=request.session['user_id'])
-        if not admin_user.rol:
-            return JsonResponse({'success': False, 'error': 'No autorizado'}, status=403)
-    except usuarios.DoesNotExist:
-        return JsonResponse({'success': False, 'error': 'Admin no válido'}, status=401)
+    # Usuario de la sesión (el decorador ya verificó que existe y que es administrador)
+    admin_user = request.usuario_actual
 
     # PARSEAR JSON DEL BODY
     # Los IDs vienen en formato JSON en el body de la petición
@@ -2313,16 +2181,16 @@ def eliminar_usuarios_view(request):
         
         # Validar que sea una lista no vacía
         if not isinstance(user_ids_to_delete_str, list) or not user_ids_to_delete_str:
-            return JsonResponse({'success': False, 'error': 'Lista de IDs inválida'}, status=400)
+            return RespuestaJSON({'success': False, 'error': 'Lista de IDs inválida'}, status=400)
     except json.JSONDecodeError:
         # Si el JSON es inválido, retornar error
-        return JsonResponse({'success': False, 'error': 'JSON inválido'}, status=400)
+        return RespuestaJSON({'success': False, 'error': 'JSON inválido'}, status=400)
 
     # PREVENIR AUTO-ELIMINACIÓN
     # Un administrador no puede eliminarse a sí mismo
     # POR QUÉ: Seguridad - evitar que un admin se bloquee a sí mismo del sistema
     if request.session['user_id'] in user_ids_to_delete_str:
-        return JsonResponse({'success': False, 'error': 'No puedes eliminarte a ti mismo'}, status=400)
+        return RespuestaJSON({'success': False, 'error': 'No puedes eliminarte a ti mismo'}, status=400)
 
     # CONVERTIR STRINGS A OBJECTIDS
     # MongoDB requiere ObjectId, no strings
@@ -2332,7 +2200,7 @@ def eliminar_usuarios_view(request):
         ids_a_eliminar = [ObjectId(uid) for uid in user_ids_to_delete_str]
     except Exception:
         # Si algún ID tiene formato inválido, retornar error
-        return JsonResponse({'success': False, 'error': 'Uno o más IDs tienen un formato inválido'}, status=400)
+        return RespuestaJSON({'success': False, 'error': 'Uno o más IDs tienen un formato inválido'}, status=400)
 
     # PROCESAR CADA USUARIO A ELIMINAR
     # Antes de eliminar, necesitamos obtener información para el log y eliminar la foto
@@ -2380,15 +2248,20 @@ def eliminar_usuarios_view(request):
     # delete() elimina todos los documentos que coinciden
     # Retorna la cantidad de documentos eliminados
     delete_result = usuarios.objects(id__in=ids_a_eliminar).delete()
+    
+    # Quitar los usuarios eliminados de la caché del usuario actual
+    # POR QUÉ: Sus sesiones abiertas deben dejar de funcionar de inmediato
+    invalidar_usuarios(*ids_a_eliminar)
 
     # Retornar éxito con la cantidad de usuarios eliminados
-    return JsonResponse({'success': True, 'deleted_count': delete_result})
+    return RespuestaJSON({'success': True, 'deleted_count': delete_result})
 
 
 # =====================================================================
 # VISTAS DE OBTENER USUARIO
 # =====================================================================
 @require_GET
+@admin_requerido_json
 def obtener_usuario_view(request, user_id): 
     """
     Vista AJAX para obtener un usuario (solo administradores).
@@ -2411,18 +2284,6 @@ def obtener_usuario_view(request, user_id):
         request: Objeto HttpRequest de Django (solo GET permitido)
         user_id: ID del usuario a obtener
     """
-    # Verificar autenticación del usuario
-    if 'user_id' not in request.session:
-        return JsonResponse({'success': False, 'error': 'No autenticado'}, status=401)
-
-    # Verificar que el usuario sea administrador
-    try:
-        admin_user = usuarios.objects.get(id=request.session['user_id'])
-        if not admin_user.rol:
-            return JsonResponse({'success': False, 'error': 'No autorizado'}, status=403)
-    except usuarios.DoesNotExist:
-        return JsonResponse({'success': False, 'error': 'Admin no válido'}, status=401)
-
     # Obtener usuario de la base de datos
     try:
         usuario = usuarios.objects.get(id=user_id)
@@ -2439,19 +2300,20 @@ def obtener_usuario_view(request, user_id):
         }
         
         # Retornar JSON con los datos del usuario
-        return JsonResponse({'success': True, 'usuario': usuario_data})
+        return RespuestaJSON({'success': True, 'usuario': usuario_data})
     except usuarios.DoesNotExist:
         # Si el usuario no existe, retornar error
-        return JsonResponse({'success': False, 'error': 'Usuario no encontrado'}, status=404)
+        return RespuestaJSON({'success': False, 'error': 'Usuario no encontrado'}, status=404)
     except Exception as e:
         # Si ocurre cualquier otro error, capturarlo
-        return JsonResponse({'success': False, 'error': f'Error interno: {e}'}, status=500)
+        return RespuestaJSON({'success': False, 'error': f'Error interno: {e}'}, status=500)
 
 
 # =====================================================================
 # VISTAS DE MODIFICAR USUARIO
 # =====================================================================
 @require_POST
+@admin_requerido_json
 def modificar_usuario_view(request):
     """
     Vista AJAX para modificar un usuario (solo administradores).
@@ -2475,17 +2337,8 @@ def modificar_usuario_view(request):
     
     Modifica un usuario de la base de datos.
     """
-    # Verificar autenticación del usuario
-    if 'user_id' not in request.session:
-        return JsonResponse({'success': False, 'error': 'No autenticado'}, status=401)
-
-    # Verificar que el usuario sea administrador
-    try:
-        admin_user = usuarios.objects.get(id=request.session['user_id'])
-        if not admin_user.rol:
-            return JsonResponse({'success': False, 'error': 'No autorizado'}, status=403)
-    except usuarios.DoesNotExist:
-        return JsonResponse({'success': False, 'error': 'Admin no válido'}, status=401)
+    # Usuario de la sesión (el decorador ya verificó que existe y que es administrador)
+    admin_user = request.usuario_actual
 
     # VALIDAR FORMULARIO
     # UsuarioUpdateForm valida nombre, correo, contraseña, rol, foto
@@ -2497,12 +2350,12 @@ def modificar_usuario_view(request):
         errors_dict = {}
         for field, errors in form.errors.items():
             errors_dict[field] = errors
-        return JsonResponse({'success': False, 'error': errors_dict}, status=400)
+        return RespuestaJSON({'success': False, 'error': errors_dict}, status=400)
     
     # Obtener datos del formulario validado
     user_id = form.cleaned_data.get('user_id')
     if not user_id:
-        return JsonResponse({'success': False, 'error': 'Falta user_id'}, status=400)
+        return RespuestaJSON({'success': False, 'error': 'Falta user_id'}, status=400)
 
     # Extraer datos del formulario
     nombre = form.cleaned_data.get('nombre', '').strip()
@@ -2512,7 +2365,7 @@ def modificar_usuario_view(request):
 
     # Validar campos obligatorios
     if not nombre or not correo:
-        return JsonResponse({'success': False, 'error': 'Nombre y correo son obligatorios.'}, status=400)
+        return RespuestaJSON({'success': False, 'error': 'Nombre y correo son obligatorios.'}, status=400)
 
     try:
         # Obtener el usuario a modificar de MongoDB
@@ -2528,7 +2381,7 @@ def modificar_usuario_view(request):
         if contrasena and contrasena.strip():
             # Hashear la nueva contraseña antes de guardar
             # POR QUÉ: NUNCA guardamos contraseñas en texto plano
-            usuario_a_modificar.contrasena = _hash_password(contrasena)
+            usuario_a_modificar.contrasena = hashear_contrasena(contrasena)
         
         # Actualizar rol
         usuario_a_modificar.rol = rol
@@ -2550,36 +2403,130 @@ def modificar_usuario_view(request):
                 usuario_a_modificar.foto_perfil = foto_ruta
             except ValueError as e:
                 # Si la foto es inválida (tamaño, formato), retornar error
-                return JsonResponse({'success': False, 'error': str(e)}, status=400)
+                return RespuestaJSON({'success': False, 'error': str(e)}, status=400)
             except Exception as e:
                 # Si hay otro error al guardar la foto
                 print(f"Error al guardar foto: {e}")
-                return JsonResponse({'success': False, 'error': f'Error al guardar foto: {e}'}, status=500)
+                return RespuestaJSON({'success': False, 'error': f'Error al guardar foto: {e}'}, status=500)
         
         # Guardar todos los cambios en MongoDB
         usuario_a_modificar.save()
         
+        # Quitar el usuario de la caché del usuario actual
+        # POR QUÉ: Si el usuario modificado tiene sesión abierta, su próxima solicitud debe ver el nombre/rol nuevos
+        invalidar_usuarios(usuario_a_modificar.id)
+        
         # Crear log de auditoría
         # Registra quién modificó qué usuario
         _crear_log(admin_user, 'Modificar Usuario', usuario_afectado=usuario_a_modificar)
         
-        return JsonResponse({'success': True})
+        return RespuestaJSON({'success': True})
     except usuarios.DoesNotExist:
         # Si el usuario no existe, retornar error
-        return JsonResponse({'success': False, 'error': 'Usuario no encontrado'}, status=404)
+        return RespuestaJSON({'success': False, 'error': 'Usuario no encontrado'}, status=404)
+    except ServidorOcupado as e:
+        # El pool de bcrypt está saturado: el administrador puede reintentar
+        return RespuestaJSON({'success': False, 'error': f'Servidor ocupado, intente nuevamente: {e}'}, status=503)
     except Exception as e:
         # Si ocurre cualquier otro error, capturarlo
         print("Error interno modificar_usuario_view:", e)
-        return JsonResponse({'success': False, 'error': f'Error interno: {str(e)}'}, status=500)
+        return RespuestaJSON({'success': False, 'error': f'Error interno: {str(e)}'}, status=500)
 
 
 # =====================================================================
 # VISTAS DE LOGS Y AUDITORÍA
 # =====================================================================
 
+def _filtros_de_logs(parametros):
+    """
+    Lee los filtros del historial de logs desde los parámetros GET.
+    
+    POR QUÉ: Los filtros se aplican en MongoDB (no en el navegador), y cada uno
+    coincide con un índice de Log (campo filtrado + -fecharegistrada, -_id), así la página
+    cuesta lo mismo aunque la colección tenga millones de logs.
+    
+    Filtros aceptados (todos opcionales):
+    - desde / hasta: Fechas 'AAAA-MM-DD' (ambas incluidas)
+    - actor: ID del usuario que realizó la acción
+    - accion: Una de Log.ACCION_CHOICES
+    - documento: ID de la calificación o del usuario afectado, o hash SHA-256 de un archivo CSV
+    - tipo: 'usuario' o 'calificacion' (tipo de elemento afectado)
+    
+    Argumentos:
+        parametros: request.GET
+        
+    Returns (lo que devuelve la funcion):
+        tuple: (Q con las condiciones, dict con los valores aceptados para el formulario, list de errores)
+    """
+    condiciones = Q()
+    valores = {}
+    errores = []
+    
+    # RANGO DE FECHAS
+    # 'hasta' incluye todo el día: se compara con el inicio del día siguiente
+    for nombre in ('desde', 'hasta'):
+        texto = parametros.get(nombre, '').strip()
+        if not texto:
+            continue
+        try:
+            dia = datetime.datetime.strptime(texto, '%Y-%m-%d')
+        except ValueError:
+            errores.append(f'Fecha "{texto}" inválida (formato AAAA-MM-DD)')
+            continue
+        valores[nombre] = texto
+        if nombre == 'desde':
+            condiciones &= Q(fecharegistrada__gte=dia)
+        else:
+            condiciones &= Q(fecharegistrada__lt=dia + datetime.timedelta(days=1))
+    
+    # ACTOR (usuario que realizó la acción)
+    actor = parametros.get('actor', '').strip()
+    if actor:
+        if ObjectId.is_valid(actor):
+            valores['actor'] = actor
+            condiciones &= Q(Usuarioid=ObjectId(actor))
+        else:
+            errores.append('Usuario inválido')
+    
+    # ACCIÓN
+    accion = parametros.get('accion', '').strip()
+    if accion:
+        if accion in Log.ACCION_CHOICES:
+            valores['accion'] = accion
+            condiciones &= Q(accion=accion)
+        else:
+            errores.append(f'Acción "{accion}" desconocida')
+    
+    # DOCUMENTO AFECTADO
+    # 24 caracteres hexadecimales: ID de una calificación o de un usuario afectado
+    # 64 caracteres hexadecimales: hash del archivo CSV de una carga masiva
+    documento = parametros.get('documento', '').strip()
+    if documento:
+        if ObjectId.is_valid(documento):
+            valores['documento'] = documento
+            condiciones &= Q(iddocumento=ObjectId(documento)) | Q(usuario_afectado=ObjectId(documento))
+        elif re.fullmatch(r'[a-fA-F0-9]{64}', documento):
+            valores['documento'] = documento
+            condiciones &= Q(hash_archivo_csv=documento.lower())
+        else:
+            errores.append('El documento afectado debe ser un ID (24 caracteres) o el hash de un archivo CSV (64 caracteres)')
+    
+    # TIPO DE ELEMENTO AFECTADO (mismo criterio que la columna "Elemento Afectado")
+    tipo = parametros.get('tipo', '').strip()
+    if tipo == 'usuario':
+        valores['tipo'] = tipo
+        condiciones &= Q(usuario_afectado__ne=None)
+    elif tipo == 'calificacion':
+        valores['tipo'] = tipo
+        condiciones &= Q(usuario_afectado=None, iddocumento__ne=None)
+    
+    return condiciones, valores, errores
+
+
+@admin_requerido
 def ver_logs_view(request):
     """
-    Vista para ver todos los logs del sistema (solo administradores).
+    Vista para ver los logs del sistema por páginas y con filtros (solo administradores).
     
     POR QUÉ ESTA FUNCIÓN ES CRÍTICA:
     - Proporciona auditoría completa del sistema
@@ -2589,10 +2536,18 @@ def ver_logs_view(request):
     
     CÓMO FUNCIONA:
     1. Verifica que el usuario sea administrador
-    2. Obtiene todos los logs de MongoDB (sin resolver referencias)
-    3. Procesa cada log para extraer información de usuarios/calificaciones
-    4. Maneja casos donde usuarios/calificaciones fueron eliminados
-    5. Renderiza template con logs procesados
+    2. Lee los filtros (fechas, actor, acción, documento afectado, tipo) con _filtros_de_logs()
+    3. Obtiene UNA página de logs de MongoDB (sin resolver referencias), más recientes primero
+    4. Resuelve los nombres de los actores de la página con una sola consulta (_nombres_de_usuarios)
+    5. Procesa cada log para extraer información de usuarios/calificaciones
+    6. Maneja casos donde usuarios/calificaciones fueron eliminados
+    7. Renderiza template con los logs de la página y el enlace a la página siguiente
+    
+    PAGINACIÓN (parámetro 'cursor'):
+    - Antes se cargaba la colección completa en cada visita; ahora se leen LOGS_POR_PAGINA logs
+    - El cursor es (fecharegistrada, _id) del último log de la página (igual que en la
+      búsqueda de calificaciones): la página siguiente no usa skip() y cuesta lo mismo
+      aunque el historial tenga millones de registros
     
     Muestra un registro completo de todas las acciones realizadas:
     - Crear, modificar, eliminar usuarios
@@ -2601,36 +2556,63 @@ def ver_logs_view(request):
     
     Argumentos:
         request: Objeto HttpRequest de Django
+        - desde, hasta, actor, accion, documento, tipo: Filtros (ver _filtros_de_logs)
+        - cursor: Cursor de la página siguiente (opcional)
         
     Returns (lo que devuelve la funcion):
         HttpResponseForbidden: Si el usuario no es administrador
-        HttpResponse: Renderiza ver_logs.html con la lista de logs
+        HttpResponse: Renderiza ver_logs.html con la página de logs
     """
-    # Verificar autenticación del usuario
-    if 'user_id' not in request.session:
-        return redirect('login')
+    # Usuario de la sesión (el decorador ya verificó que existe y que es administrador)
+    admin_user = request.usuario_actual
 
-    # Verificar que el usuario sea administrador
-    try:
-        admin_user = usuarios.objects.get(id=request.session['user_id'])
-        if not admin_user.rol:
-            return HttpResponseForbidden(
-                "<h1>Acceso Denegado</h1>"
-                "<p>No tienes permisos de administrador.</p>"
-                "<a href='/home/'>Volver</a>"
-            )
-    except usuarios.DoesNotExist:
-        # Si el usuario no existe, limpiar sesión y redirigir
-        del request.session['user_id']
-        del request.session['user_nombre']
-        return redirect('login')
+    # Grabar los logs que este proceso todavía tiene en cola
+    # POR QUÉ: Así el historial incluye las acciones que se acaban de hacer
+    vaciar_logs()
+    
+    # FILTROS
+    condiciones, filtros, errores_filtro = _filtros_de_logs(request.GET)
+    
+    # CURSOR DE LA PÁGINA (vacío = primera página)
+    # Un cursor inválido (ej: URL editada a mano) vuelve a la primera página
+    cursor = request.GET.get('cursor', '').strip()
+    if cursor:
+        try:
+            fecha_cursor, id_cursor = _decodificar_cursor(cursor)
+            condiciones &= _filtro_despues_del_cursor(fecha_cursor, id_cursor, 'fecharegistrada')
+        except ValueError:
+            errores_filtro.append('La página pedida no es válida; se muestran los logs más recientes')
+            cursor = ''
+    
+    logs_por_pagina = getattr(settings, 'LOGS_POR_PAGINA', 50)
 
     try:
-        # Obtener todos los logs de MongoDB
+        # Obtener una página de logs de MongoDB
         # .no_dereference() evita resolver referencias automáticamente
         # POR QUÉ: Necesitamos los IDs incluso si los documentos fueron eliminados
-        # .order_by('-fecharegistrada') ordena por fecha descendente (más recientes primero)
-        logs_raw = Log.objects.no_dereference().order_by('-fecharegistrada')
+        # .order_by('-fecharegistrada', '-id') ordena por fecha descendente (más recientes primero);
+        # el _id desempata los logs con la misma fecha para que el cursor sea exacto
+        # .limit(n + 1): el log extra solo indica si hay página siguiente
+        logs_raw = list(
+            Log.objects(condiciones).no_dereference()
+            .order_by('-fecharegistrada', '-id')
+            .limit(logs_por_pagina + 1)
+        )
+        hay_mas = len(logs_raw) > logs_por_pagina
+        logs_raw = logs_raw[:logs_por_pagina]
+        
+        # Cursor de la página siguiente: fecha e ID del último log de esta página
+        siguiente_cursor = ''
+        if hay_mas:
+            ultimo = logs_raw[-1]
+            siguiente_cursor = _codificar_cursor(getattr(ultimo, 'fecharegistrada', None), ultimo.id)
+        
+        # NOMBRES DE LOS ACTORES EN UNA SOLA CONSULTA
+        # POR QUÉ: Antes se hacía usuarios.objects.get() por cada log (una consulta por log)
+        # Se juntan los IDs distintos de los actores y se resuelven todos con un $in
+        nombres_actores = _nombres_de_usuarios(
+            _extraer_object_id(l.Usuarioid) for l in logs_raw if getattr(l, "Usuarioid", None)
+        )
         
         # Lista para almacenar logs procesados con información completa
         logs_procesados = []
@@ -2651,13 +2633,8 @@ def ver_logs_view(request):
                 actor_id_obj = _extraer_object_id(l.Usuarioid)
                 if actor_id_obj:
                     actor_id = actor_id_obj
-                    # Intentar obtener el nombre del actor si aún existe en la base de datos
-                    try:
-                        actor_usuario = usuarios.objects.get(id=actor_id_obj)
-                        actor_nombre = actor_usuario.nombre
-                    except usuarios.DoesNotExist:
-                        # Si el usuario fue eliminado, mantener "N/A"
-                        pass
+                    # Nombre del actor si aún existe en la base de datos (si fue eliminado, se mantiene "N/A")
+                    actor_nombre = nombres_actores.get(actor_id_obj, "N/A")
 
             # --- ELEMENTO AFECTADO (usuario, calificación o carga masiva) ---
             # Determinar qué fue afectado por la acción
@@ -2692,6 +2669,12 @@ def ver_logs_view(request):
                 "afectado_id": afectado_id,
                 "tipo_afectado": tipo_afectado,
             })
+        
+        # Usuarios para el filtro "Realizado por" (solo nombre y correo)
+        opciones_actores = [
+            {'id': str(u['_id']), 'nombre': u.get('nombre', ''), 'correo': u.get('correo', '')}
+            for u in usuarios.objects.only('nombre', 'correo').order_by('nombre').as_pymongo()
+        ]
 
     except Exception as e:
         # Si ocurre cualquier error al procesar logs, retornar error
@@ -2706,7 +2689,15 @@ def ver_logs_view(request):
     # Preparar contexto para el template
     context = {
         "user_nombre": admin_user.nombre,  # Nombre del administrador actual
-        "lista_logs": logs_procesados,  # Lista de logs procesados
+        "lista_logs": logs_procesados,  # Logs de la página actual
+        "filtros": filtros,  # Filtros aplicados (para rellenar el formulario)
+        "filtros_url": urlencode(filtros),  # Los mismos filtros para el enlace de la página siguiente
+        "errores_filtro": errores_filtro,  # Filtros ignorados por tener un valor inválido
+        "acciones": Log.ACCION_CHOICES,  # Opciones del filtro de acción
+        "actores": opciones_actores,  # Opciones del filtro de usuario
+        "es_primera_pagina": not cursor,
+        "hay_mas": hay_mas,
+        "siguiente_cursor": siguiente_cursor,
     }
     
     # Renderizar template con los logs
@@ -2717,6 +2708,7 @@ def ver_logs_view(request):
 # VISTAS DE OBTENER CALIFICACIÓN
 # =====================================================================
 @require_GET
+@login_requerido_json
 def obtener_calificacion_view(request, calificacion_id):
     """
     Vista AJAX para obtener una calificación por ID.
@@ -2741,10 +2733,6 @@ def obtener_calificacion_view(request, calificacion_id):
     
     Obtiene una calificación de la base de datos.
     """
-    # Verificar autenticación del usuario
-    if 'user_id' not in request.session:
-        return JsonResponse({'success': False, 'error': 'No autenticado'}, status=401)
-
     try:
         # Importar Decimal para cálculos financieros precisos
         from decimal import Decimal
@@ -2801,22 +2789,23 @@ def obtener_calificacion_view(request, calificacion_id):
             calificacion_data['factores'][factor_field] = str(factor_value) if factor_value else '0.0'
         
         # Retornar JSON con todos los datos
-        return JsonResponse({
+        return RespuestaJSON({
             'success': True,
             'calificacion': calificacion_data
         })
     except Calificacion.DoesNotExist:
         # Si la calificación no existe, retornar error
-        return JsonResponse({'success': False, 'error': 'Calificación no encontrada'}, status=404)
+        return RespuestaJSON({'success': False, 'error': 'Calificación no encontrada'}, status=404)
     except Exception as e:
         # Si ocurre cualquier otro error, capturarlo
-        return JsonResponse({'success': False, 'error': f'Error al obtener calificación: {str(e)}'}, status=500)
+        return RespuestaJSON({'success': False, 'error': f'Error al obtener calificación: {str(e)}'}, status=500)
 
 
 # =====================================================================
 # VISTAS DE ELIMINAR CALIFICACIÓN
 # =====================================================================
 @require_POST
+@login_requerido_json
 def eliminar_calificacion_view(request, calificacion_id):
     """
     Vista para eliminar una calificación.
@@ -2841,15 +2830,8 @@ def eliminar_calificacion_view(request, calificacion_id):
     
     Elimina una calificación de la base de datos.
     """
-    # Verificar autenticación del usuario
-    if 'user_id' not in request.session:
-        return JsonResponse({'success': False, 'error': 'No autenticado'}, status=401)
-
-    # Obtener usuario actual
-    try:
-        current_user = usuarios.objects.get(id=request.session['user_id'])
-    except usuarios.DoesNotExist:
-        return JsonResponse({'success': False, 'error': 'Usuario no válido'}, status=401)
+    # Usuario de la sesión (el decorador ya verificó que existe)
+    current_user = request.usuario_actual
 
     try:
         # Obtener la calificación a eliminar
@@ -2887,19 +2869,20 @@ def eliminar_calificacion_view(request, calificacion_id):
         # NOTA: calificacion ya fue eliminado, pero _crear_log puede manejar esto
         _crear_log(current_user, 'Eliminar Calificacion', documento_afectado=calificacion)
         
-        return JsonResponse({'success': True, 'message': 'Calificación eliminada exitosamente'})
+        return RespuestaJSON({'success': True, 'message': 'Calificación eliminada exitosamente'})
     except Calificacion.DoesNotExist:
         # Si la calificación no existe, retornar error
-        return JsonResponse({'success': False, 'error': 'Calificación no encontrada'}, status=404)
+        return RespuestaJSON({'success': False, 'error': 'Calificación no encontrada'}, status=404)
     except Exception as e:
         # Si ocurre cualquier otro error, capturarlo
-        return JsonResponse({'success': False, 'error': f'Error al eliminar: {str(e)}'}, status=500)
+        return RespuestaJSON({'success': False, 'error': f'Error al eliminar: {str(e)}'}, status=500)
 
 # =====================================================================
 # VISTAS DE COPIAR CALIFICACIÓN
 # =====================================================================
 
 @require_POST
+@login_requerido_json
 def copiar_calificacion_view(request, calificacion_id):
     """
     Vista para copiar una calificación completa con un nuevo ID.
@@ -2925,18 +2908,9 @@ def copiar_calificacion_view(request, calificacion_id):
     """
     print(f"[COPiar] Iniciando copia de calificación ID: {calificacion_id}")
     
-    # Verificar autenticación del usuario
-    if 'user_id' not in request.session:
-        print("[COPiar] Error: No autenticado")
-        return JsonResponse({'success': False, 'error': 'No autenticado'}, status=401)
-
-    # Obtener usuario actual
-    try:
-        current_user = usuarios.objects.get(id=request.session['user_id'])
-        print(f"[COPiar] Usuario autenticado: {current_user.correo}")
-    except usuarios.DoesNotExist:
-        print("[COPiar] Error: Usuario no válido")
-        return JsonResponse({'success': False, 'error': 'Usuario no válido'}, status=401)
+    # Usuario de la sesión (el decorador ya verificó que existe)
+    current_user = request.usuario_actual
+    print(f"[COPiar] Usuario autenticado: {current_user.correo}")
 
     try:
         # Importar Decimal para manejar valores numéricos
@@ -3012,7 +2986,7 @@ def copiar_calificacion_view(request, calificacion_id):
             print(f"[COPiar] Advertencia: Error al crear log: {log_error}")
         
         # Retornar éxito con el ID de la nueva calificación
-        return JsonResponse({
+        return RespuestaJSON({
             'success': True,
             'message': 'Calificación copiada exitosamente',
             'nueva_calificacion_id': str(nueva_calificacion.id)  # ID para que JavaScript pueda usarlo
@@ -3020,12 +2994,12 @@ def copiar_calificacion_view(request, calificacion_id):
         
     except Calificacion.DoesNotExist:
         print(f"[COPiar] Error: Calificación no encontrada: {calificacion_id}")
-        return JsonResponse({'success': False, 'error': 'Calificación no encontrada'}, status=404) # Se retorna un JSON con el error de no encontrada de la calificación
+        return RespuestaJSON({'success': False, 'error': 'Calificación no encontrada'}, status=404) # Se retorna un JSON con el error de no encontrada de la calificación
     except Exception as e:
         import traceback
         print(f"[COPiar] Error al copiar calificación: {e}") # Imprime el error de copia de calificación
         print(f"[COPiar] Traceback: {traceback.format_exc()}") # Imprime el traceback de la excepción
-        return JsonResponse({'success': False, 'error': f'Error al copiar: {str(e)}'}, status=500) # Se retorna un JSON con el error de copia de calificación
+        return RespuestaJSON({'success': False, 'error': f'Error al copiar: {str(e)}'}, status=500) # Se retorna un JSON con el error de copia de calificación
 
 
 # =====================================================================
@@ -3033,6 +3007,7 @@ def copiar_calificacion_view(request, calificacion_id):
 # =====================================================================
 
 @require_POST
+@login_requerido_json
 def preview_factor_view(request):
     """
     Vista AJAX para previsualizar archivo CSV con factores.
@@ -3063,37 +3038,29 @@ def preview_factor_view(request):
         request: Objeto HttpRequest de Django (solo POST permitido)
         
     Returns (lo que devuelve la funcion):
-        JsonResponse: JSON con datos del CSV para previsualizar, incluyendo hash del archivo
+        RespuestaJSON: JSON con datos del CSV para previsualizar, incluyendo hash del archivo
     """
-    # Verificar autenticación del usuario
-    if 'user_id' not in request.session:
-        return JsonResponse({'success': False, 'error': 'No autenticado'}, status=401)
-
-    # Obtener usuario actual
-    try:
-        current_user = usuarios.objects.get(id=request.session['user_id'])
-    except usuarios.DoesNotExist:
-        return JsonResponse({'success': False, 'error': 'Usuario no válido'}, status=401)
+    # Usuario de la sesión (el decorador ya verificó que existe)
+    current_user = request.usuario_actual
 
     try:
         # Importar librerías necesarias
-        import pandas as pd  # Para leer y procesar CSV
-        from decimal import Decimal  # Para precisión financiera
-        import hashlib  # Para calcular hash del archivo
+        from .carga_masiva import (  # Lectura por bloques, validación vectorizada y staging
+            analizar_archivo, leer_csv_por_bloques, previsualizar_bloques,
+            crear_carga_preparada, descartar_carga_preparada,
+        )
         
         # Verificar que se recibió un archivo
         if 'archivo' not in request.FILES:
-            return JsonResponse({'success': False, 'error': 'No se recibió ningún archivo'}, status=400)
+            return RespuestaJSON({'success': False, 'error': 'No se recibió ningún archivo'}, status=400)
         
         archivo = request.FILES['archivo']
         
         # CALCULAR HASH DEL ARCHIVO
         # POR QUÉ: Identificar archivos duplicados incluso si tienen nombres diferentes
-        archivo.seek(0)  # Asegurar que estamos al inicio del archivo
-        contenido = archivo.read()
+        # Se lee por partes (archivo.chunks()) para no cargar el archivo completo en memoria
         # SHA-256 genera un hash único de 64 caracteres hexadecimales
-        hash_archivo = hashlib.sha256(contenido).hexdigest()
-        archivo.seek(0)  # Volver al inicio para leer el CSV con pandas
+        hash_archivo, encoding = analizar_archivo(archivo)
         
         # VERIFICAR SI EL ARCHIVO YA FUE SUBIDO
         from .models import ArchivoCSV
@@ -3114,81 +3081,63 @@ def preview_factor_view(request):
                 print(f"[PREVIEW_FACTOR] Se eliminó el registro de ArchivoCSV porque no quedan calificaciones. Permitiendo subida.")
             else:
                 # Si hay calificaciones, mostrar error de duplicado
-                return JsonResponse({
+                return RespuestaJSON({
                     'success': False, 
                     'error': f'Este archivo ya fue subido anteriormente el {archivo_existente.fecha_subida.strftime("%Y-%m-%d %H:%M:%S")} por {archivo_existente.usuario.correo} y todavía existen {calificaciones_existentes} calificación(es) creadas desde ese archivo.',
                     'duplicado': True,
                     'hash_archivo': hash_archivo
                 }, status=400)
         
-        # Leer CSV con pandas
+        # MODO STREAMING
+        # POR QUÉ: Con archivos grandes no se envían todas las filas al navegador (ni de vuelta al grabar)
+        # Se valida el archivo completo pero solo se devuelve una muestra para la tabla
+        modo_streaming = archivo.size > getattr(settings, 'CARGA_MASIVA_UMBRAL_STREAMING', 1024 * 1024)
+        limite_muestra = getattr(settings, 'CARGA_MASIVA_FILAS_MUESTRA', 200) if modo_streaming else None
+        
+        # STAGING: los bloques validados quedan en el servidor y al grabar solo se envía el token
+        # POR QUÉ: Evita que el navegador reenvíe todas las filas y que el servidor las procese dos veces
+        # Si el archivo se está grabando en segundo plano no se vuelve a previsualizar
+        # POR QUÉ: crear_carga_preparada descarta la carga anterior del mismo archivo, y el trabajo todavía está leyendo sus bloques
+        from .trabajos import trabajo_activo
+        if trabajo_activo(hash_archivo) is not None:
+            print(f"[PREVIEW_FACTOR] Archivo en carga en segundo plano. Hash: {hash_archivo}")
+            return RespuestaJSON({'success': False, 'error': 'Este archivo ya se está cargando en segundo plano. Espere a que termine.'}, status=400)
+        carga = crear_carga_preparada(current_user, hash_archivo, archivo.name, 'factor')
+        
+        # Perfil de columnas de la corredora (opcional): si no se indica, se detecta por los encabezados
+        perfil = request.POST.get('perfil_columnas') or None
+        
+        # Leer y validar el CSV por bloques de filas (memoria acotada)
+        # El encoding (utf-8 o latin-1) ya se detectó al calcular el hash
         try:
-            # Intentar diferentes encodings (encodings se refiere a los caracteres que se usan en el archivo)
-            try:
-                df = pd.read_csv(archivo, encoding='utf-8')
-            except UnicodeDecodeError: # Si hay error de decodificación de caracteres, retorna un error
-                archivo.seek(0)
-                df = pd.read_csv(archivo, encoding='latin-1') # Si hay error de decodificación de caracteres, retorna un error
+            datos, errores, total = previsualizar_bloques(leer_csv_por_bloques(archivo, encoding), limite_muestra, carga=carga, perfil=perfil)
         except Exception as e:
-            return JsonResponse({'success': False, 'error': f'Error al leer el archivo CSV: {str(e)}'}, status=400) # Se retorna un JSON con el error de lectura de archivo
+            descartar_carga_preparada(carga)
+            return RespuestaJSON({'success': False, 'error': f'Error al leer el archivo CSV: {str(e)}'}, status=400) # Se retorna un JSON con el error de lectura de archivo
         
-        # Limpiar nombres de columnas (eliminar espacios)
-        df.columns = df.columns.str.strip() # Se eliminan los espacios de los nombres de las columnas
-        
-        # Eliminar filas completamente vacías
-        df = df.dropna(how='all') # Se eliminan las filas completamente vacías
-        
-        # Convertir a lista de diccionarios
-        datos = [] # Se crea una lista para los datos
-        errores = [] # Se crea una lista para los errores
-        
-        for idx, row in df.iterrows(): # Se recorre el dataframe
-            try:
-                # Convertir la fila a diccionario
-                fila = row.to_dict() # Se convierte la fila a un diccionario
-                
-                # Convertir valores NaN a strings vacíos y limpiar
-                fila_limpia = {} # Se crea un diccionario para la fila limpia
-                for key, value in fila.items():
-                    if pd.isna(value):
-                        fila_limpia[key] = '' # Se asigna un string vacío al diccionario de la fila limpia
-                    else:
-                        fila_limpia[key] = str(value).strip() if value else '' # Se asigna el valor de la fila limpia al diccionario de la fila limpia
-                
-                # Validar campos requeridos (buscar con diferentes variaciones)
-                ejercicio = fila_limpia.get('Ejercicio') or fila_limpia.get('ejercicio') or '' # Se obtiene el valor del campo Ejercicio de la fila limpia
-                mercado = fila_limpia.get('Mercado') or fila_limpia.get('mercado') or '' # Se obtiene el valor del campo Mercado de la fila limpia
-                
-                if not ejercicio or not mercado:
-                    errores.append(f'Fila {idx + 2}: Faltan campos requeridos (Ejercicio, Mercado)') # Se agrega el error a la lista de errores
-                    continue
-                
-                datos.append(fila_limpia) # Se agrega la fila limpia a la lista de datos
-                
-            except Exception as e:
-                errores.append(f'Fila {idx + 2}: {str(e)}') # Se agrega el error a la lista de errores
-                continue
-        
-        return JsonResponse({ # Se retorna un JSON con los datos de la previsualización
+        return RespuestaJSON({ # Se retorna un JSON con los datos de la previsualización
             'success': True,
             'datos': datos, # Se asigna la lista de datos al JSON
             'errores': errores, # Se asigna la lista de errores al JSON
-            'total': len(datos), # Se asigna el total de datos al JSON
+            'total': total, # Total de filas válidas del archivo (en modo streaming `datos` es solo una muestra)
             'hash_archivo': hash_archivo, # Hash único del archivo para evitar duplicados
-            'nombre_archivo': archivo.name  # Nombre original del archivo
+            'nombre_archivo': archivo.name,  # Nombre original del archivo
+            'modo_streaming': modo_streaming,  # Si es True, `datos` es solo una muestra del archivo
+            'token_carga': carga.token  # Token de la carga preparada: es lo único que se envía al grabar
         }) # Se retorna un JSON con los datos de la previsualización
         
     except Exception as e:
         print(f"Error al previsualizar factor: {e}") # Imprime el error de previsualización de factor
         import traceback
         print(traceback.format_exc()) # Imprime el traceback de la excepción
-        return JsonResponse({'success': False, 'error': f'Error al procesar: {str(e)}'}, status=500) # Se retorna un JSON con el error de procesamiento
+        return RespuestaJSON({'success': False, 'error': f'Error al procesar: {str(e)}'}, status=500) # Se retorna un JSON con el error de procesamiento
 
 
 # =====================================================================
 # VISTAS DE PREVISUALIZACIÓN DE MONTOS
 # =====================================================================
 @require_POST
+@login_requerido_json
 def preview_monto_view(request):
     """
     Vista AJAX para previsualizar archivo CSV con montos.
@@ -3213,35 +3162,27 @@ def preview_monto_view(request):
     
     Previsualiza un archivo CSV que contiene montos ya calculados.
     """
-    # Verificar autenticación del usuario
-    if 'user_id' not in request.session:
-        return JsonResponse({'success': False, 'error': 'No autenticado'}, status=401)
-
-    # Obtener usuario actual
-    try:
-        current_user = usuarios.objects.get(id=request.session['user_id'])
-    except usuarios.DoesNotExist:
-        return JsonResponse({'success': False, 'error': 'Usuario no válido'}, status=401)
+    # Usuario de la sesión (el decorador ya verificó que existe)
+    current_user = request.usuario_actual
 
     try:
         # Importar librerías necesarias
-        import pandas as pd  # Para leer y procesar CSV
-        from decimal import Decimal  # Para precisión financiera
-        import hashlib  # Para calcular hash del archivo
+        from .carga_masiva import (  # Lectura por bloques, validación vectorizada y staging
+            analizar_archivo, leer_csv_por_bloques, previsualizar_bloques,
+            crear_carga_preparada, descartar_carga_preparada,
+        )
         
         # Verificar que se recibió un archivo
         if 'archivo' not in request.FILES:
-            return JsonResponse({'success': False, 'error': 'No se recibió ningún archivo'}, status=400)
+            return RespuestaJSON({'success': False, 'error': 'No se recibió ningún archivo'}, status=400)
         
         archivo = request.FILES['archivo']
         
         # CALCULAR HASH DEL ARCHIVO
         # POR QUÉ: Identificar archivos duplicados incluso si tienen nombres diferentes
-        archivo.seek(0)  # Asegurar que estamos al inicio del archivo
-        contenido = archivo.read()
+        # Se lee por partes (archivo.chunks()) para no cargar el archivo completo en memoria
         # SHA-256 genera un hash único de 64 caracteres hexadecimales
-        hash_archivo = hashlib.sha256(contenido).hexdigest()
-        archivo.seek(0)  # Volver al inicio para leer el CSV con pandas
+        hash_archivo, encoding = analizar_archivo(archivo)
         
         # VERIFICAR SI EL ARCHIVO YA FUE SUBIDO
         from .models import ArchivoCSV
@@ -3263,82 +3204,103 @@ def preview_monto_view(request):
                 print(f"[PREVIEW_MONTO] Se eliminó el registro de ArchivoCSV porque no quedan calificaciones. Permitiendo subida.")
             else:
                 # Si hay calificaciones, mostrar error de duplicado
-                return JsonResponse({
+                return RespuestaJSON({
                     'success': False,
                     'error': f'Este archivo ya fue subido anteriormente el {archivo_existente.fecha_subida.strftime("%Y-%m-%d %H:%M:%S")} por {archivo_existente.usuario.correo} y todavía existen {calificaciones_existentes} calificación(es) creadas desde ese archivo.',
                     'duplicado': True,
                     'hash_archivo': hash_archivo
                 }, status=400)
         
-        # LEER CSV CON PANDAS
-        # Intentar diferentes encodings para manejar caracteres especiales
+        # MODO STREAMING
+        # POR QUÉ: Con archivos grandes no se envían todas las filas al navegador (ni de vuelta al grabar)
+        # Se valida el archivo completo pero solo se devuelve una muestra para la tabla
+        modo_streaming = archivo.size > getattr(settings, 'CARGA_MASIVA_UMBRAL_STREAMING', 1024 * 1024)
+        limite_muestra = getattr(settings, 'CARGA_MASIVA_FILAS_MUESTRA', 200) if modo_streaming else None
+        
+        # STAGING: los bloques validados quedan en el servidor y al grabar solo se envía el token
+        # POR QUÉ: Evita que el navegador reenvíe todas las filas y que el servidor las procese dos veces
+        # Si el archivo se está grabando en segundo plano no se vuelve a previsualizar
+        # POR QUÉ: crear_carga_preparada descarta la carga anterior del mismo archivo, y el trabajo todavía está leyendo sus bloques
+        from .trabajos import trabajo_activo
+        if trabajo_activo(hash_archivo) is not None:
+            print(f"[PREVIEW_MONTO] Archivo en carga en segundo plano. Hash: {hash_archivo}")
+            return RespuestaJSON({'success': False, 'error': 'Este archivo ya se está cargando en segundo plano. Espere a que termine.'}, status=400)
+        carga = crear_carga_preparada(current_user, hash_archivo, archivo.name, 'monto')
+        
+        # Perfil de columnas de la corredora (opcional): si no se indica, se detecta por los encabezados
+        perfil = request.POST.get('perfil_columnas') or None
+        
+        # Leer y validar el CSV por bloques de filas (memoria acotada)
+        # El encoding (utf-8 o latin-1) ya se detectó al calcular el hash
         try:
-            # Primero intentar UTF-8 (estándar moderno)
-            df = pd.read_csv(archivo, encoding='utf-8')
-        except UnicodeDecodeError:
-            # Si falla, intentar Latin-1 (común en archivos antiguos)
-            archivo.seek(0)
-            df = pd.read_csv(archivo, encoding='latin-1')
+            datos, errores, total = previsualizar_bloques(leer_csv_por_bloques(archivo, encoding), limite_muestra, carga=carga, perfil=perfil)
         except Exception as e:
-            return JsonResponse({'success': False, 'error': f'Error al leer el archivo CSV: {str(e)}'}, status=400)
-        
-        # Limpiar nombres de columnas (eliminar espacios al inicio y final)
-        df.columns = df.columns.str.strip()
-        
-        # Eliminar filas completamente vacías
-        df = df.dropna(how='all')
-        
-        # Convertir a lista de diccionarios para procesar
-        datos = []  # Lista para datos válidos
-        errores = []  # Lista para errores encontrados
-        
-        for idx, row in df.iterrows(): # Se recorre el dataframe
-            try:
-                # Convertir la fila a diccionario
-                fila = row.to_dict() # Se convierte la fila a un diccionario
-                
-                # Convertir valores NaN a strings vacíos y limpiar
-                fila_limpia = {} # Se crea un diccionario para la fila limpia
-                for key, value in fila.items():
-                    if pd.isna(value):
-                        fila_limpia[key] = '' # Se asigna un string vacío al diccionario de la fila limpia
-                    else:
-                        fila_limpia[key] = str(value).strip() if value else '' # Se asigna el valor de la fila limpia al diccionario de la fila limpia
-                
-                # Validar campos requeridos (buscar con diferentes variaciones)
-                ejercicio = fila_limpia.get('Ejercicio') or fila_limpia.get('ejercicio') or '' # Se obtiene el valor del campo Ejercicio de la fila limpia
-                mercado = fila_limpia.get('Mercado') or fila_limpia.get('mercado') or '' # Se obtiene el valor del campo Mercado de la fila limpia
-                
-                if not ejercicio or not mercado:
-                    errores.append(f'Fila {idx + 2}: Faltan campos requeridos (Ejercicio, Mercado)') # Se agrega el error a la lista de errores
-                    continue
-                
-                datos.append(fila_limpia) # Se agrega la fila limpia a la lista de datos
-                
-            except Exception as e:
-                errores.append(f'Fila {idx + 2}: {str(e)}') # Se agrega el error a la lista de errores
-                continue
+            descartar_carga_preparada(carga)
+            return RespuestaJSON({'success': False, 'error': f'Error al leer el archivo CSV: {str(e)}'}, status=400) # Se retorna un JSON con el error de lectura de archivo
         
-        return JsonResponse({ # Se retorna un JSON con los datos de la previsualización
+        return RespuestaJSON({ # Se retorna un JSON con los datos de la previsualización
             'success': True,
             'datos': datos, # Se asigna la lista de datos al JSON
             'errores': errores, # Se asigna la lista de errores al JSON
-            'total': len(datos), # Se asigna el total de datos al JSON
+            'total': total, # Total de filas válidas del archivo (en modo streaming `datos` es solo una muestra)
             'hash_archivo': hash_archivo, # Hash único del archivo para evitar duplicados
-            'nombre_archivo': archivo.name  # Nombre original del archivo
+            'nombre_archivo': archivo.name,  # Nombre original del archivo
+            'modo_streaming': modo_streaming,  # Si es True, `datos` es solo una muestra del archivo
+            'token_carga': carga.token  # Token de la carga preparada: es lo único que se envía al grabar
         }) # Se retorna un JSON con los datos de la previsualización
         
     except Exception as e:
         print(f"Error al previsualizar monto: {e}") # Imprime el error de previsualización de monto
         import traceback
         print(traceback.format_exc()) # Imprime el traceback de la excepción
-        return JsonResponse({'success': False, 'error': f'Error al procesar: {str(e)}'}, status=500) # Se retorna un JSON con el error de procesamiento
+        return RespuestaJSON({'success': False, 'error': f'Error al procesar: {str(e)}'}, status=500) # Se retorna un JSON con el error de procesamiento
+
+
+def _registrar_carga_masiva(usuario_obj, hash_archivo, nombre_archivo, tipo, total_creadas, etiqueta):
+    """
+    Registra una carga masiva terminada: crea el log 'Carga Masiva' y guarda el ArchivoCSV.
+    
+    POR QUÉ ESTA FUNCIÓN EXISTE:
+    - La usan las vistas cargar_factor_view y cargar_monto_view y también el trabajador
+      de segundo plano (trabajos.py) cuando termina una carga grande
+    - El ArchivoCSV permite detectar si el mismo archivo se vuelve a subir
+    
+    Argumentos:
+        usuario_obj: Usuario que hizo la carga
+        hash_archivo: Hash SHA-256 del archivo CSV
+        nombre_archivo: Nombre original del archivo
+        tipo: 'factor' o 'monto'
+        total_creadas: Cantidad de calificaciones insertadas (si es 0 no se registra nada)
+        etiqueta: Prefijo para los mensajes de debug (ej: 'CARGAR_MONTO')
+    """
+    if total_creadas <= 0:
+        return
+    
+    _crear_log(usuario_obj, 'Carga Masiva', documento_afectado=None, hash_archivo_csv=hash_archivo) # Se crea el log de carga masiva con el hash del archivo
+    print(f"[{etiqueta}] Log creado para {total_creadas} calificaciones (hash: {hash_archivo})")
+    
+    # Registrar el archivo CSV procesado para evitar duplicados
+    if hash_archivo:
+        from .models import ArchivoCSV
+        try:
+            archivo_csv = ArchivoCSV(
+                hash_archivo=hash_archivo,
+                nombre_archivo=nombre_archivo,
+                tipo=tipo,
+                usuario=usuario_obj,
+                total_filas=total_creadas
+            )
+            archivo_csv.save()
+            print(f"[{etiqueta}] Archivo CSV registrado: {nombre_archivo} (hash: {hash_archivo})")
+        except Exception as e:
+            print(f"[{etiqueta}] Error al registrar archivo CSV: {e}")
 
 
 # =====================================================================
 # VISTAS DE CARGA MASIVA DE FACTORES
 # =====================================================================
 @require_POST
+@login_requerido_json
 def cargar_factor_view(request):
     """
     Vista AJAX para cargar calificaciones desde CSV con factores ya calculados.
@@ -3347,7 +3309,8 @@ def cargar_factor_view(request):
     Crea múltiples calificaciones en la base de datos en una sola operación.
     
     Flujo:
-    1. Recibe datos del CSV (después de previsualización)
+    1. Recibe datos del CSV (después de previsualización) o, en modo streaming,
+       el mismo archivo CSV, que se lee por bloques de filas
     2. Valida cada fila
     3. Crea calificaciones en MongoDB
     4. Crea log de carga masiva
@@ -3356,39 +3319,66 @@ def cargar_factor_view(request):
         request: Objeto HttpRequest de Django (solo POST permitido)
         
     Returns (lo que devuelve la funcion):
-        JsonResponse: JSON con cantidad de calificaciones creadas y errores encontrados
+        RespuestaJSON: JSON con cantidad de calificaciones creadas y errores encontrados
     """
     print("[CARGAR_FACTOR] Iniciando carga de factores...") # Imprime el mensaje de inicio de carga de factores
     
-    if 'user_id' not in request.session: # Si el usuario no está autenticado, retorna un error
-        print("[CARGAR_FACTOR] Error: No autenticado")
-        return JsonResponse({'success': False, 'error': 'No autenticado'}, status=401) # Se retorna un JSON con el error de no autenticado
-
-    try:
-        current_user = usuarios.objects.get(id=request.session['user_id'])
-        print(f"[CARGAR_FACTOR] Usuario autenticado: {current_user.correo}")
-    except usuarios.DoesNotExist:
-        print("[CARGAR_FACTOR] Error: Usuario no válido") # Imprime el error de usuario no válido
-        return JsonResponse({'success': False, 'error': 'Usuario no válido'}, status=401) # Se retorna un JSON con el error de usuario no válido
+    # Usuario de la sesión (el decorador ya verificó que existe)
+    current_user = request.usuario_actual
+    print(f"[CARGAR_FACTOR] Usuario autenticado: {current_user.correo}")
 
     try:
         import pandas as pd # Importamos el modulo pandas para manejar datos en tablas
         import json # Importamos el modulo json para manejar datos en formato JSON 
-        from decimal import Decimal # Importamos el modulo decimal para manejar números decimales
-        
-        print("[CARGAR_FACTOR] Parseando JSON...") # Imprime el mensaje de parseo de JSON
-        data = json.loads(request.body) # Se carga el JSON de la solicitud
-        datos_csv = data.get('datos', []) # Se obtiene los datos del JSON
-        hash_archivo = data.get('hash_archivo', '') # Se obtiene el hash del archivo
-        nombre_archivo = data.get('nombre_archivo', 'archivo.csv') # Se obtiene el nombre del archivo
+        from .carga_masiva import ( # Procesamiento vectorizado del CSV
+            analizar_archivo, leer_csv_por_bloques, registros_factor, guardar_calificaciones, ordenar_errores,
+            obtener_carga_preparada, leer_carga_preparada, descartar_carga_preparada,
+        )
+        from .trabajos import encolar_carga, trabajo_activo # Carga en segundo plano para archivos grandes
+        
+        print("[CARGAR_FACTOR] Parseando solicitud...") # Imprime el mensaje de lectura de la solicitud
+        archivo = None # Archivo CSV reenviado por el navegador (solo en modo streaming)
+        carga = None # Carga preparada en el servidor durante la previsualización (staging)
+        en_segundo_plano = False # Solo las cargas preparadas pueden grabarse en segundo plano
+        perfil = None # Perfil de columnas de la corredora (None = se detecta por los encabezados)
+        if request.content_type == 'multipart/form-data':
+            # MODO STREAMING: el navegador reenvía el archivo en lugar de todas las filas en JSON
+            # POR QUÉ: Con archivos grandes el JSON de las filas no cabe en memoria (ni en el límite del body)
+            archivo = request.FILES.get('archivo')
+            if archivo is None:
+                print("[CARGAR_FACTOR] Error: No se recibió el archivo") # Imprime el error de no recibido de archivo
+                return RespuestaJSON({'success': False, 'error': 'No se recibió ningún archivo'}, status=400)
+            hash_archivo, encoding = analizar_archivo(archivo) # El hash se calcula en el servidor, por partes
+            nombre_archivo = archivo.name # Se obtiene el nombre del archivo
+            perfil = request.POST.get('perfil_columnas') or None
+            print(f"[CARGAR_FACTOR] Archivo recibido: {nombre_archivo} ({archivo.size} bytes)")
+        else:
+            data = json.loads(request.body) # Se carga el JSON de la solicitud
+            perfil = data.get('perfil_columnas') or None
+            token_carga = data.get('token_carga') # Token de la carga preparada en la previsualización
+            if token_carga:
+                # Los registros ya están validados en el servidor: no se reciben ni se vuelven a procesar las filas
+                carga = obtener_carga_preparada(token_carga, current_user)
+                if carga is None:
+                    print(f"[CARGAR_FACTOR] Error: Carga preparada no encontrada o vencida ({token_carga})")
+                    return RespuestaJSON({'success': False, 'error': 'La previsualización ya no está disponible. Seleccione el archivo nuevamente.'}, status=400)
+                datos_csv = None
+                hash_archivo = carga.hash_archivo # Se obtiene el hash del archivo
+                nombre_archivo = carga.nombre_archivo # Se obtiene el nombre del archivo
+                print(f"[CARGAR_FACTOR] Carga preparada recibida: {carga.total_filas} filas en {carga.bloques} bloque(s)")
+                en_segundo_plano = bool(data.get('en_segundo_plano')) or carga.total_filas > settings.CARGA_MASIVA_UMBRAL_SEGUNDO_PLANO
+            else:
+                datos_csv = data.get('datos', []) # Se obtiene los datos del JSON
+                hash_archivo = data.get('hash_archivo', '') # Se obtiene el hash del archivo
+                nombre_archivo = data.get('nombre_archivo', 'archivo.csv') # Se obtiene el nombre del archivo
+                print(f"[CARGAR_FACTOR] Datos recibidos: {len(datos_csv)} filas") # Imprime el mensaje de datos recibidos
+            
+            if carga is None and not datos_csv:
+                print("[CARGAR_FACTOR] Error: No se recibieron datos") # Imprime el error de no recibido de datos
+                return RespuestaJSON({'success': False, 'error': 'No se recibieron datos'}, status=400) # Se retorna un JSON con el error de no recibido de datos
         
-        print(f"[CARGAR_FACTOR] Datos recibidos: {len(datos_csv)} filas") # Imprime el mensaje de datos recibidos
         print(f"[CARGAR_FACTOR] Hash del archivo: {hash_archivo}") # Imprime el hash del archivo
         
-        if not datos_csv:
-            print("[CARGAR_FACTOR] Error: No se recibieron datos") # Imprime el error de no recibido de datos
-            return JsonResponse({'success': False, 'error': 'No se recibieron datos'}, status=400) # Se retorna un JSON con el error de no recibido de datos
-        
         # Verificar si este archivo ya fue procesado (doble verificación)
         if hash_archivo:
             from .models import ArchivoCSV
@@ -3408,188 +3398,65 @@ def cargar_factor_view(request):
                     print(f"[CARGAR_FACTOR] Se eliminó el registro de ArchivoCSV porque no quedan calificaciones. Permitiendo subida.")
                 else:
                     print(f"[CARGAR_FACTOR] Error: Archivo duplicado detectado. Hash: {hash_archivo}")
-                    return JsonResponse({
+                    return RespuestaJSON({
                         'success': False, 
                         'error': f'Este archivo ya fue procesado anteriormente el {archivo_existente.fecha_subida.strftime("%Y-%m-%d %H:%M:%S")} por {archivo_existente.usuario.correo} y todavía existen {calificaciones_existentes} calificación(es) creadas desde ese archivo.',
                         'duplicado': True
                     }, status=400)
         
-        # Convertir a DataFrame de pandas para procesamiento más eficiente
-        df = pd.DataFrame(datos_csv) # Se convierte el JSON a un dataframe de pandas
-        
-        # Limpiar nombres de columnas (eliminar espacios)
-        df.columns = df.columns.str.strip() # Se eliminan los espacios de los nombres de las columnas
-        
-        # Eliminar filas completamente vacías
-        df = df.dropna(how='all') # Se eliminan las filas completamente vacías
+        # El mismo archivo no se puede grabar mientras un trabajo en segundo plano todavía lo graba
+        # (si ese trabajo falla, elimina las filas del archivo, incluidas las de esta carga)
+        if hash_archivo and trabajo_activo(hash_archivo) is not None:
+            print(f"[CARGAR_FACTOR] Error: El archivo ya se está cargando en segundo plano. Hash: {hash_archivo}")
+            return RespuestaJSON({'success': False, 'error': 'Este archivo ya se está cargando en segundo plano.'}, status=400)
+        
+        if carga is not None and en_segundo_plano:
+            # CARGA EN SEGUNDO PLANO: la solicitud responde de inmediato y un trabajador graba los bloques
+            # POR QUÉ: Un archivo grande ocupaba el proceso web durante minutos y el proxy cortaba la solicitud por timeout
+            trabajo = encolar_carga(current_user, carga, 'factor')
+            print(f"[CARGAR_FACTOR] Carga enviada a segundo plano: trabajo {trabajo.id} ({trabajo.total_filas} filas)")
+            return RespuestaJSON({
+                'success': True,
+                'en_segundo_plano': True, # El navegador debe consultar el avance en estado_carga_view
+                'trabajo_id': str(trabajo.id),
+                'total_filas': trabajo.total_filas,
+                'message': f'La carga de {trabajo.total_filas} fila(s) continúa en segundo plano.'
+            }, status=202)
+        
+        if carga is not None:
+            # Bloques ya validados y preparados durante la previsualización
+            lotes = leer_carga_preparada(carga)
+        else:
+            if archivo is not None:
+                # Leer el CSV por bloques de filas: la memoria no depende del tamaño del archivo
+                bloques = leer_csv_por_bloques(archivo, encoding)
+            else:
+                # Convertir a DataFrame de pandas para procesamiento más eficiente
+                df = pd.DataFrame(datos_csv) # Se convierte el JSON a un dataframe de pandas
+                df.columns = df.columns.str.strip() # Se eliminan los espacios de los nombres de las columnas
+                bloques = [df.dropna(how='all')] # Se eliminan las filas completamente vacías
+            
+            # Validar y normalizar todas las filas de cada bloque a la vez (por columnas, sin iterrows)
+            # POR QUÉ: Convertir celda por celda con pd.to_numeric hacía que archivos grandes tardaran minutos
+            lotes = (registros_factor(df, hash_archivo, etiqueta='CARGAR_FACTOR', perfil=perfil) for df in bloques)
         
         calificaciones_creadas = 0 # Se inicializa la variable de calificaciones creadas
         errores = [] # Se inicializa la variable de errores
         
-        # Iterar sobre el DataFrame
-        for idx, row in df.iterrows():
-            fila_num = idx + 2  # +2 porque idx empieza en 0 y la fila 1 es el encabezado
-            try:
-                # Convertir la fila a diccionario
-                fila = row.to_dict()
-                
-                # Convertir valores NaN a strings vacíos y limpiar
-                fila_limpia = {} # Se crea un diccionario para la fila limpia
-                for key, value in fila.items():
-                    if pd.isna(value):
-                        fila_limpia[key] = ''
-                    else:
-                        fila_limpia[key] = str(value).strip() if value else '' # Se asigna el valor de la fila limpia al diccionario de la fila limpia
-                
-                # Debug: mostrar las claves disponibles en la primera fila
-                if fila_num == 2:
-                    print(f"[CARGAR_FACTOR] Claves disponibles en CSV: {list(fila_limpia.keys())}")
-                    print(f"[CARGAR_FACTOR] Primera fila completa: {fila_limpia}")
-                    print(f"[CARGAR_FACTOR] Ejercicio raw: '{fila_limpia.get('Ejercicio')}'")
-                    print(f"[CARGAR_FACTOR] Mercado raw: '{fila_limpia.get('Mercado')}'")
-                    print(f"[CARGAR_FACTOR] Instrumento raw: '{fila_limpia.get('Instrumento')}'")
-                
-                # Validar campos requeridos (buscar con diferentes variaciones)
-                # Primero intentar obtener Ejercicio
-                ejercicio = fila_limpia.get('Ejercicio') or fila_limpia.get('ejercicio') or ''
-                mercado_raw = fila_limpia.get('Mercado') or fila_limpia.get('mercado') or ''
-                instrumento = fila_limpia.get('Instrumento') or fila_limpia.get('instrumento') or ''
-                
-                # Normalizar mercado a los valores válidos (acciones, CFI, Fondos mutuos)
-                mercado_normalizado = mercado_raw
-                if mercado_raw: # Si el mercado no es None, normaliza el mercado
-                    mercado_lower = mercado_raw.lower().strip() # Se convierte el mercado a minúsculas y se eliminan los espacios
-                    if mercado_lower == 'acciones' or mercado_lower == 'accion':
-                        mercado_normalizado = 'acciones' # Se asigna el valor de acciones al mercado normalizado
-                    elif mercado_lower == 'cfi':
-                        mercado_normalizado = 'CFI' # Se asigna el valor de CFI al mercado normalizado
-                    elif mercado_lower == 'fondos mutuos' or mercado_lower == 'fondosmutuos' or mercado_lower == 'fondo mutuo':
-                        mercado_normalizado = 'Fondos mutuos' # Se asigna el valor de Fondos mutuos al mercado normalizado
-                
-                mercado = mercado_normalizado # Se asigna el valor del mercado normalizado al mercado
-                
-                # Detectar si Ejercicio e Instrumento están intercambiados
-                # Si Ejercicio contiene letras (como "ACC001") e Instrumento es numérico, intercambiar
-                ejercicio_es_numero = False # Se inicializa la variable de ejercicio es numero
-                instrumento_es_numero = False # Se inicializa la variable de instrumento es numero
-                ejercicio_tiene_letras = any(c.isalpha() for c in str(ejercicio)) if ejercicio else False # Se inicializa la variable de ejercicio tiene letras
-                
-                try:
-                    int(ejercicio) # Se convierte el ejercicio a entero
-                    ejercicio_es_numero = True # Se asigna el valor de True a la variable de ejercicio es numero
-                except (ValueError, TypeError):
-                    pass # Si hay error, se pasa al siguiente try
-                
-                try:
-                    int(instrumento) # Se convierte el instrumento a entero
-                    instrumento_es_numero = True # Se asigna el valor de True a la variable de instrumento es numero
-                except (ValueError, TypeError):
-                    pass # Si hay error, se pasa al siguiente try
-                
-                # Si Ejercicio no es numérico pero Instrumento sí, intercambiar
-                # O si Ejercicio tiene letras (código de instrumento) e Instrumento es numérico (año)
-                if (not ejercicio_es_numero and instrumento_es_numero) or (ejercicio_tiene_letras and instrumento_es_numero): # Si Ejercicio no es numérico pero Instrumento sí, intercambiar o si Ejercicio tiene letras (código de instrumento) e Instrumento es numérico (año)
-                    print(f"[CARGAR_FACTOR] Advertencia: Ejercicio e Instrumento parecen estar intercambiados en fila {idx}. Ejercicio: '{ejercicio}', Instrumento: '{instrumento}'")
-                    ejercicio, instrumento = instrumento, ejercicio
-                    ejercicio_es_numero = True # Se asigna el valor de True a la variable de ejercicio es numero
-                
-                if not ejercicio or not mercado: # Si Ejercicio o Mercado no es None, mostrar qué claves tiene la fila para ayudar a debuggear
-                    # Mostrar qué claves tiene la fila para ayudar a debuggear
-                    claves_disponibles = ', '.join(fila.keys()) # Se obtiene las claves de la fila
-                    errores.append(f'Fila {idx}: Faltan campos requeridos (Ejercicio, Mercado). Claves disponibles: {claves_disponibles}') # Se agrega el error a la lista de errores
-                    continue # Se pasa al siguiente try
-                
-                # Validar y convertir Ejercicio a entero (si no es un número entero, mostrar el error)
-                try:
-                    ejercicio_int = int(ejercicio) # Se convierte el ejercicio a entero
-                except (ValueError, TypeError): # Si hay error, se pasa al siguiente try
-                    # Mostrar más información sobre el error
-                    claves_disponibles = ', '.join(fila.keys()) # Se obtiene las claves de la fila
-                    errores.append(f'Fila {idx}: El campo Ejercicio debe ser un número entero. Valor recibido: "{ejercicio}". Instrumento recibido: "{instrumento}". Claves disponibles: {claves_disponibles}') # Se agrega el error a la lista de errores
-                    continue # Se pasa al siguiente try
-                
-                # Crear nueva calificación (se crea un nuevo documento en la base de datos) para la calificación
-                nueva_calificacion = Calificacion()
-                nueva_calificacion.Ejercicio = ejercicio_int # Se asigna el valor del ejercicio a la nueva calificación
-                nueva_calificacion.Mercado = mercado # Se asigna el valor del mercado a la nueva calificación
-                nueva_calificacion.Instrumento = instrumento # Se asigna el valor del instrumento a la nueva calificación
-                nueva_calificacion.Origen = 'csv'  # Normalizado a minúsculas para coincidir con el filtro
-                nueva_calificacion.hash_archivo_csv = hash_archivo  # Guardar el hash del archivo CSV para relacionar la calificación con el archivo
-                nueva_calificacion.Descripcion = fila_limpia.get('DESCRIPCION') or fila_limpia.get('Descripcion') or fila_limpia.get('descripcion') or '' # Se asigna el valor de la descripción a la nueva calificación
-                
-                # Fecha de pago usando pandas (se convierte la fecha de pago a un objeto datetime)
-                fecha_pago = fila_limpia.get('FEC_PAGO') or fila_limpia.get('Fec_Pago') or fila_limpia.get('fec_pago') or '' # Se obtiene el valor de la fecha de pago
-                if fecha_pago: # Si la fecha de pago no es None, se convierte a datetime
-                    try:
-                        fecha_parsed = pd.to_datetime(fecha_pago, format='%Y-%m-%d', errors='coerce') # Se convierte la fecha de pago a un objeto datetime
-                        if not pd.isna(fecha_parsed): # Si la fecha de pago no es NaN, se asigna a la nueva calificación
-                            nueva_calificacion.FechaPago = fecha_parsed.to_pydatetime()
-                    except Exception as e: # Si hay error, se pasa al siguiente try
-                        print(f"[CARGAR_FACTOR] Error al parsear fecha: {e}") # Imprime el error de parseo de fecha
-                        pass # Si hay error, se pasa al siguiente try
-                
-                # Secuencia evento usando pandas (se convierte la secuencia de evento a un entero)
-                sec_eve = fila_limpia.get('SEC_EVE') or fila_limpia.get('Sec_Eve') or fila_limpia.get('sec_eve') or '' # Se obtiene el valor de la secuencia de evento
-                if sec_eve: # Si la secuencia de evento no es None, se convierte a entero
-                    try:
-                        nueva_calificacion.SecuenciaEvento = pd.to_numeric(sec_eve, errors='raise').astype(int) # Se convierte la secuencia de evento a un entero
-                    except (ValueError, TypeError, Exception):
-                        print(f"[CARGAR_FACTOR] Advertencia: No se pudo convertir SecuenciaEvento '{sec_eve}' a entero en fila {fila_num}")
-                        pass
-                
-                # Asignar factores (F8 a F37) usando pandas
-                for i in range(8, 38): # Se recorre el rango de factores (F8 a F37)
-                    factor_key = f'F{i}' # Se obtiene el nombre del factor
-                    factor_value = fila_limpia.get(factor_key, '0.0') # Se obtiene el valor del factor
-                    try:
-                        # Usar pandas para convertir a numérico
-                        factor_numeric = pd.to_numeric(factor_value, errors='coerce') # Se convierte el valor del factor a un número
-                        if pd.isna(factor_numeric):
-                            factor_decimal = Decimal(0) # Se asigna el valor de 0 al factor decimal
-                        else:
-                            factor_decimal = Decimal(str(factor_numeric)) # Se convierte el valor del factor a un número decimal
-                            # Validar que el factor esté entre 0 y 1
-                            if factor_decimal < 0: # Si el factor decimal es menor que 0, se asigna el valor de 0 al factor decimal
-                                factor_decimal = Decimal(0) # Se asigna el valor de 0 al factor decimal
-                            elif factor_decimal > 1: # Si el factor decimal es mayor que 1, se asigna el valor de 1 al factor decimal
-                                factor_decimal = Decimal(1) # Se asigna el valor de 1 al factor decimal
-                        setattr(nueva_calificacion, f'Factor{i:02d}', factor_decimal) # Se asigna el valor del factor a la nueva calificación
-                    except Exception as e:
-                        print(f"[CARGAR_FACTOR] Error al procesar factor {i}: {e}") # Imprime el error de procesamiento de factor
-                        setattr(nueva_calificacion, f'Factor{i:02d}', Decimal(0)) # Se asigna el valor de 0 al factor
-                
-                nueva_calificacion.FechaAct = datetime.datetime.now() # Se asigna la fecha de actualización a la nueva calificación
-                nueva_calificacion.save() # Se guarda la nueva calificación en la base de datos
-                calificaciones_creadas += 1
-                print(f"[CARGAR_FACTOR] Calificación {fila_num} guardada exitosamente") # Imprime el mensaje de guardado exitoso de la calificación
-                
-            except Exception as e:
-                print(f"[CARGAR_FACTOR] Error en fila {fila_num}: {e}") # Imprime el error de la fila
-                import traceback
-                print(traceback.format_exc()) # Imprime el traceback de la excepción
-                errores.append(f'Fila {fila_num}: {str(e)}')
-                continue
-        
-        # Crear log de carga masiva
-        if calificaciones_creadas > 0:
-            _crear_log(current_user, 'Carga Masiva', documento_afectado=None, hash_archivo_csv=hash_archivo) # Se crea el log de carga masiva con el hash del archivo
-            print(f"[CARGAR_FACTOR] Log creado para {calificaciones_creadas} calificaciones (hash: {hash_archivo})")
+        for registros, errores_bloque in lotes:
+            errores.extend(errores_bloque)
             
-            # Registrar el archivo CSV procesado para evitar duplicados
-            if hash_archivo:
-                from .models import ArchivoCSV
-                try:
-                    archivo_csv = ArchivoCSV(
-                        hash_archivo=hash_archivo,
-                        nombre_archivo=nombre_archivo,
-                        tipo='factor',
-                        usuario=current_user,
-                        total_filas=calificaciones_creadas
-                    )
-                    archivo_csv.save()
-                    print(f"[CARGAR_FACTOR] Archivo CSV registrado: {nombre_archivo} (hash: {hash_archivo})")
-                except Exception as e:
-                    print(f"[CARGAR_FACTOR] Error al registrar archivo CSV: {e}")
+            # Guardar las calificaciones en MongoDB por lotes (insert_many) en lugar de un save() por fila
+            calificaciones_creadas += guardar_calificaciones(registros, errores, etiqueta='CARGAR_FACTOR')
+            print(f"[CARGAR_FACTOR] Bloque procesado: {calificaciones_creadas} creadas, {len(errores)} errores hasta ahora")
+        
+        if carga is not None:
+            descartar_carga_preparada(carga) # La carga ya se grabó: se eliminan sus bloques del servidor
+        
+        errores = ordenar_errores(errores) # Se dejan los errores en el orden de las filas del archivo
+        
+        # Crear log de carga masiva y registrar el archivo CSV procesado para evitar duplicados
+        _registrar_carga_masiva(current_user, hash_archivo, nombre_archivo, 'factor', calificaciones_creadas, etiqueta='CARGAR_FACTOR')
         
         mensaje = f'Se crearon {calificaciones_creadas} calificación(es) exitosamente.' # Se crea el mensaje de creación de calificaciones exitosas         
         if errores:
@@ -3597,7 +3464,7 @@ def cargar_factor_view(request):
         
         print(f"[CARGAR_FACTOR] Proceso completado: {calificaciones_creadas} creadas, {len(errores)} errores") # Imprime el mensaje de proceso completado
         
-        return JsonResponse({ # Se retorna un JSON con los datos de la carga masiva
+        return RespuestaJSON({ # Se retorna un JSON con los datos de la carga masiva
             'success': True, # Se asigna el valor de True al JSON
             'total': calificaciones_creadas, # Se asigna el total de calificaciones creadas al JSON
             'errores': errores, # Se asigna el total de errores al JSON
@@ -3608,13 +3475,14 @@ def cargar_factor_view(request):
         print(f"[CARGAR_FACTOR] Error al cargar factores: {e}") # Imprime el error de carga masiva
         import traceback
         print(traceback.format_exc()) # Imprime el traceback de la excepción
-        return JsonResponse({'success': False, 'error': f'Error al procesar: {str(e)}'}, status=500) # Se retorna un JSON con el error de procesamiento
+        return RespuestaJSON({'success': False, 'error': f'Error al procesar: {str(e)}'}, status=500) # Se retorna un JSON con el error de procesamiento
 
 
 # =====================================================================
 # VISTAS DE CARGA MASIVA DE MONTOS
 # =====================================================================
 @require_POST
+@login_requerido_json
 def cargar_monto_view(request):
     
     """
@@ -3625,7 +3493,8 @@ def cargar_monto_view(request):
     Si no, calcula los factores automáticamente: Factor = Monto / SumaBase
     
     Flujo:
-    1. Recibe datos del CSV (después de previsualización y posible cálculo de factores)
+    1. Recibe datos del CSV (después de previsualización y posible cálculo de factores) o,
+       en modo streaming, el mismo archivo CSV, que se lee por bloques de filas
     2. Valida cada fila
     3. Calcula factores si es necesario
     4. Crea calificaciones en MongoDB
@@ -3635,39 +3504,66 @@ def cargar_monto_view(request):
         request: Objeto HttpRequest de Django (solo POST permitido)
         
     Returns (lo que devuelve la funcion):
-        JsonResponse: JSON con cantidad de calificaciones creadas y errores encontrados
+        RespuestaJSON: JSON con cantidad de calificaciones creadas y errores encontrados
     """
     print("[CARGAR_MONTO] Iniciando carga de montos...") # Imprime el mensaje de inicio de carga de montos
     
-    if 'user_id' not in request.session: # Si el usuario no está autenticado, retorna un error
-        print("[CARGAR_MONTO] Error: No autenticado")
-        return JsonResponse({'success': False, 'error': 'No autenticado'}, status=401) # Se retorna un JSON con el error de no autenticado
-
-    try:
-        current_user = usuarios.objects.get(id=request.session['user_id']) # Se obtiene el usuario autenticado
-        print(f"[CARGAR_MONTO] Usuario autenticado: {current_user.correo}")
-    except usuarios.DoesNotExist:
-        print("[CARGAR_MONTO] Error: Usuario no válido") # Imprime el error de usuario no válido
-        return JsonResponse({'success': False, 'error': 'Usuario no válido'}, status=401)
+    # Usuario de la sesión (el decorador ya verificó que existe)
+    current_user = request.usuario_actual # Se obtiene el usuario autenticado
+    print(f"[CARGAR_MONTO] Usuario autenticado: {current_user.correo}")
 
     try: 
         import pandas as pd # Importamos el modulo pandas para manejar datos en tablas  
         import json # Importamos el modulo json para manejar datos en formato JSON
-        from decimal import Decimal # Importamos el modulo decimal para manejar números decimales
-        
-        print("[CARGAR_MONTO] Parseando JSON...") # Imprime el mensaje de parseo de JSON
-        data = json.loads(request.body) # Se carga el JSON de la solicitud
-        datos_csv = data.get('datos', []) # Se obtiene los datos del JSON
-        hash_archivo = data.get('hash_archivo', '') # Se obtiene el hash del archivo
-        nombre_archivo = data.get('nombre_archivo', 'archivo.csv') # Se obtiene el nombre del archivo
+        from .carga_masiva import ( # Procesamiento vectorizado del CSV
+            analizar_archivo, leer_csv_por_bloques, registros_monto, guardar_calificaciones, ordenar_errores,
+            obtener_carga_preparada, leer_carga_preparada, descartar_carga_preparada,
+        )
+        from .trabajos import encolar_carga, trabajo_activo # Carga en segundo plano para archivos grandes
+        
+        print("[CARGAR_MONTO] Parseando solicitud...") # Imprime el mensaje de lectura de la solicitud
+        archivo = None # Archivo CSV reenviado por el navegador (solo en modo streaming)
+        carga = None # Carga preparada en el servidor durante la previsualización (staging)
+        en_segundo_plano = False # Solo las cargas preparadas pueden grabarse en segundo plano
+        perfil = None # Perfil de columnas de la corredora (None = se detecta por los encabezados)
+        if request.content_type == 'multipart/form-data':
+            # MODO STREAMING: el navegador reenvía el archivo en lugar de todas las filas en JSON
+            # POR QUÉ: Con archivos grandes el JSON de las filas no cabe en memoria (ni en el límite del body)
+            archivo = request.FILES.get('archivo')
+            if archivo is None:
+                print("[CARGAR_MONTO] Error: No se recibió el archivo") # Imprime el error de no recibido de archivo
+                return RespuestaJSON({'success': False, 'error': 'No se recibió ningún archivo'}, status=400)
+            hash_archivo, encoding = analizar_archivo(archivo) # El hash se calcula en el servidor, por partes
+            nombre_archivo = archivo.name # Se obtiene el nombre del archivo
+            perfil = request.POST.get('perfil_columnas') or None
+            print(f"[CARGAR_MONTO] Archivo recibido: {nombre_archivo} ({archivo.size} bytes)")
+        else:
+            data = json.loads(request.body) # Se carga el JSON de la solicitud
+            perfil = data.get('perfil_columnas') or None
+            token_carga = data.get('token_carga') # Token de la carga preparada en la previsualización
+            if token_carga:
+                # Los registros ya están validados en el servidor: no se reciben ni se vuelven a procesar las filas
+                carga = obtener_carga_preparada(token_carga, current_user)
+                if carga is None:
+                    print(f"[CARGAR_MONTO] Error: Carga preparada no encontrada o vencida ({token_carga})")
+                    return RespuestaJSON({'success': False, 'error': 'La previsualización ya no está disponible. Seleccione el archivo nuevamente.'}, status=400)
+                datos_csv = None
+                hash_archivo = carga.hash_archivo # Se obtiene el hash del archivo
+                nombre_archivo = carga.nombre_archivo # Se obtiene el nombre del archivo
+                print(f"[CARGAR_MONTO] Carga preparada recibida: {carga.total_filas} filas en {carga.bloques} bloque(s)")
+                en_segundo_plano = bool(data.get('en_segundo_plano')) or carga.total_filas > settings.CARGA_MASIVA_UMBRAL_SEGUNDO_PLANO
+            else:
+                datos_csv = data.get('datos', []) # Se obtiene los datos del JSON
+                hash_archivo = data.get('hash_archivo', '') # Se obtiene el hash del archivo
+                nombre_archivo = data.get('nombre_archivo', 'archivo.csv') # Se obtiene el nombre del archivo
+                print(f"[CARGAR_MONTO] Datos recibidos: {len(datos_csv)} filas") # Imprime el mensaje de datos recibidos
+            
+            if carga is None and not datos_csv:
+                print("[CARGAR_MONTO] Error: No se recibieron datos") # Imprime el error de no recibido de datos
+                return RespuestaJSON({'success': False, 'error': 'No se recibieron datos'}, status=400) # Se retorna un JSON con el error de no recibido de datos
         
-        print(f"[CARGAR_MONTO] Datos recibidos: {len(datos_csv)} filas") # Imprime el mensaje de datos recibidos
         print(f"[CARGAR_MONTO] Hash del archivo: {hash_archivo}") # Imprime el hash del archivo
         
-        if not datos_csv: # Si no se recibieron datos, retorna un error
-            print("[CARGAR_MONTO] Error: No se recibieron datos") # Imprime el error de no recibido de datos
-            return JsonResponse({'success': False, 'error': 'No se recibieron datos'}, status=400) # Se retorna un JSON con el error de no recibido de datos
-        
         # Verificar si este archivo ya fue procesado (doble verificación)
         if hash_archivo:
             from .models import ArchivoCSV
@@ -3687,260 +3583,65 @@ def cargar_monto_view(request):
                     print(f"[CARGAR_MONTO] Se eliminó el registro de ArchivoCSV porque no quedan calificaciones. Permitiendo subida.")
                 else:
                     print(f"[CARGAR_MONTO] Error: Archivo duplicado detectado. Hash: {hash_archivo}")
-                    return JsonResponse({
+                    return RespuestaJSON({
                         'success': False, 
                         'error': f'Este archivo ya fue procesado anteriormente el {archivo_existente.fecha_subida.strftime("%Y-%m-%d %H:%M:%S")} por {archivo_existente.usuario.correo} y todavía existen {calificaciones_existentes} calificación(es) creadas desde ese archivo.',
                         'duplicado': True
                     }, status=400)
         
-        # Convertir a DataFrame de pandas para procesamiento más eficiente
-        df = pd.DataFrame(datos_csv) # Se convierte el JSON a un dataframe de pandas
-        
-        # Limpiar nombres de columnas (eliminar espacios)
-        df.columns = df.columns.str.strip() # Se eliminan los espacios de los nombres de las columnas
-        
-        # Eliminar filas completamente vacías
-        df = df.dropna(how='all') # Se eliminan las filas completamente vacías
+        # El mismo archivo no se puede grabar mientras un trabajo en segundo plano todavía lo graba
+        # (si ese trabajo falla, elimina las filas del archivo, incluidas las de esta carga)
+        if hash_archivo and trabajo_activo(hash_archivo) is not None:
+            print(f"[CARGAR_MONTO] Error: El archivo ya se está cargando en segundo plano. Hash: {hash_archivo}")
+            return RespuestaJSON({'success': False, 'error': 'Este archivo ya se está cargando en segundo plano.'}, status=400)
+        
+        if carga is not None and en_segundo_plano:
+            # CARGA EN SEGUNDO PLANO: la solicitud responde de inmediato y un trabajador graba los bloques
+            # POR QUÉ: Un archivo grande ocupaba el proceso web durante minutos y el proxy cortaba la solicitud por timeout
+            trabajo = encolar_carga(current_user, carga, 'monto')
+            print(f"[CARGAR_MONTO] Carga enviada a segundo plano: trabajo {trabajo.id} ({trabajo.total_filas} filas)")
+            return RespuestaJSON({
+                'success': True,
+                'en_segundo_plano': True, # El navegador debe consultar el avance en estado_carga_view
+                'trabajo_id': str(trabajo.id),
+                'total_filas': trabajo.total_filas,
+                'message': f'La carga de {trabajo.total_filas} fila(s) continúa en segundo plano.'
+            }, status=202)
+        
+        if carga is not None:
+            # Bloques ya validados y preparados durante la previsualización
+            lotes = leer_carga_preparada(carga)
+        else:
+            if archivo is not None:
+                # Leer el CSV por bloques de filas: la memoria no depende del tamaño del archivo
+                bloques = leer_csv_por_bloques(archivo, encoding)
+            else:
+                # Convertir a DataFrame de pandas para procesamiento más eficiente
+                df = pd.DataFrame(datos_csv) # Se convierte el JSON a un dataframe de pandas
+                df.columns = df.columns.str.strip() # Se eliminan los espacios de los nombres de las columnas
+                bloques = [df.dropna(how='all')] # Se eliminan las filas completamente vacías
+            
+            # Validar y normalizar todas las filas de cada bloque a la vez (por columnas, sin iterrows)
+            # POR QUÉ: Convertir celda por celda con pd.to_numeric hacía que archivos grandes tardaran minutos
+            lotes = (registros_monto(df, hash_archivo, etiqueta='CARGAR_MONTO', perfil=perfil) for df in bloques)
         
         calificaciones_creadas = 0 # Se inicializa la variable de calificaciones creadas
         errores = [] # Se inicializa la variable de errores
         
-        # Iterar sobre el DataFrame
-        for idx, row in df.iterrows():
-            fila_num = idx + 2  # +2 porque idx empieza en 0 y la fila 1 es el encabezado (la primera fila es el encabezado)
-            try:
-                # Convertir la fila a diccionario
-                fila = row.to_dict()
-                
-                # Convertir valores NaN a strings vacíos y limpiar
-                fila_limpia = {} # Se crea un diccionario para la fila limpia
-                for key, value in fila.items():
-                    if pd.isna(value): # Si el valor es NaN, se asigna un string vacío
-                        fila_limpia[key] = '' # Se asigna un string vacío al diccionario de la fila limpia
-                    else: # Si el valor no es NaN, se convierte a string y se eliminan los espacios
-                        fila_limpia[key] = str(value).strip() if value else '' # Se asigna el valor de la fila limpia al diccionario de la fila limpia
-                
-                # Debug: mostrar las claves disponibles en la primera fila
-                if fila_num == 2:
-                    print(f"[CARGAR_MONTO] Claves disponibles en CSV: {list(fila_limpia.keys())}") # Imprime las claves disponibles en el CSV
-                    print(f"[CARGAR_MONTO] Primera fila completa: {fila_limpia}")
-                    print(f"[CARGAR_MONTO] Ejercicio raw: '{fila_limpia.get('Ejercicio')}'") # Imprime el ejercicio raw
-                    print(f"[CARGAR_MONTO] Mercado raw: '{fila_limpia.get('Mercado')}'") # Imprime el mercado raw
-                    print(f"[CARGAR_MONTO] Instrumento raw: '{fila_limpia.get('Instrumento')}'") # Imprime el instrumento raw
-                
-                # Validar campos requeridos (buscar con diferentes variaciones)
-                # Primero intentar obtener Ejercicio
-                ejercicio = fila_limpia.get('Ejercicio') or fila_limpia.get('ejercicio') or ''
-                mercado_raw = fila_limpia.get('Mercado') or fila_limpia.get('mercado') or ''
-                instrumento = fila_limpia.get('Instrumento') or fila_limpia.get('instrumento') or ''
-                
-                # Normalizar mercado a los valores válidos (acciones, CFI, Fondos mutuos)
-                mercado_normalizado = mercado_raw
-                if mercado_raw:
-                    mercado_lower = mercado_raw.lower().strip()
-                    if mercado_lower == 'acciones' or mercado_lower == 'accion':
-                        mercado_normalizado = 'acciones'
-                    elif mercado_lower == 'cfi':
-                        mercado_normalizado = 'CFI'
-                    elif mercado_lower == 'fondos mutuos' or mercado_lower == 'fondosmutuos' or mercado_lower == 'fondo mutuo':
-                        mercado_normalizado = 'Fondos mutuos'
-                
-                mercado = mercado_normalizado # Se asigna el valor del mercado normalizado a la variable mercado
-                
-                # Detectar si Ejercicio e Instrumento están intercambiados
-                # Si Ejercicio contiene letras (como "ACC001") e Instrumento es numérico, intercambiar
-                ejercicio_es_numero = False
-                instrumento_es_numero = False
-                ejercicio_tiene_letras = any(c.isalpha() for c in str(ejercicio)) if ejercicio else False
-                
-                try:
-                    int(ejercicio)
-                    ejercicio_es_numero = True
-                except (ValueError, TypeError):
-                    pass # Si hay error, se pasa al siguiente try
-                
-                try:
-                    int(instrumento)
-                    instrumento_es_numero = True
-                except (ValueError, TypeError):
-                    pass
-                
-                # Si Ejercicio no es numérico pero Instrumento sí, intercambiar
-                # O si Ejercicio tiene letras (parece código de instrumento) e Instrumento es numérico (parece año)
-                if (not ejercicio_es_numero and instrumento_es_numero) or (ejercicio_tiene_letras and instrumento_es_numero):
-                    print(f"[CARGAR_MONTO] Advertencia: Ejercicio e Instrumento parecen estar intercambiados en fila {idx}. Ejercicio: '{ejercicio}', Instrumento: '{instrumento}'")
-                    ejercicio, instrumento = instrumento, ejercicio
-                    ejercicio_es_numero = True
-                
-                if not ejercicio or not mercado:
-                    # Mostrar qué claves tiene la fila para ayudar a debuggear
-                    claves_disponibles = ', '.join(fila.keys())
-                    errores.append(f'Fila {idx}: Faltan campos requeridos (Ejercicio, Mercado). Claves disponibles: {claves_disponibles}')
-                    continue
-                
-                # Validar y convertir Ejercicio a entero
-                try:
-                    ejercicio_int = int(ejercicio)
-                except (ValueError, TypeError):
-                    # Mostrar más información sobre el error
-                    claves_disponibles = ', '.join(fila.keys())
-                    errores.append(f'Fila {idx}: El campo Ejercicio debe ser un número entero. Valor recibido: "{ejercicio}". Instrumento recibido: "{instrumento}". Claves disponibles: {claves_disponibles}')
-                    continue
-                
-                # Crear nueva calificación
-                nueva_calificacion = Calificacion()
-                nueva_calificacion.Ejercicio = ejercicio_int
-                nueva_calificacion.Mercado = mercado
-                nueva_calificacion.Instrumento = instrumento
-                nueva_calificacion.Origen = 'csv'  # Normalizado a minúsculas para coincidir con el filtro
-                nueva_calificacion.hash_archivo_csv = hash_archivo  # Guardar el hash del archivo CSV para relacionar la calificación con el archivo
-                nueva_calificacion.Descripcion = fila_limpia.get('DESCRIPCION') or fila_limpia.get('Descripcion') or fila_limpia.get('descripcion') or ''
-                
-                # Fecha de pago usando pandas
-                fecha_pago = fila_limpia.get('FEC_PAGO') or fila_limpia.get('Fec_Pago') or fila_limpia.get('fec_pago') or ''
-                if fecha_pago:
-                    try:
-                        fecha_parsed = pd.to_datetime(fecha_pago, format='%Y-%m-%d', errors='coerce')
-                        if not pd.isna(fecha_parsed):
-                            nueva_calificacion.FechaPago = fecha_parsed.to_pydatetime()
-                    except Exception as e:
-                        print(f"[CARGAR_MONTO] Error al parsear fecha: {e}")
-                        pass
-                
-                # Secuencia evento usando pandas
-                sec_eve = fila_limpia.get('SEC_EVE') or fila_limpia.get('Sec_Eve') or fila_limpia.get('sec_eve') or ''
-                if sec_eve:
-                    try:
-                        nueva_calificacion.SecuenciaEvento = pd.to_numeric(sec_eve, errors='raise').astype(int)
-                    except (ValueError, TypeError, Exception):
-                        print(f"[CARGAR_MONTO] Advertencia: No se pudo convertir SecuenciaEvento '{sec_eve}' a entero en fila {fila_num}")
-                        pass
-                
-                # Verificar si ya tiene factores calculados (después de presionar "CALCULAR FACTORES")
-                tiene_factores = any(f'F{i}' in fila_limpia for i in range(8, 38)) # Se verifica si ya tiene factores calculados
-                
-                if tiene_factores:
-                    # Los factores ya están calculados, solo asignarlos usando pandas
-                    for i in range(8, 38): # Se recorre el rango de factores (F8 a F37)
-                        factor_key = f'F{i}' # Se obtiene el nombre del factor
-                        factor_value = fila_limpia.get(factor_key, '0.0') # Se obtiene el valor del factor
-                        try:
-                            factor_numeric = pd.to_numeric(factor_value, errors='coerce') # Se convierte el valor del factor a un número
-                            if pd.isna(factor_numeric):
-                                factor_decimal = Decimal(0) # Se asigna el valor de 0 al factor decimal
-                            else:
-                                factor_decimal = Decimal(str(factor_numeric)) # Se convierte el valor del factor a un número decimal
-                                if factor_decimal < 0:
-                                    factor_decimal = Decimal(0) # Se asigna el valor de 0 al factor decimal
-                                elif factor_decimal > 1:
-                                    factor_decimal = Decimal(1) # Se asigna el valor de 1 al factor decimal
-                            setattr(nueva_calificacion, f'Factor{i:02d}', factor_decimal) # Se asigna el valor del factor a la nueva calificación
-                        except Exception as e:
-                            print(f"[CARGAR_MONTO] Error al procesar factor {i}: {e}") # Imprime el error de procesamiento de factor
-                            setattr(nueva_calificacion, f'Factor{i:02d}', Decimal(0)) # Se asigna el valor de 0 al factor
-                    
-                    # Si hay montos originales, guardarlos también usando pandas
-                    suma_base = Decimal(0) # Se inicializa la variable de suma base     
-                    for i in range(8, 38):
-                        # Buscar la clave del monto (puede ser "F8 MONT" o "F8 M")
-                        monto_key = None
-                        for key in fila_limpia.keys():
-                            if key.strip() == f'F{i} MONT' or key.strip() == f'F{i} M':
-                                monto_key = key
-                                break
-                        
-                        monto_value = fila_limpia.get(monto_key, '0.0') if monto_key else '0.0' # Se obtiene el valor del monto
-                        try:
-                            monto_numeric = pd.to_numeric(monto_value, errors='coerce') # Se convierte el valor del monto a un número
-                            if pd.isna(monto_numeric):
-                                monto_decimal = Decimal(0) # Se asigna el valor de 0 al monto decimal
-                            else:
-                                monto_decimal = Decimal(str(monto_numeric)) # Se convierte el valor del monto a un número decimal
-                            setattr(nueva_calificacion, f'Monto{i:02d}', monto_decimal) # Se asigna el valor del monto a la nueva calificación
-                            if i <= 19: # Se verifica si el monto es menor o igual a 19
-                                suma_base += monto_decimal # Se suma el valor del monto a la suma base
-                        except Exception as e:
-                            print(f"[CARGAR_MONTO] Error al procesar monto {i}: {e}")
-                            setattr(nueva_calificacion, f'Monto{i:02d}', Decimal(0))
-                    
-                    nueva_calificacion.SumaBase = suma_base # Se asigna el valor de la suma base a la nueva calificación
-                else:
-                    # Obtener montos y calcular suma base usando pandas
-                    montos = []
-                    suma_base = Decimal(0)
-                    
-                    for i in range(8, 38): # Se recorre el rango de montos (F8 a F37)
-                        # Buscar la clave del monto (puede ser "F8 MONT" o "F8 M")
-                        monto_key = None
-                        for key in fila_limpia.keys():
-                            if key.strip() == f'F{i} MONT' or key.strip() == f'F{i} M':
-                                monto_key = key
-                                break
-                        
-                        monto_value = fila_limpia.get(monto_key, '0.0') if monto_key else '0.0'
-                        try:
-                            monto_numeric = pd.to_numeric(monto_value, errors='coerce')
-                            if pd.isna(monto_numeric):
-                                monto_decimal = Decimal(0)
-                            else:
-                                monto_decimal = Decimal(str(monto_numeric))
-                            montos.append(monto_decimal)
-                            if i <= 19:  # Solo sumar del 8 al 19
-                                suma_base += monto_decimal
-                        except Exception as e:
-                            print(f"[CARGAR_MONTO] Error al procesar monto {i}: {e}")
-                            montos.append(Decimal(0))
-                    
-                    nueva_calificacion.SumaBase = suma_base # Se asigna el valor de la suma base a la nueva calificación
-                    
-                    # Guardar montos
-                    for i in range(8, 38):
-                        setattr(nueva_calificacion, f'Monto{i:02d}', montos[i - 8]) # Se asigna el valor del monto a la nueva calificación
-                    
-                    # Calcular factores 
-                    if suma_base > 0: # Se verifica si la suma base es mayor que 0
-                        EIGHT_PLACES = Decimal('0.00000001')
-                        for i in range(8, 38):
-                            factor = (montos[i - 8] / suma_base).quantize(EIGHT_PLACES)
-                            if factor > 1: # Se verifica si el factor es mayor que 1
-                                factor = Decimal(1) # Se asigna el valor de 1 al factor
-                            setattr(nueva_calificacion, f'Factor{i:02d}', factor) # Se asigna el valor del factor a la nueva calificación
-                    else:
-                        for i in range(8, 38):
-                            setattr(nueva_calificacion, f'Factor{i:02d}', Decimal(0))
-                
-                nueva_calificacion.FechaAct = datetime.datetime.now()
-                nueva_calificacion.save()
-                calificaciones_creadas += 1
-                print(f"[CARGAR_MONTO] Calificación {fila_num} guardada exitosamente")
-                
-            except Exception as e:
-                print(f"[CARGAR_MONTO] Error en fila {fila_num}: {e}")
-                import traceback
-                print(traceback.format_exc())
-                errores.append(f'Fila {fila_num}: {str(e)}')
-                continue
-        
-        # Crear log de carga masiva (se crea el log de carga masiva)
-        if calificaciones_creadas > 0:
-            _crear_log(current_user, 'Carga Masiva', documento_afectado=None, hash_archivo_csv=hash_archivo)
-            print(f"[CARGAR_MONTO] Log creado para {calificaciones_creadas} calificaciones (hash: {hash_archivo})")
+        for registros, errores_bloque in lotes:
+            errores.extend(errores_bloque)
             
-            # Registrar el archivo CSV procesado para evitar duplicados
-            if hash_archivo:
-                from .models import ArchivoCSV
-                try:
-                    archivo_csv = ArchivoCSV(
-                        hash_archivo=hash_archivo,
-                        nombre_archivo=nombre_archivo,
-                        tipo='monto',
-                        usuario=current_user,
-                        total_filas=calificaciones_creadas
-                    )
-                    archivo_csv.save()
-                    print(f"[CARGAR_MONTO] Archivo CSV registrado: {nombre_archivo} (hash: {hash_archivo})")
-                except Exception as e:
-                    print(f"[CARGAR_MONTO] Error al registrar archivo CSV: {e}")
+            # Guardar las calificaciones en MongoDB por lotes (insert_many) en lugar de un save() por fila
+            calificaciones_creadas += guardar_calificaciones(registros, errores, etiqueta='CARGAR_MONTO')
+            print(f"[CARGAR_MONTO] Bloque procesado: {calificaciones_creadas} creadas, {len(errores)} errores hasta ahora")
+        
+        if carga is not None:
+            descartar_carga_preparada(carga) # La carga ya se grabó: se eliminan sus bloques del servidor
+        
+        errores = ordenar_errores(errores) # Se dejan los errores en el orden de las filas del archivo
+        
+        # Crear log de carga masiva y registrar el archivo CSV procesado para evitar duplicados
+        _registrar_carga_masiva(current_user, hash_archivo, nombre_archivo, 'monto', calificaciones_creadas, etiqueta='CARGAR_MONTO')
         
         mensaje = f'Se crearon {calificaciones_creadas} calificación(es) exitosamente.'
         if errores:
@@ -3948,7 +3649,7 @@ def cargar_monto_view(request):
         
         print(f"[CARGAR_MONTO] Proceso completado: {calificaciones_creadas} creadas, {len(errores)} errores")
         
-        return JsonResponse({ # Se retorna un JSON con los datos de la carga masiva
+        return RespuestaJSON({ # Se retorna un JSON con los datos de la carga masiva
             'success': True,
             'total': calificaciones_creadas, # Se asigna el total de calificaciones creadas al JSON
             'errores': errores, # Se asigna el total de errores al JSON
@@ -3959,13 +3660,75 @@ def cargar_monto_view(request):
         print(f"[CARGAR_MONTO] Error al cargar montos: {e}")
         import traceback
         print(traceback.format_exc())
-        return JsonResponse({'success': False, 'error': f'Error al procesar: {str(e)}'}, status=500)
+        return RespuestaJSON({'success': False, 'error': f'Error al procesar: {str(e)}'}, status=500)
+
+
+# =====================================================================
+# VISTA DE ESTADO DE UNA CARGA EN SEGUNDO PLANO
+# =====================================================================
+@require_GET
+@login_requerido_json
+def estado_carga_view(request, trabajo_id):
+    """
+    Vista AJAX que informa el avance de una carga masiva en segundo plano.
+    
+    El navegador la consulta cada pocos segundos después de grabar un CSV grande
+    (cargar_factor_view / cargar_monto_view responden con 'trabajo_id').
+    
+    Argumentos:
+        request: Objeto HttpRequest de Django (solo GET permitido)
+        trabajo_id: ID del TrabajoCarga
+        
+    Returns (lo que devuelve la funcion):
+        RespuestaJSON: JSON con estado, filas procesadas, calificaciones creadas,
+                      errores hasta el momento y tiempo restante estimado (segundos)
+    """
+    # Usuario de la sesión (el decorador ya verificó que existe)
+    current_user = request.usuario_actual
+
+    from .models import TrabajoCarga
+    from .trabajos import ESTADOS_ACTIVOS, marcar_trabajos_interrumpidos
+    if not ObjectId.is_valid(trabajo_id):
+        return RespuestaJSON({'success': False, 'error': 'Trabajo no encontrado'}, status=404)
+    trabajo = TrabajoCarga.objects(id=trabajo_id).first()
+    
+    # Solo el usuario que inició la carga (o un administrador) puede ver su avance
+    if trabajo is None or (trabajo.usuario.id != current_user.id and not current_user.rol):
+        return RespuestaJSON({'success': False, 'error': 'Trabajo no encontrado'}, status=404)
+    
+    # Un trabajo sin avance por mucho tiempo (ej: reinicio del servidor) se informa como error en lugar de seguir 'procesando'
+    if trabajo.estado in ESTADOS_ACTIVOS:
+        marcar_trabajos_interrumpidos(id=trabajo.id)
+        trabajo.reload()
+    
+    porcentaje = 100 if trabajo.total_filas == 0 else int(trabajo.procesadas * 100 / trabajo.total_filas)
+    
+    # Tiempo restante estimado: velocidad promedio desde que el trabajador tomó la carga
+    eta_segundos = None
+    if trabajo.estado == 'procesando' and trabajo.fecha_inicio and trabajo.procesadas > 0:
+        transcurrido = (datetime.datetime.now() - trabajo.fecha_inicio).total_seconds()
+        eta_segundos = int(transcurrido / trabajo.procesadas * (trabajo.total_filas - trabajo.procesadas))
+    
+    return RespuestaJSON({
+        'success': True,
+        'estado': trabajo.estado, # pendiente, procesando, completado o error
+        'terminado': trabajo.estado in ('completado', 'error'),
+        'total_filas': trabajo.total_filas,
+        'procesadas': trabajo.procesadas,
+        'porcentaje': porcentaje,
+        'total': trabajo.creadas, # Calificaciones creadas hasta el momento
+        'total_errores': trabajo.total_errores,
+        'errores': trabajo.errores, # Primeros errores (lista acotada)
+        'eta_segundos': eta_segundos,
+        'message': trabajo.mensaje or ''
+    })
 
 
 # =====================================================================
 # VISTAS DE CALCULAR FACTORES MASIVOS
 # =====================================================================
 @require_POST
+@login_requerido_json
 def calcular_factores_masivo_view(request):
     """
     Vista AJAX para calcular factores desde montos en carga masiva.
@@ -3992,10 +3755,6 @@ def calcular_factores_masivo_view(request):
     
     Vista para calcular factores desde montos en carga masiva
     """
-    # Verificar autenticación del usuario
-    if 'user_id' not in request.session:
-        return JsonResponse({'success': False, 'error': 'No autenticado'}, status=401)
-
     try:
         import json
         from decimal import Decimal
@@ -4006,54 +3765,49 @@ def calcular_factores_masivo_view(request):
         
         # Validar que se recibieron datos
         if not datos_csv:
-            return JsonResponse({'success': False, 'error': 'No se recibieron datos'}, status=400)
+            return RespuestaJSON({'success': False, 'error': 'No se recibieron datos'}, status=400)
         
-        # Lista para almacenar filas con factores calculados
-        datos_calculados = []
+        # RESOLVER LAS COLUMNAS DE MONTOS UNA SOLA VEZ
+        # POR QUÉ: Antes se buscaba 'F{i} MONT' o 'F{i} M' en cada fila y para cada uno de los 30 montos
+        # Todas las filas vienen del mismo CSV, así que el encabezado de la primera sirve para todas
+        from .encabezados import resolver_encabezados
+        mapa = resolver_encabezados(datos_csv[0].keys(), data.get('perfil_columnas') or None)
+        columnas_monto = [(mapa[f'Monto{i:02d}'] or (None,))[0] for i in range(8, 38)]
         
-        # PROCESAR CADA FILA DEL CSV
+        # OBTENER LOS MONTOS DE TODAS LAS FILAS
+        matriz_montos = []
         for fila in datos_csv:
-            # Copiar la fila original para no modificar el original
-            fila_calculada = fila.copy()
-            
-            # OBTENER MONTOS Y CALCULAR SUMA BASE
             montos = []
-            suma_base = Decimal(0)
-            
             # Iterar sobre todos los montos del 8 al 37
-            for i in range(8, 38):
-                # Intentar diferentes nombres de columnas (variaciones en el CSV)
-                monto_key = f'F{i} MONT' if f'F{i} MONT' in fila else f'F{i} M'
-                monto_value = fila.get(monto_key, '0.0')
+            for i, monto_key in zip(range(8, 38), columnas_monto):
+                # Columna ya resuelta para este archivo (None si el CSV no trae ese monto)
+                monto_value = fila.get(monto_key, '0.0') if monto_key is not None else '0.0'
                 
                 try:
                     # Convertir a Decimal
-                    monto_decimal = Decimal(str(monto_value))
-                    montos.append(monto_decimal)
-                    
-                    # Solo sumar montos del 8 al 19 para SumaBase
-                    if i <= 19:
-                        suma_base += monto_decimal
+                    montos.append(Decimal(str(monto_value)))
                 except:
                     # Si hay error, usar 0
                     montos.append(Decimal(0))
+            matriz_montos.append(montos)
+        
+        # CALCULAR SUMA BASE Y FACTORES DE TODAS LAS FILAS A LA VEZ
+        # POR QUÉ: El motor de factores trabaja con enteros sobre el lote completo (mismo resultado que Decimal)
+        # Fórmula: Factor = Monto / SumaBase (montos 8 a 19), 8 decimales, máximo 1.0
+        # POR QUÉ el máximo: Un factor > 1.0 no tiene sentido financiero
+        resultado = calcular_factores(matriz_montos, maximo=1)
+        factores_por_fila = factores_decimales(resultado)
+        
+        # Lista para almacenar filas con factores calculados
+        datos_calculados = []
+        
+        for fila, con_base, factores in zip(datos_csv, resultado.con_base.tolist(), factores_por_fila):
+            # Copiar la fila original para no modificar el original
+            fila_calculada = fila.copy()
             
-            # CALCULAR FACTORES
-            if suma_base > 0:
-                # Precisión de 8 decimales
-                EIGHT_PLACES = Decimal('0.00000001')
-                
-                # Calcular cada factor
-                for i in range(8, 38):
-                    # Factor = Monto / SumaBase
-                    factor = (montos[i - 8] / suma_base).quantize(EIGHT_PLACES)
-                    
-                    # Validar que el factor no exceda 1.0 (100%)
-                    # POR QUÉ: Un factor > 1.0 no tiene sentido financiero
-                    if factor > 1:
-                        factor = Decimal(1)
-                    
-                    # Guardar factor en la fila calculada
+            if con_base:
+                # Guardar cada factor en la fila calculada
+                for i, factor in zip(range(8, 38), factores):
                     fila_calculada[f'F{i}'] = str(factor)
             else:
                 # Si SumaBase es 0, todos los factores son 0
@@ -4064,7 +3818,7 @@ def calcular_factores_masivo_view(request):
             datos_calculados.append(fila_calculada)
         
         # Retornar todas las filas con factores calculados
-        return JsonResponse({
+        return RespuestaJSON({
             'success': True,
             'datos_calculados': datos_calculados
         })
@@ -4074,10 +3828,38 @@ def calcular_factores_masivo_view(request):
         print(f"Error al calcular factores masivo: {e}")
         import traceback
         print(traceback.format_exc())
-        return JsonResponse({'success': False, 'error': f'Error al calcular: {str(e)}'}, status=500)
+        return RespuestaJSON({'success': False, 'error': f'Error al calcular: {str(e)}'}, status=500)
+
+
+def _cambios_de_log(log):
+    """
+    Devuelve los cambios detallados de un log como lista de diccionarios.
+    
+    POR QUÉ: Los logs nuevos guardan los cambios como documentos embebidos ('cambios');
+    los anteriores los tienen como JSON string ('cambios_detallados'). Las vistas
+    muestran ambos igual.
+    
+    Argumentos:
+        log: Documento Log
+        
+    Returns (lo que devuelve la funcion):
+        list: [{'campo', 'valor_anterior', 'valor_nuevo'}, ...] o None si el log no tiene cambios
+    """
+    if getattr(log, "cambios", None):
+        return [
+            {'campo': c.campo, 'valor_anterior': c.valor_anterior, 'valor_nuevo': c.valor_nuevo}
+            for c in log.cambios
+        ]
+    if getattr(log, "cambios_detallados", None):
+        try:
+            return json.loads(log.cambios_detallados)
+        except ValueError:
+            return None
+    return None
 
 
 @require_GET
+@login_requerido_json
 def obtener_logs_calificacion_view(request, calificacion_id):
     """
     Vista AJAX para obtener los logs de una calificación específica.
@@ -4091,21 +3873,12 @@ def obtener_logs_calificacion_view(request, calificacion_id):
     CÓMO FUNCIONA:
     1. Obtiene la calificación por ID
     2. Busca todos los logs relacionados con esa calificación
-    3. Procesa cada log para extraer información del actor y cambios
-    4. Retorna logs en formato JSON para mostrar en la interfaz
+    3. Resuelve los nombres de los actores con una sola consulta (_nombres_de_usuarios)
+    4. Procesa cada log para extraer información del actor y cambios
+    5. Retorna logs en formato JSON para mostrar en la interfaz
     
     Vista para obtener los logs de una calificación específica
     """
-    # Verificar autenticación del usuario
-    if 'user_id' not in request.session:
-        return JsonResponse({'success': False, 'error': 'No autenticado'}, status=401)
-
-    # Obtener usuario actual
-    try:
-        current_user = usuarios.objects.get(id=request.session['user_id'])
-    except usuarios.DoesNotExist:
-        return JsonResponse({'success': False, 'error': 'Usuario no válido'}, status=401)
-
     try:
         # Obtener la calificación de MongoDB
         calificacion = Calificacion.objects.get(id=calificacion_id)
@@ -4121,9 +3894,18 @@ def obtener_logs_calificacion_view(request, calificacion_id):
         # Obtener todos los logs relacionados con esta calificación
         # iddocumento es una ReferenceField que apunta a la calificación
         # .order_by('-fecharegistrada') ordena por fecha descendente (más recientes primero)
-        logs_raw = Log.objects(iddocumento=calificacion).order_by('-fecharegistrada')
+        # Grabar los logs en cola de este proceso (ej: la modificación que se acaba de hacer)
+        vaciar_logs()
+        
+        # .no_dereference() evita que cada acceso a l.Usuarioid cargue el usuario (una consulta por log)
+        logs_raw = list(Log.objects(iddocumento=calificacion).no_dereference().order_by('-fecharegistrada'))
         logs_procesados = []
         
+        # Nombres de todos los actores en una sola consulta ($in con los IDs distintos)
+        nombres_actores = _nombres_de_usuarios(
+            _extraer_object_id(l.Usuarioid) for l in logs_raw if getattr(l, "Usuarioid", None)
+        )
+        
         # PROCESAR CADA LOG
         for l in logs_raw:
             # ACTOR (usuario que ejecutó la acción)
@@ -4137,21 +3919,11 @@ def obtener_logs_calificacion_view(request, calificacion_id):
                 actor_id_obj = _extraer_object_id(l.Usuarioid)
                 if actor_id_obj:
                     actor_id = str(actor_id_obj)
-                    try:
-                        # Intentar obtener nombre del actor si aún existe
-                        actor_usuario = usuarios.objects.get(id=actor_id_obj)
-                        actor_nombre = actor_usuario.nombre
-                    except usuarios.DoesNotExist:
-                        pass
+                    # Nombre del actor si aún existe (si fue eliminado, se mantiene "N/A")
+                    actor_nombre = nombres_actores.get(actor_id_obj, "N/A")
             
-            # Obtener cambios detallados si existen
-            cambios_detallados = None
-            if hasattr(l, "cambios_detallados") and l.cambios_detallados:
-                try:
-                    import json
-                    cambios_detallados = json.loads(l.cambios_detallados)
-                except:
-                    cambios_detallados = None
+            # Obtener cambios detallados si existen (documentos embebidos o JSON de logs anteriores)
+            cambios_detallados = _cambios_de_log(l)
             
             logs_procesados.append({
                 "fecha": getattr(l, "fecharegistrada", None).isoformat() if getattr(l, "fecharegistrada", None) else None,
@@ -4162,14 +3934,102 @@ def obtener_logs_calificacion_view(request, calificacion_id):
                 "cambios_detallados": cambios_detallados
             })
         
-        return JsonResponse({
+        return RespuestaJSON({
             'success': True,
             'logs': logs_procesados,
             'calificacion_info': calificacion_info
         })
         
     except Calificacion.DoesNotExist:
-        return JsonResponse({'success': False, 'error': 'Calificación no encontrada'}, status=404)
+        return RespuestaJSON({'success': False, 'error': 'Calificación no encontrada'}, status=404)
     except Exception as e:
         print(f"Error al obtener logs: {e}")
-        return JsonResponse({'success': False, 'error': f'Error al obtener logs: {str(e)}'}, status=500)
\ No newline at end of file
+        return RespuestaJSON({'success': False, 'error': f'Error al obtener logs: {str(e)}'}, status=500)
+
+
+@require_GET
+@login_requerido_json
+def historial_campo_view(request, calificacion_id, campo):
+    """
+    Vista AJAX para obtener el historial de cambios de UN campo de una calificación.
+    
+    POR QUÉ ESTA FUNCIÓN ES ÚTIL:
+    - Responde preguntas como "quién cambió Factor12 de esta calificación y cuándo"
+      sin leer todos los logs de la calificación
+    - La consulta usa el índice (iddocumento, cambios.campo, -fecharegistrada): MongoDB
+      solo lee los logs que cambiaron ese campo
+    
+    CÓMO FUNCIONA:
+    1. Valida la calificación y que el campo exista en el modelo Calificacion
+    2. Busca los logs de la calificación con un cambio en ese campo (más recientes primero)
+    3. De cada log devuelve solo el cambio de ese campo, con la fecha y el usuario
+    
+    Argumentos:
+        request: Objeto HttpRequest de Django (solo GET)
+        - limit: Máximo de cambios a devolver (por defecto CALIFICACIONES_POR_PAGINA)
+        calificacion_id: ID de la calificación
+        campo: Nombre del campo (ej: 'Factor12', 'SumaBase', 'Instrumento')
+        
+    Returns (lo que devuelve la funcion):
+        RespuestaJSON: {'success', 'campo', 'historial': [{fecha, actor_correo, actor_id, actor_nombre,
+                       accion, valor_anterior, valor_nuevo}, ...], 'has_more'}
+    """
+    # Validar parámetros
+    if not ObjectId.is_valid(calificacion_id):
+        return RespuestaJSON({'success': False, 'error': 'ID de calificación inválido'}, status=400)
+    if campo not in Calificacion._fields or campo == 'id':
+        return RespuestaJSON({'success': False, 'error': f'Campo "{campo}" desconocido'}, status=400)
+    
+    limite_maximo = getattr(settings, 'CALIFICACIONES_LIMITE_MAXIMO', 1000)
+    try:
+        limite = int(request.GET.get('limit', getattr(settings, 'CALIFICACIONES_POR_PAGINA', 100)))
+    except ValueError:
+        return RespuestaJSON({'success': False, 'error': 'El parámetro limit debe ser un número'}, status=400)
+    limite = max(1, min(limite, limite_maximo))
+    
+    try:
+        # Grabar los logs en cola de este proceso (ej: el cambio que se acaba de hacer)
+        vaciar_logs()
+        
+        # Logs de la calificación que cambiaron ese campo, más recientes primero
+        # as_pymongo(): diccionarios simples (Usuarioid queda como ObjectId, sin cargar el usuario)
+        logs_raw = list(
+            Log.objects(iddocumento=ObjectId(calificacion_id), cambios__campo=campo)
+            .only('fecharegistrada', 'Usuarioid', 'correoElectronico', 'accion', 'cambios')
+            .order_by('-fecharegistrada', '-id')
+            .limit(limite + 1)
+            .as_pymongo()
+        )
+        hay_mas = len(logs_raw) > limite
+        logs_raw = logs_raw[:limite]
+        
+        # Nombres de los actores en una sola consulta
+        nombres_actores = _nombres_de_usuarios(_extraer_object_id(l.get('Usuarioid')) for l in logs_raw)
+        
+        historial = []
+        for l in logs_raw:
+            actor_id = _extraer_object_id(l.get('Usuarioid')) or 'N/A'
+            # Un log puede cambiar varios campos: solo se devuelve el cambio del campo pedido
+            for cambio in l.get('cambios', []):
+                if cambio.get('campo') != campo:
+                    continue
+                historial.append({
+                    'fecha': l.get('fecharegistrada'),
+                    'actor_correo': l.get('correoElectronico', 'N/A'),
+                    'actor_id': actor_id,
+                    'actor_nombre': nombres_actores.get(actor_id, 'N/A'),
+                    'accion': l.get('accion', 'N/A'),
+                    'valor_anterior': cambio.get('valor_anterior'),
+                    'valor_nuevo': cambio.get('valor_nuevo'),
+                })
+        
+        return RespuestaJSON({
+            'success': True,
+            'campo': campo,
+            'historial': historial,
+            'has_more': hay_mas
+        })
+    
+    except Exception as e:
+        print(f"Error al obtener historial del campo {campo}: {e}")
+        return RespuestaJSON({'success': False, 'error': f'Error al obtener historial: {str(e)}'}, status=500)